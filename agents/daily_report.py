@@ -18,7 +18,7 @@ import requests as _req
 from common.env_loader import load_env
 from common.logger import get_logger
 from common.supabase_client import get_supabase
-from common.telegram import Priority, flush_info_buffer, send_telegram
+from common.telegram import Priority, deliver_telegram, flush_info_buffer
 
 load_env()
 log = get_logger("daily_report")
@@ -368,7 +368,7 @@ class DailyReportGenerator:
 
         sent = False
         if send:
-            sent = send_telegram(text, priority=Priority.URGENT)
+            sent = deliver_telegram(text, priority=Priority.URGENT)
             log.info(f"일일 리포트 발송 {'성공' if sent else '실패'}")
 
         return {
@@ -16,12 +16,17 @@ Model selection:
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
 import os
+import re
+import threading
 import time
-from datetime import datetime, timezone
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional
+from typing import Callable, Dict, Iterable, List, Optional
 
 from common.cache import get_cached, set_cached
 from common.config import BRAIN_PATH
@@ -120,6 +125,87 @@ def _today_key(now: Optional[datetime] = None) -> str:
     return (now or _utc_now()).date().isoformat()
 
 
+_HEADLINE_NOISE = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def headline_key(item: dict) -> str:
+    """소스·종목과 무관한 헤드라인 중복 키 (NFKC·소문자·구두점/공백 제거 후 해시)."""
+    text = str(item.get("headline") or item.get("title") or "")
+    norm = _HEADLINE_NOISE.sub(" ", unicodedata.normalize("NFKC", text).casefold()).strip()
+    if not norm:
+        return ""
+    return "h:" + hashlib.blake2b(norm.encode("utf-8"), digest_size=10).hexdigest()
+
+
+class SeenIndex:
+    """Day-partitioned, append-only seen-id index (``seen-YYYY-MM-DD.log``).
+
+    Partitions for the last ``retain_days`` days are loaded once into per-day
+    sets; membership is a few set lookups and new ids are appended in one
+    write. Days that fall out of the window are dropped on roll-over.
+    Legacy ``seen-YYYY-MM-DD.json`` lists are read for the same days.
+    """
+
+    def __init__(self, state_dir: Path, retain_days: int = 2):
+        self.state_dir = Path(state_dir)
+        self.retain_days = max(int(retain_days), 1)
+        self._by_day: Dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+
+    def _days(self, now: datetime) -> list[str]:
+        return [(now - timedelta(days=i)).date().isoformat() for i in range(self.retain_days)]
+
+    def _ensure_loaded(self, now: datetime) -> list[str]:
+        days = self._days(now)
+        if self._by_day.keys() == set(days):
+            return days
+        with self._lock:
+            for day in list(self._by_day):
+                if day not in days:
+                    del self._by_day[day]
+            for day in days:
+                if day in self._by_day:
+                    continue
+                ids: set[str] = set()
+                log_path = self.state_dir / f"seen-{day}.log"
+                if log_path.exists():
+                    with log_path.open("r", encoding="utf-8") as fp:
+                        ids.update(line.strip() for line in fp if line.strip())
+                legacy = _read_json_file(self.state_dir / f"seen-{day}.json", [])
+                ids.update(str(x) for x in legacy or [])
+                self._by_day[day] = ids
+        return days
+
+    def _seen(self, key: str, days: list[str]) -> bool:
+        return any(key in self._by_day.get(day, ()) for day in days)
+
+    def contains(self, key: str, now: Optional[datetime] = None) -> bool:
+        days = self._ensure_loaded(now or _utc_now())
+        return self._seen(key, days)
+
+    def add_many(self, keys: Iterable[str], now: Optional[datetime] = None) -> int:
+        now = now or _utc_now()
+        days = self._ensure_loaded(now)
+        with self._lock:
+            fresh = [k for k in dict.fromkeys(keys) if k and not self._seen(k, days)]
+            if not fresh:
+                return 0
+            self._by_day.setdefault(days[0], set()).update(fresh)
+        try:
+            self.state_dir.mkdir(parents=True, exist_ok=True)
+            with (self.state_dir / f"seen-{_today_key(now)}.log").open("a", encoding="utf-8") as fp:
+                fp.write("".join(k + "\n" for k in fresh))
+        except Exception as exc:
+            log.warning("seen index append failed", error=exc)
+        return len(fresh)
+
+    def __len__(self) -> int:
+        return sum(len(ids) for ids in self._by_day.values())
+
+
+_SEEN_INDEXES: Dict[Path, SeenIndex] = {}
+
+
 
 def _normalize_label(label: str) -> str:
     t = str(label or "").strip().upper()
@@ -200,24 +286,26 @@ class NewsAnalyst:
         model: str = "claude-haiku",
         daily_budget_usd: float = 2.0,
         batch_minutes: int = 5,
+        max_concurrency: int = 4,
+        llm: Optional[Callable[[str, int], Optional[str]]] = None,
     ):
         # claude-haiku / claude-sonnet 단축명 → 실제 ID 해석
         self.model = _resolve_claude_id(model) if _is_claude_model(model) else model
         self.daily_budget_usd = max(daily_budget_usd, 0.0)
         self.batch_minutes = max(batch_minutes, 1)
+        # 종목별 배치를 병렬 실행 — 동시 LLM 호출 수는 전역 세마포어로 제한
+        self.max_concurrency = max(int(max_concurrency), 1)
+        self.llm = llm  # (prompt, max_tokens) -> text; 테스트용 로컬 fake LLM 주입
+        self._llm_slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._budget_lock = threading.Lock()
+        self._seen_index: Optional[SeenIndex] = None
 
     def _budget_key(self, now: Optional[datetime] = None) -> str:
         return f"news_analyst:budget:{_today_key(now)}"
 
-    def _seen_key(self, now: Optional[datetime] = None) -> str:
-        return f"news_analyst:seen:{_today_key(now)}"
-
     def _budget_state_path(self, now: Optional[datetime] = None) -> Path:
         return STATE_DIR / f"budget-{_today_key(now)}.json"
 
-    def _seen_ids_path(self, now: Optional[datetime] = None) -> Path:
-        return STATE_DIR / f"seen-{_today_key(now)}.json"
-
     def get_budget_state(self, now: Optional[datetime] = None) -> dict:
         key = self._budget_key(now)
         state = get_cached(key)
@@ -244,6 +332,27 @@ class NewsAnalyst:
         st = self.get_budget_state(now)
         return _safe_float(st.get("spent_usd"), 0.0) + max(estimated_increment_usd, 0.0) <= self.daily_budget_usd
 
+    def _reserve_budget(self, est_cost: float) -> bool:
+        """예산 확인과 선차감을 원자적으로 — 병렬 배치가 함께 예산을 넘지 않도록."""
+        with self._budget_lock:
+            if not self._within_budget(est_cost):
+                return False
+            st = self.get_budget_state()
+            st["spent_usd"] = round(_safe_float(st.get("spent_usd"), 0.0) + est_cost, 6)
+            self._save_budget_state(st)
+            return True
+
+    def _settle_budget(self, est_cost: float, est_tokens: int, ok: bool) -> None:
+        """호출 성공 시 calls/tokens 기록, 실패 시 선차감 환불."""
+        with self._budget_lock:
+            st = self.get_budget_state()
+            if ok:
+                st["calls"] = int(st.get("calls", 0)) + 1
+                st["estimated_tokens"] = int(st.get("estimated_tokens", 0)) + est_tokens
+            else:
+                st["spent_usd"] = round(max(_safe_float(st.get("spent_usd"), 0.0) - est_cost, 0.0), 6)
+            self._save_budget_state(st)
+
     def _estimate_cost_usd(self, prompt_text: str, completion_tokens: int = 180) -> tuple[float, int]:
         in_tokens = max(1, int(len(prompt_text) / 4))
         out_tokens = max(1, completion_tokens)
@@ -307,17 +416,22 @@ class NewsAnalyst:
             return None
 
     def _call_llm(self, prompt: str, max_tokens: int = 180) -> Optional[str]:
-        """모델에 따라 Claude 또는 OpenAI 호출."""
-        if _is_claude_model(self.model):
-            return self._call_claude(prompt, max_tokens)
-        return self._call_openai(prompt, max_tokens)
+        """모델에 따라 Claude 또는 OpenAI 호출 (전역 동시 호출 슬롯 내에서)."""
+        with self._llm_slots:
+            if self.llm is not None:
+                return self.llm(prompt, max_tokens)
+            if _is_claude_model(self.model):
+                return self._call_claude(prompt, max_tokens)
+            return self._call_openai(prompt, max_tokens)
+
+    def _llm_available(self) -> bool:
+        if self.llm is not None:
+            return True
+        use_claude = _is_claude_model(self.model)
+        return bool(os.environ.get("ANTHROPIC_API_KEY") if use_claude else os.environ.get("OPENAI_API_KEY"))
 
     def _llm_analyze(self, item: dict, symbol: str) -> Optional[dict]:
-        use_claude = _is_claude_model(self.model)
-        api_key_set = bool(
-            os.environ.get("ANTHROPIC_API_KEY") if use_claude else os.environ.get("OPENAI_API_KEY")
-        )
-        if not api_key_set:
+        if not self._llm_available():
             return None
 
         prompt = f"""
@@ -337,9 +451,10 @@ time: {item.get('timestamp','')}
 """.strip()
 
         est_cost, est_tokens = self._estimate_cost_usd(prompt, completion_tokens=180)
-        if not self._within_budget(est_cost):
+        if not self._reserve_budget(est_cost):
             return None
 
+        ok = False
         try:
             raw = self._call_llm(prompt, max_tokens=180)
             if not raw:
@@ -350,12 +465,7 @@ time: {item.get('timestamp','')}
             strength = _clip_strength(parsed.get("strength"))
             reason = str(parsed.get("reason") or "")[:100]
             confidence = max(0.0, min(1.0, _safe_float(parsed.get("confidence"), 0.6)))
-
-            st = self.get_budget_state()
-            st["spent_usd"] = round(_safe_float(st.get("spent_usd"), 0.0) + est_cost, 6)
-            st["calls"] = int(st.get("calls", 0)) + 1
-            st["estimated_tokens"] = int(st.get("estimated_tokens", 0)) + est_tokens
-            self._save_budget_state(st)
+            ok = True
 
             return {
                 "symbol": symbol,
@@ -369,6 +479,8 @@ time: {item.get('timestamp','')}
         except Exception as exc:
             log.warning("llm news analysis failed", error=exc)
             return None
+        finally:
+            self._settle_budget(est_cost, est_tokens, ok)
 
     def analyze_item(self, item: dict, symbol: str) -> dict:
         llm = self._llm_analyze(item, symbol)
@@ -384,9 +496,7 @@ time: {item.get('timestamp','')}
         Claude: claude-haiku-4-5 (저비용 배치 기본값), claude-sonnet-4-6 (고품질)
         OpenAI: gpt-4o-mini (기존 기본값, fallback)
         """
-        use_claude = _is_claude_model(self.model)
-        api_key = os.environ.get("ANTHROPIC_API_KEY" if use_claude else "OPENAI_API_KEY", "")
-        if not api_key or not items:
+        if not self._llm_available() or not items:
             return [None] * len(items)
 
         # Build numbered list of headlines for the batch prompt
@@ -405,12 +515,15 @@ time: {item.get('timestamp','')}
 
         max_tokens = min(100 * len(items), 2000)
         est_cost, est_tokens = self._estimate_cost_usd(prompt, completion_tokens=max_tokens)
-        if not self._within_budget(est_cost):
+        if not self._reserve_budget(est_cost):
             return [None] * len(items)
 
+        settled = False
         try:
             raw = self._call_llm(prompt, max_tokens=max_tokens)
             if not raw:
+                settled = True
+                self._settle_budget(est_cost, est_tokens, False)
                 return [None] * len(items)
 
             # Extract JSON array from response (안전한 파싱)
@@ -419,11 +532,8 @@ time: {item.get('timestamp','')}
                 raise ValueError("JSON array not found in batch response")
 
             # Update budget state once for the whole batch
-            st = self.get_budget_state()
-            st["spent_usd"] = round(_safe_float(st.get("spent_usd"), 0.0) + est_cost, 6)
-            st["calls"] = int(st.get("calls", 0)) + 1
-            st["estimated_tokens"] = int(st.get("estimated_tokens", 0)) + est_tokens
-            self._save_budget_state(st)
+            settled = True
+            self._settle_budget(est_cost, est_tokens, True)
 
             # Build a map keyed by 1-based idx
             result_map: dict[int, dict] = {}
@@ -456,10 +566,13 @@ time: {item.get('timestamp','')}
 
         except Exception as exc:
             log.warning("batch llm news analysis failed", error=exc)
-            # 배치 실패 시 개별 처리로 폴백 (2개 이상일 때만)
+            if not settled:
+                self._settle_budget(est_cost, est_tokens, False)
+            # 배치 실패 시 개별 처리로 폴백 (2개 이상일 때만) — 동시 실행, 슬롯은 _call_llm이 제한
             if len(items) > 1:
                 log.info("배치 파싱 실패 → 개별 처리로 전환")
-                return [self._llm_analyze(item, symbol) for item in items]
+                with ThreadPoolExecutor(max_workers=min(len(items), self.max_concurrency)) as pool:
+                    return list(pool.map(lambda it: self._llm_analyze(it, symbol), items))
             return [None] * len(items)
 
     def _score_one(self, row: dict) -> float:
@@ -495,19 +608,12 @@ time: {item.get('timestamp','')}
             "neutral": neu,
         }
 
-    def _load_seen_ids(self) -> set[str]:
-        seen = get_cached(self._seen_key())
-        if seen is None:
-            seen = _read_json_file(self._seen_ids_path(), [])
-            set_cached(self._seen_key(), seen, ttl=86400)
-        if not seen:
-            return set()
-        return set(str(x) for x in seen)
-
-    def _save_seen_ids(self, seen_ids: set[str]) -> None:
-        payload = sorted(seen_ids)
-        set_cached(self._seen_key(), payload, ttl=86400)
-        _write_json_file(self._seen_ids_path(), payload)
+    def _seen(self) -> SeenIndex:
+        """프로세스 내 공유 seen-index (STATE_DIR별 1개)."""
+        index = _SEEN_INDEXES.get(STATE_DIR)
+        if index is None:
+            index = _SEEN_INDEXES.setdefault(STATE_DIR, SeenIndex(STATE_DIR))
+        return index
 
     def _pick_symbol(self, item: dict, default_symbol: str) -> str:
         symbols = item.get("symbols")
@@ -521,34 +627,51 @@ time: {item.get('timestamp','')}
     def analyze_news_items(self, items: List[dict], default_symbol: str = "BTC") -> List[dict]:
         from collections import defaultdict
 
-        seen = self._load_seen_ids()
+        seen = self._seen()
         now = _utc_now()
 
-        # ── 1. Filter unseen items, assign symbol ──────────────────────────────
+        # ── 1. Filter unseen items (id + 정규화 헤드라인 해시), assign symbol ──
+        # 같은 기사가 여러 소스/종목으로 들어와도 LLM에는 한 번만 보낸다.
         # pending: list of (seq_idx, sym, item) in original order
         pending: List[tuple[int, str, dict]] = []
+        new_keys: list[str] = []
+        run_keys: set[str] = set()
         for item in items:
             nid = str(item.get("id") or "")
-            if not nid or nid in seen:
+            if not nid or nid in run_keys or seen.contains(nid, now):
                 continue
-            seen.add(nid)
+            hkey = headline_key(item)
+            if hkey and (hkey in run_keys or seen.contains(hkey, now)):
+                run_keys.add(nid)
+                new_keys.append(nid)
+                continue
+            run_keys.update((nid, hkey))
+            new_keys.extend(k for k in (nid, hkey) if k)
             sym = self._pick_symbol(item, default_symbol)
             pending.append((len(pending), sym, item))
 
         if not pending:
-            self._save_seen_ids(seen)
+            seen.add_many(new_keys, now)
             return []
 
-        # ── 2. Group by symbol and batch-analyze ──────────────────────────────
+        # ── 2. Group by symbol and batch-analyze (종목별 배치 병렬) ─────────────
         by_symbol: dict[str, List[tuple[int, dict]]] = defaultdict(list)
         for seq_idx, sym, item in pending:
             by_symbol[sym].append((seq_idx, item))
 
+        def _analyze_symbol(sym: str) -> List[Optional[dict]]:
+            return self._batch_analyze_items([it for _, it in by_symbol[sym]], sym)
+
+        workers = min(len(by_symbol), self.max_concurrency)
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="news-batch") as pool:
+                batch_out = dict(zip(by_symbol, pool.map(_analyze_symbol, list(by_symbol))))
+        else:
+            batch_out = {sym: _analyze_symbol(sym) for sym in by_symbol}
+
         results: dict[int, dict] = {}
         for sym, idx_items in by_symbol.items():
-            batch_items = [it for _, it in idx_items]
-            batch_results = self._batch_analyze_items(batch_items, sym)
-            for (seq_idx, item), res in zip(idx_items, batch_results):
+            for (seq_idx, item), res in zip(idx_items, batch_out[sym]):
                 if res is None:
                     res = _heuristic_analysis(item, sym)
                 results[seq_idx] = res
@@ -572,7 +695,7 @@ time: {item.get('timestamp','')}
                 }
             )
 
-        self._save_seen_ids(seen)
+        seen.add_many(new_keys, now)
         return analyzed
 
     def _build_payload(self, analyzed: List[dict], symbols: List[str], now: Optional[datetime] = None) -> dict:
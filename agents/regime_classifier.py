@@ -15,11 +15,10 @@ from __future__ import annotations
 
 import argparse
 import json
-import math
 from dataclasses import dataclass
 from datetime import date, datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Sequence
+from typing import Dict, Optional, Sequence
 
 from common.cache import get_cached, set_cached
 from common.config import BRAIN_PATH
@@ -94,113 +93,138 @@ def _parse_day(value: str | date | datetime | None = None) -> date:
     return datetime.strptime(str(value).strip()[:10], "%Y-%m-%d").date()
 
 
-def _mean(values: Sequence[float]) -> float:
-    if not values:
-        return 0.0
-    return float(sum(values) / len(values))
-
-
-def _std(values: Sequence[float]) -> float:
-    n = len(values)
-    if n < 2:
-        return 0.0
-    m = _mean(values)
-    var = sum((x - m) ** 2 for x in values) / (n - 1)
-    return float(math.sqrt(var))
-
-
-def _skew(values: Sequence[float]) -> float:
-    n = len(values)
-    if n < 3:
-        return 0.0
-    m = _mean(values)
-    s = _std(values)
-    if s <= 0:
-        return 0.0
-    return (sum(((x - m) / s) ** 3 for x in values) * n / ((n - 1) * (n - 2)))
-
-
-def _kurtosis(values: Sequence[float]) -> float:
-    n = len(values)
-    if n < 4:
-        return 0.0
-    m = _mean(values)
-    s = _std(values)
-    if s <= 0:
-        return 0.0
-    num = sum(((x - m) / s) ** 4 for x in values)
-    return (n * (n + 1) * num / ((n - 1) * (n - 2) * (n - 3))) - (3 * (n - 1) ** 2 / ((n - 2) * (n - 3)))
-
-
-def _corr(x: Sequence[float], y: Sequence[float]) -> float:
-    n = min(len(x), len(y))
-    if n < 2:
-        return 0.0
-    xs = [float(v) for v in x[-n:]]
-    ys = [float(v) for v in y[-n:]]
-    mx = _mean(xs)
-    my = _mean(ys)
-    vx = sum((v - mx) ** 2 for v in xs)
-    vy = sum((v - my) ** 2 for v in ys)
-    if vx <= 0 or vy <= 0:
-        return 0.0
-    cov = sum((a - mx) * (b - my) for a, b in zip(xs, ys))
-    return float(cov / math.sqrt(vx * vy))
-
-
-def _returns(close: Sequence[float]) -> List[float]:
-    arr = [float(x) for x in close if _safe_float(x, 0.0) > 0]
-    out = []
-    for i in range(1, len(arr)):
-        prev = arr[i - 1]
-        cur = arr[i]
-        if prev > 0:
-            out.append(cur / prev - 1.0)
-    return out
-
-
-def _fetch_close(
-    symbol: str,
-    start_iso: str | None = None,
-    end_iso: str | None = None,
-    period: str = "2y",
-) -> List[float]:
+REGIME_TICKERS = ("SPY", "QQQ", "^VIX", "HYG", "LQD")
+PANEL_PATH = MODEL_DIR / "regime_panel.npz"
+PANEL_TTL_SECONDS = 6 * 3600   # live (today) lookups refresh at most this often
+PANEL_MIN_YEARS = 8            # 5y training window + 900d warm-up
+
+# in-process memo: (fetched_at, first_day) -> feature frame
+_frame_memo: Dict[tuple, object] = {}
+
+
+def _download_panel(start_iso: str, tickers: Sequence[str] = REGIME_TICKERS):
+    """All regime tickers in one concurrent yfinance request → close DataFrame (date × ticker)."""
     try:
         import yfinance as yf
 
-        kwargs = {"interval": "1d"}
-        if start_iso and end_iso:
-            kwargs.update({"start": start_iso, "end": end_iso})
-        else:
-            kwargs.update({"period": period})
-
-        hist = retry_call(
-            yf.Ticker(symbol).history,
-            kwargs=kwargs,
+        data = retry_call(
+            yf.download,
+            kwargs={
+                "tickers": list(tickers),
+                "start": start_iso,
+                "interval": "1d",
+                "auto_adjust": True,
+                "progress": False,
+                "group_by": "column",
+                "threads": True,
+            },
             max_attempts=2,
             base_delay=1.0,
             default=None,
         )
+        if data is None or data.empty:
+            return None
+        close = data["Close"]
+        if not hasattr(close, "columns"):
+            close = close.to_frame(tickers[0])
+        close = close.reindex(columns=list(tickers))
+        close.index = close.index.tz_localize(None) if getattr(close.index, "tz", None) else close.index
+        return close.where(close > 0).sort_index()
+    except Exception as exc:
+        log.warning("regime panel download failed", error=str(exc))
+        return None
 
-        # Fallback if the requested date range does not return enough rows.
-        if (hist is None or hist.empty) and (start_iso and end_iso):
-            hist = retry_call(
-                yf.Ticker(symbol).history,
-                kwargs={"period": period, "interval": "1d"},
-                max_attempts=2,
-                base_delay=1.0,
-                default=None,
-            )
 
-        if hist is None or hist.empty or "Close" not in hist:
-            return []
-        close_col = hist["Close"]
-        if close_col is None:
-            return []
-        return [float(v) for v in list(close_col.dropna()) if _safe_float(v, 0.0) > 0]
+def _save_panel(close, path: Path = PANEL_PATH) -> None:
+    import numpy as np
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(
+        path,
+        dates=close.index.values.astype("datetime64[D]"),
+        tickers=np.array(list(close.columns)),
+        close=close.to_numpy(dtype=float),
+        fetched_at=np.array(datetime.now().timestamp()),
+    )
+
+
+def _load_panel(path: Path = PANEL_PATH):
+    """(close DataFrame, fetched_at epoch) or (None, 0.0)."""
+    if not path.exists():
+        return None, 0.0
+    try:
+        import numpy as np
+        import pandas as pd
+
+        with np.load(path, allow_pickle=False) as data:
+            close = pd.DataFrame(
+                data["close"],
+                index=pd.DatetimeIndex(data["dates"].astype("datetime64[ns]")),
+                columns=[str(t) for t in data["tickers"]],
+            )
+            return close, float(data["fetched_at"])
     except Exception as exc:
-        log.warning("fetch close failed", symbol=symbol, error=str(exc))
-        return []
+        log.warning("regime panel load failed", path=str(path), error=str(exc))
+        return None, 0.0
+
+
+def build_feature_frame(close) -> "object":
+    """Vectorized regime features for every date in the close panel.
+
+    Each ticker's rolling stats run on its own trading calendar (NaN days dropped)
+    and are forward-filled onto the panel index, so a row equals the features
+    computed from history up to and including that date.
+    """
+    import numpy as np
+    import pandas as pd
+
+    idx = close.index
+
+    def _series(ticker: str):
+        if ticker not in close:
+            return pd.Series(dtype=float)
+        return close[ticker].dropna()
+
+    def _on_panel(series, default: float = 0.0):
+        return series.reindex(idx, method="ffill").fillna(default)
+
+    def _ret_n(px, n: int):
+        return (px / px.shift(n) - 1.0).fillna(0.0)
+
+    spy, qqq, vix, hyg, lqd = (_series(t) for t in REGIME_TICKERS)
+    spy_ret = spy.pct_change().iloc[1:]
+    qqq_ret = qqq.pct_change().iloc[1:]
+
+    feat = pd.DataFrame(index=idx)
+    feat["spy_ret_5d"] = _on_panel(_ret_n(spy, 5))
+    feat["spy_ret_20d"] = _on_panel(_ret_n(spy, 20))
+    feat["spy_vol_20d"] = _on_panel(spy_ret.rolling(20, min_periods=2).std().fillna(0.0))
+    feat["vix_level"] = _on_panel(vix, default=20.0)
+    feat["vix_ret_5d"] = _on_panel(_ret_n(vix, 5))
+    term = vix.rolling(5).mean() - vix.rolling(20).mean()
+    feat["vix_term_proxy"] = _on_panel(term.fillna(0.0))
+    feat["ret_skew_60d"] = _on_panel(spy_ret.rolling(60, min_periods=3).skew().fillna(0.0))
+    feat["ret_kurt_60d"] = _on_panel(spy_ret.rolling(60, min_periods=4).kurt().fillna(0.0))
+    if len(hyg) and len(lqd):
+        credit = _on_panel(_ret_n(hyg, 20)) - _on_panel(_ret_n(lqd, 20))
+    else:
+        credit = pd.Series(0.0, index=idx)
+    feat["credit_spread_proxy"] = credit
+    pair = pd.concat([spy_ret, qqq_ret], axis=1, join="inner")
+    if len(pair):
+        a, b = pair.iloc[:, 0], pair.iloc[:, 1]
+        c20 = a.rolling(20, min_periods=2).corr(b)
+        c60 = a.rolling(60, min_periods=2).corr(b)
+        shift = (c20.replace([np.inf, -np.inf], np.nan).fillna(0.0)
+                 - c60.replace([np.inf, -np.inf], np.nan).fillna(0.0))
+        feat["corr_shift_20_60"] = _on_panel(shift)
+    else:
+        feat["corr_shift_20_60"] = 0.0
+    return feat[FEATURE_NAMES].round(6)
+
+
+def _row_to_features(row) -> dict:
+    return {name: float(row[name]) for name in FEATURE_NAMES}
 
 
 @dataclass
@@ -235,10 +259,43 @@ class RegimeClassifier:
         "corr_shift_20_60",
     ]
 
-    def __init__(self, model_path: Path = MODEL_PATH):
+    def __init__(self, model_path: Path = MODEL_PATH, panel_path: Path = PANEL_PATH):
         self.model_path = Path(model_path)
+        self.panel_path = Path(panel_path)
         self._model = None
 
+    def _panel(self, as_of_day: date, first_day: Optional[date] = None):
+        """Cached close panel covering [first_day - 900d, as_of_day]; downloads at most once."""
+        need_start = (first_day or as_of_day) - timedelta(days=900)
+        close, fetched_at = _load_panel(self.panel_path)
+        today = datetime.now().date()
+        stale = as_of_day >= today - timedelta(days=1) and (
+            datetime.now().timestamp() - fetched_at > PANEL_TTL_SECONDS
+        )
+        covers = close is not None and len(close) > 0 and close.index[0].date() <= need_start + timedelta(days=7)
+        if close is None or stale or not covers:
+            start = min(need_start, today - timedelta(days=PANEL_MIN_YEARS * 365))
+            fresh = _download_panel(start.isoformat())
+            if fresh is not None and len(fresh):
+                _save_panel(fresh, self.panel_path)
+                close, fetched_at = fresh, datetime.now().timestamp()
+        return close, fetched_at
+
+    def feature_frame(self, as_of: str | date | datetime | None = None, first: str | date | None = None):
+        """Daily feature rows (date × FEATURE_NAMES) from the cached panel, memoized per panel fetch."""
+        as_of_day = _parse_day(_to_iso_day(as_of))
+        first_day = _parse_day(first) if first is not None else None
+        close, fetched_at = self._panel(as_of_day, first_day)
+        if close is None or close.empty:
+            return None
+        key = (str(self.panel_path), fetched_at)
+        frame = _frame_memo.get(key)
+        if frame is None:
+            _frame_memo.clear()
+            frame = build_feature_frame(close)
+            _frame_memo[key] = frame
+        return frame
+
     def get_features(self, as_of: str | date | datetime | None = None) -> dict:
         as_of_iso = _to_iso_day(as_of)
         cache_key = f"regime:features:{as_of_iso}"
@@ -246,49 +303,12 @@ class RegimeClassifier:
         if cached is not None:
             return cached
 
-        as_of_day = _parse_day(as_of_iso)
-        start_iso = (as_of_day - timedelta(days=900)).isoformat()
-        end_iso = (as_of_day + timedelta(days=1)).isoformat()
-
-        spy = _fetch_close("SPY", start_iso=start_iso, end_iso=end_iso, period="5y")
-        qqq = _fetch_close("QQQ", start_iso=start_iso, end_iso=end_iso, period="5y")
-        vix = _fetch_close("^VIX", start_iso=start_iso, end_iso=end_iso, period="5y")
-        hyg = _fetch_close("HYG", start_iso=start_iso, end_iso=end_iso, period="5y")
-        lqd = _fetch_close("LQD", start_iso=start_iso, end_iso=end_iso, period="5y")
-
-        spy_ret = _returns(spy)
-        qqq_ret = _returns(qqq)
-
-        def _ret(arr: List[float], n: int) -> float:
-            if len(arr) <= n:
-                return 0.0
-            p0 = arr[-1 - n]
-            p1 = arr[-1]
-            if p0 <= 0:
-                return 0.0
-            return p1 / p0 - 1.0
-
-        credit_spread = 0.0
-        if hyg and lqd:
-            nh = hyg[-1] / hyg[-21] - 1.0 if len(hyg) > 21 and hyg[-21] > 0 else 0.0
-            nl = lqd[-1] / lqd[-21] - 1.0 if len(lqd) > 21 and lqd[-21] > 0 else 0.0
-            credit_spread = nh - nl
-
-        corr_20 = _corr(spy_ret[-20:], qqq_ret[-20:]) if spy_ret and qqq_ret else 0.0
-        corr_60 = _corr(spy_ret[-60:], qqq_ret[-60:]) if spy_ret and qqq_ret else 0.0
-
-        feat = {
-            "spy_ret_5d": round(_ret(spy, 5), 6),
-            "spy_ret_20d": round(_ret(spy, 20), 6),
-            "spy_vol_20d": round(_std(spy_ret[-20:]), 6),
-            "vix_level": round(vix[-1], 6) if vix else 20.0,
-            "vix_ret_5d": round(_ret(vix, 5), 6),
-            "vix_term_proxy": round(_mean(vix[-5:]) - _mean(vix[-20:]), 6) if len(vix) >= 20 else 0.0,
-            "ret_skew_60d": round(_skew(spy_ret[-60:]), 6),
-            "ret_kurt_60d": round(_kurtosis(spy_ret[-60:]), 6),
-            "credit_spread_proxy": round(credit_spread, 6),
-            "corr_shift_20_60": round(corr_20 - corr_60, 6),
-        }
+        frame = self.feature_frame(as_of_iso)
+        rows = frame.loc[:as_of_iso] if frame is not None else None
+        if rows is None or rows.empty:
+            feat = {name: (20.0 if name == "vix_level" else 0.0) for name in FEATURE_NAMES}
+        else:
+            feat = _row_to_features(rows.iloc[-1])
         set_cached(cache_key, feat, ttl=900)
         return feat
 
@@ -366,35 +386,32 @@ class RegimeClassifier:
 
         return self.classify_rule(features).to_dict()
 
-    def train_from_rule_labels(self, years: int = 5) -> dict:
-        """Bootstrap XGBoost model using rule-derived pseudo labels over history."""
+    def train_from_rule_labels(self, years: int = 5, freq: str = "MS") -> dict:
+        """Bootstrap XGBoost model using rule-derived pseudo labels over history.
+
+        freq: pandas offset for sample days ("MS" monthly as before, "B" daily).
+        """
         try:
             import numpy as np
+            import pandas as pd
             import xgboost as xgb
         except Exception as exc:
             return {"ok": False, "error": f"xgboost unavailable: {exc}"}
 
-        # build monthly samples
+        # build monthly samples from one feature frame (single panel download)
         end = datetime.now().date()
         start = end - timedelta(days=max(years, 1) * 365)
-
-        rows = []
-        labels = []
-        d = date(start.year, start.month, 1)
-        while d <= end:
-            try:
-                feat = self.get_features(as_of=d.isoformat())
-                rule = self.classify_rule(feat)
-                rows.append(_features_to_array(feat))
-                labels.append({"RISK_ON": 0, "RISK_OFF": 1, "TRANSITION": 2, "CRISIS": 3}[rule.regime])
-            except Exception:
-                pass
-
-            # next month
-            if d.month == 12:
-                d = date(d.year + 1, 1, 1)
-            else:
-                d = date(d.year, d.month + 1, 1)
+        frame = self.feature_frame(as_of=end, first=start)
+        if frame is None or frame.empty:
+            return {"ok": False, "error": "regime panel unavailable"}
+
+        label_ids = {"RISK_ON": 0, "RISK_OFF": 1, "TRANSITION": 2, "CRISIS": 3}
+        sample_days = pd.date_range(date(start.year, start.month, 1), end, freq=freq)
+        # as-of lookup: last trading row on or before each sample day
+        pos = frame.index.searchsorted(sample_days, side="right") - 1
+        sampled = frame.iloc[pos[pos >= 0]]
+        rows = sampled.to_numpy(dtype=float).tolist()
+        labels = [label_ids[self.classify_rule(_row_to_features(r)).regime] for _, r in sampled.iterrows()]
 
         if len(rows) < 36:
             return {"ok": False, "error": f"not enough samples: {len(rows)} (min 36 months)"}
@@ -485,13 +502,14 @@ def _cli() -> int:
     p = argparse.ArgumentParser(description="Market regime classifier")
     p.add_argument("--train", action="store_true", help="train xgboost model from rule labels")
     p.add_argument("--years", type=int, default=5, help="years for bootstrap training")
+    p.add_argument("--freq", default="MS", help="training sample frequency (MS=monthly, B=daily)")
     p.add_argument("--as-of", default=None, help="YYYY-MM-DD")
     p.add_argument("--no-model", action="store_true", help="rule-only prediction")
     args = p.parse_args()
 
     clf = RegimeClassifier()
     if args.train:
-        out = clf.train_from_rule_labels(years=args.years)
+        out = clf.train_from_rule_labels(years=args.years, freq=args.freq)
         print(json.dumps(out, ensure_ascii=False, indent=2))
         return 0 if out.get("ok") else 1
 
@@ -4,16 +4,17 @@ from __future__ import annotations
 import hashlib
 import json
 import os
+import threading
 import time
-from collections import defaultdict
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
 from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
 
 from agents.regime_classifier import RegimeClassifier
 from common.api_utils import api_success
+from common.cache import BoundedTTLCache
 from common.config import BRAIN_PATH, STRATEGY_JSON
 from common.equity_loader import load_market_allocation, load_target_weights
 from common.env_loader import load_env
@@ -25,9 +26,13 @@ log = get_logger("public_signal_api")
 router = APIRouter(prefix="/api/v1", tags=["public-api"])
 supabase = get_supabase()
 
-_RATE_CACHE: dict[str, list[float]] = defaultdict(list)
 _API_SUPABASE_WARNED = False
 
+API_KEY_REFRESH_SECONDS = float(os.environ.get("PUBLIC_API_KEY_REFRESH_SECONDS", "60"))
+API_KEY_MISS_REFRESH_SECONDS = 5.0   # unknown key → at most one background reload per 5s
+API_KEY_NEGATIVE_TTL = 60.0
+RATE_LIMIT_WINDOW_SECONDS = 60.0
+
 
 def _safe_float(value: Any, default: float = 0.0) -> float:
     try:
@@ -55,15 +60,11 @@ def _env_api_records() -> dict[str, dict]:
     return records
 
 
-def _get_api_record(api_key: str) -> dict | None:
+def _fetch_supabase_api_records() -> dict[str, dict] | None:
+    """All api_keys rows keyed by key_hash; None when the table is unreachable."""
     global _API_SUPABASE_WARNED
-    key_hash = _hash_key(api_key)
-    env_records = _env_api_records()
-    if key_hash in env_records:
-        return env_records[key_hash]
-
     if not supabase:
-        return None
+        return {}
     try:
         rows = (
             supabase.table("api_keys")
@@ -72,20 +73,151 @@ def _get_api_record(api_key: str) -> dict | None:
             .data
             or []
         )
-        for row in rows:
-            stored = str(row.get("key_hash") or "").strip().lower()
-            if stored and stored == key_hash:
-                return {
-                    "id": row.get("id"),
-                    "tier": str(row.get("tier") or "free"),
-                    "user_email": row.get("user_email"),
-                    "source": "supabase",
-                }
     except Exception as exc:
         if not _API_SUPABASE_WARNED:
             _API_SUPABASE_WARNED = True
             log.warning("api_keys lookup failed", error=str(exc))
-    return None
+        return None
+    records: dict[str, dict] = {}
+    for row in rows:
+        stored = str(row.get("key_hash") or "").strip().lower()
+        if stored:
+            records[stored] = {
+                "id": row.get("id"),
+                "tier": str(row.get("tier") or "free"),
+                "user_email": row.get("user_email"),
+                "source": "supabase",
+            }
+    return records
+
+
+class ApiKeyIndex:
+    """In-memory ``key_hash → record`` index for request-path authentication.
+
+    The first lookup loads the table synchronously; afterwards the index is
+    reloaded in a background thread every ``refresh_seconds`` (or sooner when
+    an unknown key shows up), so a lookup is a dict access. Unknown hashes
+    are negatively cached for ``negative_ttl`` seconds.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[], dict[str, dict] | None] = _fetch_supabase_api_records,
+        refresh_seconds: float = API_KEY_REFRESH_SECONDS,
+        miss_refresh_seconds: float = API_KEY_MISS_REFRESH_SECONDS,
+        negative_ttl: float = API_KEY_NEGATIVE_TTL,
+        negative_max_size: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.loader = loader
+        self.refresh_seconds = refresh_seconds
+        self.miss_refresh_seconds = miss_refresh_seconds
+        self.clock = clock
+        self._records: dict[str, dict] = {}
+        self._negative = BoundedTTLCache(max_size=negative_max_size, ttl=negative_ttl)
+        self._loaded_at: float | None = None
+        self._spawned_at = float("-inf")
+        self._refreshing = threading.Lock()
+
+    def refresh(self) -> None:
+        """Rebuild the index unless a refresh is already running."""
+        if not self._refreshing.acquire(blocking=False):
+            return
+        try:
+            self._reload_locked()
+        finally:
+            self._refreshing.release()
+
+    def _reload_locked(self) -> None:
+        db_records = self.loader()
+        if db_records is None:           # table unreachable → keep the last good DB records
+            db_records = {h: r for h, r in self._records.items() if r.get("source") == "supabase"}
+        records = dict(db_records)
+        records.update(_env_api_records())
+        self._records = records          # atomic swap; readers never see a partial index
+        self._negative.pop_where(lambda h: h in records)
+        self._loaded_at = self.clock()
+
+    def _refresh_in_background(self, now: float) -> None:
+        if self._refreshing.locked() or now - self._spawned_at < 1.0:
+            return
+        self._spawned_at = now
+        threading.Thread(target=self.refresh, name="api-key-index", daemon=True).start()
+
+    def lookup(self, key_hash: str) -> dict | None:
+        if self._loaded_at is None:
+            with self._refreshing:
+                if self._loaded_at is None:
+                    self._reload_locked()
+        now = self.clock()
+        age = now - (self._loaded_at or 0.0)
+        if age >= self.refresh_seconds:
+            self._refresh_in_background(now)
+
+        record = self._records.get(key_hash)
+        if record is not None:
+            return record
+        if key_hash in self._negative:
+            return None
+        self._negative.set(key_hash, True)
+        if age >= self.miss_refresh_seconds:
+            self._refresh_in_background(now)
+        return None
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+
+class GcraRateLimiter:
+    """Per-key GCRA limiter: ``limit`` requests per ``period`` with full burst.
+
+    Each key stores one float (the theoretical arrival time), so memory is
+    fixed per key; keys whose TAT is in the past are equivalent to new ones
+    and are evicted every ``evict_every`` seconds.
+    """
+
+    def __init__(
+        self,
+        period: float = RATE_LIMIT_WINDOW_SECONDS,
+        evict_every: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.period = float(period)
+        self.evict_every = float(evict_every)
+        self.clock = clock
+        self._tat: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._last_evict = clock()
+
+    def allow(self, key: str, limit: int) -> bool:
+        interval = self.period / max(int(limit), 1)
+        now = self.clock()
+        with self._lock:
+            tat = max(self._tat.get(key, now), now)
+            if tat - now > self.period - interval:
+                return False
+            self._tat[key] = tat + interval
+            if now - self._last_evict >= self.evict_every:
+                self._evict_locked(now)
+        return True
+
+    def _evict_locked(self, now: float) -> int:
+        idle = [k for k, tat in self._tat.items() if tat <= now]
+        for k in idle:
+            del self._tat[k]
+        self._last_evict = now
+        return len(idle)
+
+    def __len__(self) -> int:
+        return len(self._tat)
+
+
+_API_KEY_INDEX = ApiKeyIndex()
+_RATE_LIMITER = GcraRateLimiter()
+
+
+def _get_api_record(api_key: str) -> dict | None:
+    return _API_KEY_INDEX.lookup(_hash_key(api_key))
 
 
 def _rate_limit_for_tier(tier: str) -> int:
@@ -100,18 +232,14 @@ def require_public_api_key(
     if not key:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing X-API-Key")
 
-    record = _get_api_record(key)
+    key_hash = _hash_key(key)
+    record = _API_KEY_INDEX.lookup(key_hash)
     if not record:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid API key")
 
-    bucket_key = _hash_key(key)
     limit = _rate_limit_for_tier(record.get("tier", "free"))
-    now = time.time()
-    recent = [ts for ts in _RATE_CACHE[bucket_key] if now - ts < 60]
-    if len(recent) >= limit:
+    if not _RATE_LIMITER.allow(key_hash, limit):
         raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Rate limit exceeded")
-    recent.append(now)
-    _RATE_CACHE[bucket_key] = recent
     return record
 
 
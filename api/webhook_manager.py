@@ -1,14 +1,15 @@
 """Webhook registration and delivery manager (Phase E-3)."""
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import hmac
 import json
+import threading
 from datetime import datetime
 from pathlib import Path
-from typing import Any
+from typing import Any, Optional
 
-import requests
 from fastapi import APIRouter, Body, Depends, HTTPException
 
 from common.api_utils import api_success
@@ -17,6 +18,7 @@ from common.logger import get_logger
 from common.supabase_client import get_supabase
 
 from api.signal_api import require_public_api_key
+from api.webhook_queue import SPOOL_PATH, DeliveryLogWriter, WebhookDispatcher, WebhookSpool
 
 router = APIRouter(prefix="/api/v1", tags=["public-webhooks"])
 log = get_logger("webhook_manager")
@@ -36,26 +38,65 @@ def _safe_text(value: Any) -> str:
     return str(value or "").strip()
 
 
+# registry.json은 (path, mtime) 기준으로 메모리 캐시 — 다른 프로세스가 수정하면 자동 재로드
+_registry_cache: dict[str, Any] = {"key": None, "rows": [], "by_event": {}}
+_dispatcher: Optional[WebhookDispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+
+def _registry_key() -> tuple | None:
+    try:
+        stat = WEBHOOKS_PATH.stat()
+    except OSError:
+        return None
+    return (str(WEBHOOKS_PATH), stat.st_mtime_ns, stat.st_size)
+
+
+def _index_by_event(rows: list[dict]) -> dict[str, list[dict]]:
+    by_event: dict[str, list[dict]] = {}
+    for row in rows:
+        if not bool(row.get("active", True)):
+            continue
+        for event in row.get("events") or []:
+            by_event.setdefault(event, []).append(row)
+    return by_event
+
+
 def _load_registry() -> list[dict]:
-    if not WEBHOOKS_PATH.exists():
+    key = _registry_key()
+    if key is None:
         return []
+    if _registry_cache["key"] == key:
+        return _registry_cache["rows"]
     try:
         payload = json.loads(WEBHOOKS_PATH.read_text(encoding="utf-8"))
-        return payload if isinstance(payload, list) else []
+        rows = payload if isinstance(payload, list) else []
     except Exception:
-        return []
+        rows = []
+    _registry_cache.update(key=key, rows=rows, by_event=_index_by_event(rows))
+    return rows
+
+
+def _subscribers(event: str) -> list[dict]:
+    _load_registry()
+    return _registry_cache["by_event"].get(event, []) if _registry_cache["key"] else []
 
 
 def _save_registry(rows: list[dict]) -> Path:
     WEBHOOKS_PATH.parent.mkdir(parents=True, exist_ok=True)
     WEBHOOKS_PATH.write_text(json.dumps(rows, ensure_ascii=False, indent=2), encoding="utf-8")
+    _registry_cache.update(key=_registry_key(), rows=rows, by_event=_index_by_event(rows))
     return WEBHOOKS_PATH
 
 
-def _append_delivery_log(row: dict) -> None:
-    DELIVERY_LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with DELIVERY_LOG_PATH.open("a", encoding="utf-8") as fp:
-        fp.write(json.dumps(row, ensure_ascii=False) + "\n")
+def get_dispatcher() -> WebhookDispatcher:
+    """Process-wide spool + dispatcher, started on first use."""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = WebhookDispatcher(WebhookSpool(SPOOL_PATH), DeliveryLogWriter(DELIVERY_LOG_PATH))
+        _dispatcher.start()
+        return _dispatcher
 
 
 def _public_id(url: str, secret: str) -> str:
@@ -147,50 +188,46 @@ def _signature(secret: str, body_bytes: bytes) -> str:
     return hmac.new(secret.encode("utf-8"), body_bytes, hashlib.sha256).hexdigest()
 
 
-def deliver_webhook_event(event: str, data: dict) -> dict:
+def enqueue_event(
+    event: str,
+    data: dict,
+    registry: Optional[list[dict]] = None,
+    spool: Optional[WebhookSpool] = None,
+    dispatcher: Optional[WebhookDispatcher] = None,
+) -> dict:
+    """Spool one delivery per subscriber and wake the dispatcher; no network I/O here."""
     clean_event = _safe_text(event)
     body = {"event": clean_event, "data": data or {}, "timestamp": _now_iso()}
     body_bytes = json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
-    sent = 0
-    failed = 0
+    if registry is None:
+        targets = _subscribers(clean_event)
+    else:
+        targets = _index_by_event(registry).get(clean_event, [])
 
-    for row in _load_registry():
-        if clean_event not in (row.get("events") or []) or not bool(row.get("active", True)):
-            continue
+    rows = []
+    for row in targets:
         # P0: registry에는 secret_hash만 저장됨 — 원본 secret은 register 시에만 메모리에 존재.
         # 서명 생성 불가 시 빈 시크릿으로 fallback (수신 측에서 검증 실패로 거부).
         secret = _safe_text(row.get("secret", ""))
-        sig = _signature(secret, body_bytes)
-        log_row = {
-            "timestamp": _now_iso(),
-            "webhook_id": row.get("id"),
-            "event": clean_event,
-            "url": row.get("url"),
-            "status": "pending",
-        }
-        try:
-            resp = requests.post(
-                row.get("url"),
-                content=body_bytes,
-                headers={
-                    "Content-Type": "application/json",
-                    "X-Webhook-Signature": sig,
-                },
-                timeout=5,
-            )
-            log_row["status"] = "ok" if getattr(resp, "ok", False) else "failed"
-            log_row["http_status"] = getattr(resp, "status_code", None)
-            if getattr(resp, "ok", False):
-                sent += 1
-            else:
-                failed += 1
-        except Exception as exc:
-            failed += 1
-            log_row["status"] = "failed"
-            log_row["error"] = str(exc)
-        _append_delivery_log(log_row)
-
-    return {"event": clean_event, "sent": sent, "failed": failed, "timestamp": body["timestamp"]}
+        rows.append((row.get("id"), row.get("url"), clean_event, body_bytes, _signature(secret, body_bytes)))
+    if not rows:
+        return {"event": clean_event, "queued": 0, "timestamp": body["timestamp"]}
+
+    if dispatcher is None:
+        dispatcher = get_dispatcher()
+    queued = (spool or dispatcher.spool).enqueue_many(rows)
+    dispatcher.notify()
+    return {"event": clean_event, "queued": queued, "timestamp": body["timestamp"]}
+
+
+def deliver_webhook_event(event: str, data: dict) -> dict:
+    """Queue ``event`` for every active subscriber; delivery happens asynchronously.
+
+    Returns ``{"event", "queued", "timestamp"}``.  The old synchronous
+    ``sent``/``failed`` counts are no longer known at call time — per-attempt
+    outcomes land in ``DELIVERY_LOG_PATH`` once the dispatcher sends them.
+    """
+    return enqueue_event(event, data)
 
 
 @router.post("/webhooks")
@@ -219,5 +256,7 @@ async def api_test_webhook(
     event = _safe_text(body.get("event") or "alert")
     if event not in ALLOWED_EVENTS:
         raise HTTPException(status_code=400, detail="Invalid event")
-    result = deliver_webhook_event(event, body.get("data") or {"message": "test"})
-    return api_success(result, message="webhook test delivered")
+    # SQLite spool commit — keep it off the event loop
+    result = await asyncio.to_thread(deliver_webhook_event, event, body.get("data") or {"message": "test"})
+    message = "webhook test queued" if result["queued"] else "no active subscribers for event"
+    return api_success(result, message=message)
@@ -0,0 +1,524 @@
+"""Persistent webhook delivery queue (Phase E-3).
+
+``deliver_webhook_event`` only enqueues rows into a SQLite spool; a background
+dispatcher (own thread + asyncio loop) drains it:
+
+- global and per-endpoint concurrency limits (one slow receiver cannot hold
+  up the others)
+- exponential backoff retries, dead-lettering after ``max_attempts``
+- per-endpoint circuit breaker: after ``failure_threshold`` consecutive
+  failures the endpoint is skipped for ``cooldown`` seconds, then probed once
+- delivery log rows are buffered and appended in batches
+
+Spool and delivery-log I/O runs in worker threads (``asyncio.to_thread``) so
+SQLite commits never stall the drain loop's in-flight requests.
+
+Rows are leased while in flight, so a crash redelivers them (at-least-once).
+The dispatcher also remembers the ids it holds and never re-claims them, so a
+row waiting behind a slow endpoint's semaphore past its lease is sent once.
+
+Benchmark against a local mock receiver:
+    python -m api.webhook_queue --benchmark --subscribers 50
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+
+from common.config import BRAIN_PATH
+from common.logger import get_logger
+
+log = get_logger("webhook_queue")
+
+SPOOL_PATH = BRAIN_PATH / "webhooks" / "delivery_spool.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS deliveries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    webhook_id TEXT,
+    url TEXT NOT NULL,
+    event TEXT NOT NULL,
+    body BLOB NOT NULL,
+    signature TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    lease_until REAL NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_deliveries_due ON deliveries (next_attempt_at);
+"""
+
+
+@dataclass
+class Delivery:
+    id: int
+    webhook_id: Optional[str]
+    url: str
+    event: str
+    body: bytes
+    signature: str
+    attempts: int
+    created_at: float
+
+
+class WebhookSpool:
+    """SQLite-backed queue of pending deliveries (WAL, one shared connection)."""
+
+    def __init__(self, path: Path = SPOOL_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def enqueue_many(self, rows: Iterable[tuple[Optional[str], str, str, bytes, str]]) -> int:
+        """Insert ``(webhook_id, url, event, body, signature)`` rows in one transaction."""
+        now = time.time()
+        values = [(wid, url, event, body, sig, now, now) for wid, url, event, body, sig in rows]
+        if not values:
+            return 0
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT INTO deliveries (webhook_id, url, event, body, signature, next_attempt_at, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                values,
+            )
+            self._conn.execute("COMMIT")
+        return len(values)
+
+    def claim(self, limit: int, lease_seconds: float, now: Optional[float] = None,
+              exclude: Iterable[int] = ()) -> list[Delivery]:
+        """Lease up to ``limit`` due rows so no other drain picks them up.
+
+        ``exclude`` skips ids the caller still holds (queued behind a semaphore
+        past their lease) so they are not handed out twice.
+        """
+        now = time.time() if now is None else now
+        held = json.dumps(list(exclude))
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            rows = self._conn.execute(
+                "SELECT id, webhook_id, url, event, body, signature, attempts, created_at FROM deliveries"
+                " WHERE next_attempt_at <= ? AND lease_until <= ?"
+                " AND id NOT IN (SELECT value FROM json_each(?)) ORDER BY next_attempt_at LIMIT ?",
+                (now, now, held, int(limit)),
+            ).fetchall()
+            if rows:
+                self._conn.executemany(
+                    "UPDATE deliveries SET lease_until = ? WHERE id = ?",
+                    [(now + lease_seconds, r[0]) for r in rows],
+                )
+            self._conn.execute("COMMIT")
+        return [Delivery(r[0], r[1], r[2], r[3], bytes(r[4]), r[5], int(r[6]), float(r[7])) for r in rows]
+
+    def complete(self, delivery_id: int) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM deliveries WHERE id = ?", (delivery_id,))
+
+    def reschedule(self, delivery_id: int, next_attempt_at: float, attempts: int) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE deliveries SET next_attempt_at = ?, attempts = ?, lease_until = 0 WHERE id = ?",
+                (next_attempt_at, attempts, delivery_id),
+            )
+
+    def next_due_in(self, now: Optional[float] = None) -> Optional[float]:
+        now = time.time() if now is None else now
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(MAX(next_attempt_at, lease_until)) FROM deliveries"
+            ).fetchone()
+        return None if row is None or row[0] is None else max(0.0, float(row[0]) - now)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM deliveries").fetchone()[0])
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+@dataclass
+class CircuitBreaker:
+    """Consecutive-failure breaker for one endpoint."""
+
+    failure_threshold: int = 5
+    cooldown: float = 60.0
+    failures: int = 0
+    open_until: float = 0.0
+    probing: bool = False
+
+    def allow(self, now: float) -> bool:
+        if self.failures < self.failure_threshold:
+            return True
+        if now < self.open_until or self.probing:
+            return False
+        self.probing = True          # half-open: one probe request
+        return True
+
+    def record(self, ok: bool, now: float) -> None:
+        self.probing = False
+        if ok:
+            self.failures = 0
+            self.open_until = 0.0
+            return
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            self.open_until = now + self.cooldown
+
+
+class DeliveryLogWriter:
+    """Buffer delivery log rows and append them to JSONL in batches."""
+
+    def __init__(self, path: Path, batch_size: int = 200, flush_interval: float = 1.0):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._rows: list[dict] = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def add(self, row: dict) -> None:
+        with self._lock:
+            self._rows.append(row)
+            due = len(self._rows) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush_if_due(self) -> int:
+        if self._rows and time.monotonic() - self._last_flush >= self.flush_interval:
+            return self.flush()
+        return 0
+
+    def flush(self) -> int:
+        with self._lock:
+            rows, self._rows = self._rows, []
+            self._last_flush = time.monotonic()
+        if not rows:
+            return 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as fp:
+            fp.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in rows))
+        return len(rows)
+
+
+@dataclass
+class DispatcherConfig:
+    max_concurrency: int = 64
+    per_endpoint_concurrency: int = 4
+    timeout: float = 5.0
+    max_attempts: int = 6
+    backoff_base: float = 2.0
+    backoff_max: float = 300.0
+    failure_threshold: int = 5
+    cooldown: float = 60.0
+    claim_batch: int = 256
+    idle_poll: float = 1.0
+
+
+def _retryable(status: Optional[int]) -> bool:
+    return status is None or status >= 500 or status in (408, 425, 429)
+
+
+class WebhookDispatcher:
+    """Drain a ``WebhookSpool`` from a background thread running an asyncio loop."""
+
+    def __init__(self, spool: WebhookSpool, log_writer: DeliveryLogWriter, config: Optional[DispatcherConfig] = None):
+        self.spool = spool
+        self.log_writer = log_writer
+        self.config = config or DispatcherConfig()
+        self.breakers: dict[str, CircuitBreaker] = defaultdict(
+            lambda: CircuitBreaker(self.config.failure_threshold, self.config.cooldown)
+        )
+        self.stats = {"sent": 0, "failed": 0, "retried": 0, "dead": 0, "deferred": 0}
+        self._endpoint_sems: dict[str, asyncio.Semaphore] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._stopping = threading.Event()
+        self._ready = threading.Event()
+        self._inflight: set = set()
+        self._claimed: set[int] = set()     # 이 프로세스가 쥔 delivery id (리스 만료와 무관)
+
+    # ── thread control ──
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._thread_main, name="webhook-dispatcher", daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout=5)
+
+    def notify(self) -> None:
+        """Wake the drain loop after an enqueue (thread-safe, non-blocking)."""
+        loop, wake = self._loop, self._wake
+        if loop is not None and wake is not None and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(wake.set)
+            except RuntimeError:
+                pass
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stopping.set()
+        self.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        self.log_writer.flush()
+
+    def wait_idle(self, timeout: float = 10.0) -> bool:
+        """Block until nothing is queued or in flight that is due now (for tests/benchmarks)."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            due = self.spool.next_due_in()
+            if not self._inflight and (due is None or due > 0):
+                return True
+            time.sleep(0.01)
+        return False
+
+    def _thread_main(self) -> None:
+        asyncio.run(self._run())
+
+    # ── drain loop ──
+    async def _run(self) -> None:
+        import aiohttp
+
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        global_sem = asyncio.Semaphore(self.config.max_concurrency)
+        connector = aiohttp.TCPConnector(limit=self.config.max_concurrency,
+                                         limit_per_host=self.config.max_concurrency)
+        timeout = aiohttp.ClientTimeout(total=self.config.timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as client:
+            self._ready.set()
+            while not self._stopping.is_set():
+                self._wake.clear()           # before claim, so an enqueue racing the claim still wakes us
+                batch = await asyncio.to_thread(self.spool.claim, self.config.claim_batch,
+                                                lease_seconds=self.config.timeout * 4,
+                                                exclude=tuple(self._claimed))
+                for delivery in batch:
+                    self._claimed.add(delivery.id)
+                    task = asyncio.ensure_future(self._deliver(client, global_sem, delivery))
+                    self._inflight.add(task)
+                    task.add_done_callback(self._inflight.discard)
+                if len(batch) >= self.config.claim_batch:
+                    await asyncio.sleep(0)
+                    continue
+                wait_for = await asyncio.to_thread(self.spool.next_due_in)
+                wait_for = self.config.idle_poll if wait_for is None else min(wait_for, self.config.idle_poll)
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=max(wait_for, 0.005))
+                except asyncio.TimeoutError:
+                    pass
+                await asyncio.to_thread(self.log_writer.flush_if_due)
+            if self._inflight:
+                await asyncio.wait(list(self._inflight), timeout=self.config.timeout + 1)
+        self._loop = None
+
+    async def _deliver(self, client, global_sem: asyncio.Semaphore, delivery: Delivery) -> None:
+        try:
+            await self._attempt(client, global_sem, delivery)
+        finally:
+            self._claimed.discard(delivery.id)
+
+    async def _attempt(self, client, global_sem: asyncio.Semaphore, delivery: Delivery) -> None:
+        cfg = self.config
+        breaker = self.breakers[delivery.url]
+        now = time.time()
+        if not breaker.allow(now):
+            self.stats["deferred"] += 1
+            await asyncio.to_thread(self.spool.reschedule, delivery.id,
+                                    max(breaker.open_until, now + 1.0), delivery.attempts)
+            return
+
+        sem = self._endpoint_sems.setdefault(delivery.url, asyncio.Semaphore(cfg.per_endpoint_concurrency))
+        status: Optional[int] = None
+        error = ""
+        async with global_sem, sem:
+            started = time.time()
+            try:
+                async with client.post(
+                    delivery.url,
+                    data=delivery.body,
+                    headers={"Content-Type": "application/json", "X-Webhook-Signature": delivery.signature},
+                ) as resp:
+                    status = resp.status
+            except Exception as exc:
+                error = str(exc) or type(exc).__name__
+        ok = status is not None and 200 <= status < 300
+        now = time.time()
+        breaker.record(ok, now)
+
+        attempts = delivery.attempts + 1
+        row = {
+            "timestamp": now,
+            "webhook_id": delivery.webhook_id,
+            "event": delivery.event,
+            "url": delivery.url,
+            "attempt": attempts,
+            "http_status": status,
+            "latency_ms": round((now - started) * 1000, 2),
+            "queued_ms": round((started - delivery.created_at) * 1000, 2),
+        }
+        if ok:
+            self.stats["sent"] += 1
+            row["status"] = "ok"
+            await asyncio.to_thread(self.spool.complete, delivery.id)
+        elif _retryable(status) and attempts < cfg.max_attempts:
+            self.stats["retried"] += 1
+            delay = min(cfg.backoff_base * (2 ** (attempts - 1)), cfg.backoff_max)
+            row.update(status="retry", retry_in=delay)
+            await asyncio.to_thread(self.spool.reschedule, delivery.id, now + delay, attempts)
+        else:
+            self.stats["failed"] += 1
+            self.stats["dead"] += 1
+            row["status"] = "dead"
+            await asyncio.to_thread(self.spool.complete, delivery.id)
+            log.warning("webhook delivery dropped", url=delivery.url, event=delivery.event,
+                        attempts=attempts, http_status=status, error=error)
+        if error:
+            row["error"] = error
+        self.log_writer.add(row)
+
+
+# ── local mock receiver (tests / benchmark) ──────────────────────────────────
+
+class MockReceiver:
+    """Minimal HTTP server on 127.0.0.1: ``/ok``, ``/fail`` (500), ``/slow/<sec>``."""
+
+    def __init__(self) -> None:
+        self.hits: dict[str, int] = defaultdict(int)
+        self.received_at: dict[str, list[float]] = defaultdict(list)
+        self.port = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.port}{path}"
+
+    def start(self) -> "MockReceiver":
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._main()), daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout=5)
+        return self
+
+    async def _main(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        async with self._server:
+            try:
+                await self._server.serve_forever()
+            except asyncio.CancelledError:
+                pass
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                lines = head.decode("latin-1").split("\r\n")
+                path = lines[0].split(" ")[1]
+                length = 0
+                for line in lines[1:]:
+                    if line.lower().startswith("content-length:"):
+                        length = int(line.split(":", 1)[1])
+                if length:
+                    await reader.readexactly(length)
+                self.hits[path] += 1
+                self.received_at[path].append(time.time())
+                code = 200
+                if path.startswith("/slow/"):
+                    await asyncio.sleep(float(path.rsplit("/", 1)[1]))
+                elif path.startswith("/fail"):
+                    code = 500
+                writer.write(f"HTTP/1.1 {code} X\r\nContent-Length: 0\r\n\r\n".encode())
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def stop(self) -> None:
+        if self._loop is not None and self._server is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+
+def run_benchmark(subscribers: int = 50, events: int = 5, slow_seconds: float = 2.0) -> dict:
+    """Fan-out latency against a local receiver with one slow subscriber."""
+    from api import webhook_manager as wm
+
+    receiver = MockReceiver().start()
+    with tempfile.TemporaryDirectory() as tmp:
+        spool = WebhookSpool(Path(tmp) / "spool.sqlite3")
+        dispatcher = WebhookDispatcher(spool, DeliveryLogWriter(Path(tmp) / "log.jsonl"))
+        dispatcher.start()
+        hooks = [{"id": f"h{i}", "url": receiver.url(f"/ok/{i}"), "events": ["alert"], "active": True}
+                 for i in range(subscribers - 1)]
+        hooks.append({"id": "slow", "url": receiver.url(f"/slow/{slow_seconds}"), "events": ["alert"], "active": True})
+
+        enqueue_ms, fanout_ms = [], []
+        for n in range(events):
+            t0 = time.perf_counter()
+            wm.enqueue_event("alert", {"n": n}, registry=hooks, spool=spool, dispatcher=dispatcher)
+            t1 = time.perf_counter()
+            enqueue_ms.append((t1 - t0) * 1000)
+            while sum(receiver.hits[f"/ok/{i}"] for i in range(subscribers - 1)) < (n + 1) * (subscribers - 1):
+                time.sleep(0.0005)
+            fanout_ms.append((time.perf_counter() - t0) * 1000)
+        dispatcher.wait_idle(timeout=slow_seconds * events + 10)
+        dispatcher.stop()
+        spool.close()
+    receiver.stop()
+    return {
+        "subscribers": subscribers,
+        "events": events,
+        "enqueue_ms_avg": round(sum(enqueue_ms) / len(enqueue_ms), 3),
+        "fanout_ms_avg": round(sum(fanout_ms) / len(fanout_ms), 2),
+        "fanout_ms_max": round(max(fanout_ms), 2),
+        "stats": dispatcher.stats,
+    }
+
+
+def _cli() -> int:
+    parser = argparse.ArgumentParser(description="Webhook delivery queue")
+    parser.add_argument("--benchmark", action="store_true")
+    parser.add_argument("--subscribers", type=int, default=50)
+    parser.add_argument("--events", type=int, default=5)
+    parser.add_argument("--drain", action="store_true", help="drain the on-disk spool until empty")
+    args = parser.parse_args()
+    if args.benchmark:
+        print(json.dumps(run_benchmark(args.subscribers, args.events), ensure_ascii=False, indent=2))
+        return 0
+    if args.drain:
+        from api import webhook_manager as wm
+
+        dispatcher = wm.get_dispatcher()
+        dispatcher.wait_idle(timeout=3600)
+        dispatcher.stop()
+        print(json.dumps(dispatcher.stats, ensure_ascii=False))
+        return 0
+    parser.print_help()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(_cli())
@@ -173,7 +173,7 @@ async def health():
 async def health_detailed():
     """상세 헬스 체크 (Upbit/Supabase/Kiwoom/Cron 상태) — P2: Basic Auth 필수."""
     from common.health import health_monitor
-    return await health_monitor.run_checks()
+    return await health_monitor.get_status()
 
 
 # Serve built React dashboard (production)
@@ -18,6 +18,8 @@ from common.telegram import send_telegram as _tg_send, Priority as _TgPriority
 from common.supabase_client import get_supabase
 from common.logger import get_logger
 from common.retry import retry, retry_call
+from common.tracing import traced, traced_cycle, span
+from common.lazy import lazy_client, lazy_import
 from common.config import (
     BTC_LOG,
     BTC_MARKET_INTERVAL, BTC_MARKET_COUNT,
@@ -35,6 +37,7 @@ from common.equity_loader import (
 from quant.risk.drawdown_guard import DrawdownGuard
 from quant.risk.drawdown_state_store import DrawdownStateStore
 from quant.risk.position_sizer import KellyPositionSizer
+from quant.risk.cross_market_manager import invalidate_cross_market_cache
 from execution.smart_router import SmartRouter
 
 try:
@@ -50,7 +53,7 @@ except ImportError:
 load_env()
 log = get_logger("btc_agent", BTC_LOG)
 
-import pyupbit
+pyupbit = lazy_import("pyupbit")   # pandas 포함 ~0.4s — 실제 시세/주문 시점에 로드
 from common.llm_client import call_haiku, is_quota_exceeded
 from btc_news_collector import get_news_summary, get_news_result as _get_news_result
 
@@ -157,12 +160,13 @@ RUNTIME_ENV_READY = all([UPBIT_ACCESS, UPBIT_SECRET])
 
 if not RUNTIME_ENV_READY:
     log.warning("필수 환경변수 부족: 에이전트 실행은 제한되지만 API helper import는 허용")
-upbit   = pyupbit.Upbit(UPBIT_ACCESS, UPBIT_SECRET) if UPBIT_ACCESS and UPBIT_SECRET else None
-supabase = get_supabase()
+upbit   = lazy_client(lambda: pyupbit.Upbit(UPBIT_ACCESS, UPBIT_SECRET)) if UPBIT_ACCESS and UPBIT_SECRET else None
+supabase = lazy_client(get_supabase)
 _btc_buy_blocked = False
 # audit fix: CrossMarket 리스크 — 모듈 레벨 싱글턴 (매 사이클 재사용)
 _cmr_instance = None
 
+
 # ── 리스크 설정 (v6 — Top-tier Quant) ─────────────
 RISK = {
     "split_ratios":     [0.15, 0.25, 0.40],     # 스코어 높을수록 큰 비중
@@ -236,6 +240,7 @@ def send_telegram(msg: str, priority: "_TgPriority" = _TgPriority.URGENT) -> Non
 
 
 # ── 주문 실행 헬퍼 ────────────────────────────────────
+@traced("order.exchange")
 def _execute_sell(qty: float, label: str, *, pnl_pct: float | None = None,
                   close: bool = True, price: float = 0.0) -> bool:
     """Upbit 시장가 매도 + 메트릭 기록 + 선택적 포지션 종료."""
@@ -262,6 +267,7 @@ def _execute_sell(qty: float, label: str, *, pnl_pct: float | None = None,
     return True
 
 
+@traced("order.exchange")
 def _execute_buy(invest_krw: float) -> dict | None:
     """Upbit 시장가 매수. 성공 시 API 응답 dict, 실패 시 None."""
     try:
@@ -278,6 +284,7 @@ def _execute_buy(invest_krw: float) -> dict | None:
 
 
 # ── 시장 데이터 ───────────────────────────────────
+@traced("data_fetch.ohlcv")
 def get_market_data() -> "pd.DataFrame | None":
     return pyupbit.get_ohlcv("KRW-BTC", interval=BTC_MARKET_INTERVAL, count=BTC_MARKET_COUNT)
 
@@ -297,6 +304,7 @@ def _latest_market_price() -> float:
     return 0.0
 
 # ── 기술적 지표 ───────────────────────────────────
+@traced("indicators")
 def calculate_indicators(df) -> dict:
     from ta.trend import EMAIndicator, MACD
     from ta.momentum import RSIIndicator
@@ -326,6 +334,7 @@ def calculate_indicators(df) -> dict:
     }
 
 # ── 거래량 분석 ───────────────────────────────────
+@traced("indicators.volume")
 def get_volume_analysis(df) -> dict:
     try:
         if df is None or df.empty or "volume" not in df.columns:
@@ -361,6 +370,7 @@ def get_volume_analysis(df) -> dict:
         return {"ratio": 1.0, "label": "거래량 분석 실패"}
 
 # ── Fear & Greed ──────────────────────────────────
+@traced("data_fetch.fear_greed")
 def get_fear_greed() -> dict:
     try:
         res = retry_call(requests.get, args=("https://api.alternative.me/fng/?limit=1",),
@@ -385,6 +395,7 @@ def get_fear_greed() -> dict:
         return {"value": 50, "label": "Unknown", "msg": "⚪ 중립(50)"}
 
 # ── 1시간봉 추세 ──────────────────────────────────
+@traced("data_fetch.hourly")
 def get_hourly_trend() -> dict:
     try:
         df    = pyupbit.get_ohlcv("KRW-BTC", interval="minute60", count=50)
@@ -409,6 +420,7 @@ def get_hourly_trend() -> dict:
         log.warning(f"1시간봉 조회 실패: {e}")
         return {"trend": "UNKNOWN", "ema20": 0, "ema50": 0, "rsi_1h": 50}
 
+@traced("data_fetch.kimchi")
 def get_kimchi_premium():
     try:
         binance = retry_call(requests.get,
@@ -438,6 +450,7 @@ def get_kimchi_premium():
 # ── 일봉 모멘텀 분석 ─────────────────────────────
 _daily_momentum_cache: dict = {"data": None, "ts": 0.0}
 
+@traced("data_fetch.daily")
 def get_daily_momentum() -> dict:
     """yfinance BTC-USD 일봉으로 RSI/BB/거래량/수익률 분석. TTL 1시간 캐시."""
     import time as _time
@@ -663,6 +676,7 @@ def calc_btc_composite(fg_value, rsi_d, bb_pct, vol_ratio_d, trend, ret_7d=0,
 
 
 # ── 포지션 관리 ───────────────────────────────────
+@traced("data_fetch.position")
 def get_open_position():
     # audit fix: Supabase 실패 시 None 대신 예외 전파 → 호출부에서 사이클 스킵
     try:
@@ -684,11 +698,13 @@ def open_position(entry_price, quantity, entry_krw) -> bool:
     }
     try:
         supabase.table("btc_position").insert({**row, "highest_price": entry_price}).execute()
+        invalidate_cross_market_cache()
         return True
     except Exception as e:
         log.debug(f"highest_price 포함 포지션 오픈 실패, fallback 시도: {e}")
     try:
         supabase.table("btc_position").insert(row).execute()
+        invalidate_cross_market_cache()
         return True
     except Exception as e:
         log.error(f"포지션 오픈 실패: {e}")
@@ -747,12 +763,14 @@ def open_position_with_context(
 
     try:
         supabase.table("btc_position").insert(ctx_row).execute()
+        invalidate_cross_market_cache()
         return True
     except Exception:
         # signal_source 컬럼 부재 시 graceful fallback: 해당 키 제거 후 재시도
         try:
             ctx_row.pop("signal_source", None)
             supabase.table("btc_position").insert(ctx_row).execute()
+            invalidate_cross_market_cache()
             return True
         except Exception:
             return open_position(entry_price, quantity, entry_krw)
@@ -784,6 +802,7 @@ def close_all_positions(exit_price):
                     "exit_price": exit_price,
                     "exit_time":  datetime.now(timezone.utc).isoformat(),
                 }).eq("id", pos["id"]).execute()
+        invalidate_cross_market_cache()
     except Exception as e:
         log.error(f"포지션 종료 실패: {e}")
 
@@ -813,6 +832,7 @@ def check_daily_loss() -> bool:
     return False
 
 # ── 룰 기반 BTC 신호 (LLM 대체, 결정론적) ─────────
+@traced("signal")
 def rule_based_btc_signal(
     indicators,
     fg,
@@ -1090,6 +1110,7 @@ def get_split_stage(composite_total: float) -> int:
     return 1
 
 # ── 주문 실행 ─────────────────────────────────────
+@traced("order")
 def execute_trade(
     signal,
     indicators,
@@ -1479,6 +1500,7 @@ def execute_trade(
     return {"result": "HOLD"}
 
 # ── Supabase 로그 ─────────────────────────────────
+@traced("persist")
 def save_log(indicators, signal, result, *, fg=None, volume=None, comp=None, funding=None, oi=None, ls_ratio=None, kimchi=None, market_regime=None) -> None:
     try:
         row = {
@@ -1520,6 +1542,7 @@ def save_log(indicators, signal, result, *, fg=None, volume=None, comp=None, fun
         log.error(f"Supabase 저장 실패: {e}")
 
 # ── 메인 사이클 ───────────────────────────────────
+@traced_cycle("BTC")
 def run_trading_cycle() -> dict:
     global _btc_buy_blocked
     # P1-1: DrawdownGuard가 설정한 _btc_buy_blocked 값을 사이클 간 유지해야 함
@@ -1658,7 +1681,8 @@ def run_trading_cycle() -> dict:
     fg         = get_fear_greed()
     htf        = get_hourly_trend()
     momentum   = get_daily_momentum()
-    news       = _get_news_result()
+    with span("data_fetch.news"):
+        news = _get_news_result()
     pos        = get_open_position()
     kimchi     = get_kimchi_premium()
 
@@ -1668,10 +1692,11 @@ def run_trading_cycle() -> dict:
         get_btc_long_short_ratio, get_btc_whale_activity,
         get_market_regime,
     )
-    funding  = get_btc_funding_rate()
-    oi       = get_btc_open_interest()
-    ls_ratio = get_btc_long_short_ratio()
-    whale    = get_btc_whale_activity()
+    with span("data_fetch.onchain"):
+        funding  = get_btc_funding_rate()
+        oi       = get_btc_open_interest()
+        ls_ratio = get_btc_long_short_ratio()
+        whale    = get_btc_whale_activity()
 
     # ── 고래 시그널 분류 (기존 whale 데이터 재사용, 추가 API 호출 없음) ──
     whale_signal: dict = {}
@@ -1691,7 +1716,8 @@ def run_trading_cycle() -> dict:
 
     # ── 시장 레짐 (v6.1: 동적 가중치 실제 연동) ──
     try:
-        _mr = get_market_regime()
+        with span("data_fetch.regime"):
+            _mr = get_market_regime()
         market_regime = _mr.get("regime", "TRANSITION")
     except Exception:
         market_regime = "TRANSITION"
@@ -2011,6 +2037,8 @@ def send_hourly_report():
 
 if __name__ == "__main__":
     import sys
+    from common.replay import install_from_env
+    install_from_env()
     if not RUNTIME_ENV_READY:
         log.critical("필수 환경변수 없음: UPBIT keys 필요")
         sys.exit(1)
@@ -11,6 +11,7 @@ from zoneinfo import ZoneInfo
 from fastapi import APIRouter, Query
 
 _sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.cache import BoundedTTLCache, cached_to_thread
 from common.config import (STOCK_CHECK_LOG, STOCK_COLLECTOR_LOG,
                            STOCK_PREMARKET_LOG, STOCK_TRADING_LOG,
                            STRATEGY_JSON, WORKSPACE)
@@ -81,6 +82,45 @@ def _stock_name(code: str) -> str:
     return _name_cache.get(db_code, "")
 
 
+# 브로커/DB 호출 공유 캐시 — 동시 접속한 대시보드가 한 번의 호출 결과를 같이 쓴다
+_shared_cache = BoundedTTLCache(max_size=256, ttl=5)
+ACCOUNT_TTL = 5
+CHART_TTL = 30
+
+
+def _latest_closes(codes) -> dict:
+    """종목별 최신 종가 {code: close} — 최근 30일 구간 일괄 조회 1회.
+
+    거래정지 등으로 30일 안에 시세가 없는 종목만 종목별 최신 1행 조회로 보충한다.
+    """
+    codes = sorted({c for c in codes if c})
+    sb = _get_sb()
+    if not codes or not sb:
+        return {}
+    cutoff = (datetime.now(_KST) - timedelta(days=30)).date().isoformat()
+    rows = sb.table("daily_ohlcv").select("stock_code,close_price,date") \
+        .in_("stock_code", codes).gte("date", cutoff) \
+        .order("date", desc=True).execute().data or []
+    latest: dict = {}
+    for row in rows:
+        close = float(row.get("close_price") or 0)
+        if close > 0:
+            latest.setdefault(row["stock_code"], close)
+    for code in codes:
+        if code in latest:
+            continue
+        try:
+            stale = sb.table("daily_ohlcv").select("close_price,date") \
+                .eq("stock_code", code).gt("close_price", 0) \
+                .order("date", desc=True).limit(1).execute().data or []
+        except Exception as e:
+            log.warning(f"latest close {code}: {e}")
+            continue
+        if stale:
+            latest[code] = float(stale[0]["close_price"])
+    return latest
+
+
 # ── Stock page ──────────────────────────────────────────
 # @router.get("/stocks", response_class=HTMLResponse)
 # async def stocks_page():
@@ -321,14 +361,19 @@ async def get_stock_chart(code: str, interval: str = Query("1d")):
     try:
         if interval in ("5m", "10m", "1h"):
             db_interval = "5m" if interval == "10m" else interval
-            raw = await asyncio.to_thread(
-                lambda: _get_sb().table("intraday_ohlcv").select("*")
-                .eq("stock_code", db_code).eq("time_interval", db_interval)
-                .order("datetime", desc=True).limit(200).execute().data or []
+            raw, name = await asyncio.gather(
+                cached_to_thread(
+                    _shared_cache, ("intraday", db_code, db_interval),
+                    lambda: _get_sb().table("intraday_ohlcv").select("*")
+                    .eq("stock_code", db_code).eq("time_interval", db_interval)
+                    .order("datetime", desc=True).limit(200).execute().data or [],
+                    ttl=CHART_TTL,
+                ),
+                asyncio.to_thread(_stock_name, code),
             )
             rows = sorted(raw, key=lambda r: r.get("datetime", ""))
             if not rows:
-                return {"candles": [], "name": _stock_name(code), "code": code}
+                return {"candles": [], "name": name, "code": code}
             candles = []
             for r in rows:
                 dt = (r.get("datetime") or "")[:16]
@@ -342,15 +387,20 @@ async def get_stock_chart(code: str, interval: str = Query("1d")):
                     "close": r["close_price"],
                     "volume": r.get("volume") or 0,
                 })
-            return {"candles": candles, "name": _stock_name(code), "code": code}
-
-        raw = await asyncio.to_thread(
-            lambda: _get_sb().table("daily_ohlcv").select("*")
-            .eq("stock_code", db_code).order("date", desc=True).limit(60).execute().data or []
+            return {"candles": candles, "name": name, "code": code}
+
+        raw, name = await asyncio.gather(
+            cached_to_thread(
+                _shared_cache, ("daily", db_code),
+                lambda: _get_sb().table("daily_ohlcv").select("*")
+                .eq("stock_code", db_code).order("date", desc=True).limit(60).execute().data or [],
+                ttl=CHART_TTL,
+            ),
+            asyncio.to_thread(_stock_name, code),
         )
         rows = sorted(raw, key=lambda r: r["date"])
         if not rows:
-            return {"candles": [], "name": _stock_name(code), "code": code}
+            return {"candles": [], "name": name, "code": code}
         closes = [float(r["close_price"]) for r in rows]
 
         bb_data = []
@@ -404,7 +454,7 @@ async def get_stock_chart(code: str, interval: str = Query("1d")):
             c["rsi"] = rsi_data[i] if i < len(rsi_data) else None
             candles.append(c)
 
-        return {"candles": candles, "name": _stock_name(code), "code": code}
+        return {"candles": candles, "name": name, "code": code}
     except Exception as e:
         log.error(f"stock chart: {e}")
         return {"candles": [], "name": "", "code": code}
@@ -471,13 +521,26 @@ async def get_stock_indicators(code: str):
         return {"error": "Internal server error"}
 
 
+def _fetch_open_trades() -> list:
+    if not _get_sb():
+        return []
+    return _get_sb().table("trade_executions").select("*").eq("result", "OPEN").execute().data or []
+
+
 @router.get("/api/stocks/portfolio")
 async def get_stocks_portfolio():
     try:
         kiwoom = _get_kiwoom()
         if not kiwoom:
             return {"error": "키움 연동 없음", "positions": [], "deposit": 0, "total_evaluation": 0, "estimated_asset": 0}
-        account = kiwoom.get_account_evaluation()
+        # 계좌 평가(브로커)와 OPEN 체결 조회(DB)를 이벤트 루프 밖에서 동시에
+        account, rows = await asyncio.gather(
+            cached_to_thread(_shared_cache, "kiwoom_account", kiwoom.get_account_evaluation, ttl=ACCOUNT_TTL),
+            cached_to_thread(_shared_cache, "open_trades", _fetch_open_trades, ttl=ACCOUNT_TTL),
+            return_exceptions=True,
+        )
+        if isinstance(account, BaseException):
+            raise account
         summary = account.get("summary", {})
         holdings = account.get("holdings", [])
 
@@ -485,31 +548,38 @@ async def get_stocks_portfolio():
         market_open = is_market_open_now()
         if _get_sb():
             try:
-                rows = await asyncio.to_thread(
-                    lambda: _get_sb().table("trade_executions").select("*")
-                    .eq("result", "OPEN").execute().data or []
-                )
+                if isinstance(rows, BaseException):
+                    raise rows
+                holding_by_code: dict = {}
+                for h in holdings:
+                    holding_by_code.setdefault(h.get("code"), h)
                 by_code = defaultdict(list)
                 for p in rows:
                     by_code[p["stock_code"]].append(p)
+
+                # 실시간 가격이 없는 종목은 최신 종가를 한 번에 조회
+                missing = sorted(
+                    code for code in by_code
+                    if not (holding_by_code.get(code) or {}).get("current_price")
+                )
+                last_closes: dict = {}
+                if missing:
+                    try:
+                        last_closes = await cached_to_thread(
+                            _shared_cache, ("latest_closes", tuple(missing)), _latest_closes, missing, ttl=CHART_TTL,
+                        )
+                    except Exception as e:
+                        log.warning(f"portfolio latest closes: {e}")
+
                 for code, trades in by_code.items():
                     total_qty = sum(int(t.get("quantity") or 0) for t in trades)
                     total_cost = sum(float(t.get("price") or 0) * int(t.get("quantity") or 0) for t in trades)
                     avg_entry = total_cost / total_qty if total_qty > 0 else 0
-                    holding = next((h for h in holdings if h.get("code") == code), None)
+                    holding = holding_by_code.get(code)
                     current_price = holding["current_price"] if holding else 0
 
                     if not current_price or current_price == 0:
-                        try:
-                            _c = code
-                            last_row = await asyncio.to_thread(
-                                lambda: _get_sb().table("daily_ohlcv").select("close_price")
-                                .eq("stock_code", _c).order("date", desc=True).limit(1).execute().data
-                            )
-                            if last_row:
-                                current_price = float(last_row[0].get("close_price") or 0)
-                        except Exception:
-                            pass
+                        current_price = last_closes.get(code, 0)
                     if not current_price or current_price == 0:
                         current_price = avg_entry
 
@@ -811,19 +881,11 @@ async def get_kr_portfolio():
                 .select("trade_id,stock_code,stock_name,quantity,price,entry_price,created_at,reason") \
                 .eq("trade_type", "SELL").eq("result", "CLOSED") \
                 .order("created_at", desc=True).limit(30).execute().data or []
-            codes = list({r["stock_code"] for r in open_rows if r.get("stock_code")})
             latest_prices: dict = {}
-            if codes:
-                try:
-                    price_rows = _get_sb().table("daily_ohlcv") \
-                        .select("stock_code,close_price,date").in_("stock_code", codes) \
-                        .order("date", desc=True).limit(len(codes) * 3).execute().data or []
-                    for row in price_rows:
-                        sc = row["stock_code"]
-                        if sc not in latest_prices:
-                            latest_prices[sc] = float(row["close_price"] or 0)
-                except Exception:
-                    pass
+            try:
+                latest_prices = _latest_closes(r.get("stock_code") for r in open_rows)
+            except Exception:
+                pass
             return open_rows, closed_rows, latest_prices
         open_rows, closed_rows, latest_prices = await asyncio.to_thread(_sync_kr_portfolio)
 
@@ -9,6 +9,7 @@ from fastapi import APIRouter, Query
 from fastapi.responses import JSONResponse
 
 _sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.cache import BoundedTTLCache, cached_to_thread
 from common.config import US_TRADING_LOG
 from common.logger import get_logger
 from common.supabase_client import get_supabase
@@ -29,6 +30,11 @@ router = APIRouter()
 
 _fx_cache = {"ts": 0, "rate": 0}
 
+# yfinance 호출 공유 캐시 — 동시 요청은 한 번의 호출 결과를 같이 쓴다
+_shared_cache = BoundedTTLCache(max_size=256, ttl=15)
+PRICE_TTL = 15
+CHART_TTL = 60
+
 
 def _batch_fetch_prices(symbols: list) -> dict:
     """여러 심볼의 현재가를 한 번에 조회 (N+1 방지)."""
@@ -57,6 +63,30 @@ def _batch_fetch_prices(symbols: list) -> dict:
         return {}
 
 
+async def _shared_prices(symbols) -> dict:
+    """_batch_fetch_prices를 루프 밖에서 실행, 같은 심볼 집합이면 결과 공유."""
+    syms = sorted({s for s in symbols if s})
+    if not syms:
+        return {}
+    return await cached_to_thread(_shared_cache, ("prices", tuple(syms)), _batch_fetch_prices, syms, ttl=PRICE_TTL)
+
+
+def _candles_from_history(hist) -> list:
+    """yfinance history DataFrame → 캔들 리스트 (컬럼 단위 변환)."""
+    if hist is None or hist.empty:
+        return []
+    times = hist.index.strftime("%Y-%m-%d").tolist()
+    cols = [hist[c].astype(float).round(2).tolist() for c in ("Open", "High", "Low", "Close")]
+    volume = hist["Volume"].fillna(0).astype("int64").tolist()
+    keys = ("time", "open", "high", "low", "close", "volume")
+    return [dict(zip(keys, row)) for row in zip(times, *cols, volume)]
+
+
+def _fetch_us_candles(symbol: str, period: str) -> list:
+    import yfinance as yf
+    return _candles_from_history(yf.Ticker(symbol).history(period=period))
+
+
 # @router.get("/us", response_class=HTMLResponse)
 # async def us_page():
 #     from btc.templates.us_html import US_DASHBOARD_HTML
@@ -102,14 +132,16 @@ async def get_us_portfolio():
         if not _get_sb():
             return {"open_positions": [], "closed_positions": [], "summary": {}}
 
-        # US 포지션/내역 조회 + 현재가 배치 조회 (모두 to_thread)
-        def _sync_portfolio():
-            open_pos = _get_sb().table("us_trade_executions").select("*").eq("result", "OPEN").execute().data or []
-            closed_pos = _get_sb().table("us_trade_executions").select("*").eq("result", "CLOSED").order("created_at", desc=True).limit(100).execute().data or []
-            syms = list({p.get("symbol", "") for p in open_pos if p.get("symbol")})
-            prices = _batch_fetch_prices(syms)
-            return open_pos, closed_pos, prices
-        open_positions, closed_positions, batch_prices = await asyncio.to_thread(_sync_portfolio)
+        # US 포지션/내역 조회는 동시에, 현재가는 공유 캐시로 (모두 루프 밖)
+        open_positions, closed_positions = await asyncio.gather(
+            asyncio.to_thread(
+                lambda: _get_sb().table("us_trade_executions").select("*").eq("result", "OPEN").execute().data or []
+            ),
+            asyncio.to_thread(
+                lambda: _get_sb().table("us_trade_executions").select("*").eq("result", "CLOSED").order("created_at", desc=True).limit(100).execute().data or []
+            ),
+        )
+        batch_prices = await _shared_prices(p.get("symbol", "") for p in open_positions)
         total_invested = 0
         total_current = 0
 
@@ -213,8 +245,7 @@ async def api_us_positions():
         positions = await asyncio.to_thread(
             lambda: _get_sb().table("us_trade_executions").select("*").eq("result", "OPEN").execute().data or []
         )
-        symbols = [p.get("symbol", "") for p in positions if p.get("symbol")]
-        batch_prices = await asyncio.to_thread(lambda: _batch_fetch_prices(symbols))
+        batch_prices = await _shared_prices(p.get("symbol", "") for p in positions)
         total_invested = 0.0
         total_current = 0.0
         for p in positions:
@@ -247,21 +278,9 @@ async def api_us_positions():
 @router.get("/api/us/chart/{symbol}")
 async def api_us_chart(symbol: str, period: str = Query("3mo")):
     try:
-        import yfinance as _yf_chart
-        t = _yf_chart.Ticker(symbol)
-        h = t.history(period=period)
-        if h is None or h.empty:
-            return {"candles": [], "symbol": symbol}
-        candles = []
-        for ts, row in h.iterrows():
-            candles.append({
-                "time": ts.strftime("%Y-%m-%d"),
-                "open": round(float(row["Open"]), 2),
-                "high": round(float(row["High"]), 2),
-                "low": round(float(row["Low"]), 2),
-                "close": round(float(row["Close"]), 2),
-                "volume": int(row["Volume"]),
-            })
+        candles = await cached_to_thread(
+            _shared_cache, ("chart", symbol.upper(), period), _fetch_us_candles, symbol, period, ttl=CHART_TTL,
+        )
         return {"candles": candles, "symbol": symbol}
     except Exception as e:
         log.error(f"us chart: {e}")
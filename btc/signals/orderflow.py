@@ -12,11 +12,10 @@ import argparse
 import asyncio
 import json
 import time
-from collections import deque
-from dataclasses import asdict, dataclass
+from dataclasses import asdict, dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Iterable, Optional
+from typing import Any, Iterable, Optional, Sequence
 
 import requests
 
@@ -79,15 +78,35 @@ class OrderFlowState:
     large_trade_threshold_btc: float
     window_seconds: int
     timestamp: str
+    windows: dict = field(default_factory=dict)
 
     def to_dict(self) -> dict:
         return asdict(self)
 
 
+# per-second bucket / window-sum slots
+_BUY, _SELL, _COUNT, _LARGE_BUY, _LARGE_SELL = range(5)
+
+
 class OrderFlowAnalyzer:
-    def __init__(self, large_trade_threshold_btc: float = 10.0, window_seconds: int = 300):
+    """Cumulative CVD plus rolling flow over several windows in fixed memory.
+
+    Trades are folded into one-second buckets held in a ring of
+    ``max(windows) + 1`` slots. Each window keeps running sums over its completed
+    buckets, updated only when the second rolls over (add the finished bucket,
+    subtract the one leaving), so both process_trade and snapshot are O(1) in
+    the trade rate. Windows cover whole seconds: (now_sec - W, now_sec].
+    """
+
+    def __init__(
+        self,
+        large_trade_threshold_btc: float = 10.0,
+        window_seconds: int = 300,
+        windows: Sequence[int] = (10, 60, 300),
+    ):
         self.large_trade_threshold_btc = max(_safe_float(large_trade_threshold_btc, 10.0), 0.01)
         self.window_seconds = max(int(window_seconds), 1)
+        self.windows = sorted({max(int(w), 1) for w in windows} | {self.window_seconds})
 
         self._cvd = 0.0
         self._buy_volume = 0.0
@@ -95,12 +114,47 @@ class OrderFlowAnalyzer:
         self._large_buy_count = 0
         self._large_sell_count = 0
         self._trade_count = 0
-        self._rolling: deque[tuple[float, float]] = deque()
 
-    def _prune_rolling(self, now_ts: float) -> None:
-        cutoff = now_ts - self.window_seconds
-        while self._rolling and self._rolling[0][0] < cutoff:
-            self._rolling.popleft()
+        self._size = self.windows[-1] + 1
+        self._sec = [-1] * self._size
+        self._buckets = [[0.0, 0.0, 0, 0, 0] for _ in range(self._size)]
+        self._done = {w: [0.0, 0.0, 0, 0, 0] for w in self.windows}   # completed seconds only
+        self._head: Optional[int] = None
+
+    def _reset_rolling(self, head: int) -> None:
+        for i in range(self._size):
+            self._sec[i] = -1
+            self._buckets[i][:] = [0.0, 0.0, 0, 0, 0]
+        for sums in self._done.values():
+            sums[:] = [0.0, 0.0, 0, 0, 0]
+        self._head = head
+        self._sec[head % self._size] = head
+
+    def _advance(self, sec: int) -> None:
+        head = self._head
+        if head is None or sec - head >= self._size:
+            self._reset_rolling(sec)
+            return
+        size, secs, buckets = self._size, self._sec, self._buckets
+        for new_head in range(head + 1, sec + 1):
+            finished = buckets[(new_head - 1) % size]
+            fin_live = secs[(new_head - 1) % size] == new_head - 1 and finished[_COUNT] > 0
+            for w, sums in self._done.items():
+                if fin_live:
+                    for k in range(5):
+                        sums[k] += finished[k]
+                leaving = new_head - w
+                slot = leaving % size
+                if secs[slot] == leaving and buckets[slot][_COUNT] > 0:
+                    old = buckets[slot]
+                    for k in range(5):
+                        sums[k] -= old[k]
+                if sums[_COUNT] <= 0:
+                    sums[:] = [0.0, 0.0, 0, 0, 0]   # drop float residue when the window empties
+            slot = new_head % size
+            secs[slot] = new_head
+            buckets[slot][:] = [0.0, 0.0, 0, 0, 0]
+        self._head = sec
 
     def process_trade(self, trade: dict) -> None:
         qty = _safe_float(
@@ -112,39 +166,79 @@ class OrderFlowAnalyzer:
 
         ts = _to_epoch_seconds(trade.get("T", trade.get("timestamp", trade.get("ts"))))
         is_sell = _is_aggressive_sell(trade)
-        signed_qty = -qty if is_sell else qty
+        large = qty >= self.large_trade_threshold_btc
 
-        self._cvd += signed_qty
         self._trade_count += 1
-
-        if signed_qty >= 0:
-            self._buy_volume += qty
-            if qty >= self.large_trade_threshold_btc:
-                self._large_buy_count += 1
-        else:
+        if is_sell:
+            self._cvd -= qty
             self._sell_volume += qty
-            if qty >= self.large_trade_threshold_btc:
+            if large:
                 self._large_sell_count += 1
+        else:
+            self._cvd += qty
+            self._buy_volume += qty
+            if large:
+                self._large_buy_count += 1
 
-        self._rolling.append((ts, signed_qty))
-        self._prune_rolling(ts)
-
-    def snapshot(self) -> dict:
-        now_ts = time.time()
-        self._prune_rolling(now_ts)
-        net_flow = sum(v for _, v in self._rolling)
+        sec = int(ts)
+        head = self._head
+        if head is None or sec > head:
+            self._advance(sec)
+            head = sec
+        age = head - sec
+        if age >= self._size:
+            return  # older than the longest window
+        slot = sec % self._size
+        if self._sec[slot] != sec:
+            return
+        bucket = self._buckets[slot]
+        side, large_side = (_SELL, _LARGE_SELL) if is_sell else (_BUY, _LARGE_BUY)
+        bucket[side] += qty
+        bucket[_COUNT] += 1
+        if large:
+            bucket[large_side] += 1
+        if age:
+            # late trade for an already completed second
+            for w, sums in self._done.items():
+                if age < w:
+                    sums[side] += qty
+                    sums[_COUNT] += 1
+                    if large:
+                        sums[large_side] += 1
+
+    def window_stats(self, window: int) -> dict:
+        """Rolling stats for one configured window (call after advancing the clock)."""
+        sums = self._done[window]
+        cur = self._buckets[self._head % self._size] if self._head is not None else [0.0, 0.0, 0, 0, 0]
+        buy = sums[_BUY] + cur[_BUY]
+        sell = sums[_SELL] + cur[_SELL]
+        return {
+            "net_flow": round(buy - sell, 6),
+            "buy_volume": round(buy, 6),
+            "sell_volume": round(sell, 6),
+            "trade_count": int(sums[_COUNT] + cur[_COUNT]),
+            "large_buy_count": int(sums[_LARGE_BUY] + cur[_LARGE_BUY]),
+            "large_sell_count": int(sums[_LARGE_SELL] + cur[_LARGE_SELL]),
+        }
+
+    def snapshot(self, now_ts: Optional[float] = None) -> dict:
+        now_sec = int(time.time() if now_ts is None else now_ts)
+        if self._head is not None and now_sec > self._head:
+            self._advance(now_sec)
+        windows = {f"{w}s": self.window_stats(w) for w in self.windows}
 
         state = OrderFlowState(
             cvd=round(self._cvd, 6),
             large_buy_count=self._large_buy_count,
             large_sell_count=self._large_sell_count,
-            net_flow=round(net_flow, 6),
+            net_flow=windows[f"{self.window_seconds}s"]["net_flow"],
             buy_volume=round(self._buy_volume, 6),
             sell_volume=round(self._sell_volume, 6),
             trade_count=self._trade_count,
             large_trade_threshold_btc=round(self.large_trade_threshold_btc, 6),
             window_seconds=self.window_seconds,
             timestamp=_utc_now_iso(),
+            windows=windows,
         )
         return state.to_dict()
 
@@ -199,7 +293,9 @@ async def stream_binance_orderflow(
     duration_seconds: int = 30,
     large_trade_threshold_btc: float = 10.0,
     window_seconds: int = 300,
+    record_path: Optional[Path] = None,
 ) -> dict:
+    """Stream trades for ``duration_seconds``; optionally append raw frames to ``record_path`` (JSONL)."""
     sym = str(symbol or "BTCUSDT").lower()
     duration = max(int(duration_seconds), 1)
     analyzer = OrderFlowAnalyzer(
@@ -212,19 +308,27 @@ async def stream_binance_orderflow(
 
         url = BINANCE_TRADE_WS.format(symbol=sym)
         deadline = time.time() + duration
-        async with websockets.connect(
-            url,
-            open_timeout=5,
-            close_timeout=1,
-            ping_interval=20,
-            ping_timeout=10,
-        ) as ws:
-            while time.time() < deadline:
-                timeout = max(0.1, deadline - time.time())
-                raw = await asyncio.wait_for(ws.recv(), timeout=timeout)
-                payload = json.loads(raw)
-                if isinstance(payload, dict):
-                    analyzer.process_trade(payload)
+        record = open(record_path, "a", encoding="utf-8") if record_path else None
+        try:
+            async with websockets.connect(
+                url,
+                open_timeout=5,
+                close_timeout=1,
+                ping_interval=20,
+                ping_timeout=10,
+            ) as ws:
+                while time.time() < deadline:
+                    timeout = max(0.1, deadline - time.time())
+                    raw = await asyncio.wait_for(ws.recv(), timeout=timeout)
+                    if record is not None:
+                        record.write(raw if isinstance(raw, str) else raw.decode("utf-8"))
+                        record.write("\n")
+                    payload = json.loads(raw)
+                    if isinstance(payload, dict):
+                        analyzer.process_trade(payload)
+        finally:
+            if record is not None:
+                record.close()
         return analyzer.snapshot()
     except Exception as exc:
         log.warning("websocket stream failed; fallback to recent trades", symbol=sym.upper(), error=str(exc))
@@ -240,6 +344,49 @@ def _load_json_file(path: Path) -> Any:
     return json.loads(path.read_text(encoding="utf-8"))
 
 
+def load_trade_file(path: Path) -> list[dict]:
+    """Trades from a JSON list file or a JSONL recording (one frame per line)."""
+    text = Path(path).read_text(encoding="utf-8")
+    stripped = text.lstrip()
+    if stripped.startswith("["):
+        rows = json.loads(stripped)
+    else:
+        rows = [json.loads(line) for line in text.splitlines() if line.strip()]
+    return [r for r in rows if isinstance(r, dict)]
+
+
+def replay_benchmark(
+    path: Path,
+    large_trade_threshold_btc: float = 10.0,
+    window_seconds: int = 300,
+    snapshot_every: int = 1000,
+) -> dict:
+    """Replay a recorded trade file through the analyzer and report throughput (trades/sec).
+
+    Snapshots are taken every ``snapshot_every`` trades at the replayed clock, as a
+    live consumer polling the analyzer would.
+    """
+    trades = load_trade_file(path)
+    analyzer = OrderFlowAnalyzer(
+        large_trade_threshold_btc=large_trade_threshold_btc,
+        window_seconds=window_seconds,
+    )
+    every = max(int(snapshot_every), 1)
+    started = time.perf_counter()
+    for i, trade in enumerate(trades, 1):
+        analyzer.process_trade(trade)
+        if i % every == 0:
+            analyzer.snapshot(now_ts=analyzer._head)
+    elapsed = time.perf_counter() - started
+    final = analyzer.snapshot(now_ts=analyzer._head)
+    return {
+        "trades": len(trades),
+        "elapsed_sec": round(elapsed, 6),
+        "trades_per_sec": round(len(trades) / elapsed, 1) if elapsed > 0 else 0.0,
+        "snapshot": final,
+    }
+
+
 def _cli() -> int:
     parser = argparse.ArgumentParser(description="BTC orderflow analyzer")
     parser.add_argument("--symbol", default="BTCUSDT")
@@ -248,8 +395,19 @@ def _cli() -> int:
     parser.add_argument("--large-threshold", type=float, default=10.0)
     parser.add_argument("--recent-only", action="store_true", help="skip websocket, use recent trades API")
     parser.add_argument("--sample-file", default="", help="json file containing trade list")
+    parser.add_argument("--record", default="", help="append raw websocket frames to this JSONL file")
+    parser.add_argument("--benchmark", default="", help="replay a recorded trade file (JSON/JSONL) and report trades/sec")
     args = parser.parse_args()
 
+    if args.benchmark:
+        out = replay_benchmark(
+            Path(args.benchmark),
+            large_trade_threshold_btc=args.large_threshold,
+            window_seconds=args.window,
+        )
+        print(json.dumps(out, ensure_ascii=False, indent=2))
+        return 0
+
     if args.sample_file:
         rows = _load_json_file(Path(args.sample_file))
         out = analyze_trade_batch(
@@ -274,6 +432,7 @@ def _cli() -> int:
                 duration_seconds=args.seconds,
                 large_trade_threshold_btc=args.large_threshold,
                 window_seconds=args.window,
+                record_path=Path(args.record) if args.record else None,
             )
         )
 
@@ -19,7 +19,7 @@ sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 from common.env_loader import load_env
 from common.supabase_client import get_supabase
 from common.logger import get_logger
-from common.telegram import Priority, send_telegram
+from common.telegram import Priority, deliver_telegram
 
 load_env()
 log = get_logger("alert_system")
@@ -341,7 +341,7 @@ class AlertSystem:
                 message = alert["message"]
                 # info 심각도는 일일 리포트 버퍼에만 저장 (개별 발송 안 함)
                 prio = Priority.INFO if alert.get("severity") == "info" else Priority.URGENT
-                success = send_telegram(message, parse_mode="Markdown", priority=prio)
+                success = deliver_telegram(message, parse_mode="Markdown", priority=prio)
 
                 if not success:
                     log.error(f"알림 전송 실패: {alert['type']}")
@@ -13,16 +13,26 @@ Usage:
     if val is None:
         val = fetch_funding()
         set_cached("btc_funding", val, ttl=300)
+
+    # Bounded per-module cache (LRU + TTL eviction)
+    _cache = BoundedTTLCache(max_size=512, ttl=300)
+    _cache.set(("AAPL", "2026-03-09"), indicators)
+
+    # Async handlers: blocking call off the event loop, shared by concurrent callers
+    data = await cached_to_thread(_cache, ("chart", symbol), fetch_chart, symbol)
 """
 from __future__ import annotations
 
+import asyncio
 import time
 import functools
 import threading
-from typing import Any, Callable, Optional
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
 
 _lock = threading.Lock()
 _store: dict[str, tuple[float, float, Any]] = {}  # key -> (created_at, ttl, value)
+_MISSING = object()
 
 
 def get_cached(key: str) -> Optional[Any]:
@@ -90,3 +100,106 @@ def ttl_cache(ttl: float = 300, key_prefix: str = ""):
             return result
         return wrapper
     return decorator
+
+
+class BoundedTTLCache:
+    """Thread-safe cache with a hard size cap (LRU) and per-entry TTL.
+
+    Unlike the module-level store above, each instance owns its entries, so
+    hot per-symbol caches cannot grow without bound in long-lived processes.
+    """
+
+    def __init__(self, max_size: int = 512, ttl: float = 300) -> None:
+        self.max_size = max(1, int(max_size))
+        self.ttl = float(ttl)
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[Hashable, tuple[float, float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a live value (refreshing its LRU position) or *default*."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            created_at, ttl, value = entry
+            if time.time() - created_at > ttl:
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value; evicts expired entries first, then the LRU ones."""
+        with self._lock:
+            self._data[key] = (time.time(), self.ttl if ttl is None else float(ttl), value)
+            self._data.move_to_end(key)
+            if len(self._data) > self.max_size:
+                self._evict_expired_locked()
+                while len(self._data) > self.max_size:
+                    self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return default if entry is None else entry[2]
+
+    def pop_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop every key matching *predicate*. Returns the number removed."""
+        with self._lock:
+            keys = [k for k in self._data if predicate(k)]
+            for k in keys:
+                del self._data[k]
+            return len(keys)
+
+    def evict_expired(self) -> int:
+        with self._lock:
+            return self._evict_expired_locked()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def _evict_expired_locked(self) -> int:
+        now = time.time()
+        expired = [k for k, (created, ttl, _) in self._data.items() if now - created > ttl]
+        for k in expired:
+            del self._data[k]
+        return len(expired)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+_inflight: dict = {}
+
+
+async def cached_to_thread(cache: BoundedTTLCache, key: Hashable, func: Callable, *args: Any,
+                           ttl: Optional[float] = None) -> Any:
+    """Run blocking *func* in a worker thread, cached in *cache* under *key*.
+
+    Concurrent callers for the same key await a single call; its result is
+    kept for *ttl* seconds (the cache default when None). Failures are not
+    cached and propagate to every waiter.
+    """
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+    flight_key = (id(cache), key)
+    task = _inflight.get(flight_key)
+    if task is None:
+        async def _run() -> Any:
+            try:
+                result = await asyncio.to_thread(func, *args)
+                cache.set(key, result, ttl=ttl)
+                return result
+            finally:
+                _inflight.pop(flight_key, None)
+
+        task = asyncio.ensure_future(_run())
+        _inflight[flight_key] = task
+    # a cancelled caller must not cancel the shared call
+    return await asyncio.shield(task)
@@ -23,6 +23,11 @@ LOG_DIR = Path(os.environ.get("OPENCLAW_LOG_DIR", str(OPENCLAW_ROOT / "logs"))).
 BRAIN_PATH = WORKSPACE / "brain"
 MEMORY_PATH = WORKSPACE / "memory"
 
+# market data hub fan-out socket (common/data/market_hub.py)
+MARKET_HUB_SOCKET = Path(
+    os.environ.get("OPENCLAW_MARKET_HUB_SOCKET", str(OPENCLAW_ROOT / "run" / "market_hub.sock"))
+).expanduser()
+
 BTC_LOG = LOG_DIR / "btc_trading.log"
 STOCK_TRADING_LOG = LOG_DIR / "stock_trading.log"
 STOCK_CHECK_LOG = LOG_DIR / "stock_check.log"
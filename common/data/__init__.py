@@ -1,5 +1,6 @@
 """Realtime data connectors for OpenClaw Phase 9."""
 
+from common.data.market_hub import LocalOrderBook, MarketDataHub, iter_hub_messages
 from common.data.news_stream import NewsStream, collect_news_once
 from common.data.orderbook import (
     BinanceOrderbookStream,
@@ -22,6 +23,9 @@ from common.data.realtime_price import (
 )
 
 __all__ = [
+    "MarketDataHub",
+    "LocalOrderBook",
+    "iter_hub_messages",
     "NewsStream",
     "collect_news_once",
     "BinanceOrderbookStream",
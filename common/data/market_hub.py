@@ -0,0 +1,644 @@
+"""Push-based market data hub (Upbit / Binance websockets).
+
+One asyncio process keeps the exchange subscriptions and fans updates out:
+- tickers → normalized tick schema of ``common.data.realtime_price``
+- depth   → local order books (Binance snapshot + diff, Upbit full snapshots)
+            emitted in the ``common.data.orderbook`` snapshot schema
+- fan-out → in-process callbacks (``on_tick`` / ``on_snapshot``) and a local
+            Unix socket (newline-delimited JSON) for other agents
+
+Run as the shared hub:
+    python -m common.data.market_hub --binance BTCUSDT --upbit KRW-BTC
+
+Consumers in other processes read the socket with ``iter_hub_messages()``;
+``RealtimePriceFeed`` / ``BinanceOrderbookStream`` do this when created with
+``stream=True`` and fall back to REST polling if no stream can be kept up.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import heapq
+import json
+import random
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import (Any, AsyncIterator, Awaitable, Callable, Dict, List,
+                    Optional, Sequence)
+
+from common.config import MARKET_HUB_SOCKET
+from common.env_loader import load_env
+from common.logger import get_logger
+
+load_env()
+log = get_logger("market_hub")
+
+BINANCE_WS_URL = "wss://stream.binance.com:9443/stream"
+BINANCE_DEPTH_URL = "https://api.binance.com/api/v3/depth"
+UPBIT_WS_URL = "wss://api.upbit.com/websocket/v1"
+
+# private hubs started by follow_symbol give up after this, so callers can poll instead
+FOLLOW_MAX_RECONNECTS = 3
+FOLLOW_STALE_TIMEOUT = 30.0
+
+Callback = Callable[[Dict], Any]
+SnapshotFetcher = Callable[[str], Awaitable[dict]]
+
+
+def _utc_now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _ms_to_iso(ms: Any) -> str:
+    try:
+        return datetime.fromtimestamp(float(ms) / 1000.0, tz=timezone.utc).isoformat()
+    except Exception:
+        return _utc_now_iso()
+
+
+def _levels(rows: Sequence) -> List[tuple[float, float]]:
+    out = []
+    for row in rows or []:
+        try:
+            out.append((float(row[0]), float(row[1])))
+        except Exception:
+            continue
+    return out
+
+
+# ── Local order book ─────────────────────────────────────────────────────────
+
+class LocalOrderBook:
+    """Price-level book rebuilt from a snapshot plus incremental diffs.
+
+    Binance rules: drop diffs with ``u <= lastUpdateId``; the first applied diff
+    must straddle ``lastUpdateId + 1``; afterwards each ``U`` must equal the
+    previous ``u + 1``, otherwise the book is out of sync and needs a new snapshot.
+    """
+
+    def __init__(self, symbol: str, source: str, top_n: int = 20, max_pending: int = 10_000):
+        self.symbol = symbol
+        self.source = source
+        self.top_n = max(int(top_n), 1)
+        self.bids: Dict[float, float] = {}
+        self.asks: Dict[float, float] = {}
+        self.last_update_id: Optional[int] = None
+        self.synced = False
+        self.pending: deque = deque(maxlen=max_pending)
+        self.updated_ms: Optional[float] = None
+
+    def reset(self) -> None:
+        self.bids.clear()
+        self.asks.clear()
+        self.last_update_id = None
+        self.synced = False
+        self.pending.clear()
+
+    def load_snapshot(self, bids: Sequence, asks: Sequence, last_update_id: Optional[int] = None) -> None:
+        self.bids = {p: q for p, q in _levels(bids) if q > 0}
+        self.asks = {p: q for p, q in _levels(asks) if q > 0}
+        self.last_update_id = last_update_id
+        self.synced = True
+
+    def _apply_levels(self, side: Dict[float, float], rows: Sequence) -> None:
+        for price, qty in _levels(rows):
+            if qty <= 0:
+                side.pop(price, None)
+            else:
+                side[price] = qty
+
+    def apply_diff(self, event: dict) -> bool:
+        """Apply a Binance depthUpdate; False means a sequence gap (resync needed)."""
+        first, final = int(event.get("U", 0)), int(event.get("u", 0))
+        if self.last_update_id is not None:
+            if final <= self.last_update_id:
+                return True            # already contained in the snapshot
+            if first > self.last_update_id + 1:
+                self.synced = False
+                return False
+        self._apply_levels(self.bids, event.get("b") or [])
+        self._apply_levels(self.asks, event.get("a") or [])
+        self.last_update_id = final
+        self.updated_ms = event.get("E")
+        return True
+
+    def to_snapshot(self, top_n: Optional[int] = None) -> Dict:
+        from common.data.orderbook import calc_imbalance
+
+        n = top_n or self.top_n
+        bids = [{"price": p, "qty": self.bids[p]} for p in heapq.nlargest(n, self.bids)]
+        asks = [{"price": p, "qty": self.asks[p]} for p in heapq.nsmallest(n, self.asks)]
+        best_bid = bids[0]["price"] if bids else 0.0
+        best_ask = asks[0]["price"] if asks else 0.0
+        spread = round(best_ask - best_bid, 6) if best_bid > 0 and best_ask > 0 else 0.0
+        return {
+            "symbol": self.symbol,
+            "bids": bids,
+            "asks": asks,
+            "spread": spread,
+            "imbalance": calc_imbalance(bids, asks),
+            "timestamp": _ms_to_iso(self.updated_ms) if self.updated_ms else _utc_now_iso(),
+            "source": self.source,
+        }
+
+
+# ── Unix socket fan-out ──────────────────────────────────────────────────────
+
+class UnixSocketFanout:
+    """Broadcast newline-delimited JSON to every connected local client.
+
+    Clients that stop reading are dropped once ``max_buffer`` bytes are queued,
+    so a slow agent never stalls the hub.
+    """
+
+    def __init__(self, path: Path, max_buffer: int = 1 << 20):
+        self.path = Path(path)
+        self.max_buffer = max_buffer
+        self._clients: set = set()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.exists():
+            self.path.unlink()
+        self._server = await asyncio.start_unix_server(self._on_client, path=str(self.path))
+        log.info("market hub socket listening", path=str(self.path))
+
+    async def _on_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._clients.add(writer)
+        try:
+            await reader.read()      # clients do not send; EOF means disconnect
+        except Exception:
+            pass
+        finally:
+            self._clients.discard(writer)
+            writer.close()
+
+    @property
+    def client_count(self) -> int:
+        return len(self._clients)
+
+    def publish(self, kind: str, payload: Dict) -> None:
+        if not self._clients:
+            return
+        line = (json.dumps({"type": kind, "data": payload}, ensure_ascii=False) + "\n").encode("utf-8")
+        for writer in list(self._clients):
+            transport = writer.transport
+            if transport.is_closing() or transport.get_write_buffer_size() > self.max_buffer:
+                self._clients.discard(writer)
+                writer.close()
+                continue
+            writer.write(line)
+
+    async def close(self) -> None:
+        for writer in list(self._clients):
+            writer.close()
+        self._clients.clear()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+async def iter_hub_messages(path: Path = MARKET_HUB_SOCKET) -> AsyncIterator[Dict]:
+    """Yield ``{"type": "tick"|"book", "data": {...}}`` messages from a running hub."""
+    reader, writer = await asyncio.open_unix_connection(str(path), limit=1 << 22)
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+    finally:
+        writer.close()
+
+
+# ── Hub ──────────────────────────────────────────────────────────────────────
+
+async def _fetch_binance_depth(symbol: str, limit: int = 1000) -> dict:
+    import requests
+
+    def _get() -> dict:
+        res = requests.get(BINANCE_DEPTH_URL, params={"symbol": symbol.upper(), "limit": limit}, timeout=5)
+        res.raise_for_status()
+        return res.json()
+
+    return await asyncio.get_running_loop().run_in_executor(None, _get)
+
+
+class MarketDataHub:
+    """Single websocket subscriber for Binance/Upbit tickers and order books."""
+
+    def __init__(
+        self,
+        binance_symbols: Sequence[str] = (),
+        upbit_markets: Sequence[str] = (),
+        depth: bool = True,
+        top_n: int = 20,
+        socket_path: Optional[Path] = None,
+        binance_url: str = BINANCE_WS_URL,
+        upbit_url: str = UPBIT_WS_URL,
+        snapshot_fetcher: Optional[SnapshotFetcher] = None,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 30.0,
+        max_reconnect_attempts: Optional[int] = None,
+        stale_timeout: Optional[float] = None,
+        resync_delay: float = 0.5,
+        max_resync_delay: float = 30.0,
+    ):
+        self.binance_symbols = [s.upper() for s in binance_symbols]
+        self.upbit_markets = [m.upper() for m in upbit_markets]
+        self.depth = depth
+        self.top_n = top_n
+        self.binance_url = binance_url
+        self.upbit_url = upbit_url
+        self.snapshot_fetcher = snapshot_fetcher or _fetch_binance_depth
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.max_reconnect_attempts = max_reconnect_attempts
+        self.stale_timeout = stale_timeout
+        self.resync_delay = resync_delay
+        self.max_resync_delay = max_resync_delay
+        self.fanout = UnixSocketFanout(socket_path) if socket_path else None
+
+        self.books: Dict[str, LocalOrderBook] = {}
+        for s in self.binance_symbols:
+            self.books[s] = LocalOrderBook(s, "binance", top_n=top_n)
+        for m in self.upbit_markets:
+            self.books[m] = LocalOrderBook(m, "upbit", top_n=top_n)
+        self.latest_ticks: Dict[str, Dict] = {}
+        self.stats = {"messages": 0, "ticks": 0, "books": 0, "resyncs": 0, "reconnects": 0}
+
+        self._tick_callbacks: List[tuple[Optional[str], Callback]] = []
+        self._book_callbacks: List[tuple[Optional[str], Callback]] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._tasks: set = set()
+        self._syncing: set = set()
+        self._resync_failures: Dict[str, int] = {}
+        self._resync_waiting: set = set()
+
+    # ── callback API (same shape as RealtimePriceFeed / BinanceOrderbookStream) ──
+    def on_tick(self, callback: Callback, symbol: Optional[str] = None) -> None:
+        self._tick_callbacks.append((symbol.upper() if symbol else None, callback))
+
+    def on_snapshot(self, callback: Callback, symbol: Optional[str] = None) -> None:
+        self._book_callbacks.append((symbol.upper() if symbol else None, callback))
+
+    def latest_tick(self, symbol: str) -> Optional[Dict]:
+        return self.latest_ticks.get(symbol.upper())
+
+    def latest_book(self, symbol: str) -> Optional[Dict]:
+        book = self.books.get(symbol.upper())
+        return book.to_snapshot() if book is not None and book.synced else None
+
+    def _dispatch(self, callbacks: List[tuple[Optional[str], Callback]], payload: Dict) -> None:
+        symbol = payload.get("symbol")
+        for want, cb in callbacks:
+            if want is not None and want != symbol:
+                continue
+            try:
+                result = cb(payload)
+                if asyncio.iscoroutine(result):
+                    self._spawn(result)
+            except Exception as exc:
+                log.error("market hub callback failed", error=exc)
+
+    def _publish_tick(self, tick: Dict) -> None:
+        self.stats["ticks"] += 1
+        self.latest_ticks[tick["symbol"]] = tick
+        self._dispatch(self._tick_callbacks, tick)
+        if self.fanout is not None:
+            self.fanout.publish("tick", tick)
+
+    def _publish_book(self, book: LocalOrderBook) -> None:
+        self.stats["books"] += 1
+        snap = book.to_snapshot()
+        self._dispatch(self._book_callbacks, snap)
+        if self.fanout is not None:
+            self.fanout.publish("book", snap)
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    # ── Binance ──
+    def _binance_stream_url(self) -> str:
+        streams = []
+        for s in self.binance_symbols:
+            streams.append(f"{s.lower()}@ticker")
+            if self.depth:
+                streams.append(f"{s.lower()}@depth@100ms")
+        return f"{self.binance_url}?streams={'/'.join(streams)}"
+
+    async def _sync_binance_book(self, symbol: str) -> None:
+        if symbol in self._syncing:
+            return
+        self._syncing.add(symbol)
+        book = self.books[symbol]
+        try:
+            snap = await self.snapshot_fetcher(symbol)
+            book.load_snapshot(snap.get("bids") or [], snap.get("asks") or [], int(snap.get("lastUpdateId", 0)))
+            pending = list(book.pending)
+            book.pending.clear()
+            for event in pending:
+                if not book.apply_diff(event):
+                    break
+            if book.synced:
+                self._resync_failures.pop(symbol, None)
+                self._publish_book(book)
+            else:
+                self.stats["resyncs"] += 1
+                self._schedule_resync(symbol)
+        except Exception as exc:
+            log.warning("binance depth snapshot failed", symbol=symbol, error=str(exc))
+            book.synced = False
+            self._schedule_resync(symbol)
+        finally:
+            self._syncing.discard(symbol)
+
+    def _schedule_resync(self, symbol: str) -> None:
+        """Retry the snapshot with capped exponential backoff (jittered); reset on success."""
+        failures = self._resync_failures.get(symbol, 0) + 1
+        self._resync_failures[symbol] = failures
+        delay = min(self.resync_delay * (2 ** (failures - 1)), self.max_resync_delay)
+        self._resync_waiting.add(symbol)
+        self._spawn(self._resync_later(symbol, random.uniform(delay / 2, delay)))
+
+    async def _resync_later(self, symbol: str, delay: float = 0.0) -> None:
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self._resync_waiting.discard(symbol)
+        await self._sync_binance_book(symbol)
+
+    def handle_binance(self, message: Dict) -> None:
+        data = message.get("data", message)
+        if not isinstance(data, dict):
+            return
+        event = data.get("e")
+        symbol = str(data.get("s") or "").upper()
+        if event == "24hrTicker":
+            self._publish_tick({
+                "symbol": symbol,
+                "price": float(data.get("c") or 0.0),
+                "volume": float(data.get("v") or 0.0),
+                "timestamp": _ms_to_iso(data.get("E")),
+                "source": "binance",
+            })
+        elif event == "depthUpdate" and symbol in self.books:
+            book = self.books[symbol]
+            if not book.synced:
+                book.pending.append(data)
+                if symbol not in self._syncing and symbol not in self._resync_waiting:
+                    self._spawn(self._sync_binance_book(symbol))
+                return
+            if book.apply_diff(data):
+                self._publish_book(book)
+            else:
+                self.stats["resyncs"] += 1
+                book.pending.append(data)
+                self._spawn(self._sync_binance_book(symbol))
+
+    # ── Upbit ──
+    def _upbit_subscription(self) -> str:
+        req: List[dict] = [{"ticket": f"openclaw-{uuid.uuid4().hex[:12]}"},
+                           {"type": "ticker", "codes": self.upbit_markets}]
+        if self.depth:
+            req.append({"type": "orderbook", "codes": self.upbit_markets})
+        req.append({"format": "DEFAULT"})
+        return json.dumps(req)
+
+    def handle_upbit(self, data: Dict) -> None:
+        kind = data.get("type") or data.get("ty")
+        code = str(data.get("code") or data.get("cd") or "").upper()
+        if kind == "ticker":
+            self._publish_tick({
+                "symbol": code,
+                "price": float(data.get("trade_price") or 0.0),
+                "volume": float(data.get("acc_trade_volume_24h") or data.get("trade_volume") or 0.0),
+                "timestamp": _ms_to_iso(data.get("trade_timestamp") or data.get("timestamp")),
+                "source": "upbit",
+            })
+        elif kind == "orderbook" and code in self.books:
+            units = data.get("orderbook_units") or []
+            book = self.books[code]
+            book.load_snapshot(
+                [(u.get("bid_price"), u.get("bid_size")) for u in units],
+                [(u.get("ask_price"), u.get("ask_size")) for u in units],
+            )
+            book.updated_ms = data.get("timestamp")
+            self._publish_book(book)
+
+    # ── connection loops ──
+    async def _consume(self, name: str, url: str, handler: Callable[[Dict], None], hello: Optional[str] = None) -> None:
+        import websockets
+
+        loop = asyncio.get_running_loop()
+        delay = self.reconnect_delay
+        failures = 0
+        while not self._stop.is_set():
+            try:
+                async with websockets.connect(url, open_timeout=5, close_timeout=1, ping_interval=20,
+                                              ping_timeout=10, max_size=None) as ws:
+                    if hello:
+                        await ws.send(hello)
+                    if name == "binance":
+                        for book in self.books.values():
+                            if book.source == "binance":
+                                book.reset()
+                    delay = self.reconnect_delay
+                    log.info("market hub connected", exchange=name)
+                    last_message = loop.time()
+                    while not self._stop.is_set():
+                        try:
+                            raw = await asyncio.wait_for(ws.recv(), timeout=1.0)
+                        except asyncio.TimeoutError:
+                            if self.stale_timeout is not None and loop.time() - last_message > self.stale_timeout:
+                                raise ConnectionError(f"no {name} messages for {self.stale_timeout:g}s")
+                            continue
+                        last_message = loop.time()
+                        failures = 0
+                        self.stats["messages"] += 1
+                        try:
+                            payload = json.loads(raw)
+                        except ValueError:
+                            continue
+                        if isinstance(payload, dict):
+                            handler(payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                if self._stop.is_set():
+                    break
+                failures += 1
+                if self.max_reconnect_attempts is not None and failures > self.max_reconnect_attempts:
+                    raise ConnectionError(f"{name} websocket unavailable after {failures} attempts: {exc}") from exc
+                self.stats["reconnects"] += 1
+                log.warning("market hub connection lost", exchange=name, error=str(exc), retry_in=delay)
+                try:
+                    await asyncio.wait_for(self._stop.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def run(self) -> None:
+        """Run until ``stop()``; reconnects with exponential backoff.
+
+        With ``max_reconnect_attempts`` set, raises ``ConnectionError`` once an
+        exchange has failed that many times in a row without delivering a
+        message (a connection silent for ``stale_timeout`` seconds counts as a
+        failure), so callers can fall back to polling.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        if self.fanout is not None:
+            await self.fanout.start()
+        consumers = []
+        if self.binance_symbols:
+            consumers.append(self._spawn(self._consume("binance", self._binance_stream_url(), self.handle_binance)))
+        if self.upbit_markets:
+            consumers.append(self._spawn(
+                self._consume("upbit", self.upbit_url, self.handle_upbit, self._upbit_subscription())
+            ))
+        try:
+            await asyncio.gather(*consumers)
+        finally:
+            for task in list(self._tasks):
+                task.cancel()
+            if self.fanout is not None:
+                await self.fanout.close()
+
+    def stop(self) -> None:
+        """Stop the hub; safe to call from any thread."""
+        if self._loop is None or self._stop is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._stop.set()
+        else:
+            self._loop.call_soon_threadsafe(self._stop.set)
+
+
+def split_crypto_symbols(symbols: Sequence[str]) -> tuple[List[str], List[str]]:
+    """(binance_symbols, upbit_markets) from mixed symbols (``BTC`` → KRW-BTC)."""
+    binance, upbit = [], []
+    for raw in symbols:
+        s = str(raw or "").upper()
+        if s == "BTC":
+            upbit.append("KRW-BTC")
+        elif s.startswith(("KRW-", "BTC-", "USDT-")):
+            upbit.append(s)
+        elif s.endswith(("USDT", "BUSD", "FDUSD")):
+            binance.append(s)
+    return binance, upbit
+
+
+async def follow_symbol(
+    symbol: str,
+    kind: str,
+    callback: Callback,
+    should_stop: Callable[[], bool],
+    socket_path: Path = MARKET_HUB_SOCKET,
+    top_n: int = 20,
+    **hub_kwargs: Any,
+) -> None:
+    """Deliver ``kind`` ("tick" or "book") updates for one symbol until ``should_stop()``.
+
+    Reads the shared hub socket when one is running, otherwise runs a private
+    hub for just this symbol. Used by the polling classes' ``run_forever``.
+    The private hub gives up (``ConnectionError``) after a few failed
+    reconnects or a long silence, so the caller can fall back to REST polling.
+    """
+    symbol = symbol.upper()
+    if Path(socket_path).exists():
+        try:
+            messages = iter_hub_messages(socket_path)
+            # keep one read task across timeouts; cancelling __anext__ would close the generator
+            pending: Optional[asyncio.Future] = None
+            try:
+                while not should_stop():
+                    if pending is None:
+                        pending = asyncio.ensure_future(messages.__anext__())
+                    done, _ = await asyncio.wait({pending}, timeout=0.5)
+                    if not done:
+                        continue
+                    task, pending = pending, None
+                    try:
+                        msg = task.result()
+                    except StopAsyncIteration:
+                        break
+                    data = msg.get("data") or {}
+                    if msg.get("type") == kind and str(data.get("symbol", "")).upper() == symbol:
+                        callback(data)
+            finally:
+                if pending is not None:
+                    pending.cancel()
+                    await asyncio.gather(pending, return_exceptions=True)
+                await messages.aclose()
+            if should_stop():
+                return
+        except (ConnectionError, FileNotFoundError, OSError) as exc:
+            log.info("market hub socket unavailable; running private hub", error=str(exc))
+
+    binance, upbit = split_crypto_symbols([symbol])
+    if not binance and not upbit:
+        raise ValueError(f"no websocket market for {symbol}")
+    hub_kwargs.setdefault("max_reconnect_attempts", FOLLOW_MAX_RECONNECTS)
+    hub_kwargs.setdefault("stale_timeout", FOLLOW_STALE_TIMEOUT)
+    hub = MarketDataHub(binance_symbols=binance, upbit_markets=upbit, depth=(kind == "book"),
+                        top_n=top_n, **hub_kwargs)
+    if kind == "book":
+        hub.on_snapshot(callback)
+    else:
+        hub.on_tick(callback)
+
+    async def _watch() -> None:
+        while not should_stop():
+            await asyncio.sleep(0.25)
+        hub.stop()
+
+    watcher = asyncio.ensure_future(_watch())
+    try:
+        await hub.run()
+    finally:
+        watcher.cancel()
+
+
+def _cli() -> int:
+    parser = argparse.ArgumentParser(description="Market data hub (websocket fan-out)")
+    parser.add_argument("--binance", nargs="*", default=["BTCUSDT"])
+    parser.add_argument("--upbit", nargs="*", default=["KRW-BTC"])
+    parser.add_argument("--no-depth", action="store_true")
+    parser.add_argument("--socket", default=str(MARKET_HUB_SOCKET))
+    args = parser.parse_args()
+
+    hub = MarketDataHub(
+        binance_symbols=args.binance,
+        upbit_markets=args.upbit,
+        depth=not args.no_depth,
+        socket_path=Path(args.socket) if args.socket else None,
+    )
+    try:
+        asyncio.run(hub.run())
+    except KeyboardInterrupt:
+        log.info("market hub stopped", stats=hub.stats)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(_cli())
@@ -11,8 +11,10 @@ This module provides normalized orderbook data:
 """
 from __future__ import annotations
 
+import asyncio
 import threading
 from datetime import datetime, timezone
+from pathlib import Path
 from typing import Callable, Dict, List, Optional
 
 import requests
@@ -221,12 +223,26 @@ def fetch_kr_orderbook_snapshot(stock_code: str, kiwoom_client=None) -> Dict:
 
 
 class BinanceOrderbookStream:
-    """Polling stream interface for Binance orderbook snapshots."""
+    """Binance orderbook stream with callback registration.
 
-    def __init__(self, symbol: str = "BTCUSDT", poll_interval: float = 1.0, limit: int = 20):
+    Polls REST by default. With ``stream=True`` (opt-in) snapshots come from
+    the websocket market hub's local book (snapshot + depth diffs); if the
+    stream cannot be kept up it falls back to REST polling.
+    """
+
+    def __init__(
+        self,
+        symbol: str = "BTCUSDT",
+        poll_interval: float = 1.0,
+        limit: int = 20,
+        stream: bool = False,
+        socket_path: Optional[Path] = None,
+    ):
         self.symbol = symbol.upper()
         self.poll_interval = max(0.25, poll_interval)
         self.limit = limit
+        self.stream = stream
+        self.socket_path = socket_path
         self._callbacks: List[Callable[[Dict], None]] = []
         self._stop = threading.Event()
 
@@ -236,16 +252,37 @@ class BinanceOrderbookStream:
     def stop(self) -> None:
         self._stop.set()
 
-    def pump_once(self) -> Dict:
-        snap = fetch_binance_orderbook(symbol=self.symbol, limit=self.limit)
+    def _emit(self, snap: Dict) -> None:
+        if len(snap.get("bids") or []) > self.limit or len(snap.get("asks") or []) > self.limit:
+            snap = {**snap, "bids": snap["bids"][: self.limit], "asks": snap["asks"][: self.limit]}
         for cb in self._callbacks:
             try:
                 cb(snap)
             except Exception as exc:
                 log.error("orderbook callback failed", error=exc)
+
+    def pump_once(self) -> Dict:
+        snap = fetch_binance_orderbook(symbol=self.symbol, limit=self.limit)
+        self._emit(snap)
         return snap
 
     def run_forever(self) -> None:
+        if self.stream:
+            try:
+                from common.config import MARKET_HUB_SOCKET
+                from common.data.market_hub import follow_symbol
+
+                log.info("orderbook streaming", symbol=self.symbol)
+                asyncio.run(follow_symbol(
+                    self.symbol, "book", self._emit, self._stop.is_set,
+                    socket_path=self.socket_path or MARKET_HUB_SOCKET,
+                    top_n=self.limit,
+                ))
+                if self._stop.is_set():
+                    return
+            except Exception as exc:
+                log.warning("orderbook stream unavailable; falling back to polling", error=str(exc))
+
         log.info("orderbook stream started", symbol=self.symbol, poll_interval=self.poll_interval)
         while not self._stop.is_set():
             try:
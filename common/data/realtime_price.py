@@ -1,6 +1,6 @@
 """Realtime price helpers for Phase 9.
 
-Normalized tick schema:
+Normalized tick schema (also emitted by common.data.market_hub):
 {
   symbol,
   price,
@@ -11,8 +11,10 @@ Normalized tick schema:
 """
 from __future__ import annotations
 
+import asyncio
 import threading
 from datetime import datetime, timezone
+from pathlib import Path
 from typing import Callable, Dict, Optional
 
 from common.cache import get_cached, set_cached
@@ -197,7 +199,13 @@ def get_price_snapshot(symbol: str, market: str = "auto", kiwoom_client=None) ->
 
 
 class RealtimePriceFeed:
-    """Polling price feed with callback registration."""
+    """Price feed with callback registration.
+
+    Polls every ``poll_interval`` seconds by default. With ``stream=True``
+    (opt-in) crypto symbols (KRW-*, *USDT) are pushed from the websocket
+    market hub (``common.data.market_hub``); everything else, or a stream
+    that cannot be kept up, falls back to polling.
+    """
 
     def __init__(
         self,
@@ -205,11 +213,15 @@ class RealtimePriceFeed:
         market: str = "auto",
         poll_interval: float = 1.0,
         kiwoom_client=None,
+        stream: bool = False,
+        socket_path: Optional[Path] = None,
     ):
         self.symbol = symbol
         self.market = market
         self.poll_interval = max(0.25, poll_interval)
         self.kiwoom_client = kiwoom_client
+        self.stream = stream
+        self.socket_path = socket_path
         self._callbacks: list[Callable[[Dict], None]] = []
         self._stop = threading.Event()
 
@@ -219,20 +231,47 @@ class RealtimePriceFeed:
     def stop(self) -> None:
         self._stop.set()
 
+    def _emit(self, tick: Dict) -> None:
+        for cb in self._callbacks:
+            try:
+                cb(tick)
+            except Exception as exc:
+                log.error("price callback failed", error=exc)
+
     def pump_once(self) -> Dict:
         tick = get_price_snapshot(
             self.symbol,
             market=self.market,
             kiwoom_client=self.kiwoom_client,
         )
-        for cb in self._callbacks:
-            try:
-                cb(tick)
-            except Exception as exc:
-                log.error("price callback failed", error=exc)
+        self._emit(tick)
         return tick
 
+    def _stream_symbol(self) -> Optional[str]:
+        if self.market.lower().strip() not in {"auto", "btc"}:
+            return None
+        from common.data.market_hub import split_crypto_symbols
+
+        binance, upbit = split_crypto_symbols([self.symbol])
+        return (binance or upbit or [None])[0]
+
     def run_forever(self) -> None:
+        stream_symbol = self._stream_symbol() if self.stream else None
+        if stream_symbol:
+            try:
+                from common.config import MARKET_HUB_SOCKET
+                from common.data.market_hub import follow_symbol
+
+                log.info("price feed streaming", symbol=stream_symbol)
+                asyncio.run(follow_symbol(
+                    stream_symbol, "tick", self._emit, self._stop.is_set,
+                    socket_path=self.socket_path or MARKET_HUB_SOCKET,
+                ))
+                if self._stop.is_set():
+                    return
+            except Exception as exc:
+                log.warning("price stream unavailable; falling back to polling", error=str(exc))
+
         log.info(
             "price feed started",
             symbol=self.symbol,
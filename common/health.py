@@ -107,73 +107,132 @@ async def check_cron_freshness() -> dict[str, Any]:
 
 class HealthMonitor:
     COMPONENTS = {
-        "upbit_api": {"check": check_upbit, "critical": True},
-        "supabase": {"check": check_supabase, "critical": True},
-        "kiwoom": {"check": check_kiwoom, "critical": False},
-        "dashboard": {"check": check_dashboard, "critical": False},
-        "cron_jobs": {"check": check_cron_freshness, "critical": True},
+        "upbit_api": {"check": check_upbit, "critical": True, "timeout": 5.0},
+        "supabase": {"check": check_supabase, "critical": True, "timeout": 8.0},
+        "kiwoom": {"check": check_kiwoom, "critical": False, "timeout": 3.0},
+        "dashboard": {"check": check_dashboard, "critical": False, "timeout": 3.0},
+        "cron_jobs": {"check": check_cron_freshness, "critical": True, "timeout": 3.0},
     }
+    DEFAULT_TIMEOUT_SEC = 5.0
     # Telegram 알림 쿨다운: 컴포넌트별 마지막 발송 시각
     _ALERT_COOLDOWN_SEC = 30 * 60  # 30분
     _last_alert: dict[str, float] = {}
 
+    def __init__(self) -> None:
+        # 마지막 리포트 — /api/health 는 max_age 이내면 재조회 없이 이 값을 반환
+        self._snapshot: dict[str, Any] | None = None
+        self._snapshot_at = 0.0
+        self._inflight: asyncio.Future | None = None
+        self._persist_task: asyncio.Task | None = None
+        # 저장 중에 나온 최신 결과 — 진행 중인 저장이 끝나면 이어서 저장 (중간 회차는 합쳐짐)
+        self._persist_pending: tuple[Any, dict[str, Any]] | None = None
+
+    async def _run_component(self, name: str, config: dict) -> dict[str, Any]:
+        timeout = float(config.get("timeout") or self.DEFAULT_TIMEOUT_SEC)
+        started = time.time()
+        try:
+            details = await asyncio.wait_for(config["check"](), timeout=timeout)
+        except asyncio.TimeoutError:
+            error = f"{name} 응답 없음 ({timeout:.0f}초 초과)"
+        except Exception as exc:
+            error = str(exc)
+        else:
+            latency = int((time.time() - started) * 1000)
+            # 복구 시 쿨다운 초기화
+            self._last_alert.pop(name, None)
+            return {"status": "healthy", "latency_ms": latency, "details": details}
+
+        log.error("health check failed", component=name, error=error)
+        return {"status": "down", "error": error, "latency_ms": int((time.time() - started) * 1000)}
+
+    async def _alert(self, name: str, error: str, now: float) -> None:
+        last = self._last_alert.get(name, 0)
+        if now - last < self._ALERT_COOLDOWN_SEC:
+            return
+        try:
+            await asyncio.to_thread(send_telegram, f"🚨 CRITICAL: {name} is DOWN — {error[:200]}")
+            self._last_alert[name] = now
+        except Exception:
+            pass
+
     async def run_checks(self) -> dict[str, Any]:
-        results: dict[str, Any] = {}
-        supabase = get_supabase()
+        """모든 컴포넌트를 동시에 점검 — 소요 시간은 가장 느린 점검(각 timeout 상한)."""
         now = time.time()
-
-        for name, config in self.COMPONENTS.items():
-            started = time.time()
-            try:
-                details = await config["check"]()
-                latency = int((time.time() - started) * 1000)
-                results[name] = {"status": "healthy", "latency_ms": latency, "details": details}
-                # 복구 시 쿨다운 초기화
-                self._last_alert.pop(name, None)
-            except Exception as exc:
-                results[name] = {"status": "down", "error": str(exc)}
-                log.error("health check failed", component=name, error=str(exc))
-                if config.get("critical"):
-                    last = self._last_alert.get(name, 0)
-                    if now - last >= self._ALERT_COOLDOWN_SEC:
-                        try:
-                            await asyncio.to_thread(send_telegram, f"🚨 CRITICAL: {name} is DOWN — {str(exc)[:200]}")
-                            self._last_alert[name] = now
-                        except Exception:
-                            pass
-
-        if supabase:
-            await asyncio.to_thread(self._persist_snapshots, supabase, results)
+        names = list(self.COMPONENTS)
+        outcomes = await asyncio.gather(*(self._run_component(n, self.COMPONENTS[n]) for n in names))
+        results: dict[str, Any] = dict(zip(names, outcomes))
+
+        alerts = [
+            self._alert(name, result.get("error", ""), now)
+            for name, result in results.items()
+            if result["status"] != "healthy" and self.COMPONENTS[name].get("critical")
+        ]
+        if alerts:
+            await asyncio.gather(*alerts)
 
         all_healthy = all(item["status"] == "healthy" for item in results.values())
-        return {
+        report = {
             "status": "ok" if all_healthy else "degraded",
             "components": results,
             "timestamp": datetime.now(timezone.utc).isoformat(),
         }
+        self._snapshot = report
+        self._snapshot_at = time.time()
+
+        supabase = get_supabase()
+        if supabase:
+            # 저장은 응답 지연에 포함하지 않는다 (진행 중이면 최신 결과만 대기열에 남김)
+            if self._persist_pending is not None:
+                log.info("health snapshot persist coalesced", skipped_components=len(self._persist_pending[1]))
+            self._persist_pending = (supabase, results)
+            if self._persist_task is None or self._persist_task.done():
+                self._persist_task = asyncio.ensure_future(self._persist_latest())
+        return report
+
+    async def _persist_latest(self) -> None:
+        while self._persist_pending is not None:
+            supabase, results = self._persist_pending
+            self._persist_pending = None
+            await asyncio.to_thread(self._persist_snapshots, supabase, results)
+
+    def snapshot(self) -> dict[str, Any] | None:
+        """마지막 점검 결과 (재조회 없음). 한 번도 점검하지 않았으면 None."""
+        if self._snapshot is None:
+            return None
+        return {**self._snapshot, "age_seconds": round(time.time() - self._snapshot_at, 3)}
+
+    async def get_status(self, max_age: float = 30.0) -> dict[str, Any]:
+        """max_age 이내 스냅샷이 있으면 반환, 없으면 점검 — 동시 요청은 한 번의 점검을 공유."""
+        if self._snapshot is not None and time.time() - self._snapshot_at < max_age:
+            return self.snapshot()
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.ensure_future(self.run_checks())
+        await asyncio.shield(self._inflight)
+        return self.snapshot()
 
     @staticmethod
     def _persist_snapshots(supabase: Any, results: dict[str, Any]) -> None:
         global _HEALTH_SNAPSHOT_TABLE_MISSING
-        if _HEALTH_SNAPSHOT_TABLE_MISSING:
+        if _HEALTH_SNAPSHOT_TABLE_MISSING or not results:
             return
 
-        for component, result in results.items():
-            try:
-                supabase.table("health_snapshots").insert(
-                    {
-                        "component": component,
-                        "status": result["status"],
-                        "details": result,
-                        "latency_ms": result.get("latency_ms"),
-                    }
-                ).execute()
-            except Exception as exc:
-                if "PGRST205" in str(exc) and "health_snapshots" in str(exc):
-                    _HEALTH_SNAPSHOT_TABLE_MISSING = True
-                    log.warning("health snapshot persistence disabled", error=str(exc))
-                    return
-                log.warning("health snapshot persist failed", component=component, error=str(exc))
+        rows = [
+            {
+                "component": component,
+                "status": result["status"],
+                "details": result,
+                "latency_ms": result.get("latency_ms"),
+            }
+            for component, result in results.items()
+        ]
+        try:
+            supabase.table("health_snapshots").insert(rows).execute()
+        except Exception as exc:
+            if "PGRST205" in str(exc) and "health_snapshots" in str(exc):
+                _HEALTH_SNAPSHOT_TABLE_MISSING = True
+                log.warning("health snapshot persistence disabled", error=str(exc))
+                return
+            log.warning("health snapshot persist failed", rows=len(rows), error=str(exc))
 
 
 health_monitor = HealthMonitor()
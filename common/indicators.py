@@ -1,6 +1,9 @@
 """기술적 지표 계산 — ta 라이브러리 기반 통합 모듈."""
 from __future__ import annotations
 
+import warnings
+
+import numpy as np
 import pandas as pd
 from ta.trend import EMAIndicator, MACD
 from ta.momentum import RSIIndicator
@@ -80,3 +83,97 @@ def full_indicators(df: pd.DataFrame) -> Dict[str, Any]:
         result["vol_ratio"] = calc_volume_ratio(volume)
 
     return result
+
+
+def _right_align_valid(values: np.ndarray) -> np.ndarray:
+    """각 열의 유효값을 원래 순서대로 아래쪽으로 모으는 행 인덱스 (결측은 위쪽).
+
+    종목별 휴장/상장일 차이로 생긴 결측 행을 제거한 것과 같은 결과를 만들어
+    와이드 패널 연산이 종목별 `history()` 연산과 정확히 일치하도록 한다.
+    """
+    valid = ~np.isnan(values)
+    # stable argsort: False(결측) 먼저, True(유효) 나중 → 유효값 상대 순서 보존
+    return np.argsort(valid, axis=0, kind="stable")
+
+
+def calc_indicator_panel(
+    close: pd.DataFrame,
+    high: pd.DataFrame,
+    volume: pd.DataFrame,
+    min_bars: int = 30,
+    rsi_period: int = 14,
+    bb_window: int = 20,
+    bb_std: float = 2.0,
+) -> pd.DataFrame:
+    """날짜 × 종목 와이드 패널에서 모든 종목의 최신 지표를 한 번에 계산.
+
+    반환: 종목 인덱스 DataFrame
+        price, rsi, bb_pos, vol_ratio, near_high, high_60d, bars, last_bar
+    결과는 종목별 `RSIIndicator`/`BollingerBands` 계산과 동일하다.
+    유효 봉이 ``min_bars`` 미만인 종목은 제외된다.
+    """
+    columns = ["price", "rsi", "bb_pos", "vol_ratio", "near_high", "high_60d", "bars", "last_bar"]
+    if close is None or close.empty:
+        return pd.DataFrame(columns=columns)
+
+    close = close.astype(float)
+    symbols = list(close.columns)
+    high = high.reindex(index=close.index, columns=symbols).astype(float)
+    volume = volume.reindex(index=close.index, columns=symbols).astype(float)
+
+    c_raw = close.to_numpy()
+    order = _right_align_valid(c_raw)
+    c = np.take_along_axis(c_raw, order, axis=0)
+    valid = ~np.isnan(c)
+    bars = valid.sum(axis=0)
+    h = np.take_along_axis(high.to_numpy(), order, axis=0)
+    v = np.take_along_axis(volume.to_numpy(), order, axis=0)
+    h[~valid] = np.nan
+    v[~valid] = np.nan
+
+    # 각 종목의 마지막 유효 봉 날짜
+    last_idx = len(close.index) - 1 - np.argmax(~np.isnan(c_raw[::-1]), axis=0)
+
+    # RSI — ta.RSIIndicator와 동일한 Wilder EWM (첫 diff는 0.0으로 취급)
+    c_df = pd.DataFrame(c)
+    diff = c_df.diff(1)
+    up = diff.where(diff > 0, 0.0).where(valid)
+    down = (-diff.where(diff < 0, 0.0)).where(valid)
+    ema_up = up.ewm(alpha=1 / rsi_period, min_periods=rsi_period, adjust=False).mean().to_numpy()[-1]
+    ema_dn = down.ewm(alpha=1 / rsi_period, min_periods=rsi_period, adjust=False).mean().to_numpy()[-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = np.where(ema_dn == 0, 100.0, 100.0 - 100.0 / (1.0 + ema_up / ema_dn))
+    rsi = np.where(np.isnan(rsi), 50.0, rsi)
+
+    price = c[-1]
+    with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # 데이터 없는 종목의 nanmean/nanmax
+        tail = c[-bb_window:]
+        mavg = tail.mean(axis=0)
+        mstd = tail.std(axis=0, ddof=0)
+        bb_upper = mavg + bb_std * mstd
+        bb_lower = mavg - bb_std * mstd
+        bb_width = bb_upper - bb_lower
+        bb_pos = np.where(bb_width > 0, (price - bb_lower) / bb_width * 100, 50.0)
+
+        vol_20 = np.nanmean(v[-20:], axis=0)
+        vol_5 = np.nanmean(v[-5:], axis=0)
+        vol_ratio = np.where(vol_20 > 0, vol_5 / vol_20, 1.0)
+
+        high_60d = np.nanmax(h[-60:], axis=0)
+        near_high = np.where(high_60d > 0, price / high_60d * 100, 50.0)
+
+    out = pd.DataFrame(
+        {
+            "price": price,
+            "rsi": np.round(rsi, 1),
+            "bb_pos": np.round(bb_pos, 1),
+            "vol_ratio": np.round(vol_ratio, 2),
+            "near_high": np.round(near_high, 1),
+            "high_60d": high_60d,
+            "bars": bars,
+            "last_bar": [close.index[i] for i in last_idx],
+        },
+        index=pd.Index(symbols, name="symbol"),
+    )
+    return out[out["bars"] >= max(min_bars, bb_window)]
@@ -0,0 +1,241 @@
+"""Deferred imports and clients for cron-launched agents.
+
+Each cron run is a fresh process, and most runs exit early (market closed,
+STOP flag, daily loss limit). Module-level ``import pandas`` / ``yfinance`` /
+``pyupbit`` and eager client construction made every one of them pay the full
+startup cost. These proxies postpone both until the first attribute access:
+
+    from common.lazy import lazy_import, lazy_client
+
+    pd = lazy_import("pandas")                  # import on first pd.<attr>
+    supabase = lazy_client(get_supabase)        # built on first use / bool()
+
+Import report (fresh interpreter, ``-X importtime``):
+
+    python -m common.lazy btc.btc_trading_agent stocks.us_stock_trading_agent
+"""
+from __future__ import annotations
+
+import importlib
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+# 지연 대상 — 보고서에서 시작 시 로드 여부를 표시
+HEAVY_MODULES = (
+    "pandas", "numpy", "scipy", "sklearn", "yfinance", "ta", "pyupbit",
+    "xgboost", "lightgbm", "catboost", "supabase", "httpx", "anthropic",
+)
+
+_MARKER = "__import_report__"
+
+_declared: Dict[str, "LazyModule"] = {}
+_declared_lock = threading.Lock()
+
+
+class LazyModule:
+    """Module proxy: ``import_module(name)`` on first attribute access."""
+
+    __slots__ = ("_lazy_name", "_lazy_module", "_lazy_lock")
+
+    def __init__(self, name: str):
+        object.__setattr__(self, "_lazy_name", name)
+        object.__setattr__(self, "_lazy_module", None)
+        object.__setattr__(self, "_lazy_lock", threading.Lock())
+
+    def _resolve(self):
+        module = self._lazy_module
+        if module is None:
+            with self._lazy_lock:
+                module = self._lazy_module
+                if module is None:
+                    module = importlib.import_module(self._lazy_name)
+                    object.__setattr__(self, "_lazy_module", module)
+        return module
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._lazy_module is not None or self._lazy_name in sys.modules
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._resolve(), attr)
+
+    def __setattr__(self, attr: str, value: Any) -> None:   # mock.patch 대상 지원
+        setattr(self._resolve(), attr, value)
+
+    def __delattr__(self, attr: str) -> None:
+        delattr(self._resolve(), attr)
+
+    def __dir__(self):
+        return dir(self._resolve())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._lazy_module is not None else "deferred"
+        return f"<lazy module {self._lazy_name!r} ({state})>"
+
+
+def lazy_import(name: str) -> Any:
+    """Module proxy for ``name``; the real module when it is already imported."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    with _declared_lock:
+        proxy = _declared.get(name)
+        if proxy is None:
+            proxy = _declared[name] = LazyModule(name)
+    return proxy
+
+
+def declared_modules() -> List[str]:
+    """Names passed to :func:`lazy_import` that have not been imported yet."""
+    with _declared_lock:
+        return [name for name, proxy in _declared.items() if not proxy.is_loaded]
+
+
+def resolve_declared(names: Sequence[str]) -> List[str]:
+    """Import the declared lazy modules among ``names`` now (e.g. before patching them)."""
+    pending = set(declared_modules())
+    loaded = []
+    for name in names:
+        if name in pending:
+            _declared[name]._resolve()
+            loaded.append(name)
+    return loaded
+
+
+class LazyClient:
+    """Client proxy: ``factory()`` runs once, on first attribute access or ``bool()``.
+
+    Factories may return None (e.g. Supabase without credentials); the proxy is
+    then falsy, so existing ``if not supabase:`` guards keep working.
+    """
+
+    __slots__ = ("_lazy_factory", "_lazy_value", "_lazy_ready", "_lazy_lock")
+
+    def __init__(self, factory: Callable[[], Any]):
+        object.__setattr__(self, "_lazy_factory", factory)
+        object.__setattr__(self, "_lazy_value", None)
+        object.__setattr__(self, "_lazy_ready", False)
+        object.__setattr__(self, "_lazy_lock", threading.Lock())
+
+    def resolve(self) -> Any:
+        if not self._lazy_ready:
+            with self._lazy_lock:
+                if not self._lazy_ready:
+                    object.__setattr__(self, "_lazy_value", self._lazy_factory())
+                    object.__setattr__(self, "_lazy_ready", True)
+        return self._lazy_value
+
+    @property
+    def is_ready(self) -> bool:
+        return self._lazy_ready
+
+    def __getattr__(self, attr: str) -> Any:
+        value = self.resolve()
+        if value is None:
+            raise AttributeError(f"{attr!r} — client unavailable (factory returned None)")
+        return getattr(value, attr)
+
+    def __setattr__(self, attr: str, value: Any) -> None:
+        setattr(self.resolve(), attr, value)
+
+    def __bool__(self) -> bool:
+        return bool(self.resolve())
+
+    def __repr__(self) -> str:
+        if not self._lazy_ready:
+            return f"<lazy client {getattr(self._lazy_factory, '__name__', '?')} (deferred)>"
+        return repr(self._lazy_value)
+
+
+def lazy_client(factory: Callable[..., Any], *args, **kwargs) -> LazyClient:
+    """Defer ``factory(*args, **kwargs)`` until the client is first used."""
+    if args or kwargs:
+        return LazyClient(lambda: factory(*args, **kwargs))
+    return LazyClient(factory)
+
+
+# ── import-time profiler ──────────────────────────────────────────────
+def _parse_importtime(stderr: str) -> List[dict]:
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cum_us, name = line[len("import time:"):].split("|", 2)
+            row = {"self_us": int(self_us), "cum_us": int(cum_us)}
+        except ValueError:
+            continue
+        name = name[1:]                                   # 구분자 뒤 공백 1칸
+        row["depth"] = (len(name) - len(name.lstrip(" "))) // 2
+        row["module"] = name.strip()
+        rows.append(row)
+    return rows
+
+
+def import_report(module: str, top: int = 15, env: Optional[dict] = None) -> dict:
+    """Import ``module`` in a fresh interpreter and summarise where startup time went.
+
+    Returns wall time, the ``top`` slowest top-level imports (cumulative) and
+    which :data:`HEAVY_MODULES` ended up loaded.
+    """
+    probe = (
+        "import sys, time; t = time.perf_counter(); "
+        f"import {module}; "
+        "ms = round((time.perf_counter() - t) * 1000, 1); "
+        f"print({_MARKER!r}, ms, ','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        capture_output=True, text=True, env={**os.environ, **(env or {})},
+    )
+    wall_ms = round((time.perf_counter() - started) * 1000, 1)
+    marker = [ln.split(" ", 2) for ln in proc.stdout.splitlines() if ln.startswith(_MARKER)]
+    ok = proc.returncode == 0 and bool(marker)
+    rows = _parse_importtime(proc.stderr)
+    # 대상 모듈 바로 아래 단계 = 대상이 직접 유발한 import
+    base = min((r["depth"] for r in rows), default=0)
+    direct = [r for r in rows if r["depth"] in (base, base + 1) and r["module"] != module]
+    direct.sort(key=lambda r: r["cum_us"], reverse=True)
+    return {
+        "module": module,
+        "ok": ok,
+        "error": None if ok else (proc.stderr.strip().splitlines() or ["no output"])[-1],
+        "import_ms": float(marker[-1][1]) if ok else None,
+        "process_ms": wall_ms,
+        "heavy_loaded": [m for m in (marker[-1][2].split(",") if ok and len(marker[-1]) > 2 else []) if m],
+        "top": [{"module": r["module"], "cum_ms": round(r["cum_us"] / 1000, 1)} for r in direct[:top]],
+    }
+
+
+def _cli(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="에이전트 모듈 import 시간 보고서")
+    parser.add_argument("modules", nargs="*", default=[
+        "btc.btc_trading_agent", "stocks.stock_trading_agent", "stocks.us_stock_trading_agent",
+    ])
+    parser.add_argument("--top", type=int, default=12)
+    args = parser.parse_args(argv)
+
+    status = 0
+    for module in args.modules:
+        rep = import_report(module, top=args.top)
+        print(f"\n== {module}")
+        if not rep["ok"]:
+            print(f"   import 실패: {rep['error']}")
+            status = 1
+            continue
+        print(f"   import {rep['import_ms']:.0f} ms | process {rep['process_ms']:.0f} ms")
+        print(f"   heavy loaded: {', '.join(rep['heavy_loaded']) or '-'}")
+        for row in rep["top"]:
+            print(f"   {row['cum_ms']:>8.1f} ms  {row['module']}")
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(_cli())
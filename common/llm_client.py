@@ -14,6 +14,7 @@ from typing import Optional
 
 from common.cache import get_cached, set_cached
 from common.logger import get_logger
+from common.tracing import traced
 
 log = get_logger("llm_client")
 
@@ -38,6 +39,7 @@ def is_quota_exceeded() -> bool:
     return get_cached(_QUOTA_CACHE_KEY) is not None
 
 
+@traced("llm")
 def call_haiku(
     prompt: str,
     system: Optional[str] = None,
@@ -141,3 +141,33 @@ def calc_max_drawdown(equity_curve: list) -> float:
         return 0.0
     except Exception:
         return 0.0
+
+
+def summarize_stage_latency(records, *, quantiles=(0.5, 0.95)) -> dict:
+    """사이클 트레이스 레코드 → (market, stage)별 지연 요약.
+
+    Args:
+        records: common.tracing 이 기록한 사이클 레코드 iterable
+        quantiles: 계산할 분위수 (0~1)
+
+    Returns:
+        dict: {(market, stage): {"n", "mean_ms", "max_ms", "p50_ms", "p95_ms", ...}}
+              stage "cycle" 은 사이클 전체 소요시간
+    """
+    import numpy as np
+
+    samples: dict = {}
+    for rec in records:
+        market = rec.get("market", "?")
+        samples.setdefault((market, "cycle"), []).append(float(rec.get("duration_ms", 0.0)))
+        for stage, ms in (rec.get("stages") or {}).items():
+            samples.setdefault((market, stage), []).append(float(ms))
+
+    out = {}
+    for key, values in samples.items():
+        arr = np.asarray(values, dtype=float)
+        row = {"n": int(arr.size), "mean_ms": float(arr.mean()), "max_ms": float(arr.max())}
+        for q in quantiles:
+            row[f"p{int(round(q * 100))}_ms"] = float(np.quantile(arr, q))
+        out[key] = row
+    return out
@@ -45,6 +45,12 @@ try:
         "Supabase query count",
         ["operation", "status"],
     )
+    STAGE_LATENCY = Histogram(
+        "openclaw_stage_duration_seconds",
+        "Per-cycle trading stage duration",
+        ["market", "stage"],
+        buckets=[0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0],
+    )
 
     _ENABLED = True
 
@@ -92,3 +98,9 @@ def record_supabase_query(operation: str, status: str = "ok") -> None:
     """Supabase 쿼리 카운터 증가."""
     if _ENABLED:
         SUPABASE_QUERY.labels(operation=operation, status=status).inc()
+
+
+def observe_stage_latency(market: str, stage: str, seconds: float) -> None:
+    """사이클 스테이지 소요시간 히스토그램 기록."""
+    if _ENABLED:
+        STAGE_LATENCY.labels(market=market, stage=stage).observe(seconds)
@@ -0,0 +1,548 @@
+"""Record / replay layer for the trading agents' external data access.
+
+``record`` wraps the data-access functions (pyupbit, yfinance, Kiwoom,
+Supabase reads, plain ``requests`` GETs such as Fear & Greed, the LLM call)
+and captures every response, pickled at call time, into a gzip archive.
+``replay`` serves those responses back, optionally sleeping the recorded
+latency (scaled), so complete trading cycles rerun deterministically offline:
+
+    python -m common.replay record --agent btc --archive /tmp/btc.replay.gz
+    python -m common.replay replay --agent btc --archive /tmp/btc.replay.gz \\
+        --cycles 3 --latency 1.0 --profile-dir /tmp/prof
+
+Matching: the exact call key (function + arguments) is served in recorded
+order, repeating its last response once exhausted; a call whose arguments
+changed (e.g. a date computed from ``now()``) takes the next unconsumed
+response of the same function. Writes (Supabase insert/update, ``requests.post``)
+pass through live while recording and become no-op stubs in replay; order
+calls (Upbit, Kiwoom, Alpaca) are recorded and replayed like reads. Replay
+fails closed: any other HTTP request (``requests`` sessions, ``httpx``
+clients) raises :class:`ReplayMiss` for reads and gets an empty stub for
+writes, so nothing reaches a live endpoint.
+
+Cron runs can record too: ``OPENCLAW_REPLAY_MODE=record`` and
+``OPENCLAW_REPLAY_ARCHIVE=<path>`` (see :func:`install_from_env`).
+Archives are pickles — only replay files you recorded yourself.
+"""
+from __future__ import annotations
+
+import argparse
+import atexit
+import functools
+import gzip
+import importlib
+import json
+import os
+import pickle
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from common.logger import get_logger
+
+log = get_logger("replay")
+
+ARCHIVE_VERSION = 1
+MODES = ("record", "replay")
+
+AGENTS = {
+    "btc": "btc.btc_trading_agent",
+    "kr": "stocks.stock_trading_agent",
+    "us": "stocks.us_stock_trading_agent",
+}
+
+
+class ReplayMiss(LookupError):
+    """Replay archive has no response for this call."""
+
+
+@dataclass(frozen=True)
+class Target:
+    """A patch point: ``attr`` (``"func"`` or ``"Class.method"``) in ``module``.
+
+    kind: ``read`` (recorded/replayed), ``order`` (same, named separately in
+    stats), ``write`` (live while recording, stubbed in replay).
+    ``fanout``: the call spawns worker threads that re-enter other targets of
+    the same package, which must not be recorded separately.
+    """
+    module: str
+    attr: str
+    kind: str = "read"
+    fanout: bool = False
+
+    @property
+    def namespace(self) -> str:
+        return f"{self.module}.{self.attr}"
+
+    @property
+    def family(self) -> str:
+        return self.module.split(".")[0]
+
+
+_UPBIT_READS = ("get_balance", "get_balances", "get_order", "get_amount", "get_avg_buy_price")
+_UPBIT_ORDERS = ("buy_market_order", "sell_market_order", "buy_limit_order", "sell_limit_order", "cancel_order")
+_KIWOOM_READS = ("get_stock_info", "get_investor_trend", "get_current_price", "get_account_evaluation",
+                 "get_daily_balance_pnl", "get_settlement_balance", "get_asset_summary")
+
+DEFAULT_TARGETS: Tuple[Target, ...] = (
+    Target("pyupbit", "get_ohlcv"),
+    Target("pyupbit", "get_current_price"),
+    Target("pyupbit", "get_orderbook"),
+    *(Target("pyupbit", f"Upbit.{m}") for m in _UPBIT_READS),
+    *(Target("pyupbit", f"Upbit.{m}", "order") for m in _UPBIT_ORDERS),
+    Target("yfinance", "download", fanout=True),
+    Target("yfinance", "Ticker.history"),
+    Target("yfinance", "Ticker.get_info"),
+    # stock agents import the client both as ``kiwoom_client`` and ``stocks.kiwoom_client``
+    *(Target(mod, f"KiwoomClient.{m}") for mod in ("kiwoom_client", "stocks.kiwoom_client") for m in _KIWOOM_READS),
+    *(Target(mod, "KiwoomClient.place_order", "order") for mod in ("kiwoom_client", "stocks.kiwoom_client")),
+    # Alpaca paper/live orders go through ``requests.request`` — tap the broker itself
+    Target("stocks.us_broker", "AlpacaBroker.get_account"),
+    Target("stocks.us_broker", "AlpacaBroker.submit_order", "order"),
+    Target("stocks.us_broker", "AlpacaBroker.route_and_execute", "order"),
+    Target("common.llm_client", "call_haiku"),
+    Target("requests", "get"),
+    Target("requests", "post", "write"),
+)
+
+# postgrest query builders: reads (GET/HEAD) recorded, writes stubbed in replay
+_POSTGREST_MODULE = "postgrest._sync.request_builder"
+
+
+def _call_key(args: Sequence[Any], kwargs: Dict[str, Any]) -> str:
+    return repr((tuple(args), sorted(kwargs.items())))
+
+
+def _postgrest_key(builder) -> Tuple[str, str]:
+    method = str(getattr(builder, "http_method", "GET")).upper()
+    key = repr((method, str(getattr(builder, "path", "")), str(getattr(builder, "params", "")),
+                getattr(builder, "json", None)))
+    return method, key
+
+
+def _stub_http_response():
+    import requests
+
+    resp = requests.Response()
+    resp.status_code = 200
+    resp._content = b"{}"
+    resp.headers["Content-Type"] = "application/json"
+    return resp
+
+
+def _stub_httpx_response(request):
+    import httpx
+
+    return httpx.Response(200, json={}, request=request)
+
+
+_READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def _stub_postgrest_response():
+    from postgrest import APIResponse
+
+    return APIResponse(data=[], count=None)
+
+
+def _dump_error(exc: BaseException) -> bytes:
+    try:
+        return pickle.dumps(exc, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        return pickle.dumps(RuntimeError(f"{type(exc).__name__}: {exc}"))
+
+
+class ReplayArchive:
+    """Ordered list of recorded calls, stored as a gzip-compressed pickle."""
+
+    def __init__(self, entries: Optional[List[dict]] = None, meta: Optional[dict] = None):
+        self.entries: List[dict] = entries or []
+        self.meta: dict = meta or {}
+        self._lock = threading.Lock()
+
+    def add(self, namespace: str, key: str, elapsed: float, payload: bytes, ok: bool) -> None:
+        with self._lock:
+            self.entries.append({"ns": namespace, "key": key, "elapsed": elapsed, "ok": ok, "payload": payload})
+
+    def save(self, path: Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with self._lock:
+            doc = {"version": ARCHIVE_VERSION, "meta": self.meta, "entries": list(self.entries)}
+        with gzip.open(tmp, "wb", compresslevel=6) as fh:
+            pickle.dump(doc, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path: Path) -> "ReplayArchive":
+        with gzip.open(Path(path), "rb") as fh:
+            doc = pickle.load(fh)
+        if doc.get("version") != ARCHIVE_VERSION:
+            raise ValueError(f"unsupported replay archive version: {doc.get('version')}")
+        return cls(doc.get("entries") or [], doc.get("meta") or {})
+
+
+class ReplaySession:
+    """Patches the targets for one record or replay session.
+
+    Use as a context manager, or call :meth:`install` / :meth:`uninstall`.
+    In record mode the archive is written on uninstall.
+    """
+
+    def __init__(
+        self,
+        mode: str,
+        archive_path: Path,
+        latency_scale: float = 0.0,
+        targets: Sequence[Target] = DEFAULT_TARGETS,
+        patch_postgrest: bool = True,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}: {mode!r}")
+        self.mode = mode
+        self.archive_path = Path(archive_path)
+        self.latency_scale = max(0.0, float(latency_scale))
+        self.targets = tuple(targets)
+        self.patch_postgrest = patch_postgrest
+        self._sleep = sleep
+        self.archive = ReplayArchive.load(self.archive_path) if mode == "replay" else ReplayArchive(
+            meta={"created": time.time(), "argv": list(sys.argv)})
+        self._patches: List[Tuple[Any, str, Any]] = []
+        self._local = threading.local()
+        self._fanout_lock = threading.Lock()
+        self._fanout_active: Dict[str, int] = defaultdict(int)
+        self._by_key: Dict[Tuple[str, str], deque] = defaultdict(deque)
+        self._by_ns: Dict[str, deque] = defaultdict(deque)
+        self._last: Dict[Tuple[str, str], dict] = {}
+        self._consumed: set = set()
+        self._serve_lock = threading.Lock()
+        self.stats: Dict[str, Any] = {"calls": 0, "recorded": 0, "misses": 0, "stubbed": 0,
+                                      "simulated_latency": 0.0, "by_namespace": defaultdict(int)}
+        if mode == "replay":
+            for i, e in enumerate(self.archive.entries):
+                self._by_key[(e["ns"], e["key"])].append(i)
+                self._by_ns[e["ns"]].append(i)
+
+    # ── lifecycle ────────────────────────────────────────────────────
+    def __enter__(self) -> "ReplaySession":
+        return self.install()
+
+    def __exit__(self, *exc) -> None:
+        self.uninstall()
+
+    def install(self) -> "ReplaySession":
+        """Patch every target whose module is imported or declared lazily by the agent.
+
+        Modules the process never asked for are not imported.
+        """
+        from common.lazy import resolve_declared
+
+        resolve_declared(sorted({t.module for t in self.targets}))
+        replacements: Dict[int, Any] = {}
+        for target in self.targets:
+            module = sys.modules.get(target.module)
+            if module is None:
+                continue
+            owner_name, _, name = target.attr.rpartition(".")
+            owner = getattr(module, owner_name) if owner_name else module
+            original = getattr(owner, name, None)
+            if original is None or getattr(original, "__replay_wrapped__", False):
+                continue
+            wrapper = self._wrap(target, original, bound=bool(owner_name))
+            self._set(owner, name, original, wrapper)
+            if not owner_name:
+                replacements[id(original)] = (original, wrapper)
+        if self.patch_postgrest:
+            self._install_postgrest()
+        self._rebind_imported_names(replacements)
+        if self.mode == "replay":
+            self._install_network_guard()
+        log.info("replay layer installed", mode=self.mode, patches=len(self._patches),
+                 archive=str(self.archive_path))
+        return self
+
+    def uninstall(self) -> None:
+        for owner, name, original in reversed(self._patches):
+            setattr(owner, name, original)
+        self._patches.clear()
+        if self.mode == "record":
+            self.archive.save(self.archive_path)
+            log.info("replay archive saved", path=str(self.archive_path), entries=len(self.archive.entries))
+
+    def _set(self, owner, name: str, original, wrapper) -> None:
+        setattr(owner, name, wrapper)
+        self._patches.append((owner, name, original))
+
+    def _rebind_imported_names(self, replacements: Dict[int, Any]) -> None:
+        """``from pyupbit import get_ohlcv`` style bindings point at the original — swap them too."""
+        if not replacements:
+            return
+        for module in list(sys.modules.values()):
+            namespace = getattr(module, "__dict__", None)
+            if not isinstance(namespace, dict):
+                continue
+            for name, value in list(namespace.items()):
+                hit = replacements.get(id(value))
+                if hit is not None and hit[0] is value:
+                    self._set(module, name, value, hit[1])
+
+    def _install_postgrest(self) -> None:
+        module = sys.modules.get(_POSTGREST_MODULE)
+        if module is None:
+            # Supabase 클라이언트가 지연 생성되면 아직 import 전 — 설치되어 있으면 지금 로드
+            try:
+                module = importlib.import_module(_POSTGREST_MODULE)
+            except ImportError:
+                return
+        for cls in vars(module).values():
+            original = vars(cls).get("execute") if isinstance(cls, type) else None
+            if original is None or getattr(original, "__replay_wrapped__", False):
+                continue
+            self._set(cls, "execute", original, self._wrap_postgrest(original))
+
+    def _install_network_guard(self) -> None:
+        """Replay fails closed: HTTP that no target served never reaches the network.
+
+        Reads raise :class:`ReplayMiss`; writes (POST/PUT/PATCH/DELETE) get an
+        empty 200 stub, so an untapped order path cannot reach a live broker.
+        """
+        try:
+            import requests
+        except ImportError:
+            requests = None
+        if requests is not None:
+            original = requests.Session.request
+
+            @functools.wraps(original)
+            def request(session, method, url, *args, **kwargs):
+                return self._blocked(str(method), str(url), _stub_http_response)
+
+            request.__replay_wrapped__ = True
+            self._set(requests.Session, "request", original, request)
+
+        try:
+            import httpx
+        except ImportError:
+            return
+        sync_send, async_send = httpx.Client.send, httpx.AsyncClient.send
+
+        @functools.wraps(sync_send)
+        def send(client, request, *args, **kwargs):
+            return self._blocked(request.method, str(request.url), lambda: _stub_httpx_response(request))
+
+        @functools.wraps(async_send)
+        async def asend(client, request, *args, **kwargs):
+            return self._blocked(request.method, str(request.url), lambda: _stub_httpx_response(request))
+
+        send.__replay_wrapped__ = asend.__replay_wrapped__ = True
+        self._set(httpx.Client, "send", sync_send, send)
+        self._set(httpx.AsyncClient, "send", async_send, asend)
+
+    def _blocked(self, method: str, url: str, stub: Callable[[], Any]) -> Any:
+        method = method.upper()
+        if method in _READ_METHODS:
+            self.stats["misses"] += 1
+            raise ReplayMiss(f"unrecorded network read {method} {url[:200]}")
+        self.stats["stubbed"] += 1
+        log.warning("replay blocked network write", method=method, url=url[:200])
+        return stub()
+
+    # ── wrappers ─────────────────────────────────────────────────────
+    def _wrap(self, target: Target, original: Callable, bound: bool) -> Callable:
+        namespace = target.namespace
+        stub = _stub_http_response if target.kind == "write" else None
+
+        @functools.wraps(original)
+        def wrapper(*args, **kwargs):
+            key = _call_key(args[1:] if bound else args, kwargs)
+            if target.kind == "write":
+                if self.mode == "replay":
+                    self.stats["stubbed"] += 1
+                    return stub()
+                return original(*args, **kwargs)
+            return self._dispatch(target, namespace, key, lambda: original(*args, **kwargs))
+
+        wrapper.__replay_wrapped__ = True
+        return wrapper
+
+    def _wrap_postgrest(self, original: Callable) -> Callable:
+        target = Target("supabase", "execute")
+
+        @functools.wraps(original)
+        def execute(builder, *args, **kwargs):
+            method, key = _postgrest_key(builder)
+            if method not in ("GET", "HEAD"):
+                if self.mode == "replay":
+                    self.stats["stubbed"] += 1
+                    return _stub_postgrest_response()
+                return original(builder, *args, **kwargs)
+            return self._dispatch(target, "supabase.read", key, lambda: original(builder, *args, **kwargs))
+
+        execute.__replay_wrapped__ = True
+        return execute
+
+    def _nested(self, target: Target) -> bool:
+        """Inside another recorded call (same thread, or a fan-out call's worker threads)."""
+        return getattr(self._local, "depth", 0) > 0 or self._fanout_active.get(target.family, 0) > 0
+
+    def _dispatch(self, target: Target, namespace: str, key: str, call: Callable[[], Any]) -> Any:
+        if self.mode == "replay":
+            return self._serve(namespace, key)
+        if self._nested(target):
+            return call()
+
+        self._local.depth = getattr(self._local, "depth", 0) + 1
+        if target.fanout:
+            with self._fanout_lock:
+                self._fanout_active[target.family] += 1
+        t0 = time.perf_counter()
+        try:
+            value = call()
+        except BaseException as exc:
+            self.archive.add(namespace, key, time.perf_counter() - t0, _dump_error(exc), ok=False)
+            raise
+        else:
+            try:
+                payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception as exc:
+                log.warning("unpicklable response not recorded", ns=namespace, error=str(exc)[:120])
+            else:
+                self.archive.add(namespace, key, time.perf_counter() - t0, payload, ok=True)
+                self.stats["recorded"] += 1
+            return value
+        finally:
+            self._local.depth -= 1
+            if target.fanout:
+                with self._fanout_lock:
+                    self._fanout_active[target.family] -= 1
+            self.stats["calls"] += 1
+            self.stats["by_namespace"][namespace] += 1
+
+    def _next_index(self, namespace: str, key: str) -> Optional[int]:
+        with self._serve_lock:
+            exact = self._by_key.get((namespace, key))
+            while exact and exact[0] in self._consumed:
+                exact.popleft()
+            if exact:
+                idx = exact.popleft()
+            elif (namespace, key) in self._last:
+                return self._last[(namespace, key)]
+            else:
+                pending = self._by_ns.get(namespace)
+                while pending and pending[0] in self._consumed:
+                    pending.popleft()
+                if not pending:
+                    return None
+                idx = pending.popleft()
+            self._consumed.add(idx)
+            self._last[(namespace, key)] = idx
+            return idx
+
+    def _serve(self, namespace: str, key: str) -> Any:
+        self.stats["calls"] += 1
+        self.stats["by_namespace"][namespace] += 1
+        idx = self._next_index(namespace, key)
+        if idx is None:
+            self.stats["misses"] += 1
+            raise ReplayMiss(f"{namespace} {key[:200]}")
+        entry = self.archive.entries[idx]
+        delay = entry["elapsed"] * self.latency_scale
+        if delay > 0:
+            self.stats["simulated_latency"] += delay
+            self._sleep(delay)
+        value = pickle.loads(entry["payload"])
+        if not entry["ok"]:
+            raise value
+        return value
+
+    def snapshot_stats(self) -> dict:
+        out = dict(self.stats)
+        out["by_namespace"] = dict(self.stats["by_namespace"])
+        return out
+
+
+_ACTIVE: Optional[ReplaySession] = None
+
+
+def install_from_env() -> Optional[ReplaySession]:
+    """Install a session from ``OPENCLAW_REPLAY_MODE`` / ``OPENCLAW_REPLAY_ARCHIVE``.
+
+    No-op unless both are set. Call after the agent's imports; record-mode
+    archives are written at exit.
+    """
+    global _ACTIVE
+    mode = os.environ.get("OPENCLAW_REPLAY_MODE", "").strip().lower()
+    path = os.environ.get("OPENCLAW_REPLAY_ARCHIVE", "").strip()
+    if _ACTIVE is not None or mode not in MODES or not path:
+        return _ACTIVE
+    latency = float(os.environ.get("OPENCLAW_REPLAY_LATENCY", "0") or 0)
+    _ACTIVE = ReplaySession(mode, Path(path), latency_scale=latency).install()
+    atexit.register(_ACTIVE.uninstall)
+    return _ACTIVE
+
+
+def run_cycles(agent: str, session: ReplaySession, cycles: int = 1,
+               profile_dir: Optional[Path] = None) -> List[dict]:
+    """Run ``agent.run_trading_cycle`` ``cycles`` times under ``session``; per-cycle timings."""
+    module = importlib.import_module(AGENTS[agent])
+    reports = []
+    with session:
+        for n in range(1, cycles + 1):
+            before = session.snapshot_stats()
+            profiler = None
+            if profile_dir is not None:
+                import cProfile
+
+                profiler = cProfile.Profile()
+                profiler.enable()
+            t0 = time.perf_counter()
+            error = None
+            try:
+                module.run_trading_cycle()
+            except Exception as exc:
+                error = f"{type(exc).__name__}: {exc}"
+            wall = time.perf_counter() - t0
+            if profiler is not None:
+                profiler.disable()
+                Path(profile_dir).mkdir(parents=True, exist_ok=True)
+                profiler.dump_stats(str(Path(profile_dir) / f"{agent}_cycle{n}.prof"))
+            after = session.snapshot_stats()
+            reports.append({
+                "agent": agent,
+                "mode": session.mode,
+                "cycle": n,
+                "wall_s": round(wall, 4),
+                "calls": after["calls"] - before["calls"],
+                "misses": after["misses"] - before["misses"],
+                "simulated_latency_s": round(after["simulated_latency"] - before["simulated_latency"], 4),
+                "error": error,
+            })
+    return reports
+
+
+def _cli(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Record or replay trading cycles")
+    parser.add_argument("mode", choices=MODES)
+    parser.add_argument("--agent", choices=sorted(AGENTS), required=True)
+    parser.add_argument("--archive", required=True)
+    parser.add_argument("--cycles", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.0, help="replay: recorded latency multiplier")
+    parser.add_argument("--profile-dir", default=None, help="write cProfile stats per cycle")
+    args = parser.parse_args(argv)
+
+    session = ReplaySession(args.mode, Path(args.archive), latency_scale=args.latency)
+    profile_dir = Path(args.profile_dir) if args.profile_dir else None
+    for report in run_cycles(args.agent, session, max(1, args.cycles), profile_dir):
+        print(json.dumps(report, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(_cli())
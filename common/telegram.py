@@ -1,28 +1,54 @@
 """Telegram message sender with priority-based routing.
 
 Priority.URGENT    🔴  즉시 발송: 손절 체결·에이전트 다운·API 에러
-Priority.IMPORTANT 🟡  즉시 발송: 매수/매도 체결·스코어 급변
+Priority.IMPORTANT 🟡  즉시 발송: 매수/매도 체결·스코어 급변 (연속 발송은 digest로 병합)
 Priority.INFO      🟢  버퍼 저장: 일일 리포트에만 포함 (개별 발송 안 함)
+
+발송은 백그라운드 디스패처가 담당한다 — ``send_telegram``은 큐에 넣고 바로 반환
+(True = 접수됨). 실제 발송 여부가 필요한 호출부는 ``deliver_telegram``으로 기다린다.
+- 우선순위 큐: URGENT → IMPORTANT 순서
+- 토큰 버킷 rate-limit (호출 스레드에서 sleep 하지 않음), 429 Retry-After 준수
+- IMPORTANT 메시지 burst는 4096자 이내 digest 1건으로 병합
+- outbox(append-only JSONL)에 먼저 기록 → 프로세스가 죽어도 다음 프로세스가 재발송
+- 프로세스 종료 시(atexit) 남은 큐를 최대 ``_EXIT_DRAIN_SECONDS``까지 발송
 """
+import atexit
+import heapq
 import json
 import os
+import threading
 import time
+import uuid
 from enum import Enum
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 
 import requests
 
 # v6.2 B6: 텔레그램 실패 로깅
 from common.logger import get_logger
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
 log = get_logger(__name__)
 
-_last_send_ts = 0.0
-_MIN_INTERVAL = 1.0  # rate-limit: 1 msg/sec
+_MIN_INTERVAL = 1.0  # rate-limit: 1 msg/sec (토큰 버킷 refill 간격)
+_BURST = 3           # 토큰 버킷 용량
+_MAX_MESSAGE_CHARS = 4096
+_DIGEST_SEPARATOR = "\n\n"
+_EXIT_DRAIN_SECONDS = 10.0
 
-# INFO 등급 버퍼 — 프로세스 간 공유를 위해 파일 기반
-_INFO_BUFFER_FILE = Path(__file__).resolve().parents[1] / ".telegram_info_buffer.json"
+_ROOT = Path(__file__).resolve().parents[1]
+# INFO 등급 버퍼 — 프로세스 간 공유를 위해 append-only JSONL
+_INFO_BUFFER_FILE = _ROOT / ".telegram_info_buffer.jsonl"
+# 구버전 단일 JSON 버퍼 — 처음 접근할 때 JSONL로 옮기고 삭제
+_LEGACY_INFO_BUFFER_FILE = _ROOT / ".telegram_info_buffer.json"
+# 발송 대기 큐 spool — {"id",...} 메시지 / {"ack": id} 완료 / {"claim": id, "pid"} 인계
+_OUTBOX_FILE = _ROOT / ".telegram_outbox.jsonl"
+_OUTBOX_COMPACT_BYTES = 1 << 20
 
 
 class Priority(str, Enum):
@@ -32,10 +58,102 @@ class Priority(str, Enum):
     INFO      = "info"       # 🟢 일일 리포트 버퍼에만 저장
 
 
+_PRIORITY_RANK = {Priority.URGENT: 0, Priority.IMPORTANT: 1}
+
+
+# ── append-only spool helpers ───────────────────────────────────────────────
+
+def _append_jsonl(path: Path, row: dict) -> None:
+    """한 줄을 O_APPEND + flock으로 기록 — 여러 프로세스가 동시에 써도 줄이 섞이지 않음."""
+    data = (json.dumps(row, ensure_ascii=False) + "\n").encode("utf-8")
+    fd = os.open(str(path), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        os.write(fd, data)
+    finally:
+        os.close(fd)
+
+
+def _read_jsonl(path: Path) -> list[dict]:
+    if not path.exists():
+        return []
+    rows = []
+    with path.open("r", encoding="utf-8") as fp:
+        for line in fp:
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                continue  # 쓰는 중인 마지막 줄
+    return rows
+
+
+def _drain_jsonl(path: Path, keep: Optional[Callable[[list[dict]], list[dict]]] = None) -> list[dict]:
+    """잠금 상태에서 전체를 읽고 비운다 (``keep``이 돌려준 줄만 다시 기록)."""
+    if not path.exists():
+        return []
+    with path.open("r+", encoding="utf-8") as fp:
+        if fcntl is not None:
+            fcntl.flock(fp.fileno(), fcntl.LOCK_EX)
+        rows = []
+        for line in fp.read().splitlines():
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                continue
+        kept = keep(rows) if keep is not None else []
+        fp.seek(0)
+        fp.truncate()
+        if kept:
+            fp.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in kept))
+        return rows
+
+
+# ── INFO 버퍼 ────────────────────────────────────────────────────────────────
+
+def _migrate_legacy_info_buffer() -> None:
+    """구버전 ``{"date","msgs","hours"}`` JSON 버퍼를 JSONL 줄로 옮기고 삭제.
+
+    rename으로 먼저 선점하므로 여러 프로세스가 동시에 불러도 한 번만 옮겨진다.
+    hours 버킷에 남지 않은 메시지는 이미 브리핑된 것 — 시각을 알 수 없으므로
+    hour "" 로 기록하고 브리핑 완료 표시를 함께 남긴다.
+    """
+    legacy = _LEGACY_INFO_BUFFER_FILE
+    if not legacy.exists():
+        return
+    claimed = legacy.with_name(f"{legacy.name}.{os.getpid()}.migrating")
+    try:
+        legacy.rename(claimed)
+    except OSError:
+        return  # 다른 프로세스가 먼저 가져감
+    try:
+        data = json.loads(claimed.read_text(encoding="utf-8"))
+        date_str = str(data.get("date") or time.strftime("%Y-%m-%d"))
+        pending = {str(h): list(m or []) for h, m in (data.get("hours") or {}).items()}
+        rows = []
+        for msg in data.get("msgs") or []:
+            hour = next((h for h, bucket in pending.items() if msg in bucket), "")
+            if hour:
+                pending[hour].remove(msg)
+            rows.append({"date": date_str, "hour": hour, "msg": msg})
+        briefed = {h for h, m in (data.get("hours") or {}).items() if not m}
+        if any(not r["hour"] for r in rows):
+            briefed.add("")
+        rows += [{"date": date_str, "hour": h, "briefed": True} for h in sorted(briefed)]
+        for row in rows:
+            _append_jsonl(_INFO_BUFFER_FILE, row)
+        log.info("legacy info buffer migrated", rows=len(rows))
+    except Exception as exc:
+        log.warning("legacy info buffer migration failed", error=str(exc)[:200])
+    finally:
+        claimed.unlink(missing_ok=True)
+
+
 def append_info_buffer(msg: str) -> None:
     """INFO 등급 메시지를 버퍼에 추가 (즉시 발송하지 않음).
 
-    구조 (역호환 유지):
+    append-only 한 줄 기록 — 파일 전체 read-modify-write 없음.
+    ``load_info_buffer()``가 기존 구조로 재구성한다:
         {
           "date": "YYYY-MM-DD",
           "msgs": [...],              # 일일 리포트용 전체 메시지
@@ -43,95 +161,437 @@ def append_info_buffer(msg: str) -> None:
         }
     """
     try:
-        today = time.strftime("%Y-%m-%d")
-        hour = time.strftime("%H")
-        data: dict = {}
-        if _INFO_BUFFER_FILE.exists():
-            try:
-                data = json.loads(_INFO_BUFFER_FILE.read_text(encoding="utf-8"))
-            except Exception:
-                data = {}
+        _migrate_legacy_info_buffer()
+        _append_jsonl(_INFO_BUFFER_FILE, {
+            "date": time.strftime("%Y-%m-%d"),
+            "hour": time.strftime("%H"),
+            "msg": msg,
+        })
+    except Exception:
+        # 버퍼 기록 실패는 트레이딩 로직에 영향을 주지 않도록 조용히 무시
+        pass
 
-        if data.get("date") != today:
-            # 날짜가 바뀌면 새로 시작 (이전 데이터는 덮어씀)
-            data = {"date": today, "msgs": [], "hours": {}}
 
-        # 일일 리포트용 전체 목록
-        msgs = data.setdefault("msgs", [])
-        msgs.append(msg)
+def _info_view(rows: list[dict]) -> dict:
+    """최신 날짜의 메시지만으로 {"date","msgs","hours"} 구성 (날짜가 바뀌면 새로 시작)."""
+    dates = [r.get("date") for r in rows if r.get("date")]
+    if not dates:
+        return {}
+    today = max(dates)
+    briefed = {r.get("hour") for r in rows if r.get("briefed") and r.get("date") == today}
+    msgs: list = []
+    hours: dict = {}
+    for r in rows:
+        if r.get("date") != today or "msg" not in r:
+            continue
+        msgs.append(r["msg"])
+        if r.get("hour") not in briefed:
+            hours.setdefault(r.get("hour"), []).append(r["msg"])
+    return {"date": today, "msgs": msgs, "hours": hours}
+
+
+def load_info_buffer() -> dict:
+    """현재 INFO 버퍼를 {"date","msgs","hours"} 형태로 반환 (이미 브리핑한 시각 제외)."""
+    try:
+        _migrate_legacy_info_buffer()
+        return _info_view(_read_jsonl(_INFO_BUFFER_FILE))
+    except Exception:
+        return {}
 
-        # 시각별 버킷 (매시 정각 요약용)
-        hours = data.setdefault("hours", {})
-        bucket = hours.setdefault(hour, [])
-        bucket.append(msg)
 
-        _INFO_BUFFER_FILE.write_text(
-            json.dumps(data, ensure_ascii=False), encoding="utf-8"
-        )
+def mark_info_hour_briefed(date_str: str, hour: str) -> None:
+    """매시 브리핑 후 해당 시각 버킷을 비운 것으로 표시 (append-only)."""
+    try:
+        _migrate_legacy_info_buffer()
+        _append_jsonl(_INFO_BUFFER_FILE, {"date": date_str, "hour": hour, "briefed": True})
     except Exception:
-        # 버퍼 기록 실패는 트레이딩 로직에 영향을 주지 않도록 조용히 무시
         pass
 
 
 def flush_info_buffer() -> list:
     """버퍼에 쌓인 INFO 메시지를 반환하고 초기화. 일일 리포트 발송 시 호출."""
     try:
-        if not _INFO_BUFFER_FILE.exists():
-            return []
-        data = json.loads(_INFO_BUFFER_FILE.read_text(encoding="utf-8"))
-        msgs = data.get("msgs", [])
-        _INFO_BUFFER_FILE.write_text(
-            json.dumps({"date": time.strftime("%Y-%m-%d"), "msgs": []}, ensure_ascii=False),
-            encoding="utf-8",
-        )
-        return msgs
+        _migrate_legacy_info_buffer()
+        return _info_view(_drain_jsonl(_INFO_BUFFER_FILE)).get("msgs", [])
     except Exception:
         return []
 
 
+# ── 발송 디스패처 ────────────────────────────────────────────────────────────
+
+class TokenBucket:
+    """``rate`` tokens/sec, 최대 ``capacity``개 — ``wait_time()``이 0이면 토큰 소비."""
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.clock = clock
+        self.tokens = float(capacity)
+        self.updated = clock()
+        self.paused_until = 0.0
+
+    def wait_time(self) -> float:
+        now = self.clock()
+        if now < self.paused_until:
+            return self.paused_until - now
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+    def pause(self, seconds: float) -> None:
+        """429 Retry-After: 지정 시간 동안 발송 중지."""
+        self.paused_until = max(self.paused_until, self.clock() + seconds)
+        self.tokens = 0.0
+
+
+def _post_message(text: str, parse_mode: str) -> tuple[bool, int, float]:
+    """(ok, http_status, retry_after_sec). 토큰 미설정 시 (False, 0, 0)."""
+    token = os.environ.get("TELEGRAM_BOT_TOKEN", "")
+    chat_id = os.environ.get("TELEGRAM_CHAT_ID", "")
+    if not token or not chat_id:
+        return False, 0, 0.0
+    resp = requests.post(
+        f"https://api.telegram.org/bot{token}/sendMessage",
+        json={"chat_id": chat_id, "text": text, "parse_mode": parse_mode},
+        timeout=10,
+    )
+    retry_after = 0.0
+    if resp.status_code == 429:
+        retry_after = float(resp.headers.get("Retry-After", 2))
+    return bool(resp.ok), int(resp.status_code), retry_after
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except Exception:
+        return False
+    return True
+
+
+class TelegramDispatcher:
+    """우선순위 큐 + 토큰 버킷 + outbox spool 기반 백그라운드 발송기."""
+
+    def __init__(
+        self,
+        outbox_path: Path = _OUTBOX_FILE,
+        post: Callable[[str, str], tuple[bool, int, float]] = _post_message,
+        rate: float = 1.0 / _MIN_INTERVAL,
+        burst: int = _BURST,
+        max_chars: int = _MAX_MESSAGE_CHARS,
+    ):
+        self.outbox_path = Path(outbox_path)
+        self.post = post
+        self.bucket = TokenBucket(rate, burst)
+        self.max_chars = max_chars
+        self.stats = {"queued": 0, "sent": 0, "messages": 0, "failed": 0, "recovered": 0}
+        self._heap: list = []
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._deadline: Optional[float] = None
+        self._inflight = 0
+        self._waiters: dict[str, Optional[bool]] = {}   # id → None(대기) / True(발송) / False(포기)
+        self._thread: Optional[threading.Thread] = None
+
+    # ── enqueue ──
+    def submit(self, text: str, parse_mode: str, priority: Priority, retries: int, track: bool = False) -> str:
+        """큐에 넣고 id 반환. ``track=True``면 ``wait_delivered(id)``로 결과를 기다릴 수 있다."""
+        record = {
+            "id": uuid.uuid4().hex,
+            "pid": os.getpid(),
+            "ts": time.time(),
+            "priority": Priority(priority).value,
+            "text": text,
+            "parse_mode": parse_mode,
+            "retries": int(retries),
+        }
+        try:
+            _append_jsonl(self.outbox_path, record)
+        except Exception as exc:
+            log.warning(f"텔레그램 outbox 기록 실패: {exc}")
+        if track:
+            with self._cond:
+                self._waiters[record["id"]] = None
+        self._push(record)
+        self.stats["queued"] += 1
+        return record["id"]
+
+    def _push(self, record: dict) -> None:
+        rank = _PRIORITY_RANK.get(Priority(record.get("priority", "urgent")), 0)
+        with self._cond:
+            self._seq += 1
+            heapq.heappush(self._heap, (rank, self._seq, record))
+            self._cond.notify()
+        self._ensure_thread()
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="telegram-dispatcher", daemon=True)
+            self._thread.start()
+
+    def recover(self, adopt_own: bool = True) -> int:
+        """죽은 프로세스가 남긴 미발송 메시지를 인계받아 큐에 넣는다.
+
+        ``adopt_own=True``는 시작 시 1회용 — 자기 pid 기록을 pid 재사용된 이전
+        프로세스의 잔재로 보고 인계한다. 실행 중 compaction은 False로 호출해
+        이 프로세스가 아직 들고 있는 메시지를 다시 큐에 넣지 않는다.
+        """
+        if not self.outbox_path.exists():
+            return 0
+        adopted: list[dict] = []
+
+        def _keep(rows: list[dict]) -> list[dict]:
+            acked = {r["ack"] for r in rows if "ack" in r}
+            owner: dict[str, int] = {}
+            pending: dict[str, dict] = {}
+            for r in rows:
+                if "claim" in r:
+                    owner[r["claim"]] = int(r.get("pid", 0))
+                elif "id" in r and r["id"] not in acked:
+                    pending[r["id"]] = r
+                    owner.setdefault(r["id"], int(r.get("pid", 0)))
+            keep = []
+            for mid, rec in pending.items():
+                if owner[mid] == os.getpid():
+                    held = not adopt_own
+                else:
+                    held = _pid_alive(owner[mid])
+                if held:
+                    keep.append(rec)
+                    if owner[mid] != rec.get("pid"):
+                        keep.append({"claim": mid, "pid": owner[mid]})
+                else:
+                    adopted.append(rec)
+                    keep.append(rec)
+                    keep.append({"claim": mid, "pid": os.getpid()})
+            return keep
+
+        try:
+            # 잠금 상태에서 미완료 메시지만 남기고 정리 (ack 된 줄은 compaction)
+            _drain_jsonl(self.outbox_path, keep=_keep)
+        except Exception as exc:
+            log.warning(f"텔레그램 outbox 복구 실패: {exc}")
+            return 0
+        for rec in sorted(adopted, key=lambda r: r.get("ts", 0)):
+            self._push(rec)
+        self.stats["recovered"] += len(adopted)
+        return len(adopted)
+
+    def _settle(self, records: list[dict], ok: bool) -> None:
+        with self._cond:
+            hit = False
+            for rec in records:
+                if rec["id"] in self._waiters:
+                    self._waiters[rec["id"]] = ok
+                    hit = True
+            if hit:
+                self._cond.notify_all()
+
+    def wait_delivered(self, message_id: str, timeout: float = 10.0) -> bool:
+        """``submit(track=True)`` 메시지가 실제로 발송되면 True (실패·타임아웃은 False)."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            try:
+                while self._waiters.get(message_id) is None:
+                    remaining = deadline - time.monotonic()
+                    if message_id not in self._waiters or remaining <= 0:
+                        return False
+                    self._cond.wait(timeout=min(remaining, 0.1))
+                return bool(self._waiters[message_id])
+            finally:
+                self._waiters.pop(message_id, None)
+
+    def _ack(self, records: list[dict]) -> None:
+        for rec in records:
+            try:
+                _append_jsonl(self.outbox_path, {"ack": rec["id"]})
+            except Exception:
+                pass
+        try:
+            if self.outbox_path.stat().st_size > _OUTBOX_COMPACT_BYTES:
+                self.recover(adopt_own=False)  # ack 된 줄 정리 (자기 대기분은 유지)
+        except OSError:
+            pass
+
+    # ── drain loop ──
+    def _take_batch(self) -> list[dict]:
+        """최우선 메시지 1건 (IMPORTANT는 같은 parse_mode 연속분을 digest로 병합)."""
+        rank, _, first = heapq.heappop(self._heap)
+        batch = [first]
+        if first.get("priority") != Priority.IMPORTANT.value:
+            return batch
+        size = len(first["text"])
+        while self._heap:
+            nrank, _, nxt = self._heap[0]
+            if nrank != rank or nxt.get("parse_mode") != first.get("parse_mode"):
+                break
+            extra = len(_DIGEST_SEPARATOR) + len(nxt["text"])
+            if size + extra > self.max_chars:
+                break
+            heapq.heappop(self._heap)
+            batch.append(nxt)
+            size += extra
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._heap and not self._stopping:
+                    self._cond.wait()
+                if not self._heap:
+                    return
+                if self._deadline is not None and time.monotonic() > self._deadline:
+                    log.warning(f"텔레그램 종료 대기 초과 — {len(self._heap)}건은 outbox에 남김")
+                    return
+                wait = self.bucket.wait_time()
+                if wait > 0:
+                    # 더 높은 우선순위 메시지가 들어오면 다시 top을 본다
+                    self._cond.wait(timeout=wait)
+                    continue
+                batch = self._take_batch()
+                self._inflight += 1
+            try:
+                self._deliver(batch)
+            finally:
+                with self._cond:
+                    self._inflight -= 1
+                    self._cond.notify_all()
+
+    def _deliver(self, batch: list[dict]) -> None:
+        text = _DIGEST_SEPARATOR.join(r["text"] for r in batch)
+        parse_mode = batch[0].get("parse_mode", "HTML")
+        attempt = int(batch[0].get("_attempt", 0))
+        retries = max(int(r.get("retries", 2)) for r in batch)
+        try:
+            ok, status, retry_after = self.post(text, parse_mode)
+        except Exception as exc:
+            log.error(f"텔레그램 발송 실패: {exc}")
+            ok, status, retry_after = False, 0, 0.0
+
+        if ok:
+            self.stats["sent"] += 1
+            self.stats["messages"] += len(batch)
+            self._ack(batch)
+            self._settle(batch, True)
+            return
+        if status == 429:
+            self.bucket.pause(retry_after)
+        elif attempt < retries:
+            self.bucket.pause(1.0 * (attempt + 1))
+        if status == 429 or attempt < retries:
+            for rec in batch:
+                rec["_attempt"] = attempt + (0 if status == 429 else 1)
+                self._push(rec)
+            return
+        self.stats["failed"] += len(batch)
+        self._ack(batch)  # 재시도 소진 — 로그만 남기고 drop
+        self._settle(batch, False)
+        log.error(f"텔레그램 발송 포기: status={status} msgs={len(batch)}")
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._heap) + self._inflight
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """큐가 빌 때까지 대기 (테스트·종료 직전용)."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._heap or self._inflight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(timeout=min(remaining, 0.1))
+        return True
+
+    def close(self, timeout: float = _EXIT_DRAIN_SECONDS) -> None:
+        with self._cond:
+            self._stopping = True
+            self._deadline = time.monotonic() + timeout
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout + 1)
+
+
+_dispatcher: Optional[TelegramDispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher() -> TelegramDispatcher:
+    """프로세스 공용 디스패처 (첫 호출 시 outbox 복구 + atexit 등록)."""
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                dispatcher = TelegramDispatcher()
+                dispatcher.recover()
+                atexit.register(dispatcher.close)
+                _dispatcher = dispatcher
+    return _dispatcher
+
+
+def flush_telegram(timeout: float = 10.0) -> bool:
+    """대기 중인 메시지가 모두 발송될 때까지 대기."""
+    return _dispatcher.flush(timeout) if _dispatcher is not None else True
+
+
 def send_telegram(
     msg: str,
     parse_mode: str = "HTML",
     retries: int = 2,
     priority: Priority = Priority.URGENT,
 ) -> bool:
-    """메시지 전송.
+    """메시지를 발송 큐에 넣는다 — 반환값은 "접수됨"이지 "발송됨"이 아니다.
 
     priority=INFO  → 버퍼에 저장, 즉시 발송 안 함
-    priority=IMPORTANT/URGENT → 즉시 발송
+    priority=IMPORTANT/URGENT → 발송 큐에 넣고 바로 반환 (토큰 미설정 시 False)
+
+    발송 성공 여부가 필요하면 ``deliver_telegram``을 쓴다.
     """
     if priority == Priority.INFO:
         append_info_buffer(msg)
         return True
 
-    global _last_send_ts
-    token = os.environ.get("TELEGRAM_BOT_TOKEN", "")
-    chat_id = os.environ.get("TELEGRAM_CHAT_ID", "")
-    if not token or not chat_id:
+    if not os.environ.get("TELEGRAM_BOT_TOKEN", "") or not os.environ.get("TELEGRAM_CHAT_ID", ""):
         return False
 
-    elapsed = time.time() - _last_send_ts
-    if elapsed < _MIN_INTERVAL:
-        time.sleep(_MIN_INTERVAL - elapsed)
+    get_dispatcher().submit(msg, parse_mode, priority, retries)
+    return True
 
-    for attempt in range(retries + 1):
-        try:
-            resp = requests.post(
-                f"https://api.telegram.org/bot{token}/sendMessage",
-                json={"chat_id": chat_id, "text": msg, "parse_mode": parse_mode},
-                timeout=10,
-            )
-            _last_send_ts = time.time()
-            if resp.status_code == 429:
-                retry_after = int(resp.headers.get("Retry-After", 2))
-                time.sleep(retry_after)
-                continue
-            return resp.ok
-        except Exception as e:
-            log.error(f"텔레그램 발송 실패: {e}")
-            if attempt < retries:
-                time.sleep(1 * (attempt + 1))
-    return False
+
+def deliver_telegram(
+    msg: str,
+    parse_mode: str = "HTML",
+    retries: int = 2,
+    priority: Priority = Priority.URGENT,
+    timeout: float = 30.0,
+) -> bool:
+    """메시지를 발송하고 Telegram이 받을 때까지 대기 — 실제 발송됐을 때만 True.
+
+    INFO는 버퍼 저장이 곧 목적지이므로 ``send_telegram``과 같다. 타임아웃된
+    메시지는 outbox에 남아 계속(또는 다음 프로세스가) 발송하지만 결과는 False.
+    """
+    if priority == Priority.INFO:
+        return send_telegram(msg, parse_mode, retries, priority)
+
+    if not os.environ.get("TELEGRAM_BOT_TOKEN", "") or not os.environ.get("TELEGRAM_CHAT_ID", ""):
+        return False
+
+    dispatcher = get_dispatcher()
+    message_id = dispatcher.submit(msg, parse_mode, priority, retries, track=True)
+    return dispatcher.wait_delivered(message_id, timeout)
 
 
 def send_trade_alert(
@@ -0,0 +1,305 @@
+"""Cycle-level stage tracing for the trading agents.
+
+Usage:
+    from common.tracing import span, traced, traced_cycle
+
+    @traced_cycle("BTC")            # 사이클 루트 — 종료 시 히스토그램 + JSONL 기록
+    def run_trading_cycle(): ...
+
+    @traced("data_fetch.ohlcv")     # 사이클 안에서만 측정, 밖에서는 그대로 호출
+    def get_market_data(): ...
+
+    with span("ml_inference"):
+        ...
+
+Stage names are dotted categories (``data_fetch.*``, ``indicators``,
+``ml_inference``, ``llm``, ``order.*``) and double as the ``stage`` label of
+``openclaw_stage_duration_seconds``. Outside an active cycle — or with
+``OPENCLAW_TRACE=0`` — ``span`` returns a shared no-op context and ``traced``
+calls straight through, so instrumented helpers cost one context-variable lookup.
+
+The current span lives in a ``contextvars`` context, so ``asyncio.to_thread``
+work and pool tasks submitted as ``pool.submit(propagate(fn), ...)`` nest
+under the span that submitted them; a bare ``threading.Thread`` starts with
+an empty context and is not traced. Each finished cycle appends one
+flame-style record (collapsed ``cycle;stage;sub`` stacks with total/self time
+and call count) to ``OPENCLAW_TRACE_FILE`` (default
+``<LOG_DIR>/cycle_trace.jsonl``).
+"""
+from __future__ import annotations
+
+import contextvars
+import functools
+import json
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+from common.config import LOG_DIR
+from common.logger import get_logger
+
+log = get_logger("tracing")
+
+TRACE_FILE: Path = Path(os.environ.get("OPENCLAW_TRACE_FILE", str(LOG_DIR / "cycle_trace.jsonl")))
+ROOT_STAGE = "cycle"
+
+# (cycle, 현재 열린 노드) — 스레드·태스크로 복사되는 컨텍스트 단위
+_current: contextvars.ContextVar = contextvars.ContextVar("openclaw_trace", default=None)
+
+
+def tracing_enabled() -> bool:
+    return os.environ.get("OPENCLAW_TRACE", "1").strip().lower() not in ("0", "false", "off", "no")
+
+
+class _Node:
+    __slots__ = ("name", "start", "elapsed", "children", "error")
+
+    def __init__(self, name: str, start: float):
+        self.name = name
+        self.start = start
+        self.elapsed = 0.0
+        self.children: List["_Node"] = []
+        self.error: Optional[str] = None
+
+
+class _NullSpan:
+    """비활성 상태에서 공유되는 no-op 컨텍스트."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+    def set_result(self, result: str) -> None:
+        pass
+
+
+_NULL = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("_trace", "_parent", "_name", "_node", "_token")
+
+    def __init__(self, trace: "CycleTrace", parent: _Node, name: str):
+        self._trace = trace
+        self._parent = parent
+        self._name = name
+        self._node: Optional[_Node] = None
+        self._token = None
+
+    def __enter__(self):
+        node = _Node(self._name, time.perf_counter())
+        self._parent.children.append(node)        # list.append — 워커 스레드에서 동시 호출돼도 안전
+        self._node = node
+        self._token = _current.set((self._trace, node))
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        node = self._node
+        node.elapsed = time.perf_counter() - node.start
+        if exc_type is not None:
+            node.error = exc_type.__name__
+        _reset(self._token, (self._trace, self._parent))
+        return False
+
+    def set_result(self, result: str) -> None:
+        pass
+
+
+def _reset(token, fallback) -> None:
+    try:
+        _current.reset(token)
+    except ValueError:                            # 다른 컨텍스트에서 닫힘 — 부모로 되돌림
+        _current.set(fallback)
+
+
+def span(name: str):
+    """Context manager timing ``name`` under the current cycle (no-op outside one)."""
+    cur = _current.get()
+    if cur is None:
+        return _NULL
+    return _Span(cur[0], cur[1], name)
+
+
+def traced(name: str) -> Callable:
+    """Decorator form of :func:`span`."""
+
+    def deco(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            cur = _current.get()
+            if cur is None:
+                return func(*args, **kwargs)
+            with _Span(cur[0], cur[1], name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return deco
+
+
+def propagate(func: Callable) -> Callable:
+    """Bind ``func`` to the caller's trace context, for ``executor.submit(propagate(fn), ...)``."""
+    if _current.get() is None:
+        return func
+    ctx = contextvars.copy_context()
+    return functools.partial(ctx.run, func)
+
+
+class CycleTrace:
+    """One trading cycle: root of the span tree, exported on exit."""
+
+    def __init__(self, market: str, trace_file: Optional[Path] = None):
+        self.market = market
+        self.trace_file = Path(trace_file) if trace_file is not None else TRACE_FILE
+        self.cycle_id = uuid.uuid4().hex[:12]
+        self.result = "done"
+        self.root = _Node(ROOT_STAGE, 0.0)
+        self.record: Optional[dict] = None
+        self._token = None
+
+    def set_result(self, result: str) -> None:
+        self.result = str(result)
+
+    def __enter__(self):
+        self._started_at = datetime.now(timezone.utc)
+        self.root.start = time.perf_counter()
+        self._token = _current.set((self, self.root))
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.root.elapsed = time.perf_counter() - self.root.start
+        _reset(self._token, None)
+        if exc_type is not None:
+            self.root.error = exc_type.__name__
+            self.result = "error"
+        try:
+            self.record = self._export()
+        except Exception as e:
+            log.debug(f"사이클 트레이스 기록 실패: {e}")
+        return False
+
+    def stacks(self) -> Dict[str, dict]:
+        """Collapsed stacks: ``cycle;a;b`` → total/self seconds and call count."""
+        out: Dict[str, dict] = {}
+
+        def walk(node: _Node, prefix: str) -> None:
+            path = f"{prefix};{node.name}" if prefix else node.name
+            child_total = sum(c.elapsed for c in node.children)
+            agg = out.setdefault(path, {"total": 0.0, "self": 0.0, "n": 0, "errors": 0})
+            agg["total"] += node.elapsed
+            agg["self"] += max(node.elapsed - child_total, 0.0)
+            agg["n"] += 1
+            agg["errors"] += node.error is not None
+            for child in node.children:
+                walk(child, path)
+
+        walk(self.root, "")
+        return out
+
+    def stage_totals(self) -> Dict[str, float]:
+        """Per-stage seconds this cycle; nested repeats of one stage are counted once."""
+        totals: Dict[str, float] = {}
+
+        def walk(node: _Node, open_stages: frozenset) -> None:
+            if node.name not in open_stages:
+                totals[node.name] = totals.get(node.name, 0.0) + node.elapsed
+                open_stages = open_stages | {node.name}
+            for child in node.children:
+                walk(child, open_stages)
+
+        walk(self.root, frozenset())
+        return totals
+
+    def _export(self) -> dict:
+        from common.prometheus_metrics import observe_stage_latency
+
+        totals = self.stage_totals()
+        for stage, seconds in totals.items():
+            observe_stage_latency(self.market, stage, seconds)
+        record = {
+            "ts": self._started_at.isoformat(),
+            "market": self.market,
+            "cycle_id": self.cycle_id,
+            "result": self.result,
+            "duration_ms": round(self.root.elapsed * 1000, 3),
+            "error": self.root.error,
+            "stages": {k: round(v * 1000, 3) for k, v in totals.items() if k != ROOT_STAGE},
+            "stacks": [
+                {"stack": path, "ms": round(a["total"] * 1000, 3), "self_ms": round(a["self"] * 1000, 3),
+                 "n": a["n"], **({"errors": a["errors"]} if a["errors"] else {})}
+                for path, a in self.stacks().items()
+            ],
+        }
+        self.trace_file.parent.mkdir(parents=True, exist_ok=True)
+        with self.trace_file.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return record
+
+
+def trace_cycle(market: str, trace_file: Optional[Path] = None):
+    """Open a cycle root; nested inside a running cycle it becomes a plain span."""
+    if not tracing_enabled():
+        return _NULL
+    if _current.get() is not None:
+        return span(ROOT_STAGE)
+    return CycleTrace(market, trace_file)
+
+
+def traced_cycle(market: str) -> Callable:
+    """Decorator for ``run_trading_cycle``; a dict return's ``result`` becomes the cycle result."""
+
+    def deco(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with trace_cycle(market) as cycle:
+                out = func(*args, **kwargs)
+                if isinstance(out, dict) and out.get("result"):
+                    cycle.set_result(out["result"])
+                return out
+
+        return wrapper
+
+    return deco
+
+
+def read_traces(path: Optional[Path] = None, market: Optional[str] = None) -> Iterator[dict]:
+    """Iterate cycle records from a trace file, skipping malformed lines."""
+    path = Path(path) if path is not None else TRACE_FILE
+    if not path.exists():
+        return
+    with path.open(encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            if market is None or rec.get("market") == market:
+                yield rec
+
+
+def _cli(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    from common.metrics import summarize_stage_latency
+
+    parser = argparse.ArgumentParser(description="사이클 트레이스 요약 (스테이지별 p50/p95)")
+    parser.add_argument("path", nargs="?", default=str(TRACE_FILE))
+    parser.add_argument("--market", default=None)
+    args = parser.parse_args(argv)
+
+    summary = summarize_stage_latency(read_traces(Path(args.path), market=args.market))
+    print(f"{'market':<6} {'stage':<28} {'n':>5} {'p50_ms':>10} {'p95_ms':>10} {'max_ms':>10}")
+    for (mkt, stage), s in sorted(summary.items()):
+        print(f"{mkt:<6} {stage:<28} {s['n']:>5} {s['p50_ms']:>10.1f} {s['p95_ms']:>10.1f} {s['max_ms']:>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(_cli())
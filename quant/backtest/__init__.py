@@ -1,6 +1,15 @@
 """Backtesting utilities for quant research."""
 
 from quant.backtest.engine import WalkForwardBacktestEngine, WalkForwardConfig
+from quant.backtest.panel import (OhlcvPanel, build_ohlcv_panel,
+                                  load_ohlcv_panel)
 from quant.backtest.universe import UniverseProvider
 
-__all__ = ["WalkForwardBacktestEngine", "WalkForwardConfig", "UniverseProvider"]
+__all__ = [
+    "WalkForwardBacktestEngine",
+    "WalkForwardConfig",
+    "UniverseProvider",
+    "OhlcvPanel",
+    "build_ohlcv_panel",
+    "load_ohlcv_panel",
+]
@@ -0,0 +1,257 @@
+"""Date × symbol OHLCV panel for backtests, cached as memory-mapped float32.
+
+One bulk (paged, concurrent) ``daily_ohlcv`` load builds a dense panel:
+- ``dates``  : datetime64[D] calendar, shape (T,) — every date with at least one row
+- ``fields`` : open/high/low/close/volume as float32 (T, N), NaN where no row
+- ``valid``  : bool (T, N) mask of rows that exist
+
+The panel is written once to ``<cache_dir>/<key>/`` as ``.npy`` files and
+reopened with ``mmap_mode="r"``, so repeated runs start from the mapped files
+and only touched pages are resident (about 21 bytes per date × symbol cell).
+The cache is keyed by the universe and invalidated by a data watermark
+(latest date + row count of the universe in ``daily_ohlcv``).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from common.config import BRAIN_PATH
+from common.logger import get_logger
+from common.retry import retry_call
+
+log = get_logger("backtest_panel")
+
+PANEL_CACHE_DIR: Path = BRAIN_PATH / "backtest" / "panels"
+PANEL_FIELDS = ("open", "high", "low", "close", "volume")
+_DB_COLUMNS = {
+    "open": "open_price",
+    "high": "high_price",
+    "low": "low_price",
+    "close": "close_price",
+    "volume": "volume",
+}
+_PAGE_SIZE = 1000   # PostgREST 기본 최대 행 수
+
+
+def _num(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+@dataclass
+class OhlcvPanel:
+    dates: np.ndarray               # datetime64[D], (T,)
+    symbols: List[str]
+    fields: Dict[str, np.ndarray]   # float32 (T, N), NaN = 행 없음
+    valid: np.ndarray               # bool (T, N)
+    watermark: str = ""
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        return self.fields[field]
+
+    @property
+    def shape(self) -> tuple:
+        return self.valid.shape
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.valid.nbytes + self.dates.nbytes + sum(a.nbytes for a in self.fields.values()))
+
+    def date_strings(self) -> List[str]:
+        return [str(d) for d in self.dates]
+
+    def column(self, symbol: str) -> int:
+        return self.symbols.index(symbol)
+
+    def series(self, symbol: str, field: str) -> np.ndarray:
+        """float64 values of ``field`` on the symbol's own trading days (valid rows only)."""
+        j = self.column(symbol)
+        return np.asarray(self.fields[field][self.valid[:, j], j], dtype=float)
+
+    def save(self, path: Path) -> Path:
+        """Write atomically: build in a sibling temp dir, then swap it in."""
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        np.save(tmp / "dates.npy", self.dates.astype("datetime64[D]"))
+        np.save(tmp / "valid.npy", np.ascontiguousarray(self.valid, dtype=bool))
+        for name, arr in self.fields.items():
+            np.save(tmp / f"{name}.npy", np.ascontiguousarray(arr, dtype=np.float32))
+        (tmp / "meta.json").write_text(json.dumps({
+            "symbols": list(self.symbols),
+            "fields": list(self.fields),
+            "watermark": self.watermark,
+            "shape": list(self.shape),
+        }))
+        old = path.with_name(path.name + ".old")
+        shutil.rmtree(old, ignore_errors=True)
+        if path.exists():
+            os.replace(path, old)
+        os.replace(tmp, path)
+        shutil.rmtree(old, ignore_errors=True)
+        return path
+
+    @classmethod
+    def open(cls, path: Path) -> Optional["OhlcvPanel"]:
+        """Memory-map a saved panel (read-only); None when missing or unreadable."""
+        path = Path(path)
+        try:
+            meta = json.loads((path / "meta.json").read_text())
+            fields = {name: np.load(path / f"{name}.npy", mmap_mode="r") for name in meta["fields"]}
+            return cls(
+                dates=np.load(path / "dates.npy"),
+                symbols=[str(s) for s in meta["symbols"]],
+                fields=fields,
+                valid=np.load(path / "valid.npy", mmap_mode="r"),
+                watermark=str(meta.get("watermark") or ""),
+            )
+        except FileNotFoundError:
+            return None
+        except Exception as exc:
+            log.warning("panel cache unreadable", path=str(path), error=str(exc)[:200])
+            return None
+
+
+def build_ohlcv_panel(rows: Iterable[dict], symbols: Sequence[str], watermark: str = "") -> OhlcvPanel:
+    """``daily_ohlcv`` rows → panel. Columns follow ``symbols``; unknown codes are dropped.
+
+    Missing open/high/low fall back to close and missing volume to 0, as the
+    per-stock loaders did.
+    """
+    symbols = [str(s) for s in symbols]
+    col_of = {s: j for j, s in enumerate(symbols)}
+    rows = [r for r in rows if str(r.get("stock_code")) in col_of and r.get("date")]
+    cols = np.fromiter((col_of[str(r["stock_code"])] for r in rows), dtype=np.int64, count=len(rows))
+    day = np.array([str(r["date"])[:10] for r in rows], dtype="datetime64[D]")
+    dates, t_idx = np.unique(day, return_inverse=True)
+
+    shape = (len(dates), len(symbols))
+    valid = np.zeros(shape, dtype=bool)
+    valid[t_idx, cols] = True
+    values = {
+        name: np.fromiter((_num(r.get(col)) for r in rows), dtype=np.float64, count=len(rows))
+        for name, col in _DB_COLUMNS.items()
+    }
+    close = values["close"]
+    for name in ("open", "high", "low"):
+        values[name] = np.where(np.isnan(values[name]), close, values[name])
+    values["volume"] = np.nan_to_num(values["volume"], nan=0.0)
+
+    fields = {}
+    for name in PANEL_FIELDS:
+        mat = np.full(shape, np.nan, dtype=np.float32)
+        mat[t_idx, cols] = values[name]
+        fields[name] = mat
+    return OhlcvPanel(dates=dates, symbols=symbols, fields=fields, valid=valid, watermark=watermark)
+
+
+def _cache_key(symbols: Sequence[str]) -> str:
+    digest = hashlib.sha1(",".join(symbols).encode()).hexdigest()[:12]
+    return f"kr_{len(symbols)}_{digest}"
+
+
+def fetch_watermark(client, symbols: Sequence[str]) -> Optional[str]:
+    """``<latest date>:<row count>`` of the universe in ``daily_ohlcv`` (one round-trip)."""
+    try:
+        res = retry_call(
+            lambda: client.table("daily_ohlcv")
+            .select("date", count="exact")
+            .in_("stock_code", list(symbols))
+            .order("date", desc=True)
+            .limit(1)
+            .execute(),
+            max_attempts=2,
+            base_delay=0.5,
+            default=None,
+        )
+    except Exception as exc:
+        log.warning("watermark query failed", error=str(exc)[:200])
+        return None
+    if res is None:
+        return None
+    latest = str((res.data or [{}])[0].get("date") or "")[:10]
+    return f"{latest}:{int(res.count or 0)}"
+
+
+def _fetch_rows(client, symbols: Sequence[str], total: int, max_workers: int) -> List[dict]:
+    select = "stock_code,date," + ",".join(_DB_COLUMNS.values())
+
+    def _page(offset: int) -> List[dict]:
+        res = retry_call(
+            lambda: client.table("daily_ohlcv")
+            .select(select)
+            .in_("stock_code", list(symbols))
+            .order("date")
+            .order("stock_code")
+            .range(offset, offset + _PAGE_SIZE - 1)
+            .execute(),
+            max_attempts=3,
+            base_delay=0.5,
+        )
+        if res is None:
+            raise RuntimeError(f"daily_ohlcv page fetch failed (offset={offset})")
+        return list(res.data or [])
+
+    offsets = range(0, max(total, 1), _PAGE_SIZE)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(offsets))),
+                            thread_name_prefix="panel-page") as pool:
+        pages = list(pool.map(_page, offsets))
+    # 조회 도중 추가된 행은 다음 실행에서 워터마크가 달라져 재빌드된다
+    return [r for page in pages for r in page]
+
+
+def load_ohlcv_panel(
+    symbols: Sequence[str],
+    client=None,
+    cache_dir: Path = PANEL_CACHE_DIR,
+    refresh: bool = False,
+    max_workers: int = 4,
+) -> Optional[OhlcvPanel]:
+    """Memory-mapped panel for ``symbols``; rebuilt only when the data watermark moves."""
+    symbols = list(dict.fromkeys(str(s) for s in symbols))
+    if not symbols:
+        return None
+    if client is None:
+        from common.supabase_client import get_supabase
+
+        client = get_supabase()
+    path = Path(cache_dir) / _cache_key(symbols)
+    cached = None if refresh else OhlcvPanel.open(path)
+
+    watermark = fetch_watermark(client, symbols) if client is not None else None
+    if cached is not None and (watermark is None or cached.watermark == watermark):
+        if watermark is None:
+            log.warning("watermark unavailable, using cached panel", watermark=cached.watermark)
+        return cached
+    if client is None or watermark is None:
+        return cached
+
+    total = int(watermark.rsplit(":", 1)[1])
+    try:
+        rows = _fetch_rows(client, symbols, total, max_workers)
+    except Exception as exc:
+        # 불완전한 패널은 캐시하지 않는다 — 이전 캐시가 있으면 그대로 사용
+        log.warning("panel fetch failed", error=str(exc)[:200])
+        return cached
+    panel = build_ohlcv_panel(rows, symbols, watermark=watermark)
+    try:
+        panel.save(path)
+        mapped = OhlcvPanel.open(path)
+    except Exception as exc:
+        log.warning("panel cache write failed", path=str(path), error=str(exc)[:200])
+        mapped = None
+    log.info("ohlcv panel built", rows=len(rows), dates=panel.shape[0], symbols=panel.shape[1],
+             mb=round(panel.nbytes / 1e6, 1))
+    return mapped or panel
@@ -15,10 +15,13 @@ import argparse
 import json
 import math
 import sys
+from bisect import bisect_right
 from datetime import date, datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
+import numpy as np
+
 # ── 프로젝트 루트 sys.path 주입 ────────────────────────────────────────────────
 _PROJECT_ROOT = Path(__file__).resolve().parent.parent
 if str(_PROJECT_ROOT) not in sys.path:
@@ -330,6 +333,66 @@ def kelly_size(capital: float, win_rate: float = 0.56, avg_win: float = 0.10, av
     return capital * capped
 
 
+# ── 날짜 정렬 패널 ────────────────────────────────────────────────────────────
+
+# calc_composite_score가 실제로 보는 최대 꼬리 길이 (MACD: slow + signal + 10)
+_SCORE_TAIL = 45
+
+
+def _score_by_date(rows: List[dict]) -> Dict[str, float]:
+    """날짜별 복합 스코어 (해당 날짜까지의 히스토리 기준). 히스토리 부족 시 NaN.
+
+    종가(>0)/거래량(>=0) 리스트를 한 번만 누적하고 꼬리 ``_SCORE_TAIL``개만
+    넘기므로 전체 prefix로 계산한 값과 동일하다.
+    """
+    closes: List[float] = []
+    vols: List[float] = []
+    out: Dict[str, float] = {}
+    for i, r in enumerate(rows):
+        c = _safe_float(r["close"])
+        v = _safe_float(r["volume"])
+        if c > 0:
+            closes.append(c)
+        if v >= 0:
+            vols.append(v)
+        if i + 1 < len(rows) and rows[i + 1]["date"] == r["date"]:
+            continue  # 같은 날짜 행은 모두 반영한 뒤 계산
+        if len(closes) >= 30 and len(vols) >= 21:
+            out[r["date"]] = calc_composite_score(closes[-_SCORE_TAIL:], vols[-_SCORE_TAIL:])
+        else:
+            out[r["date"]] = math.nan
+    return out
+
+
+def _build_panel(
+    series: Dict[str, List[dict]],
+    codes: List[str],
+    calendar: List[str],
+) -> Tuple[Dict[str, int], np.ndarray, np.ndarray]:
+    """(code → row index, 종가 행렬, 스코어 행렬) — shape (n_codes, n_days).
+
+    종가는 해당 날짜 첫 행의 종가(없으면 0), 스코어는 NaN이면 판단 불가.
+    """
+    index = {code: i for i, code in enumerate(c for c in dict.fromkeys(codes) if c in series)}
+    prices = np.zeros((len(index), len(calendar)), dtype=float)
+    scores = np.full((len(index), len(calendar)), math.nan)
+    day_of = {d: t for t, d in enumerate(calendar)}
+    for code, i in index.items():
+        rows = series[code]
+        seen = set()
+        for r in rows:
+            t = day_of.get(r["date"])
+            if t is None or t in seen:
+                continue
+            seen.add(t)
+            prices[i, t] = _safe_float(r["close"]) or 0.0
+        for d, sc in _score_by_date(rows).items():
+            t = day_of.get(d)
+            if t is not None:
+                scores[i, t] = sc
+    return index, prices, scores
+
+
 # ── 백테스트 메인 엔진 ────────────────────────────────────────────────────────
 
 def run_backtest(
@@ -373,7 +436,12 @@ def run_backtest(
         log.warning("거래일 부족", n_days=len(calendar))
         return {"error": f"too few trading days: {len(calendar)}", "trades": [], "metrics": {}}
 
-    # 3) 포트폴리오 시뮬레이션
+    # 3) 날짜 정렬 배열 + 스코어 시계열 사전 계산 (데이터는 날짜 오름차순)
+    for code, rows in series.items():
+        series[code] = sorted(rows, key=lambda r: r["date"])
+    index, prices, scores = _build_panel(series, codes, calendar)
+
+    # 4) 포트폴리오 시뮬레이션
     capital = float(initial_capital)
     # positions: code → {entry_price, shares, entry_date, entry_score}
     positions: Dict[str, dict] = {}
@@ -383,16 +451,12 @@ def run_backtest(
     # 과거 승률/평균손익 추정 (Kelly 계산용 초기값)
     _win_hist: List[float] = []
 
-    for today in calendar:
+    for t, today in enumerate(calendar):
         # ── 기존 포지션 청산 체크 ──
         to_close: List[str] = []
         for code, pos in positions.items():
-            rows = series[code]
-            # 오늘 종가 조회
-            today_row = next((r for r in rows if r["date"] == today), None)
-            if today_row is None:
-                continue
-            price = _safe_float(today_row["close"])
+            i = index[code]
+            price = float(prices[i, t])
             if price <= 0:
                 continue
 
@@ -407,12 +471,9 @@ def run_backtest(
                 exit_reason = "take_profit"
             else:
                 # 스코어 청산 확인
-                closes = [_safe_float(r["close"]) for r in rows if r["date"] <= today and _safe_float(r["close"]) > 0]
-                vols = [_safe_float(r["volume"]) for r in rows if r["date"] <= today and _safe_float(r["volume"]) >= 0]
-                if len(closes) >= 30 and len(vols) >= 21:
-                    curr_score = calc_composite_score(closes, vols)
-                    if curr_score <= exit_score:
-                        exit_reason = "score_exit"
+                curr_score = scores[i, t]
+                if not math.isnan(curr_score) and curr_score <= exit_score:
+                    exit_reason = "score_exit"
 
             if exit_reason:
                 proceeds = pos["shares"] * price * (1 - FEE_RATE)
@@ -441,26 +502,15 @@ def run_backtest(
         for code in codes:
             if code in positions:
                 continue
-            rows = series.get(code)
-            if not rows:
+            i = index.get(code)
+            if i is None:
                 continue
-            today_row = next((r for r in rows if r["date"] == today), None)
-            if today_row is None:
-                continue
-            price = _safe_float(today_row["close"])
+            price = float(prices[i, t])
             if price <= 0:
                 continue
 
-            # 오늘까지의 히스토리 슬라이스
-            hist_rows = [r for r in rows if r["date"] <= today]
-            closes = [_safe_float(r["close"]) for r in hist_rows if _safe_float(r["close"]) > 0]
-            vols = [_safe_float(r["volume"]) for r in hist_rows if _safe_float(r["volume"]) >= 0]
-
-            if len(closes) < 30 or len(vols) < 21:
-                continue
-
-            curr_score = calc_composite_score(closes, vols)
-            if curr_score < entry_score:
+            curr_score = float(scores[i, t])
+            if math.isnan(curr_score) or curr_score < entry_score:
                 continue
 
             # Kelly 사이징
@@ -493,23 +543,18 @@ def run_backtest(
             }
             log.debug("진입", code=code, date=today, score=curr_score, invest=round(invest))
 
-        # 당일 포트폴리오 평가액
-        pos_value = sum(
-            pos["shares"] * _safe_float(
-                next((r["close"] for r in series.get(c, []) if r["date"] == today), 0) or 0
-            )
-            for c, pos in positions.items()
-        )
+        # 당일 포트폴리오 평가액 (당일 시세 없는 종목은 0으로 평가 — 기존 동작 유지)
+        pos_value = sum(pos["shares"] * float(prices[index[c], t]) for c, pos in positions.items())
         equity_curve.append(capital + pos_value)
 
     # ── 미청산 포지션 마감 (마지막 날 종가) ──
     last_date = calendar[-1] if calendar else end
     for code, pos in positions.items():
         rows = series.get(code, [])
-        last_row = next((r for r in reversed(rows) if r["date"] <= last_date), None)
-        if last_row is None:
+        k = bisect_right([r["date"] for r in rows], last_date)
+        if k == 0:
             continue
-        price = _safe_float(last_row["close"])
+        price = _safe_float(rows[k - 1]["close"])
         if price <= 0:
             continue
         pnl_net = (price - pos["entry_price"]) / pos["entry_price"] - FEE_RATE * 2
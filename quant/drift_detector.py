@@ -1,6 +1,17 @@
-"""v6.2 C3: Concept Drift Detector — 예측 품질 모니터링 + 자동 재학습 트리거"""
+"""v6.2 C3: Concept Drift Detector — 예측 품질 모니터링 + 자동 재학습 트리거
+
+모든 검출기는 같은 스트리밍 인터페이스를 따른다:
+    update(predicted, actual) -> bool   # 드리프트면 True
+    is_drift / reset()
+
+- ConceptDriftDetector : 최근 N건 AUC (Mann-Whitney U를 증분 갱신, 정확값)
+- ADWINDetector        : 예측 오차 평균의 변화 (ADWIN, 지수 히스토그램 버킷)
+- PageHinkleyDetector  : 예측 오차 평균의 상승 (Page-Hinkley 누적합)
+"""
+import math
+from bisect import bisect_left, bisect_right, insort
 from collections import deque
-from typing import Optional
+from typing import Iterable, Optional, Sequence
 
 import numpy as np
 
@@ -9,52 +20,115 @@ from common.logger import get_logger
 log = get_logger(__name__)
 
 
+def mann_whitney_auc(predictions: Sequence[float], actuals: Sequence[int]) -> Optional[float]:
+    """Rank-sum AUC (ties = 0.5), 한 번에 계산. 양/음성 중 하나가 없으면 None."""
+    preds = np.asarray(predictions, dtype=float)
+    acts = np.asarray(actuals)
+    pos_mask = acts == 1
+    n_pos = int(pos_mask.sum())
+    n_neg = int((acts == 0).sum())
+    if n_pos == 0 or n_neg == 0:
+        return None
+    order = np.argsort(preds, kind="mergesort")
+    sorted_preds = preds[order]
+    ranks = np.empty(len(preds), dtype=float)
+    # 동점 구간에 평균 순위 부여
+    starts = np.flatnonzero(np.r_[True, sorted_preds[1:] != sorted_preds[:-1]])
+    ends = np.r_[starts[1:], len(preds)]
+    avg = (starts + ends + 1) / 2.0
+    ranks[order] = np.repeat(avg, ends - starts)
+    valid = pos_mask | (acts == 0)
+    if not valid.all():
+        # 0/1 이외 라벨은 제외하고 다시 계산
+        return mann_whitney_auc(preds[valid], acts[valid])
+    u = ranks[pos_mask].sum() - n_pos * (n_pos + 1) / 2.0
+    return float(u / (n_pos * n_neg))
+
+
+def _prediction_error(predicted: float, actual: int) -> float:
+    p = min(max(float(predicted), 0.0), 1.0)
+    return (p - float(actual)) ** 2
+
+
 class ConceptDriftDetector:
-    """최근 N건 예측의 AUC를 모니터링하여 드리프트 감지"""
+    """최근 N건 예측의 AUC를 모니터링하여 드리프트 감지
+
+    양성/음성 점수를 각각 정렬 리스트로 유지하고 U 통계량(×2, 정수)을
+    추가·만료 시 이분 탐색으로 갱신한다 — 예측 1건당 O(log window) 비교.
+    ``detectors``로 ADWIN/Page-Hinkley 검출기를 함께 돌릴 수 있다.
+    """
 
-    def __init__(self, window: int = 20, auc_threshold: float = 0.52):
+    def __init__(self, window: int = 20, auc_threshold: float = 0.52, detectors: Optional[Iterable] = None):
         self.window = window
         self.auc_threshold = auc_threshold
+        self.detectors = list(detectors or [])
         self._predictions: deque = deque(maxlen=window)
         self._actuals: deque = deque(maxlen=window)
+        self._pos: list = []
+        self._neg: list = []
+        self._u2 = 0            # 2·U — 동점 0.5를 정수로 유지
         self._drift_detected = False
 
+    def _pair_count2(self, score: float, label: int) -> int:
+        """score가 반대 집합과 이루는 (2×) 승리 쌍 수."""
+        if label == 1:
+            lo, hi = bisect_left(self._neg, score), bisect_right(self._neg, score)
+            return 2 * lo + (hi - lo)
+        lo, hi = bisect_left(self._pos, score), bisect_right(self._pos, score)
+        return 2 * (len(self._pos) - hi) + (hi - lo)
+
+    def _add(self, score: float, label: int) -> None:
+        if label not in (0, 1):
+            return
+        self._u2 += self._pair_count2(score, label)
+        insort(self._pos if label == 1 else self._neg, score)
+
+    def _remove(self, score: float, label: int) -> None:
+        if label not in (0, 1):
+            return
+        side = self._pos if label == 1 else self._neg
+        del side[bisect_left(side, score)]
+        self._u2 -= self._pair_count2(score, label)
+
     def update(self, predicted: float, actual: int) -> bool:
         """예측/실제 쌍 추가. 드리프트 감지 시 True 반환."""
+        predicted, actual = float(predicted), int(actual)
+        if len(self._predictions) == self.window:
+            self._remove(self._predictions[0], self._actuals[0])
         self._predictions.append(predicted)
         self._actuals.append(actual)
+        self._add(predicted, actual)
+
+        extra = False
+        for det in self.detectors:
+            extra = det.update(predicted, actual) or extra
 
         if len(self._predictions) < self.window:
-            return False
+            return extra
 
-        auc = self._calc_auc()
-        if auc is not None and auc < self.auc_threshold:
+        auc = self.auc
+        if (auc is not None and auc < self.auc_threshold) or extra:
             if not self._drift_detected:
-                log.warning(f"드리프트 감지: AUC={auc:.3f} < {self.auc_threshold} (최근 {self.window}건)")
+                if auc is not None and auc < self.auc_threshold:
+                    log.warning(f"드리프트 감지: AUC={auc:.3f} < {self.auc_threshold} (최근 {self.window}건)")
+                else:
+                    log.warning("드리프트 감지: 오차 분포 변화 (ADWIN/Page-Hinkley)")
                 self._drift_detected = True
             return True
 
         self._drift_detected = False
         return False
 
-    def _calc_auc(self) -> Optional[float]:
-        """간단한 AUC 계산 (Mann-Whitney U statistic 기반)"""
-        preds = np.array(self._predictions)
-        acts = np.array(self._actuals)
-
-        pos = preds[acts == 1]
-        neg = preds[acts == 0]
-
-        if len(pos) == 0 or len(neg) == 0:
+    @property
+    def auc(self) -> Optional[float]:
+        """현재 윈도우 AUC (증분 유지값)."""
+        if not self._pos or not self._neg:
             return None
+        return self._u2 / (2.0 * len(self._pos) * len(self._neg))
 
-        # Mann-Whitney U
-        u = 0.0
-        for p in pos:
-            u += np.sum(p > neg) + 0.5 * np.sum(p == neg)
-
-        auc = u / (len(pos) * len(neg))
-        return auc
+    def _calc_auc(self) -> Optional[float]:
+        """윈도우 전체 재계산 (rank-sum) — 증분값 검증용."""
+        return mann_whitney_auc(list(self._predictions), list(self._actuals))
 
     @property
     def is_drift(self) -> bool:
@@ -63,4 +137,165 @@ class ConceptDriftDetector:
     def reset(self):
         self._predictions.clear()
         self._actuals.clear()
+        self._pos.clear()
+        self._neg.clear()
+        self._u2 = 0
         self._drift_detected = False
+        for det in self.detectors:
+            det.reset()
+
+
+class ADWINDetector:
+    """ADWIN (Bifet & Gavaldà 2007) — 예측 오차 평균이 유의하게 변하면 오래된 구간을 버린다.
+
+    버킷은 크기 2^i 행별로 최대 ``max_buckets``개 (지수 히스토그램) →
+    메모리·검사 비용 O(log W). 오차가 *상승*한 컷에서만 드리프트로 보고한다.
+    """
+
+    def __init__(self, delta: float = 0.002, max_buckets: int = 5, clock: int = 8, min_window: int = 10):
+        self.delta = delta
+        self.max_buckets = max_buckets
+        self.clock = max(int(clock), 1)
+        self.min_window = min_window
+        self.reset()
+
+    def reset(self) -> None:
+        self._rows: list[deque] = [deque()]   # rows[i]: (total, variance) 크기 2^i, 오른쪽이 최신
+        self.width = 0
+        self.total = 0.0
+        self.variance = 0.0                    # 윈도우 합 제곱편차 (n·var)
+        self._ticks = 0
+        self._drift_detected = False
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.width if self.width else 0.0
+
+    @property
+    def is_drift(self) -> bool:
+        return self._drift_detected
+
+    def update(self, predicted: float, actual: int) -> bool:
+        return self.add_element(_prediction_error(predicted, actual))
+
+    def add_element(self, value: float) -> bool:
+        value = float(value)
+        if self.width:
+            self.variance += self.width * (value - self.mean) ** 2 / (self.width + 1)
+        self.width += 1
+        self.total += value
+        self._rows[0].append((value, 0.0))
+        self._compress()
+
+        self._ticks += 1
+        self._drift_detected = False
+        if self._ticks % self.clock == 0 and self.width > self.min_window:
+            self._drift_detected = self._detect()
+        return self._drift_detected
+
+    def _compress(self) -> None:
+        i = 0
+        while i < len(self._rows) and len(self._rows[i]) > self.max_buckets:
+            n = float(2 ** i)
+            t1, v1 = self._rows[i].popleft()
+            t2, v2 = self._rows[i].popleft()
+            merged = (t1 + t2, v1 + v2 + n * n * ((t1 - t2) / n) ** 2 / (2 * n))
+            if i + 1 == len(self._rows):
+                self._rows.append(deque())
+            self._rows[i + 1].append(merged)
+            i += 1
+
+    def _drop_oldest(self) -> None:
+        i = len(self._rows) - 1
+        while i > 0 and not self._rows[i]:
+            i -= 1
+        t, v = self._rows[i].popleft()
+        n = 2 ** i
+        self.width -= n
+        self.total -= t
+        if self.width:
+            self.variance -= v + n * self.width * (t / n - self.mean) ** 2 / (n + self.width)
+            self.variance = max(self.variance, 0.0)
+        else:
+            self.variance = 0.0
+        while len(self._rows) > 1 and not self._rows[-1]:
+            self._rows.pop()
+
+    def _detect(self) -> bool:
+        increased = False
+        changed = True
+        while changed and self.width > self.min_window:
+            changed = False
+            n0, t0 = 0, 0.0
+            var = self.variance / self.width
+            delta_p = self.delta / math.log(self.width)
+            log_term = math.log(2.0 / delta_p)
+            # 오래된 버킷부터 누적 → (과거 n0, 최근 n1) 분할 검사
+            for i in range(len(self._rows) - 1, -1, -1):
+                n = 2 ** i
+                for t, _ in self._rows[i]:
+                    n0 += n
+                    t0 += t
+                    n1 = self.width - n0
+                    if n1 < self.min_window // 2 or n0 < self.min_window // 2:
+                        continue
+                    u0, u1 = t0 / n0, (self.total - t0) / n1
+                    m = 1.0 / (1.0 / n0 + 1.0 / n1)
+                    eps = math.sqrt(2.0 / m * var * log_term) + 2.0 / (3.0 * m) * log_term
+                    if abs(u0 - u1) > eps:
+                        increased = increased or u1 > u0
+                        self._drop_oldest()
+                        changed = True
+                        break
+                if changed:
+                    break
+        return increased
+
+
+class PageHinkleyDetector:
+    """Page-Hinkley — 예측 오차 평균의 지속적 상승 감지 (단측)."""
+
+    def __init__(self, delta: float = 0.005, threshold: float = 2.0, alpha: float = 0.9999, min_instances: int = 20):
+        self.delta = delta
+        self.threshold = threshold
+        self.alpha = alpha
+        self.min_instances = min_instances
+        self.reset()
+
+    def reset(self) -> None:
+        self.n = 0
+        self.mean = 0.0
+        self.cum = 0.0
+        self.cum_min = 0.0
+        self._drift_detected = False
+
+    @property
+    def is_drift(self) -> bool:
+        return self._drift_detected
+
+    def update(self, predicted: float, actual: int) -> bool:
+        return self.add_element(_prediction_error(predicted, actual))
+
+    def add_element(self, value: float) -> bool:
+        self.n += 1
+        self.mean += (float(value) - self.mean) / self.n
+        self.cum = self.alpha * self.cum + (float(value) - self.mean - self.delta)
+        self.cum_min = min(self.cum_min, self.cum)
+        self._drift_detected = self.n >= self.min_instances and self.cum - self.cum_min > self.threshold
+        if self._drift_detected:
+            log.warning(f"Page-Hinkley 드리프트 감지: PH={self.cum - self.cum_min:.3f} > {self.threshold}")
+            self.reset()
+            self._drift_detected = True
+        return self._drift_detected
+
+
+def make_detector(kind: str = "auc", **kwargs):
+    """``auc`` | ``adwin`` | ``page_hinkley`` 검출기 생성."""
+    key = str(kind or "auc").lower().replace("-", "_")
+    if key == "auc":
+        return ConceptDriftDetector(**kwargs)
+    if key == "adwin":
+        return ADWINDetector(**kwargs)
+    if key in ("page_hinkley", "ph"):
+        return PageHinkleyDetector(**kwargs)
+    raise ValueError(f"unknown drift detector: {kind}")
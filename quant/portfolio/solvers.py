@@ -0,0 +1,250 @@
+"""NumPy solvers behind ``quant.portfolio.optimizer``.
+
+- project_capped_simplex: Euclidean projection onto {lo <= w <= hi, sum(w) = total}
+- mean_variance_qp: accelerated projected gradient (FISTA) for long-only / box mean-variance
+- risk_parity_erc: Newton method for equal-risk-contribution weights
+- black_litterman_posterior: posterior expected returns for absolute views
+
+All solvers accept a warm start (previous weights) and return (weights, SolveInfo).
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Mapping, Optional, Sequence
+
+import numpy as np
+
+from quant.risk.covariance import ledoit_wolf, nearest_psd
+
+
+@dataclass
+class SolveInfo:
+    iterations: int = 0
+    converged: bool = True
+    solve_ms: float = 0.0
+
+
+def covariance_from_mapping(
+    assets: Sequence[str],
+    covariance: Mapping[str, Mapping[str, float]],
+    default_var: float = 1.0,
+) -> np.ndarray:
+    """Dense PSD matrix from a nested {asset: {asset: cov}} mapping.
+
+    Either triangle may be supplied; missing off-diagonals are 0 and missing
+    variances fall back to ``default_var``.
+    """
+    n = len(assets)
+    idx = {a: i for i, a in enumerate(assets)}
+    cov = np.zeros((n, n))
+    seen_diag = np.zeros(n, dtype=bool)
+    for a, row in (covariance or {}).items():
+        i = idx.get(str(a).upper())
+        if i is None or not isinstance(row, Mapping):
+            continue
+        for b, value in row.items():
+            j = idx.get(str(b).upper())
+            if j is None:
+                continue
+            try:
+                v = float(value)
+            except (TypeError, ValueError):
+                continue
+            if not np.isfinite(v):
+                continue
+            cov[i, j] = cov[j, i] = v
+            if i == j:
+                seen_diag[i] = v > 0
+    cov[~seen_diag, ~seen_diag] = default_var
+    return nearest_psd(cov)
+
+
+def shrunk_covariance(
+    assets: Sequence[str],
+    returns: Mapping[str, Sequence[float]],
+    fallback: Optional[np.ndarray] = None,
+) -> tuple[np.ndarray, float]:
+    """Ledoit-Wolf covariance over the common tail of each asset's return history.
+
+    Assets without history keep their ``fallback`` row/column (diagonal only).
+    """
+    n = len(assets)
+    base = np.eye(n) if fallback is None else np.array(fallback, dtype=float)
+    have = [i for i, a in enumerate(assets) if len(returns.get(a) or []) >= 2]
+    if len(have) == 0:
+        return base, 0.0
+    length = min(len(returns[assets[i]]) for i in have)
+    X = np.column_stack([np.asarray(returns[assets[i]][-length:], dtype=float) for i in have])
+    lw, shrinkage = ledoit_wolf(X)
+    cov = np.diag(np.diag(base))
+    cov[np.ix_(have, have)] = lw
+    return nearest_psd(cov), shrinkage
+
+
+def project_capped_simplex(
+    v: np.ndarray,
+    lo: np.ndarray | float = 0.0,
+    hi: np.ndarray | float = 1.0,
+    total: float = 1.0,
+    tol: float = 1e-12,
+    max_iter: int = 100,
+) -> np.ndarray:
+    """argmin ||w - v|| s.t. lo <= w <= hi, sum(w) = total.
+
+    Solution is clip(v - tau, lo, hi); tau is found by safeguarded Newton on the
+    monotone piecewise-linear sum (bisection fallback), O(n) per step.
+    """
+    v = np.asarray(v, dtype=float)
+    lo = np.broadcast_to(np.asarray(lo, dtype=float), v.shape)
+    hi = np.broadcast_to(np.asarray(hi, dtype=float), v.shape)
+    total = float(np.clip(total, lo.sum(), hi.sum()))
+    a, b = float((v - hi).min()), float((v - lo).max())   # sum(a) = sum(hi), sum(b) = sum(lo)
+    tau = (a + b) / 2.0
+    w = np.clip(v - tau, lo, hi)
+    for _ in range(max_iter):
+        w = np.clip(v - tau, lo, hi)
+        gap = w.sum() - total
+        if abs(gap) <= tol:
+            break
+        if gap > 0:
+            a = tau
+        else:
+            b = tau
+        free = int(np.count_nonzero((w > lo) & (w < hi)))
+        step = tau + gap / free if free else None
+        tau = step if step is not None and a < step < b else (a + b) / 2.0
+    return w
+
+
+def _max_eigenvalue(cov: np.ndarray, iters: int = 50) -> float:
+    x = np.full(cov.shape[0], 1.0 / np.sqrt(max(cov.shape[0], 1)))
+    lam = 0.0
+    for _ in range(iters):
+        y = cov @ x
+        norm = float(np.linalg.norm(y))
+        if norm <= 0:
+            return 0.0
+        x = y / norm
+        if abs(norm - lam) <= 1e-6 * norm:
+            lam = norm
+            break
+        lam = norm
+    return lam * 1.05   # margin for an under-converged power iteration
+
+
+def mean_variance_qp(
+    mu: np.ndarray,
+    cov: np.ndarray,
+    risk_aversion: float = 3.0,
+    lo: np.ndarray | float = 0.0,
+    hi: np.ndarray | float = 1.0,
+    total: float = 1.0,
+    w0: Optional[np.ndarray] = None,
+    max_iter: int = 2000,
+    tol: float = 1e-9,
+) -> tuple[np.ndarray, SolveInfo]:
+    """max mu'w - (risk_aversion / 2) w'Σw  s.t. lo <= w <= hi, sum(w) = total.
+
+    FISTA with step 1/L (L = risk_aversion * λmax(Σ)) and adaptive restart.
+    """
+    t0 = time.perf_counter()
+    mu = np.asarray(mu, dtype=float)
+    n = mu.shape[0]
+    if n == 0:
+        return np.zeros(0), SolveInfo()
+    start = np.full(n, total / n) if w0 is None else np.asarray(w0, dtype=float)
+    w = project_capped_simplex(start, lo, hi, total)
+    lipschitz = max(risk_aversion * _max_eigenvalue(cov), 1e-12)
+    step = 1.0 / lipschitz
+
+    y, t, it, converged = w.copy(), 1.0, 0, False
+    for it in range(1, max_iter + 1):
+        grad = risk_aversion * (cov @ y) - mu
+        w_next = project_capped_simplex(y - step * grad, lo, hi, total)
+        delta = w_next - w
+        if float(np.abs(delta).max()) <= tol:
+            w = w_next
+            converged = True
+            break
+        t_next = (1.0 + np.sqrt(1.0 + 4.0 * t * t)) / 2.0
+        if float(grad @ delta) > 0:     # restart momentum when it points uphill
+            t_next, y = 1.0, w_next
+        else:
+            y = w_next + ((t - 1.0) / t_next) * delta
+        w, t = w_next, t_next
+    return w, SolveInfo(it, converged, (time.perf_counter() - t0) * 1000.0)
+
+
+def risk_parity_erc(
+    cov: np.ndarray,
+    budgets: Optional[np.ndarray] = None,
+    w0: Optional[np.ndarray] = None,
+    max_iter: int = 50,
+    tol: float = 1e-14,
+) -> tuple[np.ndarray, SolveInfo]:
+    """Equal (or budgeted) risk contribution weights, long-only, sum 1.
+
+    Newton on the convex problem min ½ y'Σy - Σ b_i log y_i (Spinu 2013);
+    w = y / sum(y) has risk contributions w_i (Σw)_i proportional to b.
+    """
+    t0 = time.perf_counter()
+    n = cov.shape[0]
+    if n == 0:
+        return np.zeros(0), SolveInfo()
+    b = np.full(n, 1.0 / n) if budgets is None else np.asarray(budgets, dtype=float) / np.sum(budgets)
+    diag = np.sqrt(np.clip(np.diag(cov), 1e-18, None))
+    if w0 is not None and np.all(np.asarray(w0) > 0):
+        y = np.asarray(w0, dtype=float).copy()
+    else:
+        y = 1.0 / diag
+    y *= np.sqrt(1.0 / max(float(y @ cov @ y), 1e-18))    # at optimum y'Σy = sum(b) = 1
+
+    def objective(x: np.ndarray) -> float:
+        return 0.5 * float(x @ cov @ x) - float(b @ np.log(x))
+
+    f, it, converged = objective(y), 0, False
+    for it in range(1, max_iter + 1):
+        sy = cov @ y
+        grad = sy - b / y
+        hess = cov + np.diag(b / (y * y))
+        direction = np.linalg.solve(hess, grad)
+        decrement = float(grad @ direction)
+        if decrement / 2.0 <= tol:
+            converged = True
+            break
+        # keep y > 0, then Armijo backtracking
+        neg = direction > 0
+        alpha = min(1.0, 0.99 * float(np.min(y[neg] / direction[neg]))) if neg.any() else 1.0
+        while alpha > 1e-12:
+            cand = y - alpha * direction
+            f_cand = objective(cand)
+            if f_cand <= f - 0.25 * alpha * decrement:
+                break
+            alpha *= 0.5
+        y, f = cand, f_cand
+    w = y / y.sum()
+    return w, SolveInfo(it, converged, (time.perf_counter() - t0) * 1000.0)
+
+
+def black_litterman_posterior(
+    prior: np.ndarray,
+    cov: np.ndarray,
+    view_index: Sequence[int],
+    view_values: Sequence[float],
+    tau: float = 0.05,
+    view_confidence: float = 1.0,
+) -> np.ndarray:
+    """Posterior mean for absolute views Q on assets ``view_index``.
+
+    Ω = diag(τ P Σ P') / view_confidence (He-Litterman proportional uncertainty).
+    """
+    prior = np.asarray(prior, dtype=float)
+    idx = np.asarray(view_index, dtype=int)
+    if idx.size == 0:
+        return prior.copy()
+    q = np.asarray(view_values, dtype=float)
+    tau_cov_pt = tau * cov[:, idx]                         # τ Σ P'   (n, k)
+    omega = np.diag(np.diag(tau_cov_pt[idx])) / max(view_confidence, 1e-9)
+    gain = np.linalg.solve(tau_cov_pt[idx] + omega, q - prior[idx])
+    return prior + tau_cov_pt @ gain
@@ -1,18 +1,44 @@
 """Portfolio risk modules for Phase 11."""
+from __future__ import annotations
 
-from quant.risk.var_model import VaRModel, compute_var_metrics
-from quant.risk.correlation import CorrelationMonitor
-from quant.risk.exposure import ExposureManager
-from quant.risk.position_sizer import KellyPositionSizer
-from quant.risk.drawdown_guard import DrawdownGuard, DrawdownGuardConfig, DrawdownGuardState
+from importlib import import_module
+from typing import Any
 
 __all__ = [
     "VaRModel",
     "compute_var_metrics",
+    "ReturnPanel",
+    "VaREngine",
     "CorrelationMonitor",
     "ExposureManager",
+    "SectorMetadataStore",
+    "get_sector_store",
     "KellyPositionSizer",
     "DrawdownGuard",
     "DrawdownGuardConfig",
     "DrawdownGuardState",
 ]
+
+# 에이전트는 drawdown_guard/position_sizer만 쓴다 — VaR/상관 모듈(numpy/pandas)은 접근 시 로드
+_MODULE_BY_EXPORT = {
+    "VaRModel": "quant.risk.var_model",
+    "compute_var_metrics": "quant.risk.var_model",
+    "ReturnPanel": "quant.risk.var_engine",
+    "VaREngine": "quant.risk.var_engine",
+    "CorrelationMonitor": "quant.risk.correlation",
+    "ExposureManager": "quant.risk.exposure",
+    "SectorMetadataStore": "quant.risk.sector_metadata",
+    "get_sector_store": "quant.risk.sector_metadata",
+    "KellyPositionSizer": "quant.risk.position_sizer",
+    "DrawdownGuard": "quant.risk.drawdown_guard",
+    "DrawdownGuardConfig": "quant.risk.drawdown_guard",
+    "DrawdownGuardState": "quant.risk.drawdown_guard",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _MODULE_BY_EXPORT.get(name)
+    if module_name is None:
+        raise AttributeError(name)
+    module = import_module(module_name)
+    return getattr(module, name)
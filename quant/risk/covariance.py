@@ -0,0 +1,51 @@
+"""Covariance estimators shared by the risk, stress and portfolio modules.
+
+Sample covariance is noisy and often singular when assets outnumber
+observations (combined BTC/KR/US universe on a 1-year window). Ledoit-Wolf
+shrinkage toward a scaled identity keeps it well-conditioned and invertible.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+
+def ledoit_wolf(returns: np.ndarray) -> tuple[np.ndarray, float]:
+    """Ledoit-Wolf (2004) shrinkage covariance toward ``mu * I``.
+
+    Args:
+        returns: (T, N) return matrix, rows are observations.
+
+    Returns:
+        (covariance, shrinkage intensity in [0, 1]). Uses the 1/T (MLE) scaling,
+        same as ``sklearn.covariance.LedoitWolf``.
+    """
+    X = np.asarray(returns, dtype=float)
+    if X.ndim == 1:
+        X = X[:, None]
+    T, N = X.shape
+    if T < 2 or N == 0:
+        return np.zeros((N, N)), 1.0
+    X = X - X.mean(axis=0)
+    S = X.T @ X / T
+    mu = float(np.trace(S)) / N
+    d2 = float(((S - mu * np.eye(N)) ** 2).sum())
+    if d2 <= 0:
+        return S, 0.0
+    # sum_t ||x_t x_t' - S||_F^2 = sum_t |x_t|^4 - T ||S||_F^2
+    row_sq = (X ** 2).sum(axis=1)
+    b2_bar = max(float((row_sq ** 2).sum() - T * (S ** 2).sum()), 0.0) / T ** 2
+    shrinkage = min(b2_bar, d2) / d2
+    cov = shrinkage * mu * np.eye(N) + (1.0 - shrinkage) * S
+    return cov, float(shrinkage)
+
+
+def nearest_psd(cov: np.ndarray, floor: float = 1e-12) -> np.ndarray:
+    """Symmetrize and clip eigenvalues so Cholesky/solves never fail."""
+    sym = (np.asarray(cov, dtype=float) + np.asarray(cov, dtype=float).T) / 2.0
+    try:
+        np.linalg.cholesky(sym)     # already positive definite: skip the O(n^3) eigh
+        return sym
+    except np.linalg.LinAlgError:
+        pass
+    vals, vecs = np.linalg.eigh(sym)
+    return (vecs * np.clip(vals, floor, None)) @ vecs.T
@@ -5,13 +5,27 @@ Provides:
 - Total exposure limit enforcement
 - Correlation-based concentration warnings
 - Global buy-block signal when limits exceeded
+
+The three market snapshots are loaded concurrently and memoized for a short
+TTL, so repeated buy checks within one trading cycle are in-memory.  Call
+``invalidate_cross_market_cache()`` after writing a trade: it rewrites a
+stamp file that every agent process checks before reusing its cache, so a
+fill in one market is visible to the others' buy-block on their next check.
 """
 from __future__ import annotations
 
+import argparse
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
+from common.config import BRAIN_PATH
 from common.env_loader import load_env
 from common.logger import get_logger
 from common.supabase_client import get_supabase
@@ -19,6 +33,32 @@ from common.supabase_client import get_supabase
 load_env()
 log = get_logger("cross_market_risk")
 
+DEFAULT_CACHE_TTL_SEC = 30.0
+_LOAD_POOL = ThreadPoolExecutor(max_workers=3, thread_name_prefix="cross-market")
+# 에이전트(BTC/KR/US)는 별도 cron 프로세스 — 트레이드 기록 시 갱신하는 공유 워터마크
+TRADE_STAMP_PATH: Path = BRAIN_PATH / "risk" / "cross_market_trade.stamp"
+_cache_generation = 0
+
+
+def _trade_watermark() -> str:
+    try:
+        return TRADE_STAMP_PATH.read_text(encoding="utf-8")
+    except OSError:
+        return ""
+
+
+def invalidate_cross_market_cache() -> None:
+    """Drop memoized snapshots in every agent process (call after trade writes; never raises)."""
+    global _cache_generation
+    _cache_generation += 1
+    try:
+        TRADE_STAMP_PATH.parent.mkdir(parents=True, exist_ok=True)
+        tmp = TRADE_STAMP_PATH.with_name(f"{TRADE_STAMP_PATH.name}.{os.getpid()}.tmp")
+        tmp.write_text(uuid.uuid4().hex, encoding="utf-8")
+        os.replace(tmp, TRADE_STAMP_PATH)
+    except OSError as e:
+        log.warning("cross-market trade stamp update failed", error=str(e)[:200])
+
 
 def _safe_float(value: Any, default: float = 0.0) -> float:
     try:
@@ -68,9 +108,45 @@ class CrossMarketRiskResult:
 class CrossMarketRiskManager:
     """Evaluates combined risk across BTC, KR, US markets."""
 
-    def __init__(self, config: Optional[CrossMarketConfig] = None):
+    def __init__(
+        self,
+        config: Optional[CrossMarketConfig] = None,
+        cache_ttl: float = DEFAULT_CACHE_TTL_SEC,
+        clock: Callable[[], float] = time.monotonic,
+    ):
         self.config = config or CrossMarketConfig()
         self._supabase = get_supabase()
+        self.cache_ttl = cache_ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._cached: Optional[Tuple[float, Tuple[int, str], Tuple[MarketSnapshot, ...]]] = None
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._cached = None
+
+    def _load_snapshots(self, use_cache: bool = True) -> Tuple[Tuple[MarketSnapshot, ...], bool]:
+        """(btc, kr, us) snapshots and whether they were freshly loaded."""
+        now = self._clock()
+        with self._lock:
+            cached = self._cached
+            generation = (_cache_generation, _trade_watermark())
+            if (
+                use_cache
+                and cached is not None
+                and cached[1] == generation
+                and now - cached[0] < self.cache_ttl
+            ):
+                return cached[2], False
+
+            futures = [
+                _LOAD_POOL.submit(loader)
+                for loader in (self._load_btc_snapshot, self._load_kr_snapshot, self._load_us_snapshot)
+            ]
+            snaps = tuple(f.result() for f in futures)
+            # a trade written while loading leaves a stale generation → not reused
+            self._cached = (self._clock(), generation, snaps)
+        return snaps, True
 
     def _load_btc_snapshot(self) -> MarketSnapshot:
         """Load BTC position data from Supabase."""
@@ -141,16 +217,15 @@ class CrossMarketRiskManager:
             log.warning("US snapshot load failed", error=str(e)[:200])
         return snap
 
-    def evaluate(self, total_capital: float = 0.0) -> CrossMarketRiskResult:
+    def evaluate(self, total_capital: float = 0.0, use_cache: bool = True) -> CrossMarketRiskResult:
         """Run cross-market risk evaluation.
 
         Args:
             total_capital: total portfolio capital (KRW-denominated).
                            If 0, uses sum of position values as proxy.
+            use_cache: reuse snapshots loaded within ``cache_ttl`` seconds.
         """
-        btc = self._load_btc_snapshot()
-        kr = self._load_kr_snapshot()
-        us = self._load_us_snapshot()
+        (btc, kr, us), fresh = self._load_snapshots(use_cache=use_cache)
 
         total_position = btc.position_value + kr.position_value + us.position_value
         if total_capital <= 0:
@@ -184,11 +259,12 @@ class CrossMarketRiskManager:
                     f"한도 {self.config.max_single_market_pct:.0%}"
                 )
 
-        log.info(
+        (log.info if fresh else log.debug)(
             "cross-market risk evaluated",
             total_exposure_pct=f"{result.total_exposure_pct:.1%}",
             buy_blocked=result.buy_blocked,
             markets=result.market_weights,
+            cached=not fresh,
         )
 
         return result
@@ -206,3 +282,62 @@ class CrossMarketRiskManager:
         except Exception as e:
             log.warning("cross-market check failed (allowing buy)", error=str(e)[:200])
             return False  # Fail-open: don't block on error
+
+
+def run_benchmark(orders: int = 20, latency: float = 0.05) -> dict:
+    """Per-order ``should_block_buy`` overhead against a fake Supabase with ``latency`` per query."""
+
+    class _Query:
+        def __init__(self, rows):
+            self._rows = rows
+
+        def select(self, *_a, **_k):
+            return self
+
+        def eq(self, *_a, **_k):
+            return self
+
+        def execute(self):
+            time.sleep(latency)
+            return type("Res", (), {"data": self._rows})()
+
+    class _FakeSupabase:
+        def table(self, name):
+            rows = [{"quantity": 1, "entry_price": 1_000_000, "price": 1_000_000}]
+            return _Query(rows if name != "us_trade_executions" else [])
+
+    def _per_order_ms(check: Callable[[], Any]) -> float:
+        started = time.perf_counter()
+        for _ in range(orders):
+            check()
+        return (time.perf_counter() - started) / orders * 1000
+
+    mgr = CrossMarketRiskManager(cache_ttl=0.0)
+    mgr._supabase = _FakeSupabase()
+    # before: evaluate() loaded the three markets one after another on every order
+    sequential_ms = _per_order_ms(
+        lambda: (mgr._load_btc_snapshot(), mgr._load_kr_snapshot(), mgr._load_us_snapshot())
+    )
+    concurrent_ms = _per_order_ms(lambda: mgr.should_block_buy("kr", total_capital=10_000_000))
+    mgr.cache_ttl = DEFAULT_CACHE_TTL_SEC
+    mgr.invalidate()
+    cached_ms = _per_order_ms(lambda: mgr.should_block_buy("kr", total_capital=10_000_000))
+    return {
+        "orders": orders,
+        "query_latency_ms": latency * 1000,
+        "sequential_ms_per_order": round(sequential_ms, 3),
+        "concurrent_ms_per_order": round(concurrent_ms, 3),
+        "memoized_ms_per_order": round(cached_ms, 3),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cross-market risk manager")
+    parser.add_argument("--benchmark", action="store_true", help="measure per-order buy-check overhead")
+    parser.add_argument("--orders", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="fake Supabase latency per query (s)")
+    args = parser.parse_args()
+    if args.benchmark:
+        print(run_benchmark(orders=args.orders, latency=args.latency))
+    else:
+        print(CrossMarketRiskManager().evaluate())
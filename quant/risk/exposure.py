@@ -5,7 +5,7 @@ from typing import Dict, Iterable, List, Mapping, Optional
 
 from common.env_loader import load_env
 from common.logger import get_logger
-from common.retry import retry_call
+from quant.risk.sector_metadata import SectorMetadataStore, get_sector_store
 
 load_env()
 log = get_logger("risk_exposure")
@@ -75,36 +75,49 @@ def _default_factor_groups() -> Dict[str, List[str]]:
     }
 
 
-def _sector_from_position(position: dict, yfinance_fallback: bool = False) -> str:
+def _position_symbol(position: dict) -> str:
+    return _normalize_symbol(position.get("symbol") or position.get("ticker") or position.get("code"))
+
+
+def _sector_from_position(
+    position: dict,
+    yfinance_fallback: bool = False,
+    store: Optional[SectorMetadataStore] = None,
+) -> str:
     sector = str(position.get("sector") or position.get("industry") or "").strip()
     if sector:
         return sector
 
-    if not yfinance_fallback:
-        return "UNKNOWN"
-
-    symbol = _normalize_symbol(position.get("symbol") or position.get("ticker") or position.get("code"))
-    if not symbol or symbol.isdigit():
-        return "UNKNOWN"
-    try:
-        import yfinance as yf
-
-        info = retry_call(
-            yf.Ticker(symbol).get_info,
-            max_attempts=1,
-            base_delay=0.2,
-            default=None,
-        )
-        if not info:
-            info = yf.Ticker(symbol).info or {}
-        return str(info.get("sector") or info.get("industry") or "UNKNOWN")
-    except Exception:
+    symbol = _position_symbol(position)
+    if not symbol:
         return "UNKNOWN"
+    return (store or get_sector_store()).sector(symbol, fetch=yfinance_fallback)
 
 
 class ExposureManager:
-    def __init__(self, sector_limit: float = 0.30):
+    def __init__(self, sector_limit: float = 0.30, sector_store: Optional[SectorMetadataStore] = None):
         self.sector_limit = max(0.0, min(1.0, sector_limit))
+        self._sector_store = sector_store
+
+    @property
+    def sector_store(self) -> SectorMetadataStore:
+        if self._sector_store is None:
+            self._sector_store = get_sector_store()
+        return self._sector_store
+
+    def resolve_sectors(self, positions: List[dict], yfinance_fallback: bool = False) -> List[str]:
+        """Sector per position; symbols without an inline sector are resolved in one batch."""
+        pending = [
+            _position_symbol(p) for p in positions
+            if not str(p.get("sector") or p.get("industry") or "").strip()
+        ]
+        pending = [s for s in pending if s]
+        resolved = self.sector_store.resolve_many(pending, fetch=yfinance_fallback) if pending else {}
+        sectors = []
+        for p in positions:
+            inline = str(p.get("sector") or p.get("industry") or "").strip()
+            sectors.append(inline or resolved.get(_position_symbol(p), "UNKNOWN"))
+        return sectors
 
     def sector_exposure(
         self,
@@ -113,11 +126,10 @@ class ExposureManager:
     ) -> dict:
         sector_values: Dict[str, float] = {}
         total = 0.0
-        for p in positions:
-            v = _position_value(p)
-            if v <= 0:
-                continue
-            sector = _sector_from_position(p, yfinance_fallback=yfinance_fallback)
+        valued = [(p, _position_value(p)) for p in positions]
+        valued = [(p, v) for p, v in valued if v > 0]
+        sectors = self.resolve_sectors([p for p, _ in valued], yfinance_fallback=yfinance_fallback)
+        for (p, v), sector in zip(valued, sectors):
             sector_values[sector] = sector_values.get(sector, 0.0) + v
             total += v
 
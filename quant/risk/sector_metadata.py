@@ -0,0 +1,301 @@
+"""Sector/industry metadata table for exposure analysis.
+
+Lookups are served from an in-memory dict mirrored in a local SQLite table,
+so warm exposure reports never hit the network.  Offline lookups only read
+the bundled static map and an existing table; the table is seeded from
+Supabase ``top50_stocks`` the first time a fetching lookup misses, and unknown
+symbols are resolved together in one concurrent yfinance batch and persisted
+with a long TTL (misses are stored too, with a shorter TTL).
+"""
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Mapping, Optional
+
+from common.config import BRAIN_PATH, ETF_SECTOR_MAP
+from common.logger import get_logger
+from common.retry import retry_call
+
+log = get_logger("sector_metadata")
+
+SECTOR_DB_PATH = BRAIN_PATH / "risk" / "sector_metadata.sqlite3"
+UNKNOWN = "UNKNOWN"
+
+# 자주 보유하는 미국 대형주 — yfinance 없이도 바로 해석
+STATIC_SECTOR_MAP: Dict[str, tuple[str, str]] = {
+    **{sym: (sector, "") for sym, sector in ETF_SECTOR_MAP.items()},
+    "AAPL": ("Technology", "Consumer Electronics"),
+    "MSFT": ("Technology", "Software—Infrastructure"),
+    "NVDA": ("Technology", "Semiconductors"),
+    "AMD": ("Technology", "Semiconductors"),
+    "AVGO": ("Technology", "Semiconductors"),
+    "GOOGL": ("Communication Services", "Internet Content & Information"),
+    "GOOG": ("Communication Services", "Internet Content & Information"),
+    "META": ("Communication Services", "Internet Content & Information"),
+    "AMZN": ("Consumer Cyclical", "Internet Retail"),
+    "TSLA": ("Consumer Cyclical", "Auto Manufacturers"),
+    "NFLX": ("Communication Services", "Entertainment"),
+    "JPM": ("Financial Services", "Banks—Diversified"),
+    "V": ("Financial Services", "Credit Services"),
+    "XOM": ("Energy", "Oil & Gas Integrated"),
+    "UNH": ("Healthcare", "Healthcare Plans"),
+    "LLY": ("Healthcare", "Drug Manufacturers—General"),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sector_metadata (
+    symbol TEXT PRIMARY KEY,
+    sector TEXT NOT NULL,
+    industry TEXT NOT NULL DEFAULT '',
+    source TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sector_meta_state (
+    key TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+"""
+
+
+def _normalize_symbol(symbol: str) -> str:
+    return str(symbol or "").strip().upper()
+
+
+def _fetch_yfinance(symbol: str) -> Optional[tuple[str, str]]:
+    """Return ``(sector, industry)`` from yfinance, or None when unavailable."""
+    try:
+        import yfinance as yf
+
+        info = retry_call(yf.Ticker(symbol).get_info, max_attempts=1, base_delay=0.2, default=None) or {}
+    except Exception:
+        return None
+    sector = str(info.get("sector") or info.get("industry") or "").strip()
+    if not sector:
+        return None
+    return sector, str(info.get("industry") or "").strip()
+
+
+def _load_top50_rows() -> list[dict]:
+    try:
+        from common.supabase_client import run_query_with_retry
+
+        res = run_query_with_retry(
+            lambda sb: sb.table("top50_stocks").select("stock_code, industry").execute(),
+            max_attempts=1,
+            default=None,
+        )
+        return list(getattr(res, "data", None) or [])
+    except Exception:
+        return []
+
+
+class SectorMetadataStore:
+    def __init__(
+        self,
+        path: Path = SECTOR_DB_PATH,
+        ttl_seconds: float = 30 * 86400,
+        miss_ttl_seconds: float = 86400,
+        fetcher: Optional[Callable[[str], Optional[tuple[str, str]]]] = None,
+        seed_loader: Optional[Callable[[], Iterable[Mapping]]] = None,
+        max_workers: int = 8,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = Path(path)
+        self.ttl_seconds = float(ttl_seconds)
+        self.miss_ttl_seconds = float(miss_ttl_seconds)
+        self.fetcher = fetcher or _fetch_yfinance
+        self.seed_loader = seed_loader or _load_top50_rows
+        self.max_workers = max(1, int(max_workers))
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._rows: Dict[str, tuple[str, str, float]] = {}   # symbol -> (sector, industry, expires_at)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._loaded = False
+        self._seeded_at = 0.0
+
+    # ── storage ──────────────────────────────────────────────────────
+    def _connect(self, create: bool = True) -> Optional[sqlite3.Connection]:
+        if self._conn is None and (create or self.path.exists()):
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+                self._conn = conn
+            except Exception as exc:
+                log.warning("sector table unavailable", path=str(self.path), error=str(exc)[:200])
+        return self._conn
+
+    def _write(self, rows: Dict[str, tuple[str, str, str, float]]) -> None:
+        conn = self._connect()
+        if conn is None or not rows:
+            return
+        try:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT OR REPLACE INTO sector_metadata (symbol, sector, industry, source, expires_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                [(sym, sec, ind, src, exp) for sym, (sec, ind, src, exp) in rows.items()],
+            )
+            conn.execute("COMMIT")
+        except Exception as exc:
+            conn.execute("ROLLBACK")
+            log.warning("sector table write failed", error=str(exc)[:200])
+
+    def _ensure_loaded(self) -> None:
+        """Load the static map and any existing table; never creates the file or hits the network."""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            for sym, (sec, ind) in STATIC_SECTOR_MAP.items():
+                self._rows[sym] = (sec, ind, float("inf"))
+            conn = self._connect(create=False)
+            if conn is not None:
+                for sym, sec, ind, exp in conn.execute(
+                    "SELECT symbol, sector, industry, expires_at FROM sector_metadata"
+                ):
+                    self._rows[sym] = (sec, ind, exp)
+                row = conn.execute("SELECT value FROM sector_meta_state WHERE key = 'seeded_at'").fetchone()
+                self._seeded_at = float(row[0]) if row else 0.0
+            self._loaded = True
+
+    def _ensure_seeded(self) -> None:
+        if self.clock() - self._seeded_at <= self.ttl_seconds:
+            return
+        with self._lock:
+            if self.clock() - self._seeded_at <= self.ttl_seconds:
+                return
+            self._seed_locked()
+
+    def _seed_locked(self) -> None:
+        now = self.clock()
+        expires = now + self.ttl_seconds
+        rows: Dict[str, tuple[str, str, str, float]] = {
+            sym: (sec, ind, "static", expires) for sym, (sec, ind) in STATIC_SECTOR_MAP.items()
+        }
+        try:
+            seed_rows = list(self.seed_loader() or [])
+        except Exception as exc:
+            log.warning("top50 seed failed", error=str(exc)[:200])
+            seed_rows = []
+        for r in seed_rows:
+            sym = _normalize_symbol(r.get("stock_code") or r.get("symbol"))
+            sector = str(r.get("sector") or r.get("industry") or "").strip()
+            if sym and sector:
+                rows[sym] = (sector, str(r.get("industry") or ""), "top50", expires)
+        for sym, (sec, ind, _, exp) in rows.items():
+            self._rows[sym] = (sec, ind, exp)
+        self._write(rows)
+        self._seeded_at = now
+        conn = self._connect()
+        if conn is not None:
+            try:
+                conn.execute("INSERT OR REPLACE INTO sector_meta_state (key, value) VALUES ('seeded_at', ?)", (now,))
+            except Exception:
+                pass
+        log.info("sector table seeded", rows=len(rows), top50=len(seed_rows))
+
+    # ── lookups ──────────────────────────────────────────────────────
+    def get(self, symbol: str) -> Optional[dict]:
+        """Cached metadata for ``symbol`` (never fetches); None when missing or expired."""
+        self._ensure_loaded()
+        row = self._rows.get(_normalize_symbol(symbol))
+        if row is None or row[2] <= self.clock():
+            return None
+        return {"sector": row[0], "industry": row[1]}
+
+    def sector(self, symbol: str, fetch: bool = False) -> str:
+        return self.resolve_many([symbol], fetch=fetch).get(_normalize_symbol(symbol), UNKNOWN)
+
+    def resolve_many(self, symbols: Iterable[str], fetch: bool = True) -> Dict[str, str]:
+        """Map symbols to sectors; stale/unknown ones are fetched in one concurrent batch.
+
+        With ``fetch=False`` this is a pure local lookup: no seeding, no network,
+        no SQLite file created.
+        """
+        self._ensure_loaded()
+        syms = [s for s in dict.fromkeys(_normalize_symbol(raw) for raw in symbols) if s]
+        now = self.clock()
+        if fetch and any(sym not in self._rows or self._rows[sym][2] <= now for sym in syms):
+            self._ensure_seeded()
+        out: Dict[str, str] = {}
+        missing = []
+        for sym in syms:
+            row = self._rows.get(sym)
+            if row is not None and row[2] > now:
+                out[sym] = row[0]
+            else:
+                out[sym] = row[0] if row is not None else UNKNOWN
+                # 한국 종목코드는 yfinance 섹터가 없음 → top50 시드에만 의존
+                if not sym.isdigit():
+                    missing.append(sym)
+        if fetch and missing:
+            out.update(self._fetch_batch(missing))
+        return out
+
+    def _fetch_batch(self, symbols: list[str]) -> Dict[str, str]:
+        workers = min(self.max_workers, len(symbols))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sector-meta") as pool:
+            results = list(pool.map(self._safe_fetch, symbols))
+        now = self.clock()
+        rows: Dict[str, tuple[str, str, str, float]] = {}
+        extended: Dict[str, float] = {}
+        with self._lock:
+            for sym, meta in zip(symbols, results):
+                if meta:
+                    rows[sym] = (meta[0], meta[1], "yfinance", now + self.ttl_seconds)
+                elif sym in self._rows:
+                    # 재조회 실패 — 알던 섹터는 유지하고 만료만 miss TTL만큼 연장
+                    sec, ind, _ = self._rows[sym]
+                    self._rows[sym] = (sec, ind, now + self.miss_ttl_seconds)
+                    extended[sym] = now + self.miss_ttl_seconds
+                else:
+                    rows[sym] = (UNKNOWN, "", "miss", now + self.miss_ttl_seconds)
+            for sym, (sec, ind, _, exp) in rows.items():
+                self._rows[sym] = (sec, ind, exp)
+            self._write(rows)
+            self._extend(extended)
+            out = {sym: self._rows[sym][0] for sym in symbols}
+        log.info("sector batch resolved", requested=len(symbols), hits=sum(1 for r in results if r))
+        return out
+
+    def _extend(self, expiries: Dict[str, float]) -> None:
+        conn = self._connect()
+        if conn is None or not expiries:
+            return
+        try:
+            conn.executemany("UPDATE sector_metadata SET expires_at = ? WHERE symbol = ?",
+                             [(exp, sym) for sym, exp in expiries.items()])
+        except Exception as exc:
+            log.warning("sector table write failed", error=str(exc)[:200])
+
+    def _safe_fetch(self, symbol: str) -> Optional[tuple[str, str]]:
+        try:
+            return self.fetcher(symbol)
+        except Exception:
+            return None
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_STORE: Optional[SectorMetadataStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_sector_store() -> SectorMetadataStore:
+    global _STORE
+    if _STORE is None:
+        with _STORE_LOCK:
+            if _STORE is None:
+                _STORE = SectorMetadataStore()
+    return _STORE
@@ -0,0 +1,279 @@
+"""Vectorized VaR/CVaR engine (NumPy).
+
+Methods on one aligned (days x symbols) return matrix:
+- historical:       empirical quantile of R @ w (same result as var_model)
+- filtered:         filtered historical simulation (EWMA-devolatilized residuals,
+                    rescaled to today's volatility, resampled into paths)
+- block_bootstrap:  moving-block bootstrap of whole rows (keeps cross-correlation
+                    and short-range autocorrelation) over a multi-day horizon
+- monte_carlo:      Cholesky-correlated Gaussian paths from the sample covariance
+Plus parametric marginal/component VaR and historical component CVaR per position.
+
+Output keys are loss-positive fractions of portfolio value, like var_model.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from common.logger import get_logger
+from common.retry import retry_call
+
+log = get_logger("risk_var_engine")
+
+_MC_CHUNK = 8192  # paths simulated per block (bounds memory for large books)
+
+
+@dataclass
+class ReturnPanel:
+    """Aligned return matrix: ``returns[t, j]`` is symbol ``symbols[j]`` on day ``t``."""
+
+    symbols: List[str]
+    returns: np.ndarray
+
+    @property
+    def n_days(self) -> int:
+        return int(self.returns.shape[0])
+
+
+def panel_from_series(series: Dict[str, Sequence[float]], lookback: int = 252) -> ReturnPanel:
+    """Right-align per-symbol return lists on their common tail (var_model alignment rule)."""
+    usable = {s: v for s, v in series.items() if v}
+    if not usable:
+        return ReturnPanel([], np.empty((0, 0)))
+    n = min(min(len(v) for v in usable.values()), max(lookback, 2))
+    symbols = [s for s in series if series.get(s) and len(series[s]) >= n]
+    mat = np.array([np.asarray(series[s][-n:], dtype=float) for s in symbols]).T
+    return ReturnPanel(symbols, mat.reshape(n, len(symbols)))
+
+
+def fetch_return_panel(symbols: Sequence[str], lookback_days: int = 252, aligned: bool = True):
+    """Download every symbol with one batched yfinance request.
+
+    ``aligned=True`` returns a ``ReturnPanel`` on the dates where all symbols trade.
+    ``aligned=False`` returns ``{symbol: [returns...]}`` computed per symbol on its own
+    calendar (the shape ``var_model.fetch_return_matrix`` has always returned).
+    """
+    uniq = sorted({str(s or "").strip().upper() for s in symbols if str(s or "").strip()})
+    empty = ReturnPanel([], np.empty((0, 0))) if aligned else {}
+    if not uniq:
+        return empty
+    try:
+        import pandas as pd
+        import yfinance as yf
+
+        data = retry_call(
+            yf.download,
+            kwargs={
+                "tickers": uniq,
+                "period": f"{lookback_days + 30}d",
+                "interval": "1d",
+                "auto_adjust": True,
+                "progress": False,
+                "group_by": "column",
+                "threads": True,
+            },
+            max_attempts=2,
+            base_delay=1.0,
+            default=None,
+        )
+        if data is None or data.empty:
+            return empty
+        close = data["Close"]
+        if isinstance(close, pd.Series):
+            close = close.to_frame(uniq[0])
+        close = close.where(close > 0)
+    except Exception as exc:
+        log.warning("fetch_return_panel failed", error=str(exc))
+        return empty
+
+    if not aligned:
+        out: Dict[str, List[float]] = {}
+        for sym in close.columns:
+            px = close[sym].dropna()
+            if len(px) < 3:
+                continue
+            rets = (px.iloc[1:].to_numpy() / px.iloc[:-1].to_numpy()) - 1.0
+            out[str(sym).upper()] = rets[-lookback_days:].tolist()
+        return out
+
+    close = close.dropna(axis=1, thresh=3).dropna(axis=0, how="any")
+    if len(close) < 3:
+        return empty
+    px = close.to_numpy(dtype=float)
+    rets = px[1:] / px[:-1] - 1.0
+    return ReturnPanel([str(c).upper() for c in close.columns], rets[-lookback_days:])
+
+
+# ─────────────────────────────────────────────
+# Core estimators (all operate on arrays)
+# ─────────────────────────────────────────────
+def var_cvar_from_samples(samples: np.ndarray, confidence: float) -> tuple[float, float]:
+    """Loss-positive VaR/CVaR from P&L return samples (linear-interpolated quantile)."""
+    samples = np.asarray(samples, dtype=float)
+    if samples.size == 0:
+        return 0.0, 0.0
+    alpha = min(max(confidence, 0.0), 1.0)
+    q = float(np.percentile(samples, (1.0 - alpha) * 100.0))
+    var = max(0.0, -q)
+    tail = samples[samples <= q]
+    cvar = max(0.0, -float(tail.mean())) if tail.size else var
+    return var, cvar
+
+
+def ewma_volatility(returns: np.ndarray, lam: float = 0.94) -> np.ndarray:
+    """RiskMetrics EWMA volatility; ``out[t]`` uses information up to ``t - 1``."""
+    r = np.asarray(returns, dtype=float)
+    var = np.empty_like(r)
+    var[0] = r.var() if r.size > 1 else r[0] ** 2
+    for t in range(1, r.size):
+        var[t] = lam * var[t - 1] + (1.0 - lam) * r[t - 1] ** 2
+    return np.sqrt(np.maximum(var, 1e-18))
+
+
+def _robust_cholesky(cov: np.ndarray) -> np.ndarray:
+    try:
+        return np.linalg.cholesky(cov)
+    except np.linalg.LinAlgError:
+        # clip tiny/negative eigenvalues (near-duplicate assets, short samples)
+        vals, vecs = np.linalg.eigh((cov + cov.T) / 2.0)
+        vals = np.clip(vals, 1e-12, None)
+        return np.linalg.cholesky((vecs * vals) @ vecs.T)
+
+
+class VaREngine:
+    """Vectorized VaR/CVaR calculator over a ``ReturnPanel`` and a weight vector."""
+
+    def __init__(
+        self,
+        n_paths: int = 20000,
+        horizon_days: int = 1,
+        block_size: int = 5,
+        ewma_lambda: float = 0.94,
+        seed: Optional[int] = 42,
+    ) -> None:
+        self.n_paths = max(int(n_paths), 100)
+        self.horizon_days = max(int(horizon_days), 1)
+        self.block_size = max(int(block_size), 1)
+        self.ewma_lambda = float(ewma_lambda)
+        self.seed = seed
+
+    def _rng(self) -> np.random.Generator:
+        return np.random.default_rng(self.seed)
+
+    # ── simulators: each returns portfolio horizon-return samples ──
+    def historical_samples(self, returns: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        return returns @ weights
+
+    def filtered_samples(self, returns: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        port = returns @ weights
+        sigma = ewma_volatility(port, self.ewma_lambda)
+        z = port / sigma
+        sigma_next = np.sqrt(self.ewma_lambda * sigma[-1] ** 2 + (1.0 - self.ewma_lambda) * port[-1] ** 2)
+        idx = self._rng().integers(0, z.size, size=(self.n_paths, self.horizon_days))
+        return (z[idx] * sigma_next).sum(axis=1)
+
+    def block_bootstrap_samples(self, returns: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        port = returns @ weights  # rows resampled jointly → weighting first is equivalent
+        block = min(self.block_size, port.size)
+        n_blocks = -(-self.horizon_days // block)
+        starts = self._rng().integers(0, port.size - block + 1, size=(self.n_paths, n_blocks))
+        idx = (starts[:, :, None] + np.arange(block)).reshape(self.n_paths, -1)[:, : self.horizon_days]
+        return port[idx].sum(axis=1)
+
+    def monte_carlo_samples(self, returns: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        mu = returns.mean(axis=0)
+        cov = np.atleast_2d(np.cov(returns, rowvar=False))
+        chol = _robust_cholesky(cov)
+        h = self.horizon_days
+        # loadings of the portfolio on the independent shocks: w' L
+        load = weights @ chol
+        rng = self._rng()
+        out = np.empty(self.n_paths)
+        for start in range(0, self.n_paths, _MC_CHUNK):
+            stop = min(start + _MC_CHUNK, self.n_paths)
+            z = rng.standard_normal((stop - start, chol.shape[0]))
+            out[start:stop] = z @ load * np.sqrt(h) + float(mu @ weights) * h
+        return out
+
+    # ── attribution ──
+    def component_var(self, returns: np.ndarray, weights: np.ndarray, confidence: float = 0.95) -> dict:
+        """Parametric marginal/component VaR and historical (Euler) component CVaR."""
+        cov = np.atleast_2d(np.cov(returns, rowvar=False))
+        sigma_w = cov @ weights
+        port_sigma = float(np.sqrt(max(weights @ sigma_w, 0.0)))
+        z = NormalDist().inv_cdf(min(max(confidence, 1e-6), 1 - 1e-6))
+        if port_sigma > 0:
+            marginal = z * sigma_w / port_sigma
+        else:
+            marginal = np.zeros_like(weights)
+        component = weights * marginal
+
+        port = returns @ weights
+        q = np.percentile(port, (1.0 - confidence) * 100.0)
+        tail = port <= q
+        if tail.any():
+            component_cvar = -weights * returns[tail].mean(axis=0)
+        else:
+            component_cvar = np.zeros_like(weights)
+        return {
+            "marginal_var": marginal,
+            "component_var": component,
+            "component_cvar": component_cvar,
+            "parametric_var": z * port_sigma,
+        }
+
+    def compute(
+        self,
+        panel: ReturnPanel,
+        weights: Dict[str, float],
+        methods: Sequence[str] = ("historical", "filtered", "block_bootstrap", "monte_carlo"),
+        confidences: Sequence[float] = (0.95, 0.99),
+    ) -> dict:
+        """Run every requested method and per-position attribution in one pass."""
+        if panel.n_days < 2 or not panel.symbols:
+            return {"methods": {}, "positions": {}, "sample_days": panel.n_days, "symbols": []}
+        w = np.array([float(weights.get(s, 0.0)) for s in panel.symbols])
+        R = panel.returns
+
+        simulators = {
+            "historical": self.historical_samples,
+            "filtered": self.filtered_samples,
+            "block_bootstrap": self.block_bootstrap_samples,
+            "monte_carlo": self.monte_carlo_samples,
+        }
+        results: Dict[str, dict] = {}
+        for name in methods:
+            sim = simulators.get(name)
+            if sim is None:
+                continue
+            samples = sim(R, w)
+            row = {"paths": int(samples.size)}
+            for c in confidences:
+                var, cvar = var_cvar_from_samples(samples, c)
+                tag = int(round(c * 100))
+                row[f"var_{tag}"] = round(var, 6)
+                row[f"cvar_{tag}"] = round(cvar, 6)
+            results[name] = row
+
+        attrib = self.component_var(R, w, confidence=confidences[0])
+        positions = {
+            sym: {
+                "weight": round(float(w[i]), 6),
+                "marginal_var": round(float(attrib["marginal_var"][i]), 6),
+                "component_var": round(float(attrib["component_var"][i]), 6),
+                "component_cvar": round(float(attrib["component_cvar"][i]), 6),
+            }
+            for i, sym in enumerate(panel.symbols)
+        }
+        return {
+            "methods": results,
+            "positions": positions,
+            "parametric_var": round(float(attrib["parametric_var"]), 6),
+            "horizon_days": self.horizon_days,
+            "sample_days": panel.n_days,
+            "symbols": list(panel.symbols),
+        }
@@ -9,9 +9,12 @@ import math
 from statistics import NormalDist
 from typing import Dict, Iterable, List, Mapping, Sequence
 
+import numpy as np
+
 from common.env_loader import load_env
 from common.logger import get_logger
-from common.retry import retry_call
+from quant.risk.var_engine import (VaREngine, fetch_return_panel,
+                                   panel_from_series, var_cvar_from_samples)
 
 load_env()
 log = get_logger("risk_var")
@@ -41,24 +44,6 @@ def _std(values: Sequence[float]) -> float:
     return float(math.sqrt(var))
 
 
-def _percentile(values: Sequence[float], q: float) -> float:
-    """q in [0, 100]. Linear interpolation percentile."""
-    if not values:
-        return 0.0
-    arr = sorted(float(v) for v in values)
-    n = len(arr)
-    if n == 1:
-        return arr[0]
-    q = max(0.0, min(100.0, q))
-    pos = (q / 100.0) * (n - 1)
-    lo = int(math.floor(pos))
-    hi = int(math.ceil(pos))
-    if lo == hi:
-        return arr[lo]
-    w = pos - lo
-    return arr[lo] * (1.0 - w) + arr[hi] * w
-
-
 def _normalize_symbol(symbol: str) -> str:
     return str(symbol or "").strip().upper()
 
@@ -155,24 +140,13 @@ def _portfolio_return_series(aligned: Dict[str, List[float]], weights: Dict[str,
     n = min(len(aligned[s]) for s in symbols)
     if n <= 0:
         return []
-    out = []
-    for i in range(n):
-        r = 0.0
-        for s in symbols:
-            r += weights.get(s, 0.0) * aligned[s][i]
-        out.append(float(r))
-    return out
+    mat = np.array([aligned[s][-n:] for s in symbols], dtype=float)
+    w = np.array([weights.get(s, 0.0) for s in symbols], dtype=float)
+    return (w @ mat).tolist()
 
 
 def _historical_var_cvar(portfolio_returns: Sequence[float], confidence: float) -> tuple[float, float]:
-    if not portfolio_returns:
-        return 0.0, 0.0
-    alpha = max(0.0, min(1.0, confidence))
-    tail_q = (1.0 - alpha) * 100.0
-    q = _percentile(portfolio_returns, tail_q)
-    var = max(0.0, -q)
-    tails = [r for r in portfolio_returns if r <= q]
-    cvar = max(0.0, -_mean(tails)) if tails else var
+    var, cvar = var_cvar_from_samples(np.asarray(portfolio_returns, dtype=float), confidence)
     return float(var), float(cvar)
 
 
@@ -275,45 +249,22 @@ class VaRModel:
             lookback_days=self.lookback_days,
         )
 
+    def compute_full(self, positions: List[dict], returns_matrix, engine: VaREngine | None = None) -> dict:
+        """compute() + simulated VaR/CVaR methods and per-position marginal/component VaR."""
+        base = self.compute(positions, returns_matrix)
+        matrix = _coerce_returns_matrix(returns_matrix)
+        symbols = base.get("symbols") or []
+        if not matrix or not symbols:
+            return base
+        panel = panel_from_series({s: matrix[s] for s in symbols}, lookback=self.lookback_days)
+        weights = _extract_weights(positions, symbols=panel.symbols)
+        base.update((engine or VaREngine()).compute(panel, weights))
+        return base
 
-def fetch_return_matrix(symbols: List[str], lookback_days: int = 252) -> Dict[str, List[float]]:
-    """Fetch simple daily return matrix from yfinance for standalone runs."""
-    out: Dict[str, List[float]] = {}
-    uniq = sorted({_normalize_symbol(s) for s in symbols if _normalize_symbol(s)})
-    if not uniq:
-        return out
-
-    try:
-        import yfinance as yf
-
-        for sym in uniq:
-            hist = retry_call(
-                yf.Ticker(sym).history,
-                kwargs={"period": f"{lookback_days + 30}d", "interval": "1d"},
-                max_attempts=2,
-                base_delay=1.0,
-                default=None,
-            )
-            if hist is None or hist.empty or "Close" not in hist:
-                continue
-            close_col = hist["Close"]
-            if close_col is None:
-                continue
-            close = [float(v) for v in list(close_col) if _safe_float(v, 0.0) > 0]
-            if len(close) < 3:
-                continue
-            rets = []
-            for i in range(1, len(close)):
-                prev = close[i - 1]
-                cur = close[i]
-                if prev > 0:
-                    rets.append(cur / prev - 1.0)
-            if rets:
-                out[sym] = rets[-lookback_days:]
-    except Exception as exc:
-        log.warning("fetch_return_matrix failed", error=str(exc))
 
-    return out
+def fetch_return_matrix(symbols: List[str], lookback_days: int = 252) -> Dict[str, List[float]]:
+    """Fetch simple daily return matrix from yfinance for standalone runs (one batched request)."""
+    return fetch_return_panel(symbols, lookback_days=lookback_days, aligned=False)
 
 
 if __name__ == "__main__":
@@ -329,5 +280,6 @@ if __name__ == "__main__":
             "MSFT": [0.001, -0.003, 0.002, -0.006, 0.002] * 60,
             "NVDA": [0.004, -0.009, 0.003, -0.012, 0.005] * 60,
         }
-    result = compute_var_metrics(sample_positions, matrix)
-    log.info("var_metrics", **result)
+    result = VaRModel().compute_full(sample_positions, matrix)
+    log.info("var_metrics", **{k: v for k, v in result.items() if not isinstance(v, dict)})
+    log.info("var_methods", **result.get("methods", {}))
@@ -25,6 +25,8 @@ from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
+
 from common.config import BRAIN_PATH, SIGNAL_IC_MIN, SIGNAL_IC_IR_MIN, SIGNAL_IC_MIN_SAMPLES
 from common.env_loader import load_env
 from common.logger import get_logger
@@ -55,15 +57,31 @@ _SIGNAL_SOURCES: Dict[str, Tuple[str, str, str, bool]] = {
 
 # ── Pure-math IC/IR helpers ────────────────────────────────────────────────
 
-def _rank(values: List[float]) -> List[float]:
-    """Return rank vector (1-based) for a list of floats."""
-    indexed = sorted(enumerate(values), key=lambda x: x[1])
-    ranks = [0.0] * len(values)
-    for rank, (idx, _) in enumerate(indexed, 1):
-        ranks[idx] = float(rank)
+def _valid_pairs(signals: List[float], returns: List[float]) -> Tuple[np.ndarray, np.ndarray]:
+    """Drop pairs where either side is None or 0 (v6.2 A2 filter)."""
+    pairs = [(s, r) for s, r in zip(signals, returns)
+             if s is not None and r is not None and s != 0 and r != 0]
+    if not pairs:
+        return np.empty(0), np.empty(0)
+    arr = np.asarray(pairs, dtype=float)
+    return arr[:, 0], arr[:, 1]
+
+
+def _rank(values) -> np.ndarray:
+    """Return rank vector (1-based, ties broken by position) for a sequence of floats."""
+    values = np.asarray(values, dtype=float)
+    ranks = np.empty(len(values), dtype=float)
+    ranks[np.argsort(values, kind="stable")] = np.arange(1, len(values) + 1)
     return ranks
 
 
+def _spearman_from_ranks(rx: np.ndarray, ry: np.ndarray) -> np.ndarray:
+    """Spearman IC of permutation ranks along the last axis: 1 - 6Σd² / (n(n²-1))."""
+    n = rx.shape[-1]
+    d2 = ((rx - ry) ** 2).sum(axis=-1)
+    return 1.0 - 6.0 * d2 / (n * (n * n - 1.0))
+
+
 def compute_ic(signals: List[float], returns: List[float]) -> Optional[float]:
     """Spearman rank IC between *signals* and *returns*.
 
@@ -71,23 +89,104 @@ def compute_ic(signals: List[float], returns: List[float]) -> Optional[float]:
     # v6.2 A2: NULL/0 필터링 + 최소샘플 — n_valid < 10 시 None 반환
     Returns None if fewer than 10 valid non-zero pairs (was 5, stricter to avoid degenerate IC).
     """
-    pairs = [(s, r) for s, r in zip(signals, returns)
-             if s is not None and r is not None and s != 0 and r != 0]
-    n_valid = len(pairs)
-    if n_valid < 10:
+    sx, sy = _valid_pairs(signals, returns)
+    if len(sx) < 10:
         return None
-    sx, sy = zip(*pairs)
-    rx = _rank(list(sx))
-    ry = _rank(list(sy))
-    n = len(rx)
-    mean_x = sum(rx) / n
-    mean_y = sum(ry) / n
-    cov = sum((a - mean_x) * (b - mean_y) for a, b in zip(rx, ry)) / n
-    std_x = (sum((a - mean_x) ** 2 for a in rx) / n) ** 0.5
-    std_y = (sum((b - mean_y) ** 2 for b in ry) / n) ** 0.5
-    if std_x == 0 or std_y == 0:
-        return 0.0
-    return round(cov / (std_x * std_y), 6)
+    return round(float(_spearman_from_ranks(_rank(sx), _rank(sy))), 6)
+
+
+def rolling_rank_ic(
+    signals: List[float],
+    returns: List[float],
+    window: int,
+    step: int,
+    min_valid: int = 10,
+) -> List[float]:
+    """compute_ic() over windows [start, start + window) every ``step`` samples.
+
+    In-window ordinal ranks come from cumulative sums over a (n, 2·window-1) band
+    of pairwise comparisons, so no window is re-sorted. Windows with fewer than
+    ``min_valid`` non-zero pairs are skipped, as in compute_ic().
+    """
+    n = min(len(signals), len(returns))
+    if window < 1 or n < window:
+        return []
+    x = np.array([np.nan if v is None else float(v) for v in signals[:n]])
+    y = np.array([np.nan if v is None else float(v) for v in returns[:n]])
+    valid = ~np.isnan(x) & ~np.isnan(y) & (x != 0) & (y != 0)
+
+    offsets = np.arange(-(window - 1), window)                  # j - i
+    j = np.arange(n)[:, None] + offsets[None, :]                 # (n, 2w-1)
+    in_range = (j >= 0) & (j < n)
+    jc = np.clip(j, 0, n - 1)
+    peer_valid = in_range & valid[jc]
+
+    def _band_cumsum(v: np.ndarray) -> np.ndarray:
+        # count of valid peers j (same window) ranked below i; ties broken by position
+        below = (v[jc] < v[:, None]) | ((v[jc] == v[:, None]) & (offsets[None, :] < 0))
+        return np.concatenate([np.zeros((n, 1), dtype=np.int64),
+                               np.cumsum(below & peer_valid, axis=1)], axis=1)
+
+    cx, cy = _band_cumsum(x), _band_cumsum(y)
+    valid_cum = np.concatenate([[0], np.cumsum(valid)])
+
+    out: List[float] = []
+    for start in range(0, n - window + 1, max(1, step)):
+        end = start + window
+        m = int(valid_cum[end] - valid_cum[start])
+        if m < min_valid:
+            continue
+        idx = start + np.flatnonzero(valid[start:end])
+        lo = start - idx + (window - 1)                          # band column of offset start - i
+        hi = end - idx + (window - 1)
+        rx = 1 + cx[idx, hi] - cx[idx, lo]
+        ry = 1 + cy[idx, hi] - cy[idx, lo]
+        out.append(round(float(_spearman_from_ranks(rx.astype(float), ry.astype(float))), 6))
+    return out
+
+
+def permutation_pvalue(
+    signals: List[float],
+    returns: List[float],
+    n_perms: int = 10_000,
+    seed: Optional[int] = 42,
+    batch_size: int = 1000,
+    alpha: float = 0.05,
+    early_stop: bool = True,
+    min_perms: int = 1000,
+) -> Tuple[float, int]:
+    """Two-sided permutation p-value of |IC| → (p_value, permutations used).
+
+    Signal ranks are computed once; each batch permutes the return ranks as a
+    (batch, n) matrix and gets every permuted IC from one matrix product
+    (Σd² = 2Σr² - 2·rx·ry). With ``early_stop`` the test ends once a 99.9%
+    binomial bound on the running p-value lies entirely on one side of ``alpha``.
+    """
+    sx, sy = _valid_pairs(signals, returns)
+    n = len(sx)
+    if n < 10 or n_perms <= 0:
+        return 1.0, 0
+    rx, ry = _rank(sx), _rank(sy)
+    denom = n * (n * n - 1.0)
+    sum_sq = float((rx * rx).sum())
+    observed = abs(1.0 - 6.0 * (2.0 * sum_sq - 2.0 * float(rx @ ry)) / denom)
+    # compute_ic rounds to 6 d.p.; compare on the same grid
+    observed = round(observed, 6)
+
+    rng = np.random.default_rng(seed)
+    count = done = 0
+    while done < n_perms:
+        b = min(batch_size, n_perms - done)
+        perm = rng.permuted(np.broadcast_to(ry, (b, n)), axis=1)
+        ics = 1.0 - 6.0 * (2.0 * sum_sq - 2.0 * (perm @ rx)) / denom
+        count += int(np.count_nonzero(np.round(np.abs(ics), 6) >= observed))
+        done += b
+        if early_stop and done >= min_perms:
+            p = count / done
+            half = 3.29 * np.sqrt(max(p * (1.0 - p), 1.0 / done) / done)
+            if p + half < alpha or p - half > alpha:
+                break
+    return round(count / done, 4), done
 
 
 def compute_ir(ic_series: List[float]) -> float:
@@ -109,15 +208,26 @@ def compute_ir(ic_series: List[float]) -> float:
 # ── SignalEvaluator ────────────────────────────────────────────────────────
 
 class SignalEvaluator:
-    def __init__(self, supabase_client=None, lookback_days: int = 90, window_days: int = 14):
+    def __init__(
+        self,
+        supabase_client=None,
+        lookback_days: int = 90,
+        window_days: int = 14,
+        n_perms: int = 10_000,
+        perm_seed: Optional[int] = 42,
+    ):
         """
         Args:
             lookback_days: how far back to pull trade records from Supabase.
             window_days:   rolling window size for IC-series (used to compute IR).
+            n_perms:       max permutations per signal (early-stopped once decided).
+            perm_seed:     RNG seed for reproducible p-values (None → random).
         """
         self.supabase = supabase_client or get_supabase()
         self.lookback_days = max(lookback_days, 7)
         self.window_days = max(window_days, 3)
+        self.n_perms = max(int(n_perms), 1)
+        self.perm_seed = perm_seed
 
     # ── Data loading ────────────────────────────────────────────────────
 
@@ -262,40 +372,27 @@ class SignalEvaluator:
 
         Returns a list of per-window IC values.
         """
+        # v6.2 A2: None(유효샘플 부족) 윈도우 skip
         w = self.window_days
-        series: List[float] = []
-        for start in range(0, len(signal_vals) - w + 1, max(1, w // 2)):
-            end = start + w
-            ic = compute_ic(signal_vals[start:end], pnl_vals[start:end])
-            if ic is not None:  # v6.2 A2: None(유효샘플 부족) 윈도우 skip
-                series.append(ic)
-        return series
+        return rolling_rank_ic(signal_vals, pnl_vals, window=w, step=max(1, w // 2))
 
     # ── Evaluation ──────────────────────────────────────────────────────
 
     def _permutation_test(
-        self, signals: List[float], returns: List[float], n_perms: int = 500
+        self, signals: List[float], returns: List[float], n_perms: Optional[int] = None
     ) -> float:
         """순열 검정으로 IC 유의성 p-value 계산 (scipy 불필요).
 
         Returns:
             p-value in [0, 1].  낮을수록 IC가 통계적으로 유의함.
         """
-        import random
-
-        _raw_ic = compute_ic(signals, returns)
-        if _raw_ic is None:
-            return 1.0
-        observed_ic = abs(_raw_ic)
-        returns_copy = list(returns)
-        count = 0
-        for _ in range(n_perms):
-            random.shuffle(returns_copy)
-            perm_ic_val = compute_ic(signals, returns_copy)
-            perm_ic = abs(perm_ic_val) if perm_ic_val is not None else 0.0
-            if perm_ic >= observed_ic:
-                count += 1
-        return round(count / n_perms, 4)
+        p_value, _ = permutation_pvalue(
+            signals,
+            returns,
+            n_perms=self.n_perms if n_perms is None else n_perms,
+            seed=self.perm_seed,
+        )
+        return p_value
 
     def evaluate_signal(self, signal_name: str) -> Dict[str, Any]:
         """Evaluate IC and IR for a single named signal."""
@@ -560,12 +657,16 @@ def _cli() -> int:
     p = argparse.ArgumentParser(description="Signal IC/IR evaluator")
     p.add_argument("--lookback", type=int, default=90, help="days of history to analyse")
     p.add_argument("--window", type=int, default=14, help="rolling IC window size (samples)")
+    p.add_argument("--perms", type=int, default=10_000, help="max permutations per signal")
+    p.add_argument("--seed", type=int, default=42, help="permutation RNG seed")
     p.add_argument("--signal", default=None, help="evaluate a single named signal")
     p.add_argument("--no-notify", action="store_true", help="skip Telegram notification")
     p.add_argument("--no-db", action="store_true", help="skip Supabase upsert")
     args = p.parse_args()
 
-    evaluator = SignalEvaluator(lookback_days=args.lookback, window_days=args.window)
+    evaluator = SignalEvaluator(
+        lookback_days=args.lookback, window_days=args.window, n_perms=args.perms, perm_seed=args.seed
+    )
 
     if args.signal:
         out = evaluator.evaluate_signal(args.signal)
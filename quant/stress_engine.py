@@ -0,0 +1,314 @@
+"""Vectorized stress engine: historical replay + covariance shock propagation.
+
+Complements ``quant.stress_test`` (fixed per-asset shocks) with:
+- Historical replay: real crisis windows (2020-03, LUNA/FTX 2022, KOSPI 2024-08)
+  applied to the whole book from a locally cached daily return panel.
+- Conditional shocks: shocks on a few assets propagated to the rest through a
+  Ledoit-Wolf shrunk covariance, E[r_U | r_K = s] = Sigma_UK Sigma_KK^-1 s.
+- Scenario batches: thousands of scenarios evaluated in one matrix pass, each with
+  P&L, path drawdown and breached limits.
+
+Usage:
+    python -m quant.stress_engine --refresh        # download/cache return panel
+    python -m quant.stress_engine [--scenarios 5000]
+"""
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from common.config import BRAIN_PATH
+from common.env_loader import load_env
+from common.logger import get_logger
+from common.retry import retry_call
+from quant.risk.covariance import ledoit_wolf, nearest_psd
+
+load_env()
+log = get_logger("stress_engine")
+
+PANEL_PATH: Path = BRAIN_PATH / "risk" / "stress_panel.npz"
+
+# asset class key (StressTest.portfolio_weights) -> market proxy ticker
+ASSET_PROXIES: Dict[str, str] = {
+    "btc": "BTC-USD",
+    "kr_equity": "^KS11",
+    "us_equity": "SPY",
+}
+
+
+# ── Data structures ──────────────────────────────────────────────────────────
+
+@dataclass
+class HistoricalWindow:
+    """Crisis window replayed day by day from the cached return panel."""
+    name: str
+    start: str
+    end: str
+    description: str = ""
+
+
+@dataclass
+class StressLimits:
+    """Loss limits checked for every scenario (positive percentages)."""
+    max_loss_pct: float = 15.0
+    max_drawdown_pct: float = 20.0
+    max_asset_loss_pct: Dict[str, float] = field(default_factory=dict)
+
+
+HISTORICAL_WINDOWS: List[HistoricalWindow] = [
+    HistoricalWindow("COVID_2020_03", "2020-02-19", "2020-03-23", "COVID crash peak to trough"),
+    HistoricalWindow("LUNA_2022_05", "2022-05-05", "2022-05-18", "Terra/LUNA collapse"),
+    HistoricalWindow("FTX_2022_11", "2022-11-06", "2022-11-21", "FTX insolvency"),
+    HistoricalWindow("KOSPI_2024_08", "2024-07-31", "2024-08-05", "Yen carry unwind / KOSPI circuit breaker"),
+]
+
+
+# ── Return panel cache ───────────────────────────────────────────────────────
+
+@dataclass
+class ReturnPanelData:
+    """Daily simple returns on a common calendar; NaN-free (missing days = 0 return)."""
+    dates: np.ndarray       # datetime64[D], shape (T,)
+    assets: List[str]
+    returns: np.ndarray     # (T, N)
+
+    def save(self, path: Path = PANEL_PATH) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(path, dates=self.dates.astype("datetime64[D]"), assets=np.array(self.assets),
+                            returns=self.returns)
+        return path
+
+    @classmethod
+    def load(cls, path: Path = PANEL_PATH) -> Optional["ReturnPanelData"]:
+        if not path.exists():
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                return cls(data["dates"].astype("datetime64[D]"), [str(a) for a in data["assets"]],
+                           data["returns"].astype(float))
+        except Exception as exc:
+            log.warning("stress panel load failed", error=str(exc))
+            return None
+
+    def select(self, assets: Sequence[str]) -> np.ndarray:
+        """(T, len(assets)) returns; unknown assets get zeros (no shock)."""
+        idx = {a: i for i, a in enumerate(self.assets)}
+        out = np.zeros((len(self.dates), len(assets)))
+        for j, a in enumerate(assets):
+            if a in idx:
+                out[:, j] = self.returns[:, idx[a]]
+        return out
+
+
+def refresh_return_panel(
+    proxies: Optional[Dict[str, str]] = None,
+    start: str = "2019-01-01",
+    path: Path = PANEL_PATH,
+) -> Optional[ReturnPanelData]:
+    """Download all proxies in one batched request and cache the panel locally."""
+    proxies = proxies or ASSET_PROXIES
+    tickers = sorted(set(proxies.values()))
+    try:
+        import yfinance as yf
+
+        data = retry_call(
+            yf.download,
+            kwargs={"tickers": tickers, "start": start, "auto_adjust": True,
+                    "progress": False, "group_by": "column", "threads": True},
+            max_attempts=2,
+            base_delay=1.0,
+            default=None,
+        )
+        if data is None or data.empty:
+            return None
+        close = data["Close"]
+        if not hasattr(close, "columns"):
+            close = close.to_frame(tickers[0])
+    except Exception as exc:
+        log.warning("stress panel refresh failed", error=str(exc))
+        return None
+
+    # union calendar (crypto trades weekends): carry last price → 0 return on closed days
+    close = close.sort_index().ffill()
+    rets = close.pct_change().iloc[1:].fillna(0.0)
+    assets = list(proxies.keys())
+    mat = np.column_stack([rets[proxies[a]].to_numpy(dtype=float) if proxies[a] in rets else
+                           np.zeros(len(rets)) for a in assets])
+    panel = ReturnPanelData(rets.index.values.astype("datetime64[D]"), assets, mat)
+    panel.save(path)
+    log.info("stress panel cached", path=str(path), days=len(rets), assets=len(assets))
+    return panel
+
+
+# ── Engine ───────────────────────────────────────────────────────────────────
+
+class StressEngine:
+    """Evaluate many stress scenarios against one book in vectorized passes.
+
+    Args:
+        panel: cached daily return panel.
+        weights: asset -> portfolio weight (same keys as ``panel.assets``).
+        portfolio_value: book value in base currency (KRW).
+        limits: loss/drawdown limits used to flag breaches.
+        cov_lookback: trailing days used for the shrunk covariance.
+    """
+
+    def __init__(
+        self,
+        panel: ReturnPanelData,
+        weights: Dict[str, float],
+        portfolio_value: float,
+        limits: Optional[StressLimits] = None,
+        cov_lookback: int = 504,
+    ) -> None:
+        self.panel = panel
+        self.assets = list(weights.keys())
+        self.weights = np.array([float(weights[a]) for a in self.assets])
+        self.portfolio_value = float(portfolio_value)
+        self.limits = limits or StressLimits()
+        self._R = panel.select(self.assets)
+        cov, self.shrinkage = ledoit_wolf(self._R[-cov_lookback:])
+        self.cov = nearest_psd(cov)
+
+    # ── shared evaluation ──
+    def evaluate_paths(self, names: Sequence[str], paths: np.ndarray) -> List[Dict]:
+        """Evaluate (S, L, N) daily asset return paths (zero-padded) in one pass."""
+        paths = np.asarray(paths, dtype=float)
+        if paths.ndim == 2:
+            paths = paths[:, None, :]
+        port = paths @ self.weights                                  # (S, L)
+        equity = np.cumprod(1.0 + port, axis=1)
+        peak = np.maximum.accumulate(np.maximum(equity, 1.0), axis=1)
+        max_dd = ((equity / peak) - 1.0).min(axis=1) * 100.0        # <= 0
+        pnl_pct = (equity[:, -1] - 1.0) * 100.0
+        asset_cum = (np.prod(1.0 + paths, axis=1) - 1.0) * 100.0    # (S, N)
+        asset_loss = -asset_cum * self.weights                       # contribution, loss-positive
+
+        breach_loss = -pnl_pct >= self.limits.max_loss_pct
+        breach_dd = -max_dd >= self.limits.max_drawdown_pct
+        asset_limits = np.array([self.limits.max_asset_loss_pct.get(a, np.inf) for a in self.assets])
+        breach_asset = asset_loss >= asset_limits
+
+        results = []
+        for s, name in enumerate(names):
+            breached = []
+            if breach_loss[s]:
+                breached.append("max_loss")
+            if breach_dd[s]:
+                breached.append("max_drawdown")
+            breached.extend(f"asset:{self.assets[j]}" for j in np.flatnonzero(breach_asset[s]))
+            loss_pct = -float(pnl_pct[s])
+            results.append({
+                "scenario_name": name,
+                "pnl_pct": round(float(pnl_pct[s]), 4),
+                "portfolio_loss_pct": round(loss_pct, 4),
+                "portfolio_loss_value": round(self.portfolio_value * loss_pct / 100.0, 2),
+                "max_drawdown_pct": round(float(max_dd[s]), 4),
+                "breached": breached,
+                "per_asset": {
+                    a: {
+                        "weight": float(self.weights[j]),
+                        "shock_pct": round(-float(asset_cum[s, j]), 4),
+                        "loss_pct": round(float(asset_loss[s, j]), 4),
+                    }
+                    for j, a in enumerate(self.assets)
+                },
+            })
+        return results
+
+    # ── historical replay ──
+    def replay(self, windows: Optional[Sequence[HistoricalWindow]] = None) -> List[Dict]:
+        """Replay crisis windows across the whole book (padded into one tensor)."""
+        windows = list(windows or HISTORICAL_WINDOWS)
+        dates = self.panel.dates
+        slices = []
+        for w in windows:
+            lo = np.searchsorted(dates, np.datetime64(w.start), side="left")
+            hi = np.searchsorted(dates, np.datetime64(w.end), side="right")
+            slices.append((lo, hi))
+        length = max([hi - lo for lo, hi in slices] + [1])
+        paths = np.zeros((len(windows), length, len(self.assets)))
+        for s, (lo, hi) in enumerate(slices):
+            paths[s, : hi - lo] = self._R[lo:hi]
+        results = self.evaluate_paths([w.name for w in windows], paths)
+        for res, w, (lo, hi) in zip(results, windows, slices):
+            res["description"] = w.description
+            res["days"] = int(hi - lo)
+        return results
+
+    # ── covariance-driven shocks ──
+    def propagate(self, shocked_assets: Sequence[str], shocks: np.ndarray) -> np.ndarray:
+        """Full (S, N) shock vectors from (S, K) shocks on ``shocked_assets``.
+
+        Unshocked assets move by their conditional expectation given the shocks.
+        """
+        shocks = np.atleast_2d(np.asarray(shocks, dtype=float))
+        k_idx = np.array([self.assets.index(a) for a in shocked_assets], dtype=int)
+        beta = np.linalg.solve(self.cov[np.ix_(k_idx, k_idx)], self.cov[k_idx, :])   # (K, N)
+        full = shocks @ beta
+        full[:, k_idx] = shocks
+        return np.clip(full, -1.0, None)   # a long position cannot lose more than 100%
+
+    def conditional_scenarios(
+        self,
+        shocked_assets: Sequence[str],
+        shocks: np.ndarray,
+        names: Optional[Sequence[str]] = None,
+    ) -> List[Dict]:
+        full = self.propagate(shocked_assets, shocks)
+        names = list(names or [f"COND_{i}" for i in range(len(full))])
+        return self.evaluate_paths(names, full)
+
+    def random_scenarios(self, n: int = 5000, stress_multiplier: float = 3.0, seed: int = 42) -> List[Dict]:
+        """Draw ``n`` correlated one-day shocks from the shrunk covariance, scaled up."""
+        rng = np.random.default_rng(seed)
+        chol = np.linalg.cholesky(self.cov)
+        shocks = np.clip(rng.standard_normal((n, len(self.assets))) @ chol.T * stress_multiplier, -1.0, None)
+        return self.evaluate_paths([f"MC_{i}" for i in range(n)], shocks)
+
+
+def summarize(results: List[Dict], top: int = 5) -> Dict:
+    """Worst scenarios + breach counts for reports."""
+    worst = sorted(results, key=lambda r: r["pnl_pct"])[:top]
+    return {
+        "scenarios": len(results),
+        "breached": sum(1 for r in results if r["breached"]),
+        "worst": [{k: r[k] for k in ("scenario_name", "pnl_pct", "max_drawdown_pct", "breached")} for r in worst],
+    }
+
+
+# ── CLI ──────────────────────────────────────────────────────────────────────
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Historical replay / covariance stress engine")
+    parser.add_argument("--refresh", action="store_true", help="re-download the cached return panel")
+    parser.add_argument("--scenarios", type=int, default=5000, help="random covariance scenarios")
+    parser.add_argument("--alert-threshold", type=float, default=15.0)
+    args = parser.parse_args()
+
+    panel = None if args.refresh else ReturnPanelData.load()
+    panel = panel or refresh_return_panel()
+    if panel is None:
+        log.error("no return panel available")
+        return
+
+    weights = {"btc": 0.30, "kr_equity": 0.30, "us_equity": 0.40}
+    engine = StressEngine(panel, weights, portfolio_value=10_000_000.0,
+                          limits=StressLimits(max_loss_pct=args.alert_threshold))
+    replay = engine.replay()
+    cond = engine.conditional_scenarios(["btc"], np.array([[-0.20], [-0.40]]), names=["BTC_-20", "BTC_-40"])
+    mc = engine.random_scenarios(n=args.scenarios)
+
+    print(f"\n{'='*60}\n  Historical replay\n{'='*60}")
+    for r in replay + cond:
+        flag = f"  ** {','.join(r['breached'])} **" if r["breached"] else ""
+        print(f"  {r['scenario_name']:<16s} P&L {r['pnl_pct']:+7.2f}%  MDD {r['max_drawdown_pct']:7.2f}%{flag}")
+    print(f"\n  Random covariance scenarios: {summarize(mc)}\n")
+
+
+if __name__ == "__main__":
+    main()
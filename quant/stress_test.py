@@ -248,6 +248,11 @@ def main() -> None:
         default=15.0,
         help="Alert if any scenario loss >= this %% (default: 15)",
     )
+    parser.add_argument(
+        "--historical",
+        action="store_true",
+        help="Also replay cached historical crisis windows (quant.stress_engine)",
+    )
     args = parser.parse_args()
 
     # Default portfolio weights — adjust to match actual allocation
@@ -268,6 +273,20 @@ def main() -> None:
     tester = StressTest(portfolio_weights, portfolio_value)
     results = tester.run_all_scenarios()
 
+    if args.historical:
+        from quant.stress_engine import (ReturnPanelData, StressEngine,
+                                         StressLimits, refresh_return_panel)
+
+        panel = ReturnPanelData.load() or refresh_return_panel()
+        if panel is None:
+            log.warning("Historical replay skipped: no cached return panel")
+        else:
+            engine = StressEngine(
+                panel, portfolio_weights, portfolio_value,
+                limits=StressLimits(max_loss_pct=args.alert_threshold),
+            )
+            results.extend(engine.replay())
+
     # Print summary to stdout
     print(f"\n{'='*60}")
     print(f"  Stress Test Results (threshold: {args.alert_threshold:.0f}%)")
@@ -7,7 +7,6 @@
 - HOLD 스킵, 스코어 체크, 일반 로그는 INFO 버퍼에만 쌓이고 여기서만 요약됨
 """
 
-import json
 import sys
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -16,32 +15,13 @@ sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
 from common.env_loader import load_env
 from common.logger import get_logger
-from common.telegram import Priority, _INFO_BUFFER_FILE, send_telegram
+from common.telegram import Priority, deliver_telegram, load_info_buffer, mark_info_hour_briefed
 
 
 load_env()
 log = get_logger("hourly_briefing")
 
 
-def _load_info_data() -> dict:
-    if not _INFO_BUFFER_FILE.exists():
-        return {}
-    try:
-        return json.loads(_INFO_BUFFER_FILE.read_text(encoding="utf-8"))
-    except Exception as exc:
-        log.warning("failed to load telegram info buffer", error=str(exc))
-        return {}
-
-
-def _save_info_data(data: dict) -> None:
-    try:
-        _INFO_BUFFER_FILE.write_text(
-            json.dumps(data, ensure_ascii=False), encoding="utf-8"
-        )
-    except Exception as exc:
-        log.warning("failed to save telegram info buffer", error=str(exc))
-
-
 # 헬스체크/노이즈 필터 — 이 키워드가 포함된 메시지는 브리핑에서 제외
 _NOISE_KEYWORDS = (
     "HOLD", "스코어 체크", "사이클 완료", "heartbeat", "체크 완료",
@@ -107,7 +87,7 @@ def run() -> int:
     now = datetime.now()
     prev = (now.replace(minute=0, second=0, microsecond=0) - timedelta(hours=1))
 
-    data = _load_info_data()
+    data = load_info_buffer()
     if not data:
         log.info("no info buffer data found")
         return 0
@@ -131,13 +111,11 @@ def run() -> int:
         log.info("empty hourly brief text — skip send", hour=hour_key)
         return 0
 
-    ok = send_telegram(text, priority=Priority.IMPORTANT)
+    ok = deliver_telegram(text, priority=Priority.IMPORTANT)
     log.info("hourly briefing send result", hour=hour_key, sent=ok)
 
     # 동일 시각 요약이 중복 발송되지 않도록 해당 버킷 비우기
-    hours[hour_key] = []
-    data["hours"] = hours
-    _save_info_data(data)
+    mark_info_hour_briefed(date_str, hour_key)
 
     return 0
 
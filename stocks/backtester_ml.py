@@ -3,7 +3,7 @@
 ML + 리스크 전체 파이프라인 백테스터 v1.0
 
 대상:
-- Supabase의 daily_ohlcv (일봉 1년치)
+- Supabase의 daily_ohlcv → 날짜×종목 float32 패널 (quant.backtest.panel, 로컬 memmap 캐시)
 - stocks/ml_model.py 에서 학습된 XGBoost 모델
 
 전략 요약:
@@ -20,9 +20,9 @@ ML + 리스크 전체 파이프라인 백테스터 v1.0
   "ML 필터 + 손절/트레일링/익절 + 하루 2건 제한" 조합만 시뮬레이션합니다.
 """
 
+import json
 import os
 import sys
-from datetime import datetime
 from pathlib import Path
 
 import numpy as np
@@ -37,6 +37,7 @@ if _STOCKS_DIR not in sys.path:
 
 from supabase import create_client  # noqa: E402
 from ml_model import _load_model, extract_features  # noqa: E402
+from quant.backtest.panel import load_ohlcv_panel  # noqa: E402
 
 SUPABASE_URL = os.environ.get('SUPABASE_URL', '')
 SUPABASE_KEY = os.environ.get('SUPABASE_SECRET_KEY', '')
@@ -78,89 +79,63 @@ def run_ml_backtest(days: int = 250) -> dict:
         print('top50_stocks 테이블 비어 있음')
         return {}
 
-    # 종목별 시계열 로드
-    series = {}
-    all_dates = set()
-
-    for s in stocks:
-        code = s['stock_code']
-        name = s.get('stock_name', code)
-        rows = (
-            supabase.table('daily_ohlcv')
-            .select('date,open_price,high_price,low_price,close_price,volume')
-            .eq('stock_code', code)
-            .order('date', desc=False)
-            .execute()
-            .data
-            or []
-        )
-        if len(rows) < 80:
-            continue
+    # 유니버스 전체를 날짜×종목 float32 패널로 로드 (로컬 memmap 캐시, 워터마크 변경 시에만 재조회)
+    codes = [s['stock_code'] for s in stocks]
+    names = {s['stock_code']: s.get('stock_name', s['stock_code']) for s in stocks}
+    panel = load_ohlcv_panel(codes, client=supabase)
+    if panel is None:
+        print('시계열 데이터 없음 (daily_ohlcv 부족)')
+        return {}
 
-        dates = [r['date'] for r in rows]
-        closes = np.array([float(r['close_price']) for r in rows], dtype=float)
-        highs = np.array(
-            [float(r.get('high_price', r['close_price'])) for r in rows], dtype=float
-        )
-        lows = np.array(
-            [float(r.get('low_price', r['close_price'])) for r in rows], dtype=float
-        )
-        vols = np.array([float(r.get('volume', 0)) for r in rows], dtype=float)
-        idx_by_date = {d: i for i, d in enumerate(dates)}
-
-        series[code] = {
-            'name': name,
-            'dates': dates,
-            'closes': closes,
-            'highs': highs,
-            'lows': lows,
-            'vols': vols,
-            'idx_by_date': idx_by_date,
-        }
-        all_dates.update(dates)
-
-    if not series:
+    valid = np.asarray(panel.valid)
+    enough = valid.sum(axis=0) >= 80
+    cols = [j for j in range(len(panel.symbols)) if enough[j]]
+    if not cols:
         print('시계열 데이터 없음 (daily_ohlcv 부족)')
         return {}
 
+    # 종목별 거래일 순번 (행 없는 날은 -1) — 피처 계산은 종목 자신의 시계열 기준
+    ordinal = np.where(valid, np.cumsum(valid, axis=0, dtype=np.int32) - 1, -1)
+    calendar = panel.date_strings()
+    close_px = panel['close']
+    _series_cache: dict = {}
+
+    def _series(j: int) -> tuple:
+        if j not in _series_cache:
+            code = panel.symbols[j]
+            _series_cache[j] = tuple(panel.series(code, f) for f in ('close', 'volume', 'high', 'low'))
+        return _series_cache[j]
+
     # 공통 날짜 캘린더 (마지막 days일만 사용)
-    sorted_dates = sorted(all_dates)
-    if len(sorted_dates) > days:
-        period_dates = sorted_dates[-days:]
-    else:
-        period_dates = sorted_dates
+    t_start = max(0, len(calendar) - days)
+    period_dates = calendar[t_start:]
 
     print(f'백테스트 기간: {period_dates[0]} ~ {period_dates[-1]} ({len(period_dates)}일)')
-    print(f'대상 종목: {len(series)}개\n')
+    print(f'대상 종목: {len(cols)}개\n')
 
     # 포지션/트레이드 상태
-    positions = {}  # code -> {entry_idx, entry_price, highest, open}
+    positions = {}  # col -> {entry_date, entry_price, highest}
     trades = []  # 완료된 트레이드 목록
-    daily_new_trades = {d: 0 for d in period_dates}
 
     # 날짜 루프
-    for d in period_dates:
+    for t in range(t_start, len(calendar)):
+        d = calendar[t]
         # 1) 기존 포지션에 대해 매도 조건 체크
-        for code, info in series.items():
-            if code not in positions or not positions[code]['open']:
-                continue
-            idx = info['idx_by_date'].get(d)
-            if idx is None:
+        for j in [j for j in cols if j in positions]:
+            if not valid[t, j]:
                 continue
 
-            price = info['closes'][idx]
+            price = float(close_px[t, j])
             if price <= 0:
                 continue
 
-            pos = positions[code]
-            entry_idx = pos['entry_idx']
+            pos = positions[j]
             entry_price = pos['entry_price']
-            highest = pos['highest']
 
             # 고점 갱신
-            if price > highest:
-                highest = price
-                pos['highest'] = highest
+            if price > pos['highest']:
+                pos['highest'] = price
+            highest = pos['highest']
 
             raw_pnl = (price - entry_price) / entry_price
             net_pnl = raw_pnl - FEE_TOTAL
@@ -180,11 +155,12 @@ def run_ml_backtest(days: int = 250) -> dict:
                 sell_reason = '익절'
 
             if sell_reason:
+                code = panel.symbols[j]
                 trades.append(
                     {
                         'stock_code': code,
-                        'stock_name': info['name'],
-                        'entry_date': info['dates'][entry_idx],
+                        'stock_name': names.get(code, code),
+                        'entry_date': pos['entry_date'],
                         'exit_date': d,
                         'entry_price': entry_price,
                         'exit_price': price,
@@ -192,31 +168,27 @@ def run_ml_backtest(days: int = 250) -> dict:
                         'reason': sell_reason,
                     }
                 )
-                pos['open'] = False
+                del positions[j]
 
-        # 2) 신규 매수 한도 체크
-        if daily_new_trades[d] >= MAX_TRADES_PER_DAY:
-            continue
-
-        # 3) 신규 매수 시도 (종목 순회)
-        for code, info in series.items():
-            if daily_new_trades[d] >= MAX_TRADES_PER_DAY:
+        # 2) 신규 매수 시도 (종목 순회, 하루 최대 MAX_TRADES_PER_DAY건)
+        new_trades = 0
+        for j in cols:
+            if new_trades >= MAX_TRADES_PER_DAY:
                 break
             # 이미 포지션 보유 중이면 스킵
-            if code in positions and positions[code]['open']:
+            if j in positions:
                 continue
 
-            idx = info['idx_by_date'].get(d)
-            if idx is None or idx < 60:
+            idx = int(ordinal[t, j])
+            if idx < 60:
                 continue
 
-            price = info['closes'][idx]
+            price = float(close_px[t, j])
             if price <= 0:
                 continue
 
-            features = extract_features(
-                info['closes'], info['vols'], info['highs'], info['lows'], idx
-            )
+            closes, vols, highs, lows = _series(j)
+            features = extract_features(closes, vols, highs, lows, idx)
             if features is None:
                 continue
 
@@ -225,34 +197,31 @@ def run_ml_backtest(days: int = 250) -> dict:
 
             if prob >= ML_THRESHOLD:
                 # 매수 체결
-                positions[code] = {
-                    'entry_idx': idx,
+                positions[j] = {
+                    'entry_date': d,
                     'entry_price': price,
                     'highest': price,
-                    'open': True,
                 }
-                daily_new_trades[d] += 1
+                new_trades += 1
 
     # 남은 미청산 포지션은 마지막 날 가격으로 정산 (참고용)
     last_date = period_dates[-1]
-    for code, pos in positions.items():
-        if not pos['open']:
-            continue
-        info = series[code]
-        idx = info['idx_by_date'].get(last_date)
-        if idx is None:
+    t_last = len(calendar) - 1
+    for j, pos in positions.items():
+        if not valid[t_last, j]:
             continue
-        price = info['closes'][idx]
+        price = float(close_px[t_last, j])
         if price <= 0:
             continue
+        code = panel.symbols[j]
         entry_price = pos['entry_price']
         raw_pnl = (price - entry_price) / entry_price
         net_pnl = raw_pnl - FEE_TOTAL
         trades.append(
             {
                 'stock_code': code,
-                'stock_name': info['name'],
-                'entry_date': info['dates'][pos['entry_idx']],
+                'stock_name': names.get(code, code),
+                'entry_date': pos['entry_date'],
                 'exit_date': last_date,
                 'entry_price': entry_price,
                 'exit_price': price,
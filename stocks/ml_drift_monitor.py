@@ -15,49 +15,17 @@ sys.path.insert(0, str(Path(__file__).resolve().parent))
 
 from common.config import BRAIN_PATH
 from common.telegram import Priority, send_telegram
-from ml_model import FEATURE_NAMES, extract_features, load_training_data, supabase
+from ml_model import FEATURE_NAMES, _horizon_paths, extract_features, load_training_data, supabase
+from stocks.ml_drift_state import DRIFT_STATE_PATH, SNAPSHOT_DIR, IncrementalDriftMonitor
 
 
 DRIFT_REPORT_PATH = BRAIN_PATH / "ml" / "drift_report.json"
 
 
-def _psi(expected: np.ndarray, actual: np.ndarray, bins: int = 10) -> float:
-    expected = expected[np.isfinite(expected)]
-    actual = actual[np.isfinite(actual)]
-    if len(expected) < 20 or len(actual) < 10:
-        return 0.0
-
-    quantiles = np.linspace(0, 1, bins + 1)
-    edges = np.quantile(expected, quantiles)
-    edges = np.unique(edges)
-    if len(edges) < 3:
-        return 0.0
-
-    exp_hist, _ = np.histogram(expected, bins=edges)
-    act_hist, _ = np.histogram(actual, bins=edges)
-
-    exp_pct = np.clip(exp_hist / max(exp_hist.sum(), 1), 1e-6, None)
-    act_pct = np.clip(act_hist / max(act_hist.sum(), 1), 1e-6, None)
-    return float(np.sum((act_pct - exp_pct) * np.log(act_pct / exp_pct)))
-
-
-def _ks_stat(expected: np.ndarray, actual: np.ndarray) -> dict:
-    expected = expected[np.isfinite(expected)]
-    actual = actual[np.isfinite(actual)]
-    if len(expected) < 20 or len(actual) < 10:
-        return {"statistic": 0.0, "pvalue": 1.0}
-    try:
-        from scipy.stats import ks_2samp
-
-        stat = ks_2samp(expected, actual, alternative="two-sided", mode="auto")
-        return {"statistic": float(stat.statistic), "pvalue": float(stat.pvalue)}
-    except Exception:
-        return {"statistic": 0.0, "pvalue": 1.0}
-
-
-def load_recent_feature_matrix(lookback_days: int = 20) -> np.ndarray:
+def iter_recent_feature_rows(lookback_days: int = 20):
+    """(stock_code, date, features) 최근 피처 행 — 증분 상태 초기 시딩용 전체 재계산 경로."""
     if not supabase:
-        return np.empty((0, len(FEATURE_NAMES)))
+        return
 
     since = (datetime.now(timezone.utc).date() - timedelta(days=max(lookback_days, 5))).isoformat()
     stocks = (
@@ -68,7 +36,6 @@ def load_recent_feature_matrix(lookback_days: int = 20) -> np.ndarray:
         or []
     )
 
-    all_X = []
     for s in stocks:
         code = s['stock_code']
         rows = (
@@ -116,20 +83,47 @@ def load_recent_feature_matrix(lookback_days: int = 20) -> np.ndarray:
             except Exception:
                 continue
             if feats is not None and len(feats) == len(FEATURE_NAMES):
-                all_X.append(feats)
+                yield code, dt, feats
 
+
+def load_recent_feature_matrix(lookback_days: int = 20) -> np.ndarray:
+    all_X = [feats for _, _, feats in iter_recent_feature_rows(lookback_days)]
     if not all_X:
         return np.empty((0, len(FEATURE_NAMES)))
     return np.array(all_X, dtype=float)
 
 
-def build_drift_report() -> dict:
+def rebuild_drift_state(lookback_days: int = 20) -> IncrementalDriftMonitor | None:
+    """학습 데이터로 기준 구간을 고정하고 최근 윈도우를 DB에서 한 번 시딩."""
     X_train, _ = load_training_data(target_days=3, target_return=0.02)
-    X_recent = load_recent_feature_matrix(lookback_days=20)
-
     if X_train is None or len(X_train) == 0:
-        return {"status": "NO_TRAIN_DATA", "generated_at": datetime.now(timezone.utc).isoformat()}
-    if len(X_recent) == 0:
+        return None
+    monitor = IncrementalDriftMonitor.fit(FEATURE_NAMES, X_train, window_days=lookback_days)
+    monitor.observe_many(iter_recent_feature_rows(lookback_days=lookback_days))
+    return monitor
+
+
+def build_drift_report(rebuild: bool = False) -> dict:
+    """증분 상태 기반 드리프트 리포트.
+
+    상태 파일이 있으면 예측 경로가 쌓은 피처 스냅샷만 흡수해 누적 히스토그램으로
+    PSI/KS를 계산한다 (DB 조회 없음). 상태가 없거나, 모델이 기준보다 나중에
+    재학습됐거나, ``rebuild``면 전체 재구축.
+    """
+    monitor = None
+    if not rebuild:
+        # 어떤 경로로든 재학습됐으면 (모델 파일이 기준보다 새것) 기준 재구축
+        artifacts = [p for key, p in _horizon_paths('3d').items() if key != 'dir']
+        monitor = IncrementalDriftMonitor.load(DRIFT_STATE_PATH, FEATURE_NAMES, model_artifacts=artifacts)
+    if monitor is None:
+        monitor = rebuild_drift_state(lookback_days=20)
+        if monitor is None:
+            return {"status": "NO_TRAIN_DATA", "generated_at": datetime.now(timezone.utc).isoformat()}
+    monitor.ingest_snapshots(SNAPSHOT_DIR)
+    monitor.expire()
+    monitor.save(DRIFT_STATE_PATH)
+
+    if monitor.recent_samples == 0:
         return {"status": "NO_RECENT_DATA", "generated_at": datetime.now(timezone.utc).isoformat()}
 
     rows = []
@@ -137,31 +131,19 @@ def build_drift_report() -> dict:
     high_psi = 0
     drifted_features = []
 
-    for i, name in enumerate(FEATURE_NAMES):
-        exp = X_train[:, i]
-        act = X_recent[:, i]
-        psi = _psi(exp, act)
-        ks = _ks_stat(exp, act)
+    for row in monitor.feature_stats():
+        psi = row["psi"]
         level = "stable"
         if psi >= 0.25:
             level = "danger"
             high_psi += 1
         elif psi >= 0.10:
             level = "warning"
-        if ks["pvalue"] < 0.01:
-            drifted_features.append(name)
+        if row["ks_pvalue"] < 0.01:
+            drifted_features.append(row["feature"])
         max_psi = max(max_psi, psi)
-        rows.append(
-            {
-                "feature": name,
-                "psi": round(psi, 6),
-                "ks_statistic": round(ks["statistic"], 6),
-                "ks_pvalue": round(ks["pvalue"], 8),
-                "train_mean": round(float(np.nanmean(exp)), 6),
-                "recent_mean": round(float(np.nanmean(act)), 6),
-                "level": level,
-            }
-        )
+        row["level"] = level
+        rows.append(row)
 
     rows.sort(key=lambda x: x["psi"], reverse=True)
     overall = "stable"
@@ -178,8 +160,9 @@ def build_drift_report() -> dict:
         "status": overall.upper(),
         "recommended_action": action,
         "generated_at": datetime.now(timezone.utc).isoformat(),
-        "recent_samples": int(len(X_recent)),
-        "training_samples": int(len(X_train)),
+        "recent_samples": int(monitor.recent_samples),
+        "training_samples": int(monitor.training_samples),
+        "reference_built_at": monitor.reference_built_at,
         "max_psi": round(max_psi, 6),
         "high_psi_count": int(high_psi),
         "ks_drift_features": drifted_features,
@@ -224,14 +207,18 @@ def main() -> int:
     parser = argparse.ArgumentParser(description="ML feature drift monitor")
     parser.add_argument("--auto-retrain", action="store_true")
     parser.add_argument("--no-telegram", action="store_true")
+    parser.add_argument("--rebuild", action="store_true", help="기준 구간/최근 윈도우 전체 재구축")
     args = parser.parse_args()
 
-    report = build_drift_report()
+    report = build_drift_report(rebuild=args.rebuild)
     save_report(report)
     if not args.no_telegram:
         maybe_notify(report)
     retrained = maybe_retrain(report, auto_retrain=args.auto_retrain)
     report["auto_retrain_triggered"] = retrained
+    if retrained:
+        # 새 모델의 학습 분포로 다음 실행 때 기준 구간 재구축
+        DRIFT_STATE_PATH.unlink(missing_ok=True)
     save_report(report)
     print(json.dumps(report, ensure_ascii=False, indent=2))
     return 0
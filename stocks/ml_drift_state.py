@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+ML 피처 드리프트 증분 상태
+
+- 기준(학습) 분포: 고정 분위수 구간 경계 + 구간별 카운트 (재학습 전까지 불변)
+- 최근 분포: 일자별 히스토그램 버킷의 누적합 (윈도우 밖 일자는 차감)
+- 예측 경로가 이미 계산한 피처 행을 일자별 JSONL 스냅샷에 append → 모니터가 오프셋부터 흡수
+
+PSI/KS는 누적 카운트만으로 계산하므로 리포트 비용은 O(피처 × 구간)이다.
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from common.config import BRAIN_PATH
+from common.utils import atomic_write_json
+
+SNAPSHOT_DIR = BRAIN_PATH / "ml" / "feature_snapshots"
+DRIFT_STATE_PATH = BRAIN_PATH / "ml" / "drift_state.json"
+
+_MIN_REF_SAMPLES = 20
+_MIN_CUR_SAMPLES = 10
+_STATE_VERSION = 1
+
+_recorded: set = set()  # 프로세스 내 (code, date) 중복 append 방지
+
+
+def record_feature_snapshot(
+    stock_code: str,
+    as_of_date: str,
+    features: Sequence[float],
+    snapshot_dir: Optional[Path] = None,
+) -> bool:
+    """예측 경로에서 계산된 피처 행을 일자별 스냅샷 파일에 1줄 append.
+
+    같은 프로세스에서 같은 (종목, 일자)는 한 번만 기록한다. 프로세스 간 중복은
+    모니터가 일자 버킷의 종목 집합으로 걸러낸다.
+    """
+    day = str(as_of_date or "")[:10]
+    key = (str(stock_code), day)
+    if not day or key in _recorded:
+        return False
+    target_dir = Path(snapshot_dir or SNAPSHOT_DIR)
+    line = json.dumps(
+        {"code": str(stock_code), "date": day, "features": [float(v) for v in features]},
+        separators=(",", ":"),
+    ) + "\n"
+    try:
+        target_dir.mkdir(parents=True, exist_ok=True)
+        # O_APPEND 단일 write — 여러 에이전트 프로세스가 동시에 써도 줄 단위로 안전
+        fd = os.open(str(target_dir / f"{day}.jsonl"), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            os.write(fd, line.encode("utf-8"))
+        finally:
+            os.close(fd)
+    except OSError:
+        return False
+    _recorded.add(key)
+    return True
+
+
+def _quantile_edges(values: np.ndarray, bins: int) -> np.ndarray:
+    if len(values) == 0:
+        return np.empty(0)
+    return np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)))
+
+
+def _ks_pvalue(stat: float, n_ref: int, n_cur: int) -> float:
+    """2표본 KS 점근 p-value (Kolmogorov 분포 급수). scipy import 비용 없이 매 사이클 호출 가능."""
+    if stat <= 0 or n_ref <= 0 or n_cur <= 0:
+        return 1.0
+    lam = math.sqrt(n_ref * n_cur / (n_ref + n_cur)) * stat
+    if lam < 0.2:
+        return 1.0
+    total = sum((-1) ** (k - 1) * math.exp(-2 * (k * lam) ** 2) for k in range(1, 101))
+    return float(min(max(2 * total, 0.0), 1.0))
+
+
+def _pad_edges(edges: List[np.ndarray], width: int) -> np.ndarray:
+    """가변 길이 경계 목록 → (피처, width) 배열. 빈 칸은 +inf."""
+    out = np.full((len(edges), width), np.inf)
+    for i, e in enumerate(edges):
+        out[i, : len(e)] = e
+    return out
+
+
+class _Grid:
+    """피처별 고정 구간 경계 (가변 길이 → +inf 패딩 2D)."""
+
+    def __init__(self, edges: List[np.ndarray], bins: int) -> None:
+        self.edges = [np.asarray(e, dtype=float) for e in edges]
+        self.padded = _pad_edges(self.edges, bins + 1)
+        self.n_bins = np.array([max(len(e) - 1, 0) for e in self.edges], dtype=np.int64)
+        self.width = bins
+
+    def index(self, values: np.ndarray) -> np.ndarray:
+        """피처별 값 1개씩 → 구간 번호 (np.histogram 규칙, 범위 밖은 양 끝 구간으로 클립)."""
+        idx = (self.padded <= values[:, None]).sum(axis=1) - 1
+        return np.clip(idx, 0, np.maximum(self.n_bins - 1, 0))
+
+    def histogram(self, i: int, col: np.ndarray) -> np.ndarray:
+        out = np.zeros(self.width, dtype=np.int64)
+        edges = self.edges[i]
+        if len(edges) < 2 or len(col) == 0:
+            return out
+        idx = np.clip(np.searchsorted(edges, col, side="right") - 1, 0, len(edges) - 2)
+        out[: len(edges) - 1] = np.bincount(idx, minlength=len(edges) - 1)
+        return out
+
+
+class IncrementalDriftMonitor:
+    """고정 기준 구간 위에 최근 윈도우 히스토그램을 누적하는 드리프트 모니터.
+
+    카운트는 모두 (피처, 구간) 2D 배열이라 관측 1건 반영과 리포트 계산이 벡터 연산이다.
+    """
+
+    def __init__(
+        self,
+        feature_names: Sequence[str],
+        window_days: int = 20,
+        psi_bins: int = 10,
+        ks_bins: int = 50,
+    ) -> None:
+        self.feature_names = list(feature_names)
+        self.window_days = int(window_days)
+        self.psi_bins = int(psi_bins)
+        self.ks_bins = int(ks_bins)
+        n = len(self.feature_names)
+
+        self.psi_grid = _Grid([np.empty(0)] * n, self.psi_bins)
+        self.ks_grid = _Grid([np.empty(0)] * n, self.ks_bins)
+        self.ref_psi = np.zeros((n, self.psi_bins), dtype=np.int64)
+        self.ref_ks = np.zeros((n, self.ks_bins), dtype=np.int64)
+        self.ref_n = np.zeros(n, dtype=np.int64)
+        self.ref_mean = np.zeros(n)
+        self.training_samples = 0
+        self.reference_built_at = ""
+
+        self.days: Dict[str, dict] = {}
+        self.offsets: Dict[str, int] = {}
+        self._reset_totals()
+
+    # ── 기준 분포 ──────────────────────────────────────
+    @classmethod
+    def fit(cls, feature_names: Sequence[str], X_ref: np.ndarray, **kwargs) -> "IncrementalDriftMonitor":
+        monitor = cls(feature_names, **kwargs)
+        X_ref = np.asarray(X_ref, dtype=float)
+        cols = []
+        for i in range(len(monitor.feature_names)):
+            col = X_ref[:, i] if X_ref.ndim == 2 and len(X_ref) else np.empty(0)
+            cols.append(col[np.isfinite(col)])
+        monitor.psi_grid = _Grid([_quantile_edges(c, monitor.psi_bins) for c in cols], monitor.psi_bins)
+        monitor.ks_grid = _Grid([_quantile_edges(c, monitor.ks_bins) for c in cols], monitor.ks_bins)
+        for i, col in enumerate(cols):
+            monitor.ref_psi[i] = monitor.psi_grid.histogram(i, col)
+            monitor.ref_ks[i] = monitor.ks_grid.histogram(i, col)
+            monitor.ref_n[i] = len(col)
+            monitor.ref_mean[i] = float(col.mean()) if len(col) else 0.0
+        monitor.training_samples = int(len(X_ref))
+        monitor.reference_built_at = datetime.now(timezone.utc).isoformat()
+        return monitor
+
+    # ── 최근 윈도우 ────────────────────────────────────
+    def _new_bucket(self) -> dict:
+        n = len(self.feature_names)
+        return {
+            "codes": set(),
+            "n": np.zeros(n, dtype=np.int64),
+            "sum": np.zeros(n),
+            "psi": np.zeros((n, self.psi_bins), dtype=np.int64),
+            "ks": np.zeros((n, self.ks_bins), dtype=np.int64),
+        }
+
+    def _reset_totals(self) -> None:
+        self.cur = self._new_bucket()
+        for bucket in self.days.values():
+            self._apply_bucket(bucket, sign=1)
+
+    def _apply_bucket(self, bucket: dict, sign: int) -> None:
+        for key in ("n", "sum", "psi", "ks"):
+            self.cur[key] += sign * bucket[key]
+
+    def observe(self, stock_code: str, as_of_date: str, features: Sequence[float]) -> bool:
+        """피처 행 1개를 해당 일자 버킷과 누적합에 반영. O(피처 × 구간) 벡터 연산."""
+        day = str(as_of_date or "")[:10]
+        if not day or len(features) != len(self.feature_names):
+            return False
+        if day < self._cutoff():
+            return False
+        bucket = self.days.get(day)
+        if bucket is None:
+            bucket = self.days[day] = self._new_bucket()
+        code = str(stock_code)
+        if code in bucket["codes"]:
+            return False
+        bucket["codes"].add(code)
+
+        values = np.asarray(features, dtype=float)
+        rows = np.flatnonzero(np.isfinite(values))
+        vals = values[rows]
+        psi_rows = rows[self.psi_grid.n_bins[rows] > 0]
+        ks_rows = rows[self.ks_grid.n_bins[rows] > 0]
+        psi_idx = self.psi_grid.index(values)[psi_rows]
+        ks_idx = self.ks_grid.index(values)[ks_rows]
+        for target in (bucket, self.cur):
+            target["n"][rows] += 1
+            target["sum"][rows] += vals
+            target["psi"][psi_rows, psi_idx] += 1
+            target["ks"][ks_rows, ks_idx] += 1
+        return True
+
+    def observe_many(self, rows: Iterable[tuple]) -> int:
+        return sum(1 for code, day, feats in rows if self.observe(code, day, feats))
+
+    def _cutoff(self, today: Optional[date] = None) -> str:
+        today = today or datetime.now(timezone.utc).date()
+        return (today - timedelta(days=max(self.window_days, 5))).isoformat()
+
+    def expire(self, today: Optional[date] = None) -> int:
+        """윈도우 밖 일자 버킷을 누적합에서 차감하고 제거."""
+        cutoff = self._cutoff(today)
+        stale = [d for d in self.days if d < cutoff]
+        for d in stale:
+            self._apply_bucket(self.days.pop(d), sign=-1)
+        return len(stale)
+
+    def ingest_snapshots(self, snapshot_dir: Optional[Path] = None, prune: bool = True) -> int:
+        """스냅샷 파일을 저장된 바이트 오프셋부터 읽어 새 행만 흡수."""
+        snapshot_dir = Path(snapshot_dir or SNAPSHOT_DIR)
+        if not snapshot_dir.exists():
+            return 0
+        cutoff = self._cutoff()
+        added = 0
+        for path in sorted(snapshot_dir.glob("*.jsonl")):
+            name = path.name
+            if path.stem < cutoff:
+                if prune:
+                    try:
+                        path.unlink()
+                    except OSError:
+                        pass
+                self.offsets.pop(name, None)
+                continue
+            offset = int(self.offsets.get(name, 0))
+            try:
+                with open(path, "rb") as f:
+                    f.seek(offset)
+                    chunk = f.read()
+            except OSError:
+                continue
+            end = chunk.rfind(b"\n") + 1  # 쓰는 중인 마지막 미완성 줄은 다음 회차로
+            for raw in chunk[:end].splitlines():
+                try:
+                    row = json.loads(raw)
+                except ValueError:
+                    continue
+                if self.observe(row.get("code", ""), row.get("date", path.stem), row.get("features") or []):
+                    added += 1
+            self.offsets[name] = offset + end
+        return added
+
+    # ── 통계 ──────────────────────────────────────────
+    @property
+    def recent_samples(self) -> int:
+        return int(sum(len(b["codes"]) for b in self.days.values()))
+
+    def feature_stats(self) -> List[dict]:
+        """피처별 PSI/KS/평균 — 누적 카운트만 사용."""
+        ref_n, cur_n = self.ref_n, self.cur["n"]
+        enough = (ref_n >= _MIN_REF_SAMPLES) & (cur_n >= _MIN_CUR_SAMPLES)
+
+        psi_valid = np.arange(self.psi_bins)[None, :] < self.psi_grid.n_bins[:, None]
+        exp_pct = np.clip(self.ref_psi / np.maximum(self.ref_psi.sum(1, keepdims=True), 1), 1e-6, None)
+        act_pct = np.clip(self.cur["psi"] / np.maximum(self.cur["psi"].sum(1, keepdims=True), 1), 1e-6, None)
+        psi = np.where(psi_valid, (act_pct - exp_pct) * np.log(act_pct / exp_pct), 0.0).sum(axis=1)
+        psi = np.where(enough & (self.psi_grid.n_bins >= 2), psi, 0.0)
+
+        ref_cdf = np.cumsum(self.ref_ks, axis=1) / np.maximum(self.ref_ks.sum(1, keepdims=True), 1)
+        cur_cdf = np.cumsum(self.cur["ks"], axis=1) / np.maximum(self.cur["ks"].sum(1, keepdims=True), 1)
+        ks_stat = np.where(enough & (self.ks_grid.n_bins >= 1), np.abs(ref_cdf - cur_cdf).max(axis=1), 0.0)
+
+        rows = []
+        for i, name in enumerate(self.feature_names):
+            n_cur = int(cur_n[i])
+            rows.append(
+                {
+                    "feature": name,
+                    "psi": round(float(psi[i]), 6),
+                    "ks_statistic": round(float(ks_stat[i]), 6),
+                    "ks_pvalue": round(_ks_pvalue(float(ks_stat[i]), int(ref_n[i]), n_cur), 8),
+                    "train_mean": round(float(self.ref_mean[i]), 6),
+                    "recent_mean": round(float(self.cur["sum"][i] / n_cur), 6) if n_cur else 0.0,
+                }
+            )
+        return rows
+
+    # ── 직렬화 ────────────────────────────────────────
+    def to_dict(self) -> dict:
+        return {
+            "version": _STATE_VERSION,
+            "feature_names": self.feature_names,
+            "window_days": self.window_days,
+            "psi_bins": self.psi_bins,
+            "ks_bins": self.ks_bins,
+            "training_samples": self.training_samples,
+            "reference_built_at": self.reference_built_at,
+            "reference": {
+                "psi_edges": [e.tolist() for e in self.psi_grid.edges],
+                "ks_edges": [e.tolist() for e in self.ks_grid.edges],
+                "psi_counts": self.ref_psi.tolist(),
+                "ks_counts": self.ref_ks.tolist(),
+                "n": self.ref_n.tolist(),
+                "mean": self.ref_mean.tolist(),
+            },
+            "days": {
+                d: {
+                    "codes": sorted(b["codes"]),
+                    "n": b["n"].tolist(),
+                    "sum": b["sum"].tolist(),
+                    "psi": b["psi"].tolist(),
+                    "ks": b["ks"].tolist(),
+                }
+                for d, b in sorted(self.days.items())
+            },
+            "offsets": dict(self.offsets),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "IncrementalDriftMonitor":
+        monitor = cls(
+            data["feature_names"],
+            window_days=data.get("window_days", 20),
+            psi_bins=data.get("psi_bins", 10),
+            ks_bins=data.get("ks_bins", 50),
+        )
+        ref = data["reference"]
+        monitor.psi_grid = _Grid(ref["psi_edges"], monitor.psi_bins)
+        monitor.ks_grid = _Grid(ref["ks_edges"], monitor.ks_bins)
+        monitor.ref_psi = np.asarray(ref["psi_counts"], dtype=np.int64)
+        monitor.ref_ks = np.asarray(ref["ks_counts"], dtype=np.int64)
+        monitor.ref_n = np.asarray(ref["n"], dtype=np.int64)
+        monitor.ref_mean = np.asarray(ref["mean"], dtype=float)
+        monitor.training_samples = int(data.get("training_samples", 0))
+        monitor.reference_built_at = str(data.get("reference_built_at", ""))
+        monitor.days = {
+            d: {
+                "codes": set(b.get("codes", [])),
+                "n": np.asarray(b["n"], dtype=np.int64),
+                "sum": np.asarray(b["sum"], dtype=float),
+                "psi": np.asarray(b["psi"], dtype=np.int64),
+                "ks": np.asarray(b["ks"], dtype=np.int64),
+            }
+            for d, b in data.get("days", {}).items()
+        }
+        monitor.offsets = {k: int(v) for k, v in data.get("offsets", {}).items()}
+        monitor._reset_totals()
+        return monitor
+
+    def save(self, path: Optional[Path] = None) -> Path:
+        path = Path(path or DRIFT_STATE_PATH)
+        atomic_write_json(str(path), self.to_dict())
+        return path
+
+    @classmethod
+    def load(
+        cls,
+        path: Optional[Path] = None,
+        feature_names: Optional[Sequence[str]] = None,
+        model_artifacts: Iterable[Path] = (),
+    ) -> Optional["IncrementalDriftMonitor"]:
+        """저장된 상태 로드. 없거나 피처 구성이 바뀌었으면 None (기준 재구축 필요).
+
+        ``model_artifacts`` 중 가장 최근 수정본보다 기준 분포가 오래됐으면(이 모니터
+        밖에서 수동·다른 잡으로 재학습된 경우 포함) 역시 None.
+        """
+        path = Path(path or DRIFT_STATE_PATH)
+        if not path.exists():
+            return None
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            if data.get("version") != _STATE_VERSION:
+                return None
+            if feature_names is not None and list(data.get("feature_names", [])) != list(feature_names):
+                return None
+            model_mtime = _newest_mtime(model_artifacts)
+            if model_mtime is not None and _iso_timestamp(data.get("reference_built_at")) < model_mtime:
+                return None
+            return cls.from_dict(data)
+        except Exception:
+            return None
+
+
+def _newest_mtime(paths: Iterable[Path]) -> Optional[float]:
+    mtimes = []
+    for p in paths:
+        try:
+            mtimes.append(Path(p).stat().st_mtime)
+        except OSError:
+            continue
+    return max(mtimes) if mtimes else None
+
+
+def _iso_timestamp(value) -> float:
+    """ISO 시각 → epoch 초. 비었거나 잘못된 값은 0 (항상 오래된 것으로 취급)."""
+    try:
+        dt = datetime.fromisoformat(str(value))
+    except ValueError:
+        return 0.0
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
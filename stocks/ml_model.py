@@ -22,6 +22,7 @@ from pathlib import Path
 
 import numpy as np
 from common.env_loader import load_env
+from common.tracing import traced
 
 load_env()
 
@@ -1410,6 +1411,7 @@ def _bundle_predict_probability(bundle: dict, X: np.ndarray) -> tuple[float, dic
     return ensemble_prob, probs
 
 
+@traced("ml_inference")
 def predict_stock(stock_code: str, horizon_key: str = '3d') -> dict:
     """특정 종목 매수 확률 예측"""
     if not supabase:
@@ -1445,6 +1447,12 @@ def predict_stock(stock_code: str, horizon_key: str = '3d') -> dict:
     if features is None:
         return {'error': '피처 추출 실패'}
 
+    try:
+        from stocks.ml_drift_state import record_feature_snapshot
+        record_feature_snapshot(stock_code, rows[-1]['date'], features)
+    except Exception:
+        pass  # 드리프트 스냅샷은 예측에 영향 없음
+
     X = np.array([features], dtype=float)
     prob, base_probs = _bundle_predict_probability(bundle, X)
     action = 'BUY' if prob >= 0.65 else 'HOLD'
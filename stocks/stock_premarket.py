@@ -19,9 +19,12 @@ import json
 import sys
 import requests
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 
+import numpy as np
+
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 from common.env_loader import load_env
 from common.logger import get_logger
@@ -100,6 +103,9 @@ WATCHLIST = [
     {"code": "443060", "name": "레인보우로보틱스","sector": "로봇"},
 ]
 
+INDICATOR_WINDOW = 30      # 지표 계산에 쓰는 종목당 최근 일봉 수
+_OHLCV_PAGE_SIZE = 1000    # PostgREST 기본 최대 행 수
+
 US_INDICES = [
     {"symbol": "^GSPC", "name": "S&P500"},
     {"symbol": "^IXIC", "name": "나스닥"},
@@ -228,66 +234,118 @@ def get_stock_prices() -> list:
     return results
 
 
-def get_stock_indicators() -> list:
-    """DB에서 종목별 기술적 지표 요약"""
+def _fetch_ohlcv_window(codes: list, window: int = INDICATOR_WINDOW) -> dict:
+    """daily_ohlcv 최근 ``window``일치를 전 종목 한 번에 조회 → {code: [rows 오름차순]}"""
+    if not supabase or not codes:
+        return {}
+    # 영업일 window개 + 연휴 여유분을 달력일로 환산
+    cutoff = (datetime.now() - timedelta(days=window * 2 + 14)).date().isoformat()
+    rows, offset = [], 0
+    while True:
+        page = (
+            supabase.table('daily_ohlcv')
+            .select('stock_code,date,close_price,volume')
+            .in_('stock_code', codes)
+            .gte('date', cutoff)
+            .order('date', desc=True)
+            .order('stock_code')
+            .range(offset, offset + _OHLCV_PAGE_SIZE - 1)
+            .execute()
+            .data or []
+        )
+        rows.extend(page)
+        if len(page) < _OHLCV_PAGE_SIZE:
+            break
+        offset += _OHLCV_PAGE_SIZE
+
+    by_code: dict = {}
+    for r in rows:
+        bucket = by_code.setdefault(r['stock_code'], [])
+        if len(bucket) < window:
+            bucket.append(r)
+    return {code: bucket[::-1] for code, bucket in by_code.items()}
+
+
+def compute_indicator_panel(closes, volumes) -> dict:
+    """종목×일자 패널(오른쪽 정렬, 빈 칸 NaN)에서 RSI·거래량비율·BB위치를 한 번에 계산
+
+    종목별 스칼라 계산과 같은 식: RSI는 최근 14개 변화의 단순평균(부족분은 0),
+    거래량비율은 마지막 거래량 / 최근 20일 평균, BB위치는 20일 미만이거나
+    밴드폭이 0이면 50.
+    """
+    closes = np.asarray(closes, dtype=float)
+    volumes = np.asarray(volumes, dtype=float)
+    n_obs = np.count_nonzero(~np.isnan(closes), axis=1)
+
+    diff = np.diff(closes, axis=1)[:, -14:]
+    avg_gain = np.nansum(np.clip(diff, 0, None), axis=1) / 14
+    avg_loss = np.nansum(np.clip(-diff, 0, None), axis=1) / 14
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = np.where(avg_loss > 0, avg_gain / avg_loss, 100.0)
+        rsi = 100 - (100 / (1 + rs))
+
+        recent_vol = volumes[:, -20:]
+        avg_vol = np.nansum(recent_vol, axis=1) / np.count_nonzero(~np.isnan(recent_vol), axis=1)
+        vol_ratio = np.where(avg_vol > 0, volumes[:, -1] / avg_vol, 1.0)
+
+        last20 = closes[:, -20:]
+        ma20 = last20.mean(axis=1)
+        std20 = np.sqrt(((last20 - ma20[:, None]) ** 2).mean(axis=1))
+        bb_width = 4 * std20
+        bb_pos = np.where(
+            (n_obs >= 20) & (bb_width > 0),
+            (closes[:, -1] - (ma20 - 2 * std20)) / bb_width * 100,
+            50.0,
+        )
+    return {'rsi': rsi, 'vol_ratio': vol_ratio, 'bb_pos': bb_pos, 'n_obs': n_obs}
+
+
+def get_stock_indicators(window: int = INDICATOR_WINDOW) -> list:
+    """DB에서 종목별 기술적 지표 요약 (일괄 조회 + 벡터화 계산)"""
     if not supabase:
         return []
 
-    results = []
+    codes = [s['code'] for s in WATCHLIST]
+    try:
+        history = _fetch_ohlcv_window(codes, window)
+    except Exception as e:
+        log(f'일봉 일괄 조회 실패: {e}', 'WARN')
+        return []
+
+    # 종가가 비었거나 깨진 종목은 그 종목만 건너뜀 (기존 종목별 try/except와 동일)
+    stocks, series = [], []
     for stock in WATCHLIST:
+        rows = history.get(stock['code'], [])
+        if len(rows) < 14:
+            continue
         try:
-            rows = (
-                supabase.table('daily_ohlcv')
-                .select('close_price,volume')
-                .eq('stock_code', stock['code'])
-                .order('date', desc=False)
-                .limit(30)
-                .execute()
-                .data or []
-            )
-            if len(rows) < 14:
-                continue
-
-            closes = [float(r['close_price']) for r in rows]
-            volumes = [float(r.get('volume', 0)) for r in rows]
-
-            # RSI
-            gains, losses = [], []
-            for i in range(1, len(closes)):
-                diff = closes[i] - closes[i - 1]
-                gains.append(max(diff, 0))
-                losses.append(max(-diff, 0))
-            avg_gain = sum(gains[-14:]) / 14
-            avg_loss = sum(losses[-14:]) / 14
-            rs = avg_gain / avg_loss if avg_loss > 0 else 100
-            rsi = round(100 - (100 / (1 + rs)), 1)
-
-            # 거래량 비율
-            avg_vol = sum(volumes[-20:]) / min(len(volumes[-20:]), 20) if volumes else 1
-            vol_ratio = round(volumes[-1] / avg_vol, 2) if avg_vol > 0 else 1.0
-
-            # 볼린저밴드 위치
-            bb_pos = 50
-            if len(closes) >= 20:
-                ma20 = sum(closes[-20:]) / 20
-                std20 = (sum((c - ma20) ** 2 for c in closes[-20:]) / 20) ** 0.5
-                bb_width = 4 * std20
-                if bb_width > 0:
-                    bb_pos = round((closes[-1] - (ma20 - 2 * std20)) / bb_width * 100, 1)
-
-            results.append({
-                'code': stock['code'],
-                'name': stock['name'],
-                'sector': stock['sector'],
-                'rsi': rsi,
-                'vol_ratio': vol_ratio,
-                'bb_pos': bb_pos,
-                'last_close': closes[-1],
-            })
-        except Exception:
+            c = [float(r['close_price']) for r in rows]
+            v = [float(r.get('volume') or 0) for r in rows]
+        except (TypeError, ValueError, KeyError):
+            log(f"{stock['code']} 일봉 데이터 이상 — 지표 계산 제외", 'WARN')
             continue
-        time.sleep(0.5)  # API/DB 호출 간격 완화 (429 방지)
+        stocks.append(stock)
+        series.append((c, v))
+    if not stocks:
+        return []
+    closes = np.full((len(stocks), window), np.nan)
+    volumes = np.full((len(stocks), window), np.nan)
+    for i, (c, v) in enumerate(series):
+        closes[i, -len(c):] = c
+        volumes[i, -len(v):] = v
 
+    panel = compute_indicator_panel(closes, volumes)
+    results = []
+    for i, stock in enumerate(stocks):
+        results.append({
+            'code': stock['code'],
+            'name': stock['name'],
+            'sector': stock['sector'],
+            'rsi': round(float(panel['rsi'][i]), 1),
+            'vol_ratio': round(float(panel['vol_ratio'][i]), 2),
+            'bb_pos': round(float(panel['bb_pos'][i]), 1),
+            'last_close': float(closes[i, -1]),
+        })
     return results
 
 
@@ -601,38 +659,59 @@ def generate_rule_based_strategy(indicators: list) -> dict:
 # ─────────────────────────────────────────────
 # 메인 실행
 # ─────────────────────────────────────────────
+def _run_stages(stages: dict) -> tuple:
+    """{name: (fn, default)} 단계를 병렬 실행 → (결과, 단계별 소요초). 실패 단계는 default."""
+    def _timed(name, fn, default):
+        t0 = time.perf_counter()
+        try:
+            value = fn()
+        except Exception as e:
+            log(f'{name} 단계 실패: {e}', 'WARN')
+            value = default
+        return value, time.perf_counter() - t0
+
+    with ThreadPoolExecutor(max_workers=len(stages), thread_name_prefix='premarket') as pool:
+        futures = {name: pool.submit(_timed, name, fn, default) for name, (fn, default) in stages.items()}
+        done = {name: fut.result() for name, fut in futures.items()}
+    return {k: v[0] for k, v in done.items()}, {k: v[1] for k, v in done.items()}
+
+
 def run_premarket():
+    started = time.perf_counter()
     log('=' * 50)
     log('장 전 분석 시작')
 
-    # 1. 데이터 수집
+    # 1. 데이터 수집 (서로 독립인 단계는 병렬 실행)
+    results, timings = _run_stages({
+        'us_market': (get_us_market, []),
+        'news': (get_korean_stock_news, []),
+        'prices': (get_stock_prices, []),
+        'indicators': (get_stock_indicators, []),
+        'fundamentals': (get_fundamental_scores, {}),
+        'yesterday': (get_yesterday_results, '전날 매매 조회 실패'),
+    })
+    us_market = results['us_market']
+    news = results['news']
+    stocks = results['prices']
+    indicators = results['indicators']
+    fundamentals = results['fundamentals']
+    yesterday = results['yesterday']
+
     log('미국 증시 조회...')
-    us_market = get_us_market()
     for m in us_market:
         log(f"  {m['name']}: {(m.get('price') or 0):,.2f} ({(m.get('change_pct') or 0):+.2f}%)")
-
-    log('한국 뉴스 수집...')
-    news = get_korean_stock_news()
     log(f'  {len(news)}개 뉴스 수집')
-
-    log('종목 현재가 조회...')
-    stocks = get_stock_prices()
     log(f'  {len(stocks)}개 종목 조회')
-
-    log('기술적 지표 계산...')
-    indicators = get_stock_indicators()
     log(f'  {len(indicators)}개 종목 지표 계산')
-
-    log('펀더멘털 점수 계산...')
-    fundamentals = get_fundamental_scores()
     log(f'  펀더멘털 데이터 {len(fundamentals)}개 종목')
-
-    yesterday = get_yesterday_results()
     log(f'  {yesterday}')
+    log('수집 단계 소요: ' + ', '.join(f'{k} {v:.2f}s' for k, v in timings.items()))
 
     # 2. AI 전략 수립
     log('전략 수립 중...')
+    t0 = time.perf_counter()
     strategy = analyze_with_ai(us_market, news, stocks, indicators, yesterday, fundamentals)
+    timings['strategy'] = time.perf_counter() - t0
     log(f"전략 생성 완료 [{strategy.get('source', '?')}]: {strategy.get('market_outlook', '?')}")
 
     # 3. 전략 저장
@@ -737,7 +816,8 @@ def run_premarket():
     )
     send_telegram(msg)
 
-    log('장 전 분석 완료', 'OK')
+    timings['total'] = time.perf_counter() - started
+    log(f"장 전 분석 완료 (전략 {timings['strategy']:.2f}s, 총 {timings['total']:.2f}s)", 'OK')
     log('=' * 50)
 
 
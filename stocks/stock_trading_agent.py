@@ -26,6 +26,8 @@ from common.telegram import send_telegram as _tg_send
 from common.supabase_client import get_supabase
 from common.logger import get_logger
 from common.retry import retry, retry_call
+from common.tracing import traced, traced_cycle
+from common.lazy import lazy_client, lazy_import
 from common.config import STOCK_TRADING_LOG
 from common.utils import generate_order_id, check_order_idempotency
 from common.llm_client import call_haiku, is_quota_exceeded
@@ -37,10 +39,10 @@ from common.equity_loader import (
     save_drawdown_state,
 )
 from execution.smart_router import SmartRouter
-from quant.drift_detector import ConceptDriftDetector  # v6.2 C3: 드리프트 감지
 from quant.risk.drawdown_guard import DrawdownGuard
 from quant.risk.drawdown_state_store import DrawdownStateStore
 from quant.risk.position_sizer import KellyPositionSizer
+from quant.risk.cross_market_manager import invalidate_cross_market_cache
 
 try:
     from common.sheets_logger import append_trade as _sheets_append
@@ -56,15 +58,17 @@ load_env()
 _log = get_logger("stock_agent", STOCK_TRADING_LOG)
 
 sys.path.insert(0, str(Path(__file__).parent))
-from kiwoom_client import KiwoomClient
+_kiwoom_client = lazy_import("kiwoom_client")
+_drift_module = lazy_import("quant.drift_detector")  # v6.2 C3: 드리프트 감지 (numpy)
 
 # ─────────────────────────────────────────────
 # 설정
 # ─────────────────────────────────────────────
-supabase = get_supabase()
-kiwoom = KiwoomClient()
+# 클라이언트는 첫 사용 시 생성 — 장 외/STOP 스킵 사이클은 import·인증 비용 없이 종료
+supabase = lazy_client(get_supabase)
+kiwoom = lazy_client(lambda: _kiwoom_client.KiwoomClient())
 _kr_drift_cache: dict = {}
-_drift_detector = ConceptDriftDetector()  # v6.2 C3: 드리프트 감지 인스턴스
+_drift_detector = lazy_client(lambda: _drift_module.ConceptDriftDetector())  # v6.2 C3: 드리프트 감지 인스턴스
 
 RISK = {
     "invest_ratio": 0.25,
@@ -265,6 +269,7 @@ def _calc_ema(data: list, period: int) -> float:
     return e
 
 
+@traced("data_fetch.kospi")
 def get_kospi_sentiment() -> dict:
     """코스피 시장 심리 (RSI 기반)"""
     cache_key = 'kospi_sentiment'
@@ -299,6 +304,7 @@ def get_kospi_sentiment() -> dict:
         return {'rsi': 50, 'msg': '⚪ 코스피 조회 실패 — 중립 처리'}
 
 
+@traced("data_fetch.weekly")
 def get_weekly_trend(code: str) -> dict:
     """주봉 EMA 5/10 기반 추세 (캐싱)"""
     cache_key = f'weekly_{code}'
@@ -331,6 +337,7 @@ def get_weekly_trend(code: str) -> dict:
         return {'trend': 'UNKNOWN'}
 
 
+@traced("data_fetch.news")
 def get_stock_news(stock_name: str) -> str:
     """종목 관련 뉴스 헤드라인"""
     try:
@@ -360,6 +367,7 @@ def get_stock_news(stock_name: str) -> str:
         return '뉴스 조회 실패'
 
 
+@traced("data_fetch.supply")
 def get_investor_trend_krx(stock_code: str) -> dict:
     """KRX 투자자별 매매동향 (당일 기준)"""
     try:
@@ -406,6 +414,7 @@ def get_investor_trend_krx(stock_code: str) -> dict:
         return {}
 
 
+@traced("indicators.momentum")
 def calc_momentum_score(code: str) -> dict:
     """
     모멘텀 스코어 — 최근 수익률 + 거래량 증가 + 신고가 근접도
@@ -470,6 +479,7 @@ def calc_momentum_score(code: str) -> dict:
         return {'score': 0, 'grade': 'F'}
 
 
+@traced("data_fetch.price")
 def get_current_price(code: str) -> float:
     """키움 API로 현재가 조회 (안정적 파싱)"""
     try:
@@ -494,6 +504,7 @@ def get_current_price(code: str) -> float:
         return 0.0
 
 
+@traced("data_fetch.candles")
 def _fetch_live_candles(code: str, period: str = '5d', interval: str = '5m') -> dict:
     cache_key = f'live_{code}_{interval}'
     if cache_key in _cache:
@@ -519,6 +530,7 @@ def _fetch_live_candles(code: str, period: str = '5d', interval: str = '5m') ->
         return {}
 
 
+@traced("data_fetch.daily")
 def _fetch_daily_from_db(code: str) -> dict:
     try:
         rows = (
@@ -545,6 +557,7 @@ def _fetch_daily_from_db(code: str) -> dict:
         return {}
 
 
+@traced("indicators")
 def _calc_indicators_from_data(closes: list, volumes: list) -> dict:
     rsi = _calc_rsi(closes)
     ema12 = _calc_ema(closes, 12)
@@ -619,6 +632,7 @@ def get_indicators(code: str) -> dict:
 # ─────────────────────────────────────────────
 # 포지션 관리
 # ─────────────────────────────────────────────
+@traced("data_fetch.positions")
 def get_open_positions() -> list:
     """현재 열린 포지션 목록"""
     try:
@@ -1103,6 +1117,7 @@ def analyze_with_ai(
         return result
 
 
+@traced("signal")
 def get_trading_signal(
     stock: dict,
     indicators: dict,
@@ -1244,6 +1259,7 @@ def _get_stock_sector(code: str) -> str:
     return ''
 
 
+@traced("data_fetch.dart")
 def _get_dart_score(code: str) -> dict:
     if code in _dart_cache:
         return _dart_cache[code]
@@ -1607,6 +1623,7 @@ def execute_buy(
         except Exception as e2:
             log(f'{name} DB 저장 2차 실패: {e2}', 'ERROR')
             send_telegram(f'🚨 {name} 매수 체결됐으나 DB 저장 실패 — 수동 확인 필요\n코드: {code}')
+    invalidate_cross_market_cache()
 
     if notify_openclaw:
         try:
@@ -1754,6 +1771,7 @@ def execute_sell(stock: dict, signal: dict, indicators: dict, reason_prefix: str
         }).execute()
     except Exception as e:
         log(f'{name} 매도 기록 저장 실패: {e}', 'ERROR')
+    invalidate_cross_market_cache()
 
     if notify_openclaw:
         try:
@@ -1809,6 +1827,7 @@ def execute_sell(stock: dict, signal: dict, indicators: dict, reason_prefix: str
     }
 
 
+@traced("order")
 def execute_trade(
     stock: dict,
     signal: dict,
@@ -1830,6 +1849,7 @@ def execute_trade(
 # ─────────────────────────────────────────────
 # 손절/익절 자동 체크
 # ─────────────────────────────────────────────
+@traced("order.exits")
 def check_stop_loss_take_profit():
     """1분마다 실행: 손절/익절/트레일링 스탑"""
     positions = get_open_positions()
@@ -2007,6 +2027,7 @@ def check_stop_loss_take_profit():
 # ─────────────────────────────────────────────
 # 메인 사이클
 # ─────────────────────────────────────────────
+@traced_cycle("KR")
 def run_trading_cycle():
     global _cache, _dart_cache, _kr_buy_blocked, _kr_drift_cache
     _cache = {}
@@ -2014,22 +2035,6 @@ def run_trading_cycle():
     _kr_drift_cache = {}
     _kr_buy_blocked = False
 
-    # 레짐별 팩터 가중치 (TTL 30분 캐시)
-    from agents.regime_classifier import get_regime_cached
-    _regime_adj = get_regime_cached(1800)
-
-    # v6: 레짐별 리스크 파라미터 런타임 오버라이드
-    from common.config import REGIME_RISK_OVERRIDES
-    _current_regime = _regime_adj.get("regime", "TRANSITION")
-    _regime_override = REGIME_RISK_OVERRIDES.get(_current_regime, {})
-    if _regime_override:
-        if "max_positions" in _regime_override:
-            RISK["max_positions"] = _regime_override["max_positions"]
-        if not _regime_override.get("allow_new_buys", True):
-            _kr_buy_blocked = True
-            log(f"레짐 {_current_regime}: 신규매수 차단")
-        log(f"레짐 리스크 오버라이드: {_current_regime} → max_pos={RISK['max_positions']}, sl_mult={_regime_override.get('sl_mult', 1.0)}")
-
     # STOP 플래그 체크 (텔레그램 /stop 명령으로 생성)
     stop_flag = Path(__file__).parent / 'STOP_TRADING'
     if stop_flag.exists():
@@ -2046,6 +2051,22 @@ def run_trading_cycle():
         log('장 외 시간 — 스킵')
         return
 
+    # 레짐별 팩터 가중치 (TTL 30분 캐시)
+    from agents.regime_classifier import get_regime_cached
+    _regime_adj = get_regime_cached(1800)
+
+    # v6: 레짐별 리스크 파라미터 런타임 오버라이드
+    from common.config import REGIME_RISK_OVERRIDES
+    _current_regime = _regime_adj.get("regime", "TRANSITION")
+    _regime_override = REGIME_RISK_OVERRIDES.get(_current_regime, {})
+    if _regime_override:
+        if "max_positions" in _regime_override:
+            RISK["max_positions"] = _regime_override["max_positions"]
+        if not _regime_override.get("allow_new_buys", True):
+            _kr_buy_blocked = True
+            log(f"레짐 {_current_regime}: 신규매수 차단")
+        log(f"레짐 리스크 오버라이드: {_current_regime} → max_pos={RISK['max_positions']}, sl_mult={_regime_override.get('sl_mult', 1.0)}")
+
     log('=' * 50)
     log('주식 매매 사이클 시작')
 
@@ -2222,6 +2243,8 @@ def run_trading_cycle():
 # 엔트리포인트
 # ─────────────────────────────────────────────
 if __name__ == '__main__':
+    from common.replay import install_from_env
+    install_from_env()
     if len(sys.argv) > 1 and sys.argv[1] == 'check':
         if is_market_open():
             log('주식 1분 손절/익절 체크')
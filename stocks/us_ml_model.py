@@ -15,6 +15,7 @@ from ta.volatility import BollingerBands
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
 from common.config import BRAIN_PATH
+from common.tracing import traced
 from stocks.ml_model import (
     _build_catboost_model,
     _build_lgbm_model,
@@ -413,6 +414,7 @@ def _load_bundle() -> tuple[dict, object | None, dict]:
     return base_models, meta_model, meta
 
 
+@traced("ml_inference")
 def predict_stock(symbol: str) -> dict:
     base_models, meta_model, meta = _load_bundle()
     if not base_models:
@@ -7,16 +7,21 @@
 - 상위 N개(≈상위 1% 수준)를 뽑아서
 - 월간 리밸런싱 포트폴리오를 간단히 백테스트.
 
+백테스트는 (날짜 × 종목) 패널 위에서 돈다: 전 종목·전 날짜 모멘텀 스코어를
+한 번에 벡터 계산하고, 리밸런싱일마다 argpartition으로 상위 N을 고른 뒤
+보유 수량 행렬로 평가한다. 여러 lookback / 상위 % 조합을 한 번에 스윕 가능.
+
 실행 예시:
     .venv/bin/python stocks/us_momentum_backtest.py scan
     .venv/bin/python stocks/us_momentum_backtest.py backtest
+    .venv/bin/python stocks/us_momentum_backtest.py sweep
 """
 
 import sys
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
 import numpy as np
 import pandas as pd
@@ -227,12 +232,16 @@ def save_all_to_supabase(all_scores: List[MomentumScore]) -> None:
         print(f"⚠️ Supabase insert 실패: {e}")
 
 
-def _build_rebalance_dates(index: pd.DatetimeIndex, every_n_days: int = 21) -> List[pd.Timestamp]:
+def _build_rebalance_dates(
+    index: pd.DatetimeIndex,
+    every_n_days: int = 21,
+    start: int = 60,
+) -> List[pd.Timestamp]:
     """리밸런싱 기준일 (약 월 1회) 생성."""
-    if len(index) < 60:
+    if len(index) < start:
         return []
     dates: List[pd.Timestamp] = []
-    i = 60  # 모멘텀 계산에 최소 60일 확보 후 시작
+    i = start  # 모멘텀 계산에 최소 start일 확보 후 시작
     while i < len(index):
         dates.append(index[i])
         i += every_n_days
@@ -241,26 +250,234 @@ def _build_rebalance_dates(index: pd.DatetimeIndex, every_n_days: int = 21) -> L
     return dates
 
 
-def backtest_monthly_rotation(
-    universe: List[str] = US_UNIVERSE,
-    years: int = 2,
-    top_percent: float = 1.0,
-) -> Dict:
+# ─────────────────────────────────────────────
+# 패널 (날짜 × 종목) 엔진
+# ─────────────────────────────────────────────
+def _round1(values: np.ndarray) -> np.ndarray:
+    """round(x, 1)과 같은 결과 — 경계(.x5 근처) 값만 파이썬 round로 다시 계산."""
+    out = np.round(values, 1)
+    scaled = values * 10
+    edge = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if edge.any():
+        out[edge] = [round(float(x), 1) for x in values[edge]]
+    return out
+
+
+def _series_score(c: np.ndarray, h: np.ndarray, v: np.ndarray, lookback: int = 60) -> float:
+    """결측 섞인 한 구간의 스코어 — calc_momentum_score_for_series의 배열판.
+
+    closes.dropna() 위치 기준으로 highs는 ffill, volumes는 0 채움. 신고가 창은
+    벡터 경로와 같은 ``lookback``일.
     """
-    간단한 월간 모멘텀 로테이션 백테스트.
+    keep = ~np.isnan(c)
+    closes = c[keep]
+    if len(closes) < 21:
+        return np.nan
+    highs = pd.Series(h[keep]).ffill().to_numpy()
+    vols = np.nan_to_num(v[keep], nan=0.0)
 
-    - 매 리밸런싱 시점마다 모멘텀 스코어 상위 n% 종목을 동일비중 매수
-    - 다음 리밸런싱 때까지 홀딩
+    price = float(closes[-1])
+    ret_5d = (closes[-1] / closes[-6] - 1) * 100
+    ret_20d = (closes[-1] / closes[-21] - 1) * 100
+    momentum_score = max(0, min(100, 50 + (ret_5d * 0.6 + ret_20d * 0.4) * 5))
+
+    vol_5 = float(vols[-5:].mean())
+    vol_20 = float(vols[-20:].mean())
+    vol_ratio = (vol_5 / vol_20) if vol_20 > 0 else 1.0
+    vol_score = max(0, min(100, vol_ratio * 50))
+
+    tail = highs[-lookback:]
+    high_max = float(np.nanmax(tail)) if not np.isnan(tail).all() else np.nan
+    nearness = (price / high_max) * 100 if high_max > 0 else 50.0
+    high_score = max(0, min(100, (nearness - 80) * 5))
+
+    return round(momentum_score * 0.4 + vol_score * 0.3 + high_score * 0.3, 1)
+
+
+def _window_counts(mask: np.ndarray, width: int) -> np.ndarray:
+    """row t: mask[t-width+1 .. t] 의 True 개수 (t < width-1 은 0..t)."""
+    cs = np.vstack([np.zeros((1, mask.shape[1]), dtype=np.int64), np.cumsum(mask, axis=0)])
+    lo = np.maximum(np.arange(mask.shape[0]) - width + 1, 0)
+    return cs[1:] - cs[lo]
+
+
+def momentum_score_panel(
+    closes: pd.DataFrame,
+    highs: pd.DataFrame,
+    volumes: pd.DataFrame,
+    lookback: int = 60,
+    exact_rows: Optional[Iterable[int]] = None,
+) -> pd.DataFrame:
+    """모든 날짜·종목의 모멘텀 스코어 (calc_momentum_score_for_series와 동일 규칙).
+
+    row t 의 스코어는 [t-lookback, t] 구간(lookback+1행)만 본다. 구간 안에 결측이
+    없는 셀은 한 번에 벡터 계산하고, 결측이 섞인 셀(상장 초기·거래정지 등)은
+    ``exact_rows`` 행에 한해 시리즈 규칙 그대로 계산한다 (None이면 전체 행).
+    스코어를 낼 수 없는 셀은 NaN.
     """
-    if not universe:
-        print("❌ 유니버스가 비어 있습니다.")
-        return {}
+    if lookback < 20:
+        raise ValueError("lookback must be >= 20 (20일 수익률 계산)")
+    highs = highs.reindex_like(closes)
+    volumes = volumes.reindex_like(closes)
+    c = closes.to_numpy(dtype=float)
+    h = highs.to_numpy(dtype=float)
+    v_raw = volumes.to_numpy(dtype=float)
+    v = np.nan_to_num(v_raw, nan=0.0)
+    n_rows, n_cols = c.shape
+    out = np.full((n_rows, n_cols), np.nan)
+    if n_rows == 0 or n_cols == 0:
+        return pd.DataFrame(out, index=closes.index, columns=closes.columns)
+
+    c_nan = np.isnan(c)
+    close_gaps = _window_counts(c_nan, lookback + 1)
+    high_gaps = _window_counts(np.isnan(h), lookback)
+    rows = np.arange(n_rows)
+    dense = (rows[:, None] >= lookback) & (close_gaps == 0) & (high_gaps == 0)
+
+    if n_rows > lookback:
+        from numpy.lib.stride_tricks import sliding_window_view
+
+        t0 = lookback
+        sl = slice(t0, n_rows)
+        price = c[sl]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ret_5d = (price / c[t0 - 5:n_rows - 5] - 1) * 100
+            ret_20d = (price / c[t0 - 20:n_rows - 20] - 1) * 100
+            momentum_score = np.clip(50 + (ret_5d * 0.6 + ret_20d * 0.4) * 5, 0, 100)
+
+            vol_5 = sliding_window_view(v, 5, axis=0).mean(axis=-1)[t0 - 4:]
+            vol_20 = sliding_window_view(v, 20, axis=0).mean(axis=-1)[t0 - 19:]
+            vol_ratio = np.where(vol_20 > 0, vol_5 / vol_20, 1.0)
+            vol_score = np.clip(vol_ratio * 50, 0, 100)
+
+            high_max = sliding_window_view(h, lookback, axis=0).max(axis=-1)[t0 - lookback + 1:]
+            nearness = np.where(high_max > 0, price / high_max * 100, 50.0)
+            high_score = np.clip((nearness - 80) * 5, 0, 100)
+
+            total = momentum_score * 0.4 + vol_score * 0.3 + high_score * 0.3
+        fast = dense[sl] & np.isfinite(total)
+        block = out[sl]
+        block[fast] = _round1(total[fast])
+        out[sl] = block
+
+    # 결측이 섞인 구간 → 시리즈 규칙 그대로 (셀 단위)
+    enough = _window_counts(~c_nan, lookback + 1) >= 21
+    todo = enough & ~dense
+    if exact_rows is not None:
+        keep = np.zeros(n_rows, dtype=bool)
+        keep[[r for r in exact_rows if 0 <= r < n_rows]] = True
+        todo &= keep[:, None]
+    for t, j in zip(*np.nonzero(todo)):
+        lo = max(0, t - lookback)
+        out[t, j] = _series_score(c[lo:t + 1, j], h[lo:t + 1, j], v_raw[lo:t + 1, j], lookback)
+
+    return pd.DataFrame(out, index=closes.index, columns=closes.columns)
+
+
+def _top_n_columns(scores: np.ndarray, n: int) -> np.ndarray:
+    """점수 상위 n개 열 (동점은 열 순서 = 티커 알파벳순 우선)."""
+    vals = np.where(np.isnan(scores), -np.inf, scores)
+    kth = vals[np.argpartition(-vals, n - 1)[n - 1]]
+    above = np.flatnonzero(vals > kth)
+    ties = np.flatnonzero(vals == kth)
+    return np.concatenate([above, ties[: n - len(above)]])
+
+
+def _simulate_rotation(
+    prices: np.ndarray,
+    scores: np.ndarray,
+    rebalance_rows: Sequence[int],
+    top_percent: float,
+    initial_capital: float,
+) -> Tuple[List[Tuple[int, float]], np.ndarray]:
+    """리밸런싱 행마다 상위 N 동일비중 → (평가 이력, 보유수량 행렬 [n_rebalance × n_cols])."""
+    capital = initial_capital
+    holdings = np.zeros((len(rebalance_rows), prices.shape[1]))
+    shares = np.zeros(prices.shape[1])
+    history: List[Tuple[int, float]] = []
+
+    for k, t in enumerate(rebalance_rows):
+        px = prices[t]
+        if k > 0:
+            value = float(np.dot(shares, np.nan_to_num(px, nan=0.0)))
+            capital = value if value > 0 else capital
+            history.append((t, capital))
 
-    tickers = sorted(set(universe))
-    initial_capital = 100_000.0
-    print(f"📊 US 모멘텀 로테이션 백테스트 — {years}년, 초기 {initial_capital:,.0f} USD, "
-          f"{len(tickers)}종, 상위 {top_percent:.2f}%")
+        row = scores[t]
+        n_valid = int(np.count_nonzero(~np.isnan(row)))
+        if n_valid:
+            n_top = max(1, int(round(n_valid * (top_percent / 100.0))))
+            picks = _top_n_columns(row, n_top)
+            buy_px = px[picks]
+            ok = np.isfinite(buy_px) & (buy_px != 0)
+            shares = np.zeros(prices.shape[1])
+            shares[picks[ok]] = (capital / n_top) / buy_px[ok]
+        holdings[k] = shares   # 스코어가 없으면 이전 보유 유지
+
+    return history, holdings
+
+
+def _summarize_history(
+    history: List[Tuple[pd.Timestamp, float]],
+    initial_capital: float,
+) -> Dict:
+    values = np.array([v for _, v in history], dtype=float)
+    final_value = float(values[-1])
+    peak = np.maximum.accumulate(values)
+    max_dd = float(min(0.0, ((values / peak - 1.0) * 100.0).min()))
+    return {
+        "initial_capital": initial_capital,
+        "final_capital": final_value,
+        "total_return_pct": (final_value / initial_capital - 1.0) * 100.0,
+        "max_drawdown_pct": max_dd,
+        "points": len(history),
+        "start_date": history[0][0],
+        "end_date": history[-1][0],
+    }
+
+
+def sweep_momentum_rotation(
+    closes: pd.DataFrame,
+    highs: pd.DataFrame,
+    volumes: pd.DataFrame,
+    lookbacks: Sequence[int] = (60,),
+    top_percents: Sequence[float] = (1.0,),
+    rebalance_every: int = 21,
+    initial_capital: float = 100_000.0,
+) -> List[Dict]:
+    """lookback × top_percent 조합 백테스트. 스코어 패널은 lookback당 한 번만 계산.
 
+    모든 조합이 같은 기간을 쓰도록 리밸런싱은 max(lookbacks, 60)행부터 시작한다.
+    """
+    closes = closes.reindex(columns=sorted(closes.columns))
+    highs = highs.reindex_like(closes)
+    volumes = volumes.reindex_like(closes)
+    start = max(max(lookbacks), 60)
+    rebalance_dates = _build_rebalance_dates(closes.index, rebalance_every, start=start)
+    if len(rebalance_dates) < 2:
+        return []
+    rebalance_rows = [closes.index.get_loc(d) for d in rebalance_dates]
+    prices = closes.to_numpy(dtype=float)
+
+    results: List[Dict] = []
+    for lookback in lookbacks:
+        scores = momentum_score_panel(closes, highs, volumes, lookback, exact_rows=rebalance_rows).to_numpy()
+        for top_percent in top_percents:
+            history, holdings = _simulate_rotation(prices, scores, rebalance_rows, top_percent, initial_capital)
+            if not history:
+                continue
+            summary = _summarize_history([(closes.index[t], v) for t, v in history], initial_capital)
+            summary.update({
+                "lookback": lookback,
+                "top_percent": top_percent,
+                "avg_holdings": float(np.count_nonzero(holdings, axis=1).mean()),
+                "holdings": pd.DataFrame(holdings, index=rebalance_dates, columns=closes.columns),
+            })
+            results.append(summary)
+    return results
+
+
+def _download_panel(tickers: List[str], years: int) -> Optional[Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]]:
     data = yf.download(
         tickers=tickers,
         period=f"{years}y",
@@ -270,114 +487,77 @@ def backtest_monthly_rotation(
     )
     if data.empty:
         print("❌ yfinance 데이터가 비었습니다.")
-        return {}
-
+        return None
     closes = data["Adj Close"].dropna(how="all")
     highs = data["High"].reindex_like(closes)
     volumes = data["Volume"].reindex_like(closes)
+    return closes, highs, volumes
 
-    dates = closes.index
-    rebalance_dates = _build_rebalance_dates(dates)
-    if len(rebalance_dates) < 2:
-        print("❌ 리밸런싱 기준일이 부족합니다.")
-        return {}
 
-    capital = initial_capital
-    portfolio_value_history: List[Tuple[pd.Timestamp, float]] = []
-    current_positions: Dict[str, float] = {}  # symbol -> shares
-
-    for i, reb_date in enumerate(rebalance_dates):
-        # 포트폴리오 평가
-        if i > 0:
-            reb_idx = dates.get_loc(reb_date)
-            price_row = closes.iloc[reb_idx]
-            value = 0.0
-            for sym, shares in current_positions.items():
-                px = price_row.get(sym, np.nan)
-                if not np.isnan(px):
-                    value += shares * float(px)
-            capital = value if value > 0 else capital
-            portfolio_value_history.append((reb_date, capital))
-
-        # 새 포트폴리오 구성
-        reb_idx = dates.get_loc(reb_date)
-        window_start = max(0, reb_idx - 60)
-        window_closes = closes.iloc[window_start: reb_idx + 1]
-        window_highs = highs.iloc[window_start: reb_idx + 1]
-        window_vols = volumes.iloc[window_start: reb_idx + 1]
-
-        scores: List[MomentumScore] = []
-        for sym in tickers:
-            if sym not in window_closes.columns:
-                continue
-            s = calc_momentum_score_for_series(
-                symbol=sym,
-                closes=window_closes[sym].dropna(),
-                highs=window_highs[sym].dropna(),
-                volumes=window_vols[sym].dropna(),
-            )
-            if s is not None:
-                scores.append(s)
-
-        if not scores:
-            continue
-
-        scores.sort(key=lambda x: x.score, reverse=True)
-        n_universe = len(scores)
-        n_top = max(1, int(round(n_universe * (top_percent / 100.0))))
-        top_scores = scores[:n_top]
-
-        # 동일비중 매수
-        alloc_per_stock = capital / n_top
-        new_positions: Dict[str, float] = {}
-        reb_prices = closes.iloc[reb_idx]
-        for s in top_scores:
-            price = float(reb_prices.get(s.symbol, np.nan))
-            if not price or np.isnan(price):
-                continue
-            shares = alloc_per_stock / price
-            if shares <= 0:
-                continue
-            new_positions[s.symbol] = shares
-
-        current_positions = new_positions
+def backtest_monthly_rotation(
+    universe: List[str] = US_UNIVERSE,
+    years: int = 2,
+    top_percent: float = 1.0,
+    lookback: int = 60,
+) -> Dict:
+    """
+    간단한 월간 모멘텀 로테이션 백테스트.
 
-    if not portfolio_value_history:
-        print("❌ 포트폴리오 히스토리가 비었습니다.")
+    - 매 리밸런싱 시점마다 모멘텀 스코어 상위 n% 종목을 동일비중 매수
+    - 다음 리밸런싱 때까지 홀딩
+    """
+    if not universe:
+        print("❌ 유니버스가 비어 있습니다.")
         return {}
 
-    dates_arr = [d for d, _ in portfolio_value_history]
-    values_arr = np.array([v for _, v in portfolio_value_history], dtype=float)
-    final_value = float(values_arr[-1])
-    total_return = (final_value / initial_capital - 1.0) * 100.0
+    tickers = sorted(set(universe))
+    initial_capital = 100_000.0
+    print(f"📊 US 모멘텀 로테이션 백테스트 — {years}년, 초기 {initial_capital:,.0f} USD, "
+          f"{len(tickers)}종, 상위 {top_percent:.2f}%")
 
-    # 단순 MDD 계산
-    peak = -np.inf
-    max_dd = 0.0
-    for v in values_arr:
-        if v > peak:
-            peak = v
-        dd = (v / peak - 1.0) * 100.0
-        max_dd = min(max_dd, dd)
+    panel = _download_panel(tickers, years)
+    if panel is None:
+        return {}
+    results = sweep_momentum_rotation(
+        *panel, lookbacks=(lookback,), top_percents=(top_percent,), initial_capital=initial_capital,
+    )
+    if not results:
+        print("❌ 리밸런싱 기준일 또는 포트폴리오 히스토리가 부족합니다.")
+        return {}
+    result = results[0]
 
     print("\n" + "=" * 50)
-    print(f"기간: {dates_arr[0].date()} ~ {dates_arr[-1].date()} "
-          f"({len(dates_arr)} 포인트)")
+    print(f"기간: {result['start_date'].date()} ~ {result['end_date'].date()} "
+          f"({result['points']} 포인트)")
     print(f"초기 자본:  {initial_capital:>10,.2f} USD")
-    print(f"최종 자본:  {final_value:>10,.2f} USD")
-    print(f"총 수익률: {total_return:>9.2f}%")
-    print(f"최대 낙폭: {max_dd:>9.2f}%")
+    print(f"최종 자본:  {result['final_capital']:>10,.2f} USD")
+    print(f"총 수익률: {result['total_return_pct']:>9.2f}%")
+    print(f"최대 낙폭: {result['max_drawdown_pct']:>9.2f}%")
     print("=" * 50)
 
-    return {
-        "initial_capital": initial_capital,
-        "final_capital": final_value,
-        "total_return_pct": total_return,
-        "max_drawdown_pct": max_dd,
-        "points": len(dates_arr),
-        "start_date": dates_arr[0],
-        "end_date": dates_arr[-1],
-    }
+    return {k: result[k] for k in (
+        "initial_capital", "final_capital", "total_return_pct", "max_drawdown_pct",
+        "points", "start_date", "end_date",
+    )}
+
+
+def backtest_parameter_sweep(
+    universe: List[str] = US_UNIVERSE,
+    years: int = 10,
+    lookbacks: Sequence[int] = (60, 120, 250),
+    top_percents: Sequence[float] = (1.0, 5.0, 10.0, 20.0),
+) -> List[Dict]:
+    """다운로드 1회 + 패널 엔진으로 파라미터 조합 전체 백테스트."""
+    tickers = sorted(set(universe))
+    panel = _download_panel(tickers, years)
+    if panel is None:
+        return []
+    results = sweep_momentum_rotation(*panel, lookbacks=lookbacks, top_percents=top_percents)
+    print(f"{'lookback':>8} {'top%':>6} {'수익률':>10} {'MDD':>9} {'보유':>6}")
+    for r in results:
+        print(f"{r['lookback']:>8} {r['top_percent']:>6.1f} {r['total_return_pct']:>9.2f}% "
+              f"{r['max_drawdown_pct']:>8.2f}% {r['avg_holdings']:>6.1f}")
+    return results
 
 
 def main():
@@ -389,10 +569,13 @@ def main():
         scan_today_top_us()
     elif mode == "backtest":
         backtest_monthly_rotation()
+    elif mode == "sweep":
+        backtest_parameter_sweep()
     else:
         print("사용법:")
         print("  .venv/bin/python stocks/us_momentum_backtest.py scan")
         print("  .venv/bin/python stocks/us_momentum_backtest.py backtest")
+        print("  .venv/bin/python stocks/us_momentum_backtest.py sweep")
 
 
 if __name__ == "__main__":
@@ -17,21 +17,24 @@ v2 변경사항:
 
 import sys
 import time
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Optional, List, Dict
 from zoneinfo import ZoneInfo  # v6.2 B2: ET 시간대 통일
 
-import yfinance as yf
-import pandas as pd
-from ta.momentum import RSIIndicator
-from ta.volatility import BollingerBands
-
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.lazy import lazy_client, lazy_import
+
+# yfinance/pandas/ta (~0.9s)는 첫 사용 시 로드 — 장 외/STOP 스킵 사이클은 import 비용 없이 종료
+yf = lazy_import("yfinance")
+pd = lazy_import("pandas")
+_indicators = lazy_import("common.indicators")
+from common.cache import BoundedTTLCache
 from common.env_loader import load_env
 from common.telegram import send_telegram as _tg_send
 from common.supabase_client import get_supabase
 from common.logger import get_logger
+from common.tracing import span, traced, traced_cycle
 from common.config import US_TRADING_LOG
 from common.utils import generate_order_id, check_order_idempotency
 from common.equity_loader import (
@@ -44,6 +47,7 @@ from common.equity_loader import (
 from quant.risk.drawdown_guard import DrawdownGuard
 from quant.risk.drawdown_state_store import DrawdownStateStore
 from quant.risk.position_sizer import KellyPositionSizer
+from quant.risk.cross_market_manager import invalidate_cross_market_cache
 from execution.smart_router import SmartRouter
 
 try:
@@ -56,21 +60,25 @@ try:
 except ImportError:
     _AlpacaBroker = None
 
-try:
-    from quant.drift_detector import ConceptDriftDetector as _ConceptDriftDetector
-except Exception:
-    _ConceptDriftDetector = None
+
+def _make_drift_detector():
+    try:
+        from quant.drift_detector import ConceptDriftDetector
+    except Exception:
+        return None
+    return ConceptDriftDetector()
+
 
 # v6: SmartRouter 인스턴스 (US 모의투자용 — 슬리피지 추적 + 주문 크기별 라우팅 로깅)
-_smart_router = SmartRouter()
+_smart_router = lazy_client(SmartRouter)
 
 load_env()
 _log = get_logger("us_agent", US_TRADING_LOG)
 
 sys.path.insert(0, str(Path(__file__).parent))
-from us_momentum_backtest import scan_today_top_us, US_UNIVERSE
+_momentum = lazy_import("us_momentum_backtest")   # scan_today_top_us, US_UNIVERSE
 
-supabase = get_supabase()
+supabase = lazy_client(get_supabase)
 
 # ─────────────────────────────────────────────
 # 리스크 설정 (미주용)
@@ -121,9 +129,10 @@ _us_drift_cache: Dict = {}
 # audit fix: CrossMarket 리스크 — 모듈 레벨 싱글턴 (매 사이클 재사용)
 _cmr_instance = None
 # P1-10: ConceptDriftDetector US 연동
-_us_drift_detector = _ConceptDriftDetector() if _ConceptDriftDetector is not None else None
+_us_drift_detector = lazy_client(_make_drift_detector)
 
 
+@traced("ml_inference")
 def _get_us_ml_signal(symbol: str) -> dict:
     try:
         from us_ml_model import get_ml_signal
@@ -245,64 +254,100 @@ def calc_relative_strength(symbol: str, days: int = 20) -> float:
 # ─────────────────────────────────────────────
 # 시장/지표 데이터
 # ─────────────────────────────────────────────
-_yf_cache: Dict[str, tuple] = {}  # v6.2 B5: {symbol: (data, timestamp)}
 _YF_CACHE_TTL = 300  # v6.2 B5: 5분 TTL
+_YF_CACHE_MAX = 512  # 상한 초과 시 만료 → LRU 순으로 퇴출
+# {(symbol, 세션일): indicators} — 새 세션 봉이 열리면 TTL과 무관하게 키가 바뀐다
+_yf_cache = BoundedTTLCache(max_size=_YF_CACHE_MAX, ttl=_YF_CACHE_TTL)
+
+
+def _us_session_key() -> str:
+    """현재 기준 최신 미국장 세션일(ET). 개장 전이면 직전 평일."""
+    now_et = datetime.now(ZoneInfo("America/New_York"))
+    day = now_et.date()
+    if now_et.weekday() < 5 and (now_et.hour, now_et.minute) < (9, 30):
+        day -= timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day.isoformat()
+
+
+@traced("data_fetch.ohlcv")
+def _download_ohlcv_panel(symbols: List[str], period: str = "90d"):
+    """yf.download 1회로 (close, high, volume) 와이드 패널 반환. 실패 시 None."""
+    data = yf.download(
+        tickers=symbols,
+        period=period,
+        auto_adjust=True,
+        progress=False,
+        group_by="column",
+        threads=True,
+    )
+    if data is None or data.empty:
+        return None
+    if not isinstance(data.columns, pd.MultiIndex):
+        data = pd.concat({symbols[0]: data}, axis=1).swaplevel(0, 1, axis=1)
+    return data["Close"], data["High"], data["Volume"]
 
 
-def get_us_indicators(symbol: str) -> Optional[dict]:
-    """yfinance에서 일봉 기반 RSI/BB/거래량 지표 계산."""
-    # v6.2 B5: yf_cache TTL
-    now = time.time()
-    if symbol in _yf_cache:
-        cached_data, cached_ts = _yf_cache[symbol]
-        if now - cached_ts < _YF_CACHE_TTL:
-            return cached_data
+@traced("indicators.batch")
+def get_us_indicators_batch(symbols: List[str]) -> Dict[str, dict]:
+    """스캔 리스트 전체 지표를 한 번의 그룹 다운로드로 계산.
 
-    try:
-        ticker = yf.Ticker(symbol)
-        hist = ticker.history(period="90d")
-        if hist is None or len(hist) < 30:
-            return None
+    캐시 적중 종목은 네트워크를 타지 않고, 나머지는 yf.download 1회로 받아
+    `calc_indicator_panel`로 전 종목 RSI/BB/거래량비/60일 고점을 동시에 계산한다.
+    반환: {symbol: indicators} (데이터 부족 종목은 제외)
+    """
+    session = _us_session_key()
+    results: Dict[str, dict] = {}
+    missing: List[str] = []
+    for symbol in dict.fromkeys(s for s in symbols if s):
+        cached = _yf_cache.get((symbol, session))
+        if cached is not None:
+            results[symbol] = cached
+        else:
+            missing.append(symbol)
+    if not missing:
+        return results
 
-        close = hist["Close"]
-        high = hist["High"]
-        volume = hist["Volume"]
-        price = float(close.iloc[-1])
+    try:
+        panel = _download_ohlcv_panel(missing)
+        if panel is None:
+            return results
+        table = _indicators.calc_indicator_panel(*panel, min_bars=30)
+    except Exception as e:
+        log(f"지표 일괄 조회 실패 ({len(missing)}종목): {e}", "WARN")
+        return results
 
-        rsi_s = RSIIndicator(close=close, window=14).rsi()
-        rsi = float(rsi_s.iloc[-1]) if not pd.isna(rsi_s.iloc[-1]) else 50.0
+    for symbol, row in table.iterrows():
+        result = {
+            "price": float(row["price"]),
+            "rsi": float(row["rsi"]),
+            "bb_pos": float(row["bb_pos"]),
+            "vol_ratio": float(row["vol_ratio"]),
+            "near_high": float(row["near_high"]),
+            "high_60d": float(row["high_60d"]),
+            "last_bar": pd.Timestamp(row["last_bar"]).date().isoformat(),
+        }
+        _yf_cache.set((symbol, session), result)
+        results[symbol] = result
+    return results
 
-        bb = BollingerBands(close=close, window=20, window_dev=2)
-        bb_upper = float(bb.bollinger_hband().iloc[-1])
-        bb_lower = float(bb.bollinger_lband().iloc[-1])
-        bb_width = bb_upper - bb_lower
-        bb_pos = ((price - bb_lower) / bb_width * 100) if bb_width > 0 else 50.0
 
-        vol_20 = float(volume.tail(20).mean())
-        vol_5 = float(volume.tail(5).mean())
-        vol_ratio = (vol_5 / vol_20) if vol_20 > 0 else 1.0
+def invalidate_us_indicators(symbol: str) -> None:
+    """종목의 모든 세션 캐시 제거 (재시도 전 강제 재조회용)."""
+    _yf_cache.pop_where(lambda key: key[0] == symbol)
 
-        high_60d = float(high.tail(60).max())
-        near_high = (price / high_60d * 100) if high_60d > 0 else 50.0
 
-        result = {
-            "price": price,
-            "rsi": round(rsi, 1),
-            "bb_pos": round(bb_pos, 1),
-            "vol_ratio": round(vol_ratio, 2),
-            "near_high": round(near_high, 1),
-            "high_60d": high_60d,
-        }
-        _yf_cache[symbol] = (result, now)  # v6.2 B5: yf_cache TTL
-        return result
-    except Exception as e:
-        log(f"{symbol}: 지표 조회 실패: {e}", "WARN")
-        return None
+@traced("indicators")
+def get_us_indicators(symbol: str) -> Optional[dict]:
+    """yfinance에서 일봉 기반 RSI/BB/거래량 지표 계산 (배치 경로의 단일 종목 래퍼)."""
+    return get_us_indicators_batch([symbol]).get(symbol)
 
 
 # ─────────────────────────────────────────────
 # Supabase DB (포지션 관리)
 # ─────────────────────────────────────────────
+@traced("data_fetch.positions")
 def get_open_positions() -> List[dict]:
     if not supabase:
         return []
@@ -385,6 +430,7 @@ def save_trade(trade_type: str, symbol: str, quantity: float, price: float,
             log(f"DB 확장필드 저장 실패, 기본필드로 폴백: {e}", "WARN")
         except Exception as inner_e:
             log(f"DB 저장 실패: {inner_e}", "ERROR")
+    invalidate_cross_market_cache()
 
 
 def close_position(symbol: str, exit_price: float, reason: str, pnl_pct: float | None = None) -> None:
@@ -405,6 +451,7 @@ def close_position(symbol: str, exit_price: float, reason: str, pnl_pct: float |
                 supabase.table(US_TRADE_TABLE).update(payload).eq("id", pid).execute()
             except Exception as e:
                 log(f"DB 클로즈 실패 (id={pid}): {e}", "ERROR")
+    invalidate_cross_market_cache()
 
 
 def update_highest_price(symbol: str, new_high: float) -> None:
@@ -426,6 +473,7 @@ def update_highest_price(symbol: str, new_high: float) -> None:
 # ─────────────────────────────────────────────
 # 매매 로직
 # ─────────────────────────────────────────────
+@traced("signal")
 def should_buy(symbol: str, score: float, indicators: dict) -> dict:
     """매수 판단: 복합 스코어 + 마켓 레짐 + 상대강도 + 멀티팩터 + 어닝."""
     rsi = indicators.get("rsi", 50)
@@ -731,6 +779,7 @@ def check_exit(symbol: str, position: dict, indicators: dict) -> Optional[str]:
     return None
 
 
+@traced("order")
 def execute_buy(symbol: str, score: float, indicators: dict, signal: Optional[dict] = None) -> dict:
     """매수 실행."""
     global _cmr_instance
@@ -1036,6 +1085,7 @@ def execute_buy(symbol: str, score: float, indicators: dict, signal: Optional[di
     return {"result": "BUY", "symbol": symbol, "qty": qty, "price": price}
 
 
+@traced("order.sell")
 def execute_sell(symbol: str, position: dict, reason: str, indicators: dict) -> dict:
     """매도 실행."""
     price = indicators.get("price", 0)
@@ -1098,7 +1148,7 @@ def execute_sell(symbol: str, position: dict, reason: str, indicators: dict) ->
 
     # P1-10: ConceptDriftDetector US 연동 — 매도 후 예측 결과 업데이트
     try:
-        if _us_drift_detector is not None:
+        if _us_drift_detector:
             _actual = 1 if pnl_pct > 0 else 0
             _ml_score_raw = float(position.get("ml_score", None) or position.get("ml_confidence", None) or 0.5)
             _predicted = _ml_score_raw if _ml_score_raw != 0.0 else 0.5
@@ -1125,6 +1175,7 @@ def _get_price_fallback(symbol: str) -> Optional[float]:
         return None
 
 
+@traced("order.exits")
 def check_stop_loss_take_profit():
     """보유 포지션 전체 손절/익절/트레일링 체크 (v6: retry + fallback 강화)."""
     positions = get_open_positions()
@@ -1132,6 +1183,7 @@ def check_stop_loss_take_profit():
         return
 
     log(f"보유 {len(positions)}개 포지션 체크 중...")
+    get_us_indicators_batch([p.get("symbol", "") for p in positions])  # 1회 다운로드로 캐시 워밍
     indicator_fail_max = RISK.get("indicator_fail_max", 3)
 
     for pos in positions:
@@ -1144,7 +1196,7 @@ def check_stop_loss_take_profit():
         if not indicators:
             import time as _time
             _time.sleep(3)
-            _yf_cache.pop(symbol, None)  # 캐시 무효화 후 재시도
+            invalidate_us_indicators(symbol)  # 캐시 무효화 후 재시도
             indicators = get_us_indicators(symbol)
 
         if not indicators:
@@ -1218,6 +1270,7 @@ def check_daily_loss_us() -> bool:
 # ─────────────────────────────────────────────
 # 메인 사이클
 # ─────────────────────────────────────────────
+@traced_cycle("US")
 def run_trading_cycle():
     global _us_buy_blocked, _us_drift_cache
     _us_buy_blocked = False
@@ -1228,6 +1281,16 @@ def run_trading_cycle():
         log("US 장 외 시간 — 사이클 건너뜀", "INFO")
         return
 
+    if STOP_FLAG.exists():
+        log("⛔ US_STOP_TRADING 플래그 감지 — 사이클 스킵")
+        _stop_cd = Path("/tmp/openclaw_stop_us.ts")
+        import time as _t
+        _last = float(_stop_cd.read_text()) if _stop_cd.exists() else 0.0
+        if _t.time() - _last >= 3600:
+            send_telegram("🇺🇸⛔ US 자동매매 중지 플래그 감지 — 이번 사이클 스킵")
+            _stop_cd.write_text(str(_t.time()))
+        return
+
     # audit fix: 일일 손실 한도 초과 시 사이클 스킵
     if check_daily_loss_us():
         log("[SKIP] US 일일 손실 한도 초과 — 사이클 종료")
@@ -1268,16 +1331,6 @@ def run_trading_cycle():
     except Exception as e:
         log(f"US 자산 스냅샷 저장 실패: {e}", "WARN")
 
-    if STOP_FLAG.exists():
-        log("⛔ US_STOP_TRADING 플래그 감지 — 사이클 스킵")
-        _stop_cd = Path("/tmp/openclaw_stop_us.ts")
-        import time as _t
-        _last = float(_stop_cd.read_text()) if _stop_cd.exists() else 0.0
-        if _t.time() - _last >= 3600:
-            send_telegram("🇺🇸⛔ US 자동매매 중지 플래그 감지 — 이번 사이클 스킵")
-            _stop_cd.write_text(str(_t.time()))
-        return
-
     equity_curve = load_equity_curve('us')
     if equity_curve:
         _dd_store = DrawdownStateStore()
@@ -1328,7 +1381,8 @@ def run_trading_cycle():
         return
 
     # 시장 레짐 확인
-    regime = get_market_regime()
+    with span("data_fetch.regime"):
+        regime = get_market_regime()
     log(f"시장 레짐: {regime['regime']} | SPY: {regime.get('spy_price',0):.0f} (200MA: {regime.get('spy_ma200',0):.0f}) | VIX: {regime.get('vix',0):.1f}")
 
     if regime["regime"] == "BEAR" and RISK.get("market_regime_filter"):
@@ -1337,7 +1391,8 @@ def run_trading_cycle():
 
     # 모멘텀 스캔 (상위 10% 대상으로 분석)
     log("모멘텀 스캔 중...")
-    top_list = scan_today_top_us(universe=US_UNIVERSE, lookback_days=90, top_percent=10.0)
+    with span("data_fetch.scan"):
+        top_list = _momentum.scan_today_top_us(universe=_momentum.US_UNIVERSE, lookback_days=90, top_percent=10.0)
     if not top_list:
         log("상위 종목 없음 — 종료")
         return
@@ -1345,6 +1400,9 @@ def run_trading_cycle():
     open_positions = get_open_positions()
     open_symbols = [p.get("symbol") for p in open_positions]
 
+    # 후보 전체 지표를 그룹 다운로드 1회로 선계산 (이후 get_us_indicators는 캐시 적중)
+    get_us_indicators_batch([ms.symbol for ms in top_list if ms.symbol not in open_symbols])
+
     # 종목별 분석 + 매수 판단
     for ms in top_list:
         symbol = ms.symbol
@@ -1406,6 +1464,8 @@ def run_trading_cycle():
 # 엔트리포인트
 # ─────────────────────────────────────────────
 if __name__ == "__main__":
+    from common.replay import install_from_env
+    install_from_env()
     if len(sys.argv) > 1 and sys.argv[1] == "check":
         log("보유 포지션 손절/익절 체크")
         check_stop_loss_take_profit()
@@ -143,3 +143,42 @@ class TestRunBacktest:
                 initial_capital=10_000_000,
             )
         assert result["metrics"]["final_capital"] >= 0
+
+
+class TestScorePanel:
+    """사전 계산 스코어 시계열 == 전체 prefix로 계산한 스코어."""
+
+    def test_score_by_date_matches_full_prefix(self):
+        import math
+        import random
+
+        from quant.backtest_kr import _score_by_date
+
+        rng = random.Random(1)
+        rows = _make_ohlcv(120)
+        for r in rows:
+            r["close"] *= 1 + rng.gauss(0, 0.03)
+        rows[40]["close"] = 0            # 무효 종가는 스코어 히스토리에서 제외
+        rows.insert(60, dict(rows[60]))  # 같은 날짜 중복 행
+        scores = _score_by_date(rows)
+        for d, got in scores.items():
+            hist = [r for r in rows if r["date"] <= d]
+            closes = [r["close"] for r in hist if r["close"] > 0]
+            vols = [r["volume"] for r in hist if r["volume"] >= 0]
+            if len(closes) < 30 or len(vols) < 21:
+                assert math.isnan(got)
+            else:
+                assert got == calc_composite_score(closes, vols)
+
+    def test_missing_days_and_forced_close(self):
+        rows = _make_ohlcv(90)
+        gappy = [r for i, r in enumerate(rows) if i % 7 != 3]
+
+        def _load(code, start, end):
+            return [dict(r) for r in (gappy if code == "000660" else rows)]
+
+        with patch("quant.backtest_kr.load_ohlcv", side_effect=_load):
+            result = run_backtest(["005930", "000660"], "2026-02-01", "2026-03-31", entry_score=0, exit_score=-1)
+        assert {t["code"] for t in result["trades"]} == {"005930", "000660"}
+        assert all(t["reason"] == "forced_close" for t in result["trades"])
+        assert all(t["exit"] == "2026-03-31" for t in result["trades"])
@@ -0,0 +1,135 @@
+"""Backtest OHLCV panel: dense float32 layout, memmap cache, watermark invalidation."""
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+import quant.backtest.panel as panel_mod
+from quant.backtest.panel import (OhlcvPanel, build_ohlcv_panel,
+                                  load_ohlcv_panel)
+
+
+def _rows():
+    return [
+        {"stock_code": "000660", "date": "2026-01-05", "open_price": 10, "high_price": 12,
+         "low_price": 9, "close_price": 11, "volume": 100},
+        {"stock_code": "005930", "date": "2026-01-02", "open_price": None, "high_price": None,
+         "low_price": None, "close_price": 50, "volume": None},
+        {"stock_code": "005930", "date": "2026-01-05T00:00:00", "open_price": 51, "high_price": 53,
+         "low_price": 49, "close_price": 52, "volume": 200},
+        {"stock_code": "999999", "date": "2026-01-06", "close_price": 1},      # 유니버스 밖
+    ]
+
+
+class _FakeClient:
+    """daily_ohlcv 쿼리 빌더 흉내 — 정렬/범위/exact count 지원."""
+
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self.page_calls = 0
+        self.fail_pages = False
+
+    def table(self, name):
+        assert name == "daily_ohlcv"
+        return _FakeQuery(self)
+
+
+class _FakeQuery:
+    def __init__(self, client):
+        self.client = client
+        self.filters, self.orders = [], []
+        self.window = None
+        self.count = False
+
+    def select(self, *_, count=None):
+        self.count = count == "exact"
+        return self
+
+    def in_(self, col, values):
+        self.filters.append(lambda r: r[col] in values)
+        return self
+
+    def order(self, col, desc=False):
+        self.orders.append((col, desc))
+        return self
+
+    def limit(self, n):
+        self.window = (0, n)
+        return self
+
+    def range(self, start, end):
+        if self.client.fail_pages:
+            raise RuntimeError("boom")
+        self.client.page_calls += 1
+        self.window = (start, end + 1)
+        return self
+
+    def execute(self):
+        data = [r for r in self.client.rows if all(f(r) for f in self.filters)]
+        total = len(data)
+        for col, desc in reversed(self.orders):
+            data = sorted(data, key=lambda r: r[col], reverse=desc)
+        if self.window:
+            data = data[self.window[0]:self.window[1]]
+        return type("Res", (), {"data": data, "count": total if self.count else None})()
+
+
+def test_build_panel_layout():
+    p = build_ohlcv_panel(_rows(), ["005930", "000660"])
+    assert p.shape == (2, 2)
+    assert p.date_strings() == ["2026-01-02", "2026-01-05"]
+    assert p["close"].dtype == np.float32
+    assert p.valid.tolist() == [[True, False], [True, True]]
+    assert np.isnan(p["close"][0, 1])
+    # 빈 OHLC는 종가, 빈 거래량은 0
+    assert p["high"][0, 0] == 50 and p["volume"][0, 0] == 0
+    assert p.series("005930", "close").tolist() == [50.0, 52.0]
+    assert p.series("000660", "close").dtype == np.float64
+
+
+def test_save_and_open_memmap(tmp_path):
+    p = build_ohlcv_panel(_rows(), ["005930", "000660"], watermark="w1")
+    p.save(tmp_path / "panel")
+    q = OhlcvPanel.open(tmp_path / "panel")
+    assert isinstance(q["close"], np.memmap)
+    assert q.watermark == "w1" and q.symbols == p.symbols
+    np.testing.assert_array_equal(q.dates, p.dates)
+    np.testing.assert_array_equal(np.asarray(q.valid), p.valid)
+    for name in panel_mod.PANEL_FIELDS:
+        np.testing.assert_array_equal(np.asarray(q[name]), p[name])
+    assert OhlcvPanel.open(tmp_path / "missing") is None
+
+
+def test_load_uses_cache_until_watermark_moves(tmp_path, monkeypatch):
+    monkeypatch.setattr(panel_mod, "_PAGE_SIZE", 2)
+    client = _FakeClient(_rows())
+    codes = ["005930", "000660"]
+
+    first = load_ohlcv_panel(codes, client=client, cache_dir=tmp_path)
+    assert client.page_calls == 2                      # 3행 / 페이지 2행, 병렬 조회
+    assert first.watermark == "2026-01-05:3"
+    assert isinstance(first["close"], np.memmap)
+
+    again = load_ohlcv_panel(codes, client=client, cache_dir=tmp_path)
+    assert client.page_calls == 2                      # 캐시 적중 → 재조회 없음
+    np.testing.assert_array_equal(np.asarray(again["close"]), np.asarray(first["close"]))
+
+    client.rows.append({"stock_code": "000660", "date": "2026-01-06", "close_price": 12, "volume": 5})
+    moved = load_ohlcv_panel(codes, client=client, cache_dir=tmp_path)
+    assert moved.watermark == "2026-01-06:4"
+    assert moved.shape == (3, 2) and client.page_calls == 4
+
+    client.rows.append({"stock_code": "000660", "date": "2026-01-07", "close_price": 13, "volume": 5})
+    client.fail_pages = True                           # 조회 실패 → 이전 캐시 유지
+    stale = load_ohlcv_panel(codes, client=client, cache_dir=tmp_path)
+    assert stale.watermark == "2026-01-06:4"
+
+
+@pytest.mark.parametrize("codes", [[], ["005930", "005930"]])
+def test_load_edge_universes(tmp_path, codes):
+    client = _FakeClient(_rows())
+    p = load_ohlcv_panel(codes, client=client, cache_dir=tmp_path)
+    if not codes:
+        assert p is None
+    else:
+        assert p.symbols == ["005930"] and p.shape == (2, 1)
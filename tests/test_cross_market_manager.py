@@ -31,6 +31,14 @@ def _make_mock_supabase(btc_rows=None, kr_rows=None, us_rows=None):
     return mock_sb
 
 
+@pytest.fixture(autouse=True)
+def _trade_stamp(tmp_path):
+    """트레이드 워터마크 파일을 테스트 전용 경로로."""
+    path = tmp_path / "cross_market_trade.stamp"
+    with patch("quant.risk.cross_market_manager.TRADE_STAMP_PATH", path):
+        yield path
+
+
 @pytest.fixture
 def default_config():
     return CrossMarketConfig(
@@ -188,3 +196,76 @@ class TestSupabaseNoneHandling:
         result = mgr.evaluate(total_capital=100_000_000)
         assert isinstance(result, CrossMarketRiskResult)
         assert result.buy_blocked is False
+
+
+# ── 테스트 6: 동시 로드 + TTL 메모이제이션 + 무효화 ─────────────────────────────
+class TestSnapshotMemoization:
+    def test_repeat_checks_hit_cache_until_invalidated(self, manager_factory):
+        """사이클 내 반복 체크는 Supabase 재조회 없이 캐시, 트레이드 기록 시 무효화."""
+        from quant.risk.cross_market_manager import \
+            invalidate_cross_market_cache
+
+        kr_rows = [{"stock_code": "005930", "quantity": 100, "price": 100_000, "result": "OPEN"}]
+        mgr = manager_factory(kr_rows=kr_rows)
+        for _ in range(5):
+            assert mgr.should_block_buy("kr", total_capital=100_000_000) is False
+        assert mgr._supabase.table.call_count == 3
+
+        kr_rows.append({"stock_code": "000660", "quantity": 100, "price": 800_000, "result": "OPEN"})
+        invalidate_cross_market_cache()
+        assert mgr.should_block_buy("kr", total_capital=100_000_000) is True
+        assert mgr._supabase.table.call_count == 6
+        mgr.evaluate(total_capital=100_000_000, use_cache=False)
+        assert mgr._supabase.table.call_count == 9
+
+    def test_ttl_expiry_and_concurrent_loads(self, manager_factory):
+        """TTL 경과 시 재조회, 세 마켓 로드는 동시에 실행."""
+        import threading
+        import time
+
+        now = [0.0]
+        mgr = manager_factory()
+        mgr._clock = lambda: now[0]
+        mgr.cache_ttl = 10.0
+        barrier = threading.Barrier(3, timeout=2)
+
+        def _loader(market):
+            def load():
+                barrier.wait()          # 순차 실행이면 타임아웃
+                time.sleep(0.01)
+                from quant.risk.cross_market_manager import MarketSnapshot
+                return MarketSnapshot(market=market, position_value=1.0)
+            return load
+
+        mgr._load_btc_snapshot = _loader("btc")
+        mgr._load_kr_snapshot = _loader("kr")
+        mgr._load_us_snapshot = _loader("us")
+        assert mgr.evaluate(total_capital=10).total_exposure == 3.0
+        now[0] = 5.0
+        _, fresh = mgr._load_snapshots()
+        assert fresh is False
+        now[0] = 11.0
+        _, fresh = mgr._load_snapshots()
+        assert fresh is True
+
+    def test_trade_in_another_process_invalidates_cache(self, manager_factory, _trade_stamp):
+        """다른 에이전트 프로세스의 체결도 다음 체크에서 반영 (프로세스 간 워터마크)."""
+        import subprocess
+        import sys
+
+        kr_rows = [{"stock_code": "005930", "quantity": 100, "price": 100_000, "result": "OPEN"}]
+        mgr = manager_factory(kr_rows=kr_rows)
+        assert mgr.should_block_buy("kr", total_capital=100_000_000) is False
+        assert mgr.should_block_buy("kr", total_capital=100_000_000) is False
+        assert mgr._supabase.table.call_count == 3
+
+        kr_rows.append({"stock_code": "000660", "quantity": 100, "price": 800_000, "result": "OPEN"})
+        subprocess.run(
+            [sys.executable, "-c",
+             "import sys; from pathlib import Path; import quant.risk.cross_market_manager as m; "
+             "m.TRADE_STAMP_PATH = Path(sys.argv[1]); m.invalidate_cross_market_cache()",
+             str(_trade_stamp)],
+            check=True, timeout=60,
+        )
+        assert mgr.should_block_buy("kr", total_capital=100_000_000) is True
+        assert mgr._supabase.table.call_count == 6
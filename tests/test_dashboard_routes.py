@@ -0,0 +1,218 @@
+"""Dashboard routes: off-loop shared calls, bulk latest closes, vectorized candles."""
+from __future__ import annotations
+
+import asyncio
+import operator
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+import pandas as pd
+
+from btc.routes import stock_api, us_api
+from common.cache import BoundedTTLCache, cached_to_thread
+
+
+class _Query:
+    def __init__(self, sb, table):
+        self.sb, self.table_name = sb, table
+        self.filters: list = []
+
+    def select(self, *_):
+        return self
+
+    def eq(self, col, value):
+        self.filters.append(("eq", col, value))
+        return self
+
+    def in_(self, col, values):
+        self.filters.append(("in", col, tuple(values)))
+        return self
+
+    def gte(self, col, value):
+        self.filters.append(("gte", col, value))
+        return self
+
+    def gt(self, col, value):
+        self.filters.append(("gt", col, value))
+        return self
+
+    def order(self, *_, **__):
+        return self
+
+    def limit(self, *_):
+        return self
+
+    def execute(self):
+        self.sb.calls.append((self.table_name, self.filters))
+        data = [r for r in self.sb.tables.get(self.table_name, []) if all(self._match(r, f) for f in self.filters)]
+        return type("Res", (), {"data": data})()
+
+    @staticmethod
+    def _match(row, flt):
+        op, col, value = flt
+        if col not in row:
+            return True
+        if op == "in":
+            return row[col] in value
+        return {"eq": operator.eq, "gte": operator.ge, "gt": operator.gt}[op](row[col], value)
+
+
+class _FakeSupabase:
+    def __init__(self, tables):
+        self.tables = tables
+        self.calls: list = []
+
+    def table(self, name):
+        return _Query(self, name)
+
+
+def _days_ago(n: int) -> str:
+    return (stock_api.datetime.now(stock_api._KST) - stock_api.timedelta(days=n)).date().isoformat()
+
+
+class _FakeKiwoom:
+    def __init__(self, holdings):
+        self.holdings = holdings
+        self.calls = 0
+        self.threads: set = set()
+
+    def get_account_evaluation(self):
+        self.calls += 1
+        self.threads.add(threading.get_ident())
+        time.sleep(0.05)
+        return {"summary": {"deposit": 1000}, "holdings": self.holdings}
+
+
+class CachedToThreadTests(unittest.TestCase):
+    def test_concurrent_callers_share_one_call(self):
+        cache = BoundedTTLCache(ttl=60)
+        calls = []
+
+        def slow(x):
+            calls.append(threading.get_ident())
+            time.sleep(0.05)
+            return x * 2
+
+        async def main():
+            return await asyncio.gather(*(cached_to_thread(cache, "k", slow, 21) for _ in range(5)))
+
+        self.assertEqual(asyncio.run(main()), [42] * 5)
+        self.assertEqual(len(calls), 1)
+        self.assertNotEqual(calls[0], threading.get_ident())          # 루프 밖 실행
+        self.assertEqual(asyncio.run(cached_to_thread(cache, "k", slow, 0)), 42)   # TTL 내 재사용
+        self.assertEqual(len(calls), 1)
+
+    def test_failures_are_not_cached(self):
+        cache = BoundedTTLCache(ttl=60)
+        attempts = []
+
+        def flaky():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise RuntimeError("down")
+            return "ok"
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(cached_to_thread(cache, "k", flaky))
+        self.assertEqual(asyncio.run(cached_to_thread(cache, "k", flaky)), "ok")
+
+
+class KrPortfolioTests(unittest.TestCase):
+    def setUp(self):
+        stock_api._shared_cache.clear()
+
+    def test_missing_prices_use_one_bulk_query(self):
+        trades = [
+            {"stock_code": "005930", "quantity": 10, "price": 70000, "stock_name": "삼성전자"},
+            {"stock_code": "000660", "quantity": 2, "price": 150000, "stock_name": "SK하이닉스"},
+            {"stock_code": "035420", "quantity": 1, "price": 200000, "stock_name": "NAVER"},
+            {"stock_code": "005930", "quantity": 10, "price": 72000, "stock_name": "삼성전자"},
+        ]
+        d1, d2 = _days_ago(1), _days_ago(2)
+        ohlcv = [   # 최신순
+            {"stock_code": "000660", "close_price": 160000, "date": d1},
+            {"stock_code": "035420", "close_price": 0, "date": d1},
+            {"stock_code": "035420", "close_price": 190000, "date": d2},
+            {"stock_code": "000660", "close_price": 155000, "date": d2},
+        ]
+        sb = _FakeSupabase({"trade_executions": trades, "daily_ohlcv": ohlcv})
+        kiwoom = _FakeKiwoom([
+            {"code": "005930", "current_price": 75000},
+            {"code": "005930", "current_price": 1},                    # 첫 번째 보유 항목 우선
+            {"code": "000660", "current_price": 0},
+        ])
+
+        async def main():
+            return await asyncio.gather(*(stock_api.get_stocks_portfolio() for _ in range(3)))
+
+        with patch.object(stock_api, "_get_sb", return_value=sb), \
+                patch.object(stock_api, "_get_kiwoom", return_value=kiwoom):
+            results = asyncio.run(main())
+
+        self.assertEqual(kiwoom.calls, 1)
+        self.assertNotIn(threading.get_ident(), kiwoom.threads)
+        ohlcv_calls = [f for t, f in sb.calls if t == "daily_ohlcv"]
+        self.assertEqual(len(ohlcv_calls), 1)
+        self.assertIn(("in", "stock_code", ("000660", "035420")), ohlcv_calls[0])
+        self.assertEqual(len([t for t, _ in sb.calls if t == "trade_executions"]), 1)
+
+        prices = {p["code"]: p["current_price"] for p in results[0]["positions"]}
+        self.assertEqual(prices, {"005930": 75000, "000660": 160000, "035420": 190000})
+        self.assertTrue(all(r == results[0] for r in results))
+
+    def test_stale_codes_fall_back_to_latest_row(self):
+        ohlcv = [   # 최신순
+            {"stock_code": "005930", "close_price": 71000, "date": _days_ago(1)},
+            {"stock_code": "000660", "close_price": 0, "date": "2026-01-05"},
+            {"stock_code": "000660", "close_price": 120000, "date": "2026-01-02"},
+        ]
+        sb = _FakeSupabase({"daily_ohlcv": ohlcv})
+        with patch.object(stock_api, "_get_sb", return_value=sb):
+            closes = stock_api._latest_closes(["005930", "000660", "999999"])
+        self.assertEqual(closes, {"005930": 71000.0, "000660": 120000.0})
+        fallback = [f for _, f in sb.calls if ("eq", "stock_code", "005930") in f]
+        self.assertEqual(fallback, [])                              # 30일 안에 있으면 일괄 조회만
+        self.assertEqual(len(sb.calls), 3)                          # 일괄 1회 + 누락 종목 2회
+
+
+class UsChartTests(unittest.TestCase):
+    def _history(self):
+        idx = pd.DatetimeIndex(["2026-10-14", "2026-10-15", "2026-10-16"], tz="America/New_York")
+        return pd.DataFrame({
+            "Open": [1.234, 2.0, 3.005], "High": [1.5, 2.5, 3.5], "Low": [1.0, 1.9, 2.95],
+            "Close": [1.456, 2.2, 3.3], "Volume": [100, float("nan"), 300],
+        }, index=idx)
+
+    def test_candles_match_row_serialization(self):
+        hist = self._history()
+        candles = us_api._candles_from_history(hist)
+        for (ts, row), c in zip(hist.iterrows(), candles):
+            self.assertEqual(c["time"], ts.strftime("%Y-%m-%d"))
+            for key in ("Open", "High", "Low", "Close"):
+                self.assertAlmostEqual(c[key.lower()], round(float(row[key]), 2), places=9)
+            self.assertIsInstance(c["volume"], int)
+        self.assertEqual([c["volume"] for c in candles], [100, 0, 300])
+        self.assertEqual(us_api._candles_from_history(hist.iloc[:0]), [])
+
+    def test_chart_endpoint_shares_fetch(self):
+        us_api._shared_cache.clear()
+        calls = []
+
+        def fetch(symbol, period):
+            calls.append((symbol, period))
+            time.sleep(0.05)
+            return us_api._candles_from_history(self._history())
+
+        async def main():
+            return await asyncio.gather(*(us_api.api_us_chart("aapl", period="3mo") for _ in range(4)))
+
+        with patch.object(us_api, "_fetch_us_candles", side_effect=fetch):
+            results = asyncio.run(main())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results[0]["candles"]), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
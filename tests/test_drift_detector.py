@@ -0,0 +1,93 @@
+"""Concept drift detector tests (incremental AUC, ADWIN, Page-Hinkley)."""
+from __future__ import annotations
+
+import random
+import unittest
+
+from quant.drift_detector import (ADWINDetector, ConceptDriftDetector,
+                                  PageHinkleyDetector, make_detector,
+                                  mann_whitney_auc)
+
+
+def _brute_auc(preds, actuals):
+    pos = [p for p, a in zip(preds, actuals) if a == 1]
+    neg = [p for p, a in zip(preds, actuals) if a == 0]
+    if not pos or not neg:
+        return None
+    wins = sum(1.0 if p > n else 0.5 if p == n else 0.0 for p in pos for n in neg)
+    return wins / (len(pos) * len(neg))
+
+
+class IncrementalAucTests(unittest.TestCase):
+    def test_matches_brute_force_with_ties(self) -> None:
+        rng = random.Random(7)
+        det = ConceptDriftDetector(window=25, auc_threshold=0.0)
+        for _ in range(600):
+            # 0.1 단위 점수 → 동점이 자주 생김
+            det.update(round(rng.random(), 1), rng.randint(0, 1))
+            expected = _brute_auc(list(det._predictions), list(det._actuals))
+            if expected is None:
+                self.assertIsNone(det.auc)
+                continue
+            self.assertAlmostEqual(det.auc, expected, places=12)
+            self.assertAlmostEqual(det._calc_auc(), expected, places=12)
+
+    def test_mann_whitney_reference(self) -> None:
+        self.assertEqual(mann_whitney_auc([0.9, 0.8, 0.2, 0.1], [1, 1, 0, 0]), 1.0)
+        self.assertEqual(mann_whitney_auc([0.5, 0.5], [1, 0]), 0.5)
+        self.assertIsNone(mann_whitney_auc([0.3, 0.4], [1, 1]))
+
+    def test_drift_flag_and_reset(self) -> None:
+        det = ConceptDriftDetector(window=10, auc_threshold=0.52)
+        for i in range(10):
+            self.assertFalse(det.update(0.9 if i % 2 else 0.1, i % 2))
+        self.assertEqual(det.auc, 1.0)
+        for i in range(10):                       # 점수가 반대로 → AUC 0
+            det.update(0.1 if i % 2 else 0.9, i % 2)
+        self.assertTrue(det.is_drift)
+        self.assertEqual(det.auc, 0.0)
+        det.reset()
+        self.assertIsNone(det.auc)
+        self.assertFalse(det.is_drift)
+
+
+class ErrorDetectorTests(unittest.TestCase):
+    def _stream(self, det, n, hit_rate, rng):
+        fired = False
+        for _ in range(n):
+            actual = 1 if rng.random() < hit_rate else 0
+            fired = det.update(0.8, actual) or fired
+        return fired
+
+    def test_adwin_detects_error_increase_only(self) -> None:
+        rng = random.Random(3)
+        det = ADWINDetector()
+        self.assertFalse(self._stream(det, 600, 0.9, rng))
+        width = det.width
+        self.assertTrue(self._stream(det, 300, 0.1, rng))
+        self.assertLess(det.width, width + 300)    # 과거 구간이 잘려나감
+
+        det.reset()
+        self._stream(det, 600, 0.1, rng)
+        self.assertFalse(self._stream(det, 300, 0.9, rng))   # 오차 감소는 드리프트 아님
+
+    def test_page_hinkley_detects_error_increase(self) -> None:
+        rng = random.Random(5)
+        det = PageHinkleyDetector(threshold=5.0)
+        self.assertFalse(self._stream(det, 500, 0.9, rng))
+        self.assertTrue(self._stream(det, 200, 0.1, rng))
+
+    def test_composed_detectors_and_factory(self) -> None:
+        ph = make_detector("page_hinkley", threshold=5.0)
+        det = make_detector("auc", window=10, auc_threshold=0.0, detectors=[ph])
+        rng = random.Random(11)
+        fired = [det.update(0.8, 1 if rng.random() < 0.9 else 0) for _ in range(300)]
+        self.assertFalse(any(fired))
+        fired = [det.update(0.8, 1 if rng.random() < 0.1 else 0) for _ in range(200)]
+        self.assertTrue(any(fired))
+        with self.assertRaises(ValueError):
+            make_detector("kswin")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+"""Concurrent health checks, cached snapshot and bulk persistence tests."""
+from __future__ import annotations
+
+import asyncio
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+import common.health as health_mod
+from common.health import HealthMonitor
+
+
+def _probe(delay: float, fail: bool = False):
+    async def check():
+        await asyncio.sleep(delay)
+        if fail:
+            raise RuntimeError("boom")
+        return {"delay": delay}
+    return check
+
+
+class _Monitor(HealthMonitor):
+    COMPONENTS = {
+        "fast": {"check": _probe(0.05), "critical": False, "timeout": 1.0},
+        "slow": {"check": _probe(0.2), "critical": False, "timeout": 1.0},
+        "hung": {"check": _probe(10.0), "critical": True, "timeout": 0.3},
+        "broken": {"check": _probe(0.0, fail=True), "critical": False, "timeout": 1.0},
+    }
+    _last_alert: dict = {}
+
+
+class HealthMonitorTests(unittest.TestCase):
+    def test_concurrent_checks_snapshot_and_bulk_insert(self) -> None:
+        supabase = MagicMock()
+        sent = []
+        monitor = _Monitor()
+
+        async def scenario():
+            started = time.perf_counter()
+            report = await monitor.run_checks()
+            elapsed = time.perf_counter() - started
+            await monitor._persist_task
+            return report, elapsed
+
+        with patch.object(health_mod, "get_supabase", return_value=supabase), \
+                patch.object(health_mod, "send_telegram", side_effect=sent.append):
+            report, elapsed = asyncio.run(scenario())
+
+        self.assertLess(elapsed, 0.6)                     # ≈ hung deadline, not the sum
+        comps = report["components"]
+        self.assertEqual(report["status"], "degraded")
+        self.assertEqual(comps["fast"]["status"], "healthy")
+        self.assertEqual(comps["slow"]["details"], {"delay": 0.2})
+        self.assertIn("초 초과", comps["hung"]["error"])
+        self.assertEqual(comps["broken"]["error"], "boom")
+        self.assertEqual(len(sent), 1)                     # only the critical one alerts
+
+        inserts = supabase.table.return_value.insert.call_args_list
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual({r["component"] for r in inserts[0].args[0]}, set(comps))
+
+    def test_get_status_serves_cached_snapshot(self) -> None:
+        calls = []
+
+        async def counted():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {}
+
+        class Monitor(HealthMonitor):
+            COMPONENTS = {"svc": {"check": counted, "critical": False}}
+            _last_alert: dict = {}
+
+        monitor = Monitor()
+        self.assertIsNone(monitor.snapshot())
+
+        async def scenario():
+            first = await asyncio.gather(*(monitor.get_status(max_age=60) for _ in range(5)))
+            again = await monitor.get_status(max_age=60)
+            fresh = await monitor.get_status(max_age=0)
+            return first, again, fresh
+
+        with patch.object(health_mod, "get_supabase", return_value=None):
+            first, again, fresh = asyncio.run(scenario())
+        self.assertEqual(len(calls), 2)                    # 5 concurrent + cached, then forced
+        self.assertEqual(first[0]["status"], "ok")
+        self.assertEqual(again["timestamp"], first[0]["timestamp"])
+        self.assertIn("age_seconds", fresh)
+
+    def test_snapshot_taken_during_persist_is_saved_afterwards(self) -> None:
+        supabase = MagicMock()
+        release = asyncio.Event()
+        stamps = iter(range(100))
+
+        async def ticking():
+            return {"n": next(stamps)}
+
+        class Monitor(HealthMonitor):
+            COMPONENTS = {"svc": {"check": ticking, "critical": False}}
+            _last_alert: dict = {}
+
+        monitor = Monitor()
+        persist = monitor._persist_snapshots
+
+        async def scenario():
+            loop = asyncio.get_running_loop()
+
+            def slow_persist(sb, results):
+                if results["svc"]["details"]["n"] == 0:
+                    asyncio.run_coroutine_threadsafe(release.wait(), loop).result()
+                persist(sb, results)
+
+            with patch.object(monitor, "_persist_snapshots", side_effect=slow_persist):
+                for _ in range(3):                           # 1st persist blocks; 2nd is superseded by 3rd
+                    await monitor.run_checks()
+                release.set()
+                await monitor._persist_task
+
+        with patch.object(health_mod, "get_supabase", return_value=supabase):
+            asyncio.run(scenario())
+        inserts = supabase.table.return_value.insert.call_args_list
+        self.assertEqual([c.args[0][0]["details"]["details"]["n"] for c in inserts], [0, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
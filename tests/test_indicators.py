@@ -0,0 +1,82 @@
+"""common.indicators 패널 지표 / common.cache BoundedTTLCache 테스트."""
+from __future__ import annotations
+
+import time
+import unittest
+
+import numpy as np
+import pandas as pd
+from ta.momentum import RSIIndicator
+from ta.volatility import BollingerBands
+
+from common.cache import BoundedTTLCache
+from common.indicators import calc_indicator_panel
+
+
+def _make_panel(n_rows: int = 90, symbols=("A", "B", "C"), seed: int = 0):
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range("2026-01-02", periods=n_rows)
+    close = pd.DataFrame(
+        100 * np.exp(np.cumsum(rng.normal(0, 0.02, (n_rows, len(symbols))), axis=0)),
+        index=idx,
+        columns=list(symbols),
+    )
+    high = close * (1 + rng.uniform(0, 0.02, close.shape))
+    volume = pd.DataFrame(
+        rng.integers(100_000, 1_000_000, close.shape).astype(float), index=idx, columns=list(symbols)
+    )
+    return close, high, volume
+
+
+class IndicatorPanelTests(unittest.TestCase):
+    def test_matches_per_symbol_ta_with_gaps(self) -> None:
+        close, high, volume = _make_panel()
+        close.iloc[:20, 1] = np.nan   # 늦은 상장
+        close.iloc[50, 2] = np.nan    # 개별 휴장일
+        out = calc_indicator_panel(close, high, volume)
+
+        for sym in ("A", "B", "C"):
+            c = close[sym].dropna()
+            h = high[sym].reindex(c.index)
+            v = volume[sym].reindex(c.index)
+            bb = BollingerBands(close=c, window=20, window_dev=2)
+            upper = float(bb.bollinger_hband().iloc[-1])
+            lower = float(bb.bollinger_lband().iloc[-1])
+            row = out.loc[sym]
+            self.assertAlmostEqual(row["rsi"], round(float(RSIIndicator(close=c, window=14).rsi().iloc[-1]), 1))
+            self.assertAlmostEqual(row["bb_pos"], round((c.iloc[-1] - lower) / (upper - lower) * 100, 1))
+            self.assertAlmostEqual(row["vol_ratio"], round(v.tail(5).mean() / v.tail(20).mean(), 2))
+            self.assertAlmostEqual(row["high_60d"], float(h.tail(60).max()))
+            self.assertEqual(row["bars"], len(c))
+
+    def test_short_history_excluded(self) -> None:
+        close, high, volume = _make_panel()
+        close.iloc[:70, 0] = np.nan
+        out = calc_indicator_panel(close, high, volume, min_bars=30)
+        self.assertNotIn("A", out.index)
+        self.assertIn("B", out.index)
+
+
+class BoundedTTLCacheTests(unittest.TestCase):
+    def test_lru_bound(self) -> None:
+        cache = BoundedTTLCache(max_size=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")          # a가 최근 사용
+        cache.set("c", 3)       # b 퇴출
+        self.assertEqual(len(cache), 2)
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+
+    def test_ttl_expiry_and_pop_where(self) -> None:
+        cache = BoundedTTLCache(max_size=10, ttl=60)
+        cache.set(("AAPL", "2026-03-09"), {"price": 1.0}, ttl=0.01)
+        cache.set(("MSFT", "2026-03-09"), {"price": 2.0})
+        time.sleep(0.02)
+        self.assertIsNone(cache.get(("AAPL", "2026-03-09")))
+        self.assertEqual(cache.pop_where(lambda k: k[0] == "MSFT"), 1)
+        self.assertEqual(len(cache), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
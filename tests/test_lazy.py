@@ -0,0 +1,108 @@
+"""Lazy imports / deferred clients and the agents' cold-start import weight."""
+from __future__ import annotations
+
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from common import lazy
+from common.lazy import (LazyModule, import_report, lazy_client, lazy_import,
+                         resolve_declared)
+
+AGENTS = ("btc.btc_trading_agent", "stocks.stock_trading_agent", "stocks.us_stock_trading_agent")
+_ENV = {
+    "SUPABASE_URL": "https://example.supabase.co",
+    "SUPABASE_KEY": "test-key",
+    "UPBIT_ACCESS_KEY": "a",
+    "UPBIT_SECRET_KEY": "b",
+    "KIWOOM_MOCK_REST_API_APP_KEY": "x",
+    "KIWOOM_MOCK_REST_API_SECRET_KEY": "y",
+}
+
+
+class LazyModuleTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        Path(self.tmp.name, "lazy_probe_mod.py").write_text("LOADED = True\nvalue = 1\n")
+        sys.path.insert(0, self.tmp.name)
+
+    def tearDown(self):
+        sys.path.remove(self.tmp.name)
+        sys.modules.pop("lazy_probe_mod", None)
+        lazy._declared.pop("lazy_probe_mod", None)
+        self.tmp.cleanup()
+
+    def test_import_deferred_until_attribute_access(self):
+        mod = lazy_import("lazy_probe_mod")
+        self.assertIsInstance(mod, LazyModule)
+        self.assertNotIn("lazy_probe_mod", sys.modules)
+        self.assertIn("lazy_probe_mod", lazy.declared_modules())
+        self.assertIs(lazy_import("lazy_probe_mod"), mod)           # 같은 프록시 재사용
+        self.assertTrue(mod.LOADED)
+        self.assertIn("lazy_probe_mod", sys.modules)
+        self.assertNotIn("lazy_probe_mod", lazy.declared_modules())
+        self.assertIs(lazy_import("lazy_probe_mod"), sys.modules["lazy_probe_mod"])
+
+    def test_patch_through_proxy(self):
+        mod = lazy_import("lazy_probe_mod")
+        with patch.object(mod, "value", 99):
+            self.assertEqual(sys.modules["lazy_probe_mod"].value, 99)
+        self.assertEqual(mod.value, 1)
+
+    def test_resolve_declared_only_touches_declared(self):
+        lazy_import("lazy_probe_mod")
+        self.assertEqual(resolve_declared(["lazy_probe_mod", "json_not_declared"]), ["lazy_probe_mod"])
+        self.assertIn("lazy_probe_mod", sys.modules)
+
+
+class LazyClientTests(unittest.TestCase):
+    def test_built_once_on_first_use(self):
+        calls = []
+
+        class Client:
+            def __init__(self):
+                calls.append(1)
+                time.sleep(0.01)
+
+            def ping(self):
+                return "pong"
+
+        client = lazy_client(Client)
+        self.assertEqual(calls, [])
+        threads = [threading.Thread(target=client.ping) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(calls, [1])
+        self.assertEqual(client.ping(), "pong")
+
+    def test_none_factory_is_falsy(self):
+        client = lazy_client(lambda: None)
+        self.assertFalse(client)
+        with self.assertRaises(AttributeError):
+            client.table("x")
+
+    def test_factory_arguments(self):
+        client = lazy_client(dict, a=1)
+        self.assertEqual(client.get("a"), 1)
+
+
+class ColdStartTests(unittest.TestCase):
+    """Fresh-interpreter import of each agent must not pull in heavy dependencies."""
+
+    def test_agents_import_without_heavy_modules(self):
+        for module in AGENTS:
+            with self.subTest(module=module):
+                rep = import_report(module, top=5, env=_ENV)
+                self.assertTrue(rep["ok"], rep["error"])
+                self.assertEqual(rep["heavy_loaded"], [])
+                self.assertLess(rep["import_ms"], 1000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,273 @@
+"""Websocket market data hub tests (local replay server, no network)."""
+from __future__ import annotations
+
+import asyncio
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import websockets
+
+from common.data import market_hub
+from common.data.market_hub import (LocalOrderBook, MarketDataHub,
+                                    UnixSocketFanout, follow_symbol,
+                                    iter_hub_messages)
+
+BINANCE_FRAMES = [
+    {"stream": "btcusdt@depth@100ms", "data": {"e": "depthUpdate", "E": 1, "s": "BTCUSDT", "U": 95, "u": 99,
+                                               "b": [["100.0", "9"]], "a": []}},         # stale, in snapshot
+    {"stream": "btcusdt@depth@100ms", "data": {"e": "depthUpdate", "E": 2, "s": "BTCUSDT", "U": 100, "u": 102,
+                                               "b": [["100.0", "3"], ["99.0", "0"]], "a": [["101.5", "1"]]}},
+    {"stream": "btcusdt@ticker", "data": {"e": "24hrTicker", "E": 1_700_000_000_000, "s": "BTCUSDT",
+                                          "c": "100.5", "v": "1234.5"}},
+    {"stream": "btcusdt@depth@100ms", "data": {"e": "depthUpdate", "E": 3, "s": "BTCUSDT", "U": 103, "u": 104,
+                                               "b": [], "a": [["101.0", "0"]]}},
+    {"stream": "btcusdt@depth@100ms", "data": {"e": "depthUpdate", "E": 4, "s": "BTCUSDT", "U": 110, "u": 111,
+                                               "b": [["98.0", "5"]], "a": []}},          # gap → resync
+]
+
+UPBIT_FRAMES = [
+    {"type": "ticker", "code": "KRW-BTC", "trade_price": 95_000_000.0, "acc_trade_volume_24h": 321.0,
+     "trade_timestamp": 1_700_000_000_000},
+    {"type": "orderbook", "code": "KRW-BTC", "timestamp": 1_700_000_000_100,
+     "orderbook_units": [{"ask_price": 95_010_000.0, "bid_price": 95_000_000.0, "ask_size": 0.5, "bid_size": 1.5},
+                         {"ask_price": 95_020_000.0, "bid_price": 94_990_000.0, "ask_size": 0.7, "bid_size": 0.2}]},
+]
+
+
+async def _serve(frames, binary=False):
+    """Replay ``frames`` to every client, then keep the connection open."""
+    received = []
+
+    async def handler(ws, path=None):
+        received.append(path if path is not None else getattr(ws, "path", ""))
+        try:
+            first = await asyncio.wait_for(ws.recv(), timeout=0.2)
+            received.append(first)
+        except asyncio.TimeoutError:
+            pass
+        for frame in frames:
+            raw = json.dumps(frame)
+            await ws.send(raw.encode() if binary else raw)
+        await ws.wait_closed()
+
+    server = await websockets.serve(handler, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    return server, f"ws://127.0.0.1:{port}/stream", received
+
+
+async def _until(predicate, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not reached")
+        await asyncio.sleep(0.02)
+
+
+class LocalOrderBookTests(unittest.TestCase):
+    def test_diff_sequence_rules(self) -> None:
+        book = LocalOrderBook("BTCUSDT", "binance", top_n=2)
+        book.load_snapshot([["100", "1"], ["99", "2"], ["98", "1"]], [["101", "1"], ["102", "3"]], 100)
+        self.assertTrue(book.apply_diff({"U": 90, "u": 100, "b": [["100", "0"]]}))   # ignored
+        self.assertIn(100.0, book.bids)
+        self.assertTrue(book.apply_diff({"U": 99, "u": 101, "b": [["100", "0"]], "a": [["100.5", "4"]]}))
+        snap = book.to_snapshot()
+        self.assertEqual([b["price"] for b in snap["bids"]], [99.0, 98.0])
+        self.assertEqual(snap["asks"][0], {"price": 100.5, "qty": 4.0})
+        self.assertAlmostEqual(snap["spread"], 1.5)
+        self.assertFalse(book.apply_diff({"U": 105, "u": 106}))
+        self.assertFalse(book.synced)
+
+
+class MarketDataHubReplayTests(unittest.TestCase):
+    def test_binance_replay_ticks_books_and_resync(self) -> None:
+        async def scenario():
+            server, url, received = await _serve(BINANCE_FRAMES)
+            snapshots = [
+                {"lastUpdateId": 99, "bids": [["100.0", "1"], ["99.0", "2"]], "asks": [["101.0", "1"]]},
+                {"lastUpdateId": 120, "bids": [["97.0", "4"]], "asks": [["103.0", "2"]]},
+            ]
+            calls, before_resync = [], []
+
+            async def fetcher(symbol):
+                calls.append(symbol)
+                if len(calls) == 2:
+                    before_resync.append(hub.books[symbol].to_snapshot())
+                return snapshots[min(len(calls), len(snapshots)) - 1]
+
+            hub = MarketDataHub(binance_symbols=["BTCUSDT"], binance_url=url,
+                                snapshot_fetcher=fetcher, reconnect_delay=0.05)
+            ticks, books = [], []
+            hub.on_tick(ticks.append, symbol="BTCUSDT")
+            hub.on_snapshot(books.append)
+            runner = asyncio.ensure_future(hub.run())
+            try:
+                await _until(lambda: len(calls) >= 2 and hub.books["BTCUSDT"].synced
+                             and hub.books["BTCUSDT"].last_update_id == 120)
+            finally:
+                hub.stop()
+                await asyncio.wait_for(runner, timeout=5)
+                server.close()
+                await server.wait_closed()
+            return hub, ticks, books, received, before_resync
+
+        hub, ticks, books, received, before_resync = asyncio.run(scenario())
+        self.assertIn("streams=btcusdt@ticker/btcusdt@depth@100ms", received[0])
+        self.assertEqual(len(ticks), 1)
+        self.assertEqual(ticks[0]["price"], 100.5)
+        self.assertEqual(ticks[0]["source"], "binance")
+        self.assertEqual(hub.latest_tick("btcusdt")["volume"], 1234.5)
+
+        # state when the gap hit: stale diff dropped, 100..102 and 103..104 applied
+        self.assertTrue(books)
+        self.assertEqual(before_resync[0]["bids"], [{"price": 100.0, "qty": 3.0}])
+        self.assertEqual(before_resync[0]["asks"], [{"price": 101.5, "qty": 1.0}])
+        self.assertEqual(hub.stats["resyncs"], 1)
+        self.assertEqual(hub.latest_book("BTCUSDT")["bids"], [{"price": 97.0, "qty": 4.0}])
+
+    def test_upbit_replay_and_socket_fanout(self) -> None:
+        async def scenario(sock):
+            server, url, received = await _serve(UPBIT_FRAMES, binary=True)
+            hub = MarketDataHub(upbit_markets=["KRW-BTC"], upbit_url=url, socket_path=sock, reconnect_delay=0.05)
+            fanned = []
+
+            async def client():
+                await _until(sock.exists)
+                async for msg in iter_hub_messages(sock):
+                    fanned.append(msg)
+                    if len(fanned) >= 2:
+                        return
+
+            # hold the websocket frames until the socket client is attached
+            client_task = asyncio.ensure_future(client())
+            orig_start = hub.fanout.start
+
+            async def start_and_wait():
+                await orig_start()
+                await _until(lambda: hub.fanout.client_count > 0)
+
+            hub.fanout.start = start_and_wait
+            runner = asyncio.ensure_future(hub.run())
+            try:
+                await asyncio.wait_for(client_task, timeout=5)
+            finally:
+                hub.stop()
+                await asyncio.wait_for(runner, timeout=5)
+                server.close()
+                await server.wait_closed()
+            return hub, fanned, received
+
+        with tempfile.TemporaryDirectory() as tmp:
+            sock = Path(tmp) / "hub.sock"
+            hub, fanned, received = asyncio.run(scenario(sock))
+            self.assertFalse(sock.exists())
+
+        sub = json.loads(received[1])
+        self.assertEqual(sub[1], {"type": "ticker", "codes": ["KRW-BTC"]})
+        self.assertEqual([m["type"] for m in fanned], ["tick", "book"])
+        self.assertEqual(fanned[0]["data"]["price"], 95_000_000.0)
+        book = fanned[1]["data"]
+        self.assertEqual(book["bids"][0], {"price": 95_000_000.0, "qty": 1.5})
+        self.assertEqual(book["spread"], 10_000.0)
+        self.assertEqual(book["source"], "upbit")
+
+    def test_snapshot_failures_back_off_and_reset(self) -> None:
+        async def scenario():
+            loop = asyncio.get_running_loop()
+            calls = []
+
+            async def fetcher(symbol):
+                calls.append(loop.time())
+                if len(calls) <= 4:
+                    raise ConnectionError("418 banned")
+                return {"lastUpdateId": 10, "bids": [["1", "1"]], "asks": [["2", "1"]]}
+
+            hub = MarketDataHub(binance_symbols=["BTCUSDT"], snapshot_fetcher=fetcher,
+                                resync_delay=0.05, max_resync_delay=0.15)
+            await hub._sync_binance_book("BTCUSDT")
+            # diffs arriving while a retry is scheduled must not bypass the backoff
+            hub.handle_binance({"e": "depthUpdate", "s": "BTCUSDT", "U": 1, "u": 2, "b": [], "a": []})
+            await _until(lambda: hub.books["BTCUSDT"].synced)
+            return hub, calls
+
+        with patch.object(market_hub.random, "uniform", side_effect=lambda lo, hi: hi):
+            hub, calls = asyncio.run(scenario())
+        self.assertEqual(len(calls), 5)
+        gaps = [b - a for a, b in zip(calls, calls[1:])]
+        for gap, want in zip(gaps, [0.05, 0.1, 0.15, 0.15]):
+            self.assertGreaterEqual(gap, want * 0.9)
+        self.assertEqual(hub._resync_failures, {})
+
+
+class FollowSymbolTests(unittest.TestCase):
+    def test_quiet_gap_keeps_shared_socket(self) -> None:
+        async def scenario(sock):
+            fanout = UnixSocketFanout(sock)
+            await fanout.start()
+            got = []
+            follower = asyncio.ensure_future(follow_symbol("BTCUSDT", "tick", got.append,
+                                                           should_stop=lambda: len(got) >= 2, socket_path=sock))
+            try:
+                await _until(lambda: fanout.client_count > 0)
+                fanout.publish("tick", {"symbol": "BTCUSDT", "price": 1.0})
+                await _until(lambda: len(got) == 1)
+                await asyncio.sleep(0.8)                                   # longer than the 0.5 s poll
+                fanout.publish("tick", {"symbol": "ETHUSDT", "price": 9.0})
+                fanout.publish("tick", {"symbol": "BTCUSDT", "price": 2.0})
+                await asyncio.wait_for(follower, timeout=5)
+            finally:
+                follower.cancel()
+                await fanout.close()
+            return got
+
+        with tempfile.TemporaryDirectory() as tmp, \
+                patch.object(market_hub, "MarketDataHub", side_effect=AssertionError("fell back to private hub")):
+            got = asyncio.run(scenario(Path(tmp) / "hub.sock"))
+        self.assertEqual([t["price"] for t in got], [1.0, 2.0])
+
+    def test_private_hub_gives_up_so_callers_can_poll(self) -> None:
+        async def scenario(url):
+            return await follow_symbol("BTCUSDT", "tick", lambda d: None, should_stop=lambda: False,
+                                       socket_path=Path("/nonexistent/hub.sock"), binance_url=url,
+                                       reconnect_delay=0.01, max_reconnect_attempts=2)
+
+        with self.assertRaises(ConnectionError):
+            asyncio.run(asyncio.wait_for(scenario("ws://127.0.0.1:1/stream"), timeout=10))
+
+        async def silent():
+            server, url, _ = await _serve([])
+            try:
+                await follow_symbol("BTCUSDT", "tick", lambda d: None, should_stop=lambda: False,
+                                    socket_path=Path("/nonexistent/hub.sock"), binance_url=url,
+                                    reconnect_delay=0.01, max_reconnect_attempts=1, stale_timeout=0.3)
+            finally:
+                server.close()
+                await server.wait_closed()
+
+        with self.assertRaises(ConnectionError):
+            asyncio.run(asyncio.wait_for(silent(), timeout=10))
+
+    def test_feed_falls_back_to_polling_when_stream_fails(self) -> None:
+        from common.data.realtime_price import RealtimePriceFeed
+
+        feed = RealtimePriceFeed("BTCUSDT", stream=True, socket_path=Path("/nonexistent/hub.sock"))
+        polled = []
+
+        def pump_once():
+            polled.append(1)
+            feed.stop()
+
+        async def failing(*args, **kwargs):
+            raise ConnectionError("binance websocket unavailable after 4 attempts")
+
+        feed.pump_once = pump_once
+        with patch.object(market_hub, "follow_symbol", failing):
+            feed.run_forever()
+        self.assertEqual(polled, [1])
+        self.assertFalse(RealtimePriceFeed("BTCUSDT").stream)          # streaming is opt-in
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+"""IncrementalDriftMonitor 증분 PSI/KS 테스트."""
+from __future__ import annotations
+
+import tempfile
+import unittest
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+
+import stocks.ml_drift_state as drift_state
+from stocks.ml_drift_state import (IncrementalDriftMonitor,
+                                   record_feature_snapshot)
+
+FEATURES = ["f0", "f1", "f2"]
+
+
+def _batch_psi(expected: np.ndarray, actual: np.ndarray, bins: int = 10) -> float:
+    edges = np.unique(np.quantile(expected, np.linspace(0, 1, bins + 1)))
+    exp_hist, _ = np.histogram(expected, bins=edges)
+    act_hist, _ = np.histogram(actual, bins=edges)
+    exp_pct = np.clip(exp_hist / max(exp_hist.sum(), 1), 1e-6, None)
+    act_pct = np.clip(act_hist / max(act_hist.sum(), 1), 1e-6, None)
+    return float(np.sum((act_pct - exp_pct) * np.log(act_pct / exp_pct)))
+
+
+class IncrementalDriftMonitorTests(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(7)
+        self.X_ref = rng.normal(0, 1, (2000, 3))
+        self.today = date.today()
+
+    def _observe_days(self, monitor, X, n_days=5):
+        rows_per_day = len(X) // n_days
+        for d in range(n_days):
+            day = (self.today - timedelta(days=d)).isoformat()
+            for k in range(rows_per_day):
+                monitor.observe(f"S{k:03d}", day, X[d * rows_per_day + k])
+
+    def test_psi_matches_batch_for_in_range_data(self) -> None:
+        rng = np.random.default_rng(8)
+        X_cur = np.clip(rng.normal(0.5, 1, (250, 3)), self.X_ref.min(0), self.X_ref.max(0))
+        monitor = IncrementalDriftMonitor.fit(FEATURES, self.X_ref)
+        self._observe_days(monitor, X_cur)
+        stats = {r["feature"]: r for r in monitor.feature_stats()}
+        for i, name in enumerate(FEATURES):
+            self.assertAlmostEqual(stats[name]["psi"], round(_batch_psi(self.X_ref[:, i], X_cur[:, i]), 6), places=6)
+            self.assertLess(stats[name]["ks_pvalue"], 0.01)   # 평균 이동 감지
+        self.assertEqual(monitor.recent_samples, 250)
+
+    def test_expire_and_duplicate_codes(self) -> None:
+        monitor = IncrementalDriftMonitor.fit(FEATURES, self.X_ref, window_days=10)
+        old_day = (self.today - timedelta(days=30)).isoformat()
+        day = self.today.isoformat()
+        self.assertFalse(monitor.observe("A", old_day, [0.0, 0.0, 0.0]))   # 윈도우 밖
+        self.assertTrue(monitor.observe("A", day, [0.0, 0.0, 0.0]))
+        self.assertFalse(monitor.observe("A", day, [0.0, 0.0, 0.0]))       # 같은 종목/일자
+        monitor.days["2000-01-01"] = monitor._new_bucket()
+        monitor.days["2000-01-01"]["n"] += 1
+        monitor.cur["n"] += 1
+        monitor.expire()
+        self.assertEqual(int(monitor.cur["n"][0]), 1)
+
+    def test_snapshot_roundtrip_is_incremental(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            snap_dir = Path(td) / "snaps"
+            state_path = Path(td) / "state.json"
+            drift_state._recorded.clear()
+            day = self.today.isoformat()
+            self.assertTrue(record_feature_snapshot("005930", day, [0.1, 0.2, 0.3], snapshot_dir=snap_dir))
+            self.assertFalse(record_feature_snapshot("005930", day, [0.1, 0.2, 0.3], snapshot_dir=snap_dir))
+
+            monitor = IncrementalDriftMonitor.fit(FEATURES, self.X_ref)
+            self.assertEqual(monitor.ingest_snapshots(snap_dir), 1)
+            monitor.save(state_path)
+
+            record_feature_snapshot("000660", day, [0.4, 0.5, 0.6], snapshot_dir=snap_dir)
+            loaded = IncrementalDriftMonitor.load(state_path, FEATURES)
+            self.assertEqual(loaded.ingest_snapshots(snap_dir), 1)   # 오프셋 이후 새 행만
+            self.assertEqual(loaded.recent_samples, 2)
+            self.assertIsNone(IncrementalDriftMonitor.load(state_path, ["other"]))
+
+    def test_reference_older_than_model_is_rebuilt(self) -> None:
+        import os
+        import time
+
+        with tempfile.TemporaryDirectory() as td:
+            state_path = Path(td) / "state.json"
+            model = Path(td) / "xgb_model.ubj"
+            model.write_bytes(b"old")
+            os.utime(model, (time.time() - 3600,) * 2)
+            IncrementalDriftMonitor.fit(FEATURES, self.X_ref).save(state_path)
+            missing = Path(td) / "lgbm_model.txt"
+            self.assertIsNotNone(IncrementalDriftMonitor.load(state_path, FEATURES, model_artifacts=[model, missing]))
+
+            os.utime(model, (time.time() + 60,) * 2)                   # 다른 잡이 재학습
+            self.assertIsNone(IncrementalDriftMonitor.load(state_path, FEATURES, model_artifacts=[model, missing]))
+            self.assertIsNotNone(IncrementalDriftMonitor.load(state_path, FEATURES))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,13 +1,17 @@
 """Phase 12 agent smoke/unit tests."""
 from __future__ import annotations
 
+import json
+import re
 import tempfile
+import threading
+import time
 import unittest
 from datetime import date, timedelta
 from pathlib import Path
 from unittest.mock import patch
 
-from agents.news_analyst import NewsAnalyst
+from agents.news_analyst import NewsAnalyst, SeenIndex, headline_key
 from agents.regime_classifier import RegimeClassifier
 from agents.strategy_reviewer import StrategyReviewer
 from common.cache import clear_cache
@@ -110,6 +114,82 @@ class NewsAnalystTests(unittest.TestCase):
         self.assertEqual(len(first), 2)
         self.assertEqual(len(second), 0)
 
+    def test_headline_dedupe_and_concurrent_symbol_batches(self) -> None:
+        calls: list[str] = []
+        active = {"now": 0, "peak": 0}
+        lock = threading.Lock()
+
+        def fake_llm(prompt: str, max_tokens: int) -> str:
+            with lock:
+                calls.append(prompt)
+                active["now"] += 1
+                active["peak"] = max(active["peak"], active["now"])
+            time.sleep(0.05)
+            with lock:
+                active["now"] -= 1
+            n = len(re.findall(r"^\d+\. headline:", prompt, re.M))
+            return json.dumps([{"idx": i, "label": "POSITIVE", "strength": 4, "reason": "ok", "confidence": 0.8}
+                               for i in range(1, n + 1)])
+
+        analyst = NewsAnalyst(daily_budget_usd=10.0, llm=fake_llm, max_concurrency=2)
+        items = [
+            {"id": "a1", "headline": "ETF inflows hit record!", "source": "x", "symbols": ["BTC"]},
+            {"id": "b7", "headline": "  etf INFLOWS hit record ", "source": "y", "symbols": ["ETH"]},
+            {"id": "c1", "headline": "ETH upgrade ships", "source": "x", "symbols": ["ETH"]},
+            {"id": "d1", "headline": "SOL outage", "source": "z", "symbols": ["SOL"]},
+            {"id": "e1", "headline": "XRP ruling", "source": "z", "symbols": ["XRP"]},
+        ]
+        out = analyst.analyze_news_items(items)
+        self.assertEqual([r["id"] for r in out], ["a1", "c1", "d1", "e1"])
+        self.assertTrue(all(r["label"] == "POSITIVE" for r in out))
+        self.assertEqual(len(calls), 4)                    # one batch per symbol, dup never sent
+        self.assertEqual(sum(p.count("etf inflows") + p.count("ETF inflows") for p in calls), 1)
+        self.assertEqual(active["peak"], 2)
+        self.assertEqual(analyst.get_budget_state()["calls"], 4)
+
+        # syndicated copy with a new id on a later run is still a duplicate
+        again = analyst.analyze_news_items([{"id": "z9", "headline": "ETF Inflows Hit Record", "symbols": ["BTC"]}])
+        self.assertEqual(again, [])
+        self.assertEqual(len(calls), 4)
+
+    def test_batch_parse_failure_falls_back_per_item(self) -> None:
+        def fake_llm(prompt: str, max_tokens: int) -> str:
+            if "headline:" in prompt and "1. headline" in prompt:
+                return "not json"
+            return '{"label": "NEGATIVE", "strength": 3, "reason": "x", "confidence": 0.7}'
+
+        analyst = NewsAnalyst(daily_budget_usd=10.0, llm=fake_llm)
+        out = analyst.analyze_news_items([
+            {"id": "p1", "headline": "one", "symbols": ["BTC"]},
+            {"id": "p2", "headline": "two", "symbols": ["BTC"]},
+        ])
+        self.assertEqual([r["label"] for r in out], ["NEGATIVE", "NEGATIVE"])
+        self.assertEqual(analyst.get_budget_state()["calls"], 2)   # failed batch is refunded
+
+    def test_seen_index_is_append_only_and_day_partitioned(self) -> None:
+        from datetime import datetime, timezone
+
+        state = Path(self.tmp.name) / "seen"
+        day1 = datetime(2026, 3, 1, 23, 0, tzinfo=timezone.utc)
+        day2 = datetime(2026, 3, 2, 1, 0, tzinfo=timezone.utc)
+        index = SeenIndex(state)
+        self.assertEqual(index.add_many(["a", "b", "a"], day1), 2)
+        self.assertEqual(index.add_many(["b", "c"], day2), 1)
+        self.assertEqual((state / "seen-2026-03-01.log").read_text().split(), ["a", "b"])
+        self.assertEqual((state / "seen-2026-03-02.log").read_text().split(), ["c"])
+
+        fresh = SeenIndex(state)
+        self.assertTrue(fresh.contains("a", day2))          # yesterday's partition still checked
+        self.assertFalse(SeenIndex(state).contains("a", datetime(2026, 3, 5, tzinfo=timezone.utc)))
+
+        # a long-lived instance forgets days that rolled out of the window
+        self.assertTrue(index.contains("a", day2))
+        later = datetime(2026, 3, 5, tzinfo=timezone.utc)
+        self.assertFalse(index.contains("a", later))
+        self.assertEqual(len(index), 0)
+        self.assertEqual(index.add_many(["a"], later), 1)
+        self.assertEqual(headline_key({"headline": "Fed: rates on HOLD"}), headline_key({"title": "fed rates on hold"}))
+
 
 class RegimeClassifierTests(unittest.TestCase):
     def test_classify_rule_crisis(self) -> None:
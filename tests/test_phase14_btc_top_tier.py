@@ -1,11 +1,16 @@
 """Phase 14 BTC top-tier module tests."""
 from __future__ import annotations
 
+import json
+import random
+import tempfile
 import time
 import unittest
+from pathlib import Path
 
 from btc.signals.arb_detector import ArbitrageDetector, compute_kimchi_premium
-from btc.signals.orderflow import analyze_trade_batch
+from btc.signals.orderflow import (OrderFlowAnalyzer, analyze_trade_batch,
+                                   replay_benchmark)
 from btc.signals.whale_tracker import classify_whale_activity
 from btc.strategies.funding_carry import build_funding_carry_decision
 
@@ -26,6 +31,49 @@ class OrderFlowTests(unittest.TestCase):
         self.assertEqual(out["large_sell_count"], 1)
         self.assertAlmostEqual(out["net_flow"], 5.0, places=6)
 
+    def test_rolling_windows_match_naive_sums(self) -> None:
+        rng = random.Random(7)
+        base_ms = 1_700_000_000_000
+        trades, t = [], base_ms
+        for _ in range(5000):
+            t += rng.choice([0, 0, 10, 250, 900, 4000, 45_000])
+            trades.append({"q": rng.uniform(0.01, 15.0), "m": rng.random() < 0.5, "T": t})
+        # a few late (out-of-order) trades
+        for back in (500, 3_000, 20_000):
+            trades.append({"q": 2.0, "m": False, "T": t - back})
+
+        analyzer = OrderFlowAnalyzer(large_trade_threshold_btc=10.0, window_seconds=60)
+        for tr in trades:
+            analyzer.process_trade(tr)
+        now = t // 1000
+        out = analyzer.snapshot(now_ts=now)
+        for w in (10, 60, 300):
+            rows = [tr for tr in trades if now - w < tr["T"] // 1000 <= now]
+            buy = sum(tr["q"] for tr in rows if not tr["m"])
+            sell = sum(tr["q"] for tr in rows if tr["m"])
+            got = out["windows"][f"{w}s"]
+            self.assertAlmostEqual(got["net_flow"], buy - sell, places=5)
+            self.assertEqual(got["trade_count"], len(rows))
+            self.assertEqual(got["large_sell_count"], sum(1 for tr in rows if tr["m"] and tr["q"] >= 10.0))
+        self.assertEqual(out["net_flow"], out["windows"]["60s"]["net_flow"])
+
+        later = analyzer.snapshot(now_ts=now + 400)
+        self.assertEqual(later["windows"]["300s"]["trade_count"], 0)
+        self.assertEqual(later["trade_count"], len(trades))
+
+    def test_replay_benchmark_from_recording(self) -> None:
+        base_ms = 1_700_000_000_000
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "trades.jsonl"
+            with path.open("w", encoding="utf-8") as f:
+                for i in range(2000):
+                    f.write(json.dumps({"e": "trade", "q": "0.5", "m": i % 2 == 0, "T": base_ms + i * 10}) + "\n")
+            out = replay_benchmark(path, window_seconds=10)
+        self.assertEqual(out["trades"], 2000)
+        self.assertGreater(out["trades_per_sec"], 0)
+        self.assertAlmostEqual(out["snapshot"]["cvd"], 0.0, places=6)
+        self.assertEqual(out["snapshot"]["windows"]["300s"]["trade_count"], 2000)
+
 
 class FundingCarryTests(unittest.TestCase):
     def test_positive_funding_triggers_short_perp_carry(self) -> None:
@@ -0,0 +1,97 @@
+"""NumPy portfolio solver tests."""
+from __future__ import annotations
+
+import unittest
+
+import numpy as np
+
+from quant.portfolio.optimizer import (OptimizerConfig, PortfolioOptimizer,
+                                       black_litterman, risk_parity)
+from quant.portfolio.solvers import (black_litterman_posterior,
+                                     mean_variance_qp, project_capped_simplex,
+                                     risk_parity_erc)
+
+
+def _cov(n=12, seed=1):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(0, 0.01, (200, 3)) @ rng.uniform(0.5, 1.5, (3, n)) + rng.normal(0, 0.01, (200, n))
+    return np.cov(X, rowvar=False) * 252, rng.normal(0.08, 0.05, n)
+
+
+class SolverTests(unittest.TestCase):
+    def test_capped_simplex_projection(self) -> None:
+        rng = np.random.default_rng(0)
+        v = rng.normal(size=50) * 0.02
+        w = project_capped_simplex(v, 0.0, 0.05, 1.0)
+        self.assertAlmostEqual(w.sum(), 1.0, places=10)
+        self.assertTrue(np.all(w >= 0) and np.all(w <= 0.05 + 1e-12))
+        # optimality: free coordinates share one shift tau = v - w
+        free = (w > 1e-12) & (w < 0.05 - 1e-12)
+        self.assertTrue(free.any())
+        tau = (v - w)[free]
+        self.assertLess(np.ptp(tau), 1e-9)
+
+    def test_mean_variance_kkt(self) -> None:
+        cov, mu = _cov()
+        w, info = mean_variance_qp(mu, cov, risk_aversion=3.0, hi=0.3)
+        self.assertTrue(info.converged)
+        grad = 3.0 * cov @ w - mu
+        lam = np.median(grad[(w > 1e-6) & (w < 0.3 - 1e-6)])
+        self.assertTrue(np.all(grad[w <= 1e-6] >= lam - 1e-5))
+        self.assertTrue(np.all(grad[w >= 0.3 - 1e-6] <= lam + 1e-5))
+        # warm start from the solution converges immediately
+        _, warm = mean_variance_qp(mu, cov, risk_aversion=3.0, hi=0.3, w0=w)
+        self.assertLessEqual(warm.iterations, 2)
+
+    def test_risk_parity_equal_contributions(self) -> None:
+        cov, _ = _cov()
+        w, info = risk_parity_erc(cov)
+        self.assertTrue(info.converged)
+        rc = w * (cov @ w)
+        self.assertLess(np.ptp(rc / rc.sum()), 1e-8)
+        self.assertAlmostEqual(w.sum(), 1.0, places=12)
+
+    def test_black_litterman_posterior(self) -> None:
+        cov, mu = _cov()
+        self.assertTrue(np.allclose(black_litterman_posterior(mu, cov, [], []), mu))
+        self.assertTrue(np.allclose(black_litterman_posterior(mu, cov, [2], [mu[2]]), mu))
+        post = black_litterman_posterior(mu, cov, [2], [mu[2] + 0.1])
+        self.assertGreater(post[2], mu[2])
+        self.assertLess(post[2], mu[2] + 0.1)
+
+
+class OptimizerSolverTests(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(4)
+        self.assets = [f"A{i}" for i in range(30)]
+        rets = rng.normal(0, 0.01, (250, 1)) + rng.normal(0, 0.015, (250, 30))
+        self.history = {a: rets[:, i].tolist() for i, a in enumerate(self.assets)}
+        self.er = {a: float(x) for a, x in zip(self.assets, rng.normal(0.1, 0.05, 30))}
+        self.class_map = {a: ("CRYPTO", "KR", "US")[i % 3] for i, a in enumerate(self.assets)}
+
+    def test_constraints_and_warm_start(self) -> None:
+        cfg = OptimizerConfig(single_name_max_weight=0.06)
+        opt = PortfolioOptimizer(cfg)
+        first = opt.optimize(self.er, {}, self.class_map, returns_history=self.history)
+        self.assertFalse(first["solver"]["warm_start"])
+        self.assertIn("shrinkage", first["solver"])
+        self.assertAlmostEqual(sum(first["weights"].values()), 1.0, places=6)
+        self.assertTrue(all(w <= 0.06 + 1e-6 for w in first["weights"].values()))
+        for cw in first["class_weights"].values():
+            self.assertGreaterEqual(cw, cfg.class_min_weight - 1e-6)
+            self.assertLessEqual(cw, cfg.class_max_weight + 1e-6)
+        second = opt.optimize(self.er, {}, self.class_map, returns_history=self.history)
+        self.assertTrue(second["solver"]["warm_start"])
+        self.assertLessEqual(second["solver"]["iterations"], first["solver"]["iterations"])
+
+    def test_wrappers(self) -> None:
+        rp = risk_parity(self.er, {}, self.class_map, returns_history=self.history)
+        bl = black_litterman(self.er, {}, self.class_map, views={"A0": 0.5}, returns_history=self.history)
+        self.assertEqual(rp["method"], "risk_parity")
+        self.assertAlmostEqual(sum(rp["weights"].values()), 1.0, places=6)
+        self.assertEqual(bl["method"], "black_litterman")
+        self.assertGreater(bl["weights"]["A0"], 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,182 @@
+"""KR 장전 분석: 일괄 조회 + 벡터화 지표 == 종목별 스칼라 계산."""
+from __future__ import annotations
+
+import importlib
+import random
+import time
+
+import pytest
+
+
+def _scalar_indicators(closes: list[float], volumes: list[float]) -> dict:
+    """기존 종목별 루프 구현 (참조용)."""
+    gains, losses = [], []
+    for i in range(1, len(closes)):
+        diff = closes[i] - closes[i - 1]
+        gains.append(max(diff, 0))
+        losses.append(max(-diff, 0))
+    avg_gain = sum(gains[-14:]) / 14
+    avg_loss = sum(losses[-14:]) / 14
+    rs = avg_gain / avg_loss if avg_loss > 0 else 100
+    rsi = 100 - (100 / (1 + rs))
+    avg_vol = sum(volumes[-20:]) / min(len(volumes[-20:]), 20)
+    vol_ratio = volumes[-1] / avg_vol if avg_vol > 0 else 1.0
+    bb_pos = 50
+    if len(closes) >= 20:
+        ma20 = sum(closes[-20:]) / 20
+        std20 = (sum((c - ma20) ** 2 for c in closes[-20:]) / 20) ** 0.5
+        if std20 > 0:
+            bb_pos = (closes[-1] - (ma20 - 2 * std20)) / (4 * std20) * 100
+    return {"rsi": rsi, "vol_ratio": vol_ratio, "bb_pos": bb_pos}
+
+
+class _FakeQuery:
+    def __init__(self, rows: list[dict]):
+        self._rows = rows
+        self._range = (0, len(rows))
+        self._order: list = []
+        self.calls = 0
+
+    def table(self, name):
+        assert name == "daily_ohlcv"
+        self.calls += 1
+        self._order = []
+        return self
+
+    def select(self, *_):
+        return self
+
+    def in_(self, col, values):
+        self._rows = [r for r in self._rows if r[col] in values]
+        return self
+
+    def gte(self, col, value):
+        self._rows = [r for r in self._rows if r[col] >= value]
+        return self
+
+    def order(self, col, desc=False):
+        self._order.append((col, desc))
+        return self
+
+    def range(self, start, end):
+        self._range = (start, end + 1)
+        return self
+
+    def execute(self):
+        rows = self._rows
+        for col, desc in reversed(self._order):
+            rows = sorted(rows, key=lambda r: r[col], reverse=desc)
+        data = rows[self._range[0]:self._range[1]]
+        return type("Res", (), {"data": data})()
+
+
+@pytest.fixture
+def premarket(monkeypatch, tmp_path):
+    import common.config
+
+    monkeypatch.setattr(common.config, "STOCK_PREMARKET_LOG", tmp_path / "stock_premarket.log")
+    monkeypatch.setenv("TRADING_ENV", "mock")
+    monkeypatch.setenv("KIWOOM_MOCK_REST_API_APP_KEY", "mock-app-key")
+    monkeypatch.setenv("KIWOOM_MOCK_REST_API_SECRET_KEY", "mock-secret")
+    monkeypatch.setenv("KIWOOM_MOCK_ACCOUNT_NO", "5012345678")
+    monkeypatch.setenv("SUPABASE_URL", "")          # 모듈 import 시 실제 클라이언트 생성 방지
+    return importlib.import_module("stocks.stock_premarket")
+
+
+def _history(codes: list[str], days: int, rng: random.Random) -> dict:
+    from datetime import date, timedelta
+
+    today = date.today()
+    out = {}
+    for n, code in zip(days, codes):
+        price = 10_000.0
+        rows = []
+        for i in range(n):
+            price *= 1 + rng.gauss(0, 0.02)
+            rows.append({
+                "stock_code": code,
+                "date": (today - timedelta(days=n - i)).isoformat(),
+                "close_price": round(price),
+                "volume": rng.randint(0, 3) * 1_000_000 if i % 9 else None,
+            })
+        out[code] = rows
+    return out
+
+
+def test_bulk_indicators_match_scalar(premarket, monkeypatch):
+    rng = random.Random(4)
+    watch = premarket.WATCHLIST[:8]
+    codes = [s["code"] for s in watch]
+    hist = _history(codes, [45, 30, 25, 20, 19, 14, 13, 0], rng)
+    hist[codes[1]][-21:] = [dict(r, close_price=5_000) for r in hist[codes[1]][-21:]]   # 밴드폭 0, 손실 0
+    fake = _FakeQuery([r for rows in hist.values() for r in rows])
+    monkeypatch.setattr(premarket, "WATCHLIST", watch)
+    monkeypatch.setattr(premarket, "supabase", fake)
+    monkeypatch.setattr(premarket, "_OHLCV_PAGE_SIZE", 7)
+
+    got = {r["code"]: r for r in premarket.get_stock_indicators()}
+    assert fake.calls > 1                             # 페이지 단위 일괄 조회
+    assert set(got) == set(codes[:6])                 # 14행 미만 종목 제외
+    for code in codes[:6]:
+        rows = hist[code][-premarket.INDICATOR_WINDOW:]
+        closes = [float(r["close_price"]) for r in rows]
+        ref = _scalar_indicators(closes, [float(r["volume"] or 0) for r in rows])
+        assert got[code]["rsi"] == pytest.approx(round(ref["rsi"], 1), abs=0.11)
+        assert got[code]["vol_ratio"] == pytest.approx(round(ref["vol_ratio"], 2), abs=0.011)
+        assert got[code]["bb_pos"] == pytest.approx(round(ref["bb_pos"], 1), abs=0.11)
+        assert got[code]["last_close"] == closes[-1]
+    assert got[codes[1]]["bb_pos"] == 50 and got[codes[1]]["rsi"] == pytest.approx(100 - 100 / 101, abs=0.1)
+
+
+def test_panel_matches_scalar_unrounded(premarket):
+    import numpy as np
+
+    rng = random.Random(9)
+    closes = np.full((3, 30), np.nan)
+    volumes = np.full((3, 30), np.nan)
+    series = []
+    for i, n in enumerate((30, 21, 15)):
+        c = [1000 + rng.random() * 50 for _ in range(n)]
+        v = [float(rng.randint(1, 9)) for _ in range(n)]
+        closes[i, -n:], volumes[i, -n:] = c, v
+        series.append((c, v))
+    panel = premarket.compute_indicator_panel(closes, volumes)
+    for i, (c, v) in enumerate(series):
+        ref = _scalar_indicators(c, v)
+        for key in ("rsi", "vol_ratio", "bb_pos"):
+            assert panel[key][i] == pytest.approx(ref[key], rel=1e-9)
+
+
+def test_stages_run_concurrently(premarket):
+    def slow(value):
+        def _fn():
+            time.sleep(0.2)
+            return value
+        return _fn
+
+    def boom():
+        raise RuntimeError("down")
+
+    t0 = time.perf_counter()
+    results, timings = premarket._run_stages({
+        "a": (slow(1), None), "b": (slow(2), None), "c": (slow(3), None), "d": (boom, "fallback"),
+    })
+    assert time.perf_counter() - t0 < 0.5
+    assert results == {"a": 1, "b": 2, "c": 3, "d": "fallback"}
+    assert set(timings) == {"a", "b", "c", "d"} and timings["a"] >= 0.2
+
+
+def test_bad_close_skips_only_that_stock(premarket, monkeypatch):
+    rng = random.Random(7)
+    watch = premarket.WATCHLIST[:3]
+    codes = [s["code"] for s in watch]
+    hist = _history(codes, [30, 30, 30], rng)
+    hist[codes[0]][5]["close_price"] = None
+    hist[codes[1]][-1]["close_price"] = "N/A"
+    fake = _FakeQuery([r for rows in hist.values() for r in rows])
+    monkeypatch.setattr(premarket, "WATCHLIST", watch)
+    monkeypatch.setattr(premarket, "supabase", fake)
+
+    got = premarket.get_stock_indicators()
+    assert [r["code"] for r in got] == [codes[2]]
+    assert got[0]["last_close"] == float(hist[codes[2]][-1]["close_price"])
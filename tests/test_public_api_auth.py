@@ -0,0 +1,108 @@
+"""Public API key index and GCRA rate limiter tests."""
+from __future__ import annotations
+
+import os
+import time
+import unittest
+from unittest.mock import patch
+
+from fastapi import HTTPException
+
+from api import signal_api
+from api.signal_api import ApiKeyIndex, GcraRateLimiter, _hash_key
+
+
+class _Clock:
+    def __init__(self, t: float = 1000.0):
+        self.t = t
+
+    def __call__(self) -> float:
+        return self.t
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.time() + timeout
+    while not predicate():
+        if time.time() > deadline:
+            raise AssertionError("condition not reached")
+        time.sleep(0.01)
+
+
+class ApiKeyIndexTests(unittest.TestCase):
+    def test_single_load_then_dict_lookups(self) -> None:
+        calls = []
+        rows = {_hash_key("pro-key"): {"id": 1, "tier": "pro", "source": "supabase"}}
+
+        def loader():
+            calls.append(1)
+            return dict(rows)
+
+        clock = _Clock()
+        index = ApiKeyIndex(loader=loader, refresh_seconds=60, clock=clock)
+        with patch.dict(os.environ, {"PUBLIC_API_KEYS": "env-key", "PUBLIC_API_KEY_HASHES": ""}):
+            for _ in range(1000):
+                self.assertEqual(index.lookup(_hash_key("pro-key"))["tier"], "pro")
+                self.assertEqual(index.lookup(_hash_key("env-key"))["source"], "env")
+        self.assertEqual(len(calls), 1)
+
+        # key created after the load: first request misses, one background reload picks it up
+        new_hash = _hash_key("new-key")
+        rows[new_hash] = {"id": 2, "tier": "free", "source": "supabase"}
+        clock.t += 10
+        self.assertIsNone(index.lookup(new_hash))
+        _wait_for(lambda: len(calls) == 2)
+        _wait_for(lambda: index.lookup(new_hash) is not None)
+
+        # loader failure keeps the last good records
+        index.loader = lambda: None
+        index.refresh()
+        self.assertEqual(index.lookup(_hash_key("pro-key"))["tier"], "pro")
+
+    def test_negative_cache_limits_reloads(self) -> None:
+        calls = []
+        clock = _Clock()
+        index = ApiKeyIndex(loader=lambda: calls.append(1) or {}, miss_refresh_seconds=5, clock=clock)
+        for i in range(200):
+            self.assertIsNone(index.lookup(_hash_key(f"bad-{i % 3}")))
+        self.assertEqual(len(calls), 1)          # fresh index: misses do not reload
+
+
+class GcraRateLimiterTests(unittest.TestCase):
+    def test_burst_then_steady_rate(self) -> None:
+        clock = _Clock()
+        limiter = GcraRateLimiter(period=60, clock=clock)
+        allowed = sum(limiter.allow("k", 60) for _ in range(100))
+        self.assertEqual(allowed, 60)
+        clock.t += 1.0
+        self.assertTrue(limiter.allow("k", 60))
+        self.assertFalse(limiter.allow("k", 60))
+        self.assertTrue(limiter.allow("other", 60))
+
+    def test_idle_keys_are_evicted(self) -> None:
+        clock = _Clock()
+        limiter = GcraRateLimiter(period=60, evict_every=300, clock=clock)
+        for i in range(500):
+            limiter.allow(f"k{i}", 60)
+        self.assertEqual(len(limiter), 500)
+        clock.t += 301
+        limiter.allow("fresh", 60)
+        self.assertEqual(len(limiter), 1)
+
+
+class RequirePublicApiKeyTests(unittest.TestCase):
+    def test_auth_and_429(self) -> None:
+        index = ApiKeyIndex(loader=lambda: {_hash_key("k1"): {"tier": "free", "source": "supabase"}})
+        with patch.object(signal_api, "_API_KEY_INDEX", index), \
+                patch.object(signal_api, "_RATE_LIMITER", GcraRateLimiter()):
+            with self.assertRaises(HTTPException) as ctx:
+                signal_api.require_public_api_key(None, x_api_key="nope")
+            self.assertEqual(ctx.exception.status_code, 401)
+            for _ in range(60):
+                signal_api.require_public_api_key(None, x_api_key="k1")
+            with self.assertRaises(HTTPException) as ctx:
+                signal_api.require_public_api_key(None, x_api_key="k1")
+            self.assertEqual(ctx.exception.status_code, 429)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+"""Vectorized regime feature frame tests."""
+from __future__ import annotations
+
+import math
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from agents import regime_classifier as rc
+
+
+def _std(v):
+    if len(v) < 2:
+        return 0.0
+    m = sum(v) / len(v)
+    return math.sqrt(sum((x - m) ** 2 for x in v) / (len(v) - 1))
+
+
+def _skew(v):
+    n, s = len(v), _std(v)
+    if n < 3 or s <= 0:
+        return 0.0
+    m = sum(v) / n
+    return sum(((x - m) / s) ** 3 for x in v) * n / ((n - 1) * (n - 2))
+
+
+def _kurt(v):
+    n, s = len(v), _std(v)
+    if n < 4 or s <= 0:
+        return 0.0
+    m = sum(v) / n
+    num = sum(((x - m) / s) ** 4 for x in v)
+    return n * (n + 1) * num / ((n - 1) * (n - 2) * (n - 3)) - 3 * (n - 1) ** 2 / ((n - 2) * (n - 3))
+
+
+def _corr(x, y):
+    n = min(len(x), len(y))
+    if n < 2:
+        return 0.0
+    return float(np.corrcoef(x[-n:], y[-n:])[0, 1])
+
+
+def _reference(close: pd.DataFrame, day) -> dict:
+    """Per-date list computation of the original get_features()."""
+    hist = {t: close[t].loc[:day].dropna().tolist() for t in rc.REGIME_TICKERS}
+    spy, qqq, vix, hyg, lqd = (hist[t] for t in rc.REGIME_TICKERS)
+    spy_ret = [b / a - 1 for a, b in zip(spy, spy[1:])]
+    qqq_ret = [b / a - 1 for a, b in zip(qqq, qqq[1:])]
+
+    def _ret(arr, n):
+        return arr[-1] / arr[-1 - n] - 1.0 if len(arr) > n else 0.0
+
+    return {
+        "spy_ret_5d": _ret(spy, 5),
+        "spy_ret_20d": _ret(spy, 20),
+        "spy_vol_20d": _std(spy_ret[-20:]),
+        "vix_level": vix[-1],
+        "vix_ret_5d": _ret(vix, 5),
+        "vix_term_proxy": np.mean(vix[-5:]) - np.mean(vix[-20:]) if len(vix) >= 20 else 0.0,
+        "ret_skew_60d": _skew(spy_ret[-60:]),
+        "ret_kurt_60d": _kurt(spy_ret[-60:]),
+        "credit_spread_proxy": _ret(hyg, 20) - _ret(lqd, 20),
+        "corr_shift_20_60": _corr(spy_ret[-20:], qqq_ret[-20:]) - _corr(spy_ret[-60:], qqq_ret[-60:]),
+    }
+
+
+def _panel(days=300, seed=11):
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range("2023-01-02", periods=days)
+    mkt = rng.normal(0, 0.01, days)
+    close = pd.DataFrame({
+        "SPY": 400 * np.cumprod(1 + mkt),
+        "QQQ": 300 * np.cumprod(1 + 1.2 * mkt + rng.normal(0, 0.004, days)),
+        "^VIX": 18 * np.exp(np.cumsum(rng.normal(0, 0.05, days))),
+        "HYG": 75 * np.cumprod(1 + rng.normal(0, 0.003, days)),
+        "LQD": 105 * np.cumprod(1 + rng.normal(0, 0.002, days)),
+    }, index=idx)
+    close.iloc[[40, 41, 150], close.columns.get_loc("^VIX")] = np.nan   # VIX holidays
+    return close
+
+
+class RegimeFeatureFrameTests(unittest.TestCase):
+    def test_frame_matches_per_date_computation(self) -> None:
+        close = _panel()
+        frame = rc.build_feature_frame(close)
+        for day in (close.index[30], close.index[41], close.index[120], close.index[-1]):
+            ref = _reference(close, day)
+            row = frame.loc[day]
+            for name in rc.FEATURE_NAMES:
+                self.assertAlmostEqual(row[name], ref[name], places=5, msg=f"{name} @ {day.date()}")
+
+    def test_single_download_serves_training_and_classify(self) -> None:
+        close = _panel(days=1300)
+        with tempfile.TemporaryDirectory() as tmp, \
+                patch.object(rc, "_download_panel", return_value=close) as download, \
+                patch.object(rc, "get_cached", return_value=None), \
+                patch.object(rc, "set_cached"):
+            clf = rc.RegimeClassifier(model_path=Path(tmp) / "m.json", panel_path=Path(tmp) / "p.npz")
+            frame = clf.feature_frame(as_of=close.index[-1].date(), first=close.index[950].date())
+            days = close.index[900::20]
+            feats = [clf.get_features(as_of=d.date()) for d in days]
+            self.assertEqual(download.call_count, 1)
+            self.assertEqual(feats[-1], {k: float(v) for k, v in frame.loc[days[-1]].items()})
+
+            # panel is reused from disk by a fresh instance
+            rc._frame_memo.clear()
+            other = rc.RegimeClassifier(model_path=Path(tmp) / "m.json", panel_path=Path(tmp) / "p.npz")
+            self.assertEqual(len(other.feature_frame(as_of=close.index[-1].date())), len(close))
+            self.assertEqual(download.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
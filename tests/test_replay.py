@@ -0,0 +1,214 @@
+"""Record/replay layer: capture, deterministic offline replay, latency, write stubs."""
+from __future__ import annotations
+
+import pickle
+import sys
+import types
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+import requests
+
+from common.replay import (DEFAULT_TARGETS, ReplayArchive, ReplayMiss,
+                           ReplaySession, Target, _postgrest_key)
+
+
+def _install_fake_modules():
+    feed = types.ModuleType("fake_feed")
+    feed.calls = []
+
+    def quote(symbol, when="now"):
+        feed.calls.append(("quote", symbol, when))
+        if symbol == "BAD":
+            raise ValueError("no such symbol")
+        return {"symbol": symbol, "px": 100 + len(feed.calls), "when": when}
+
+    def download(symbols):
+        feed.calls.append(("download", tuple(symbols)))
+        return [feed.Client().balance(s) for s in symbols]     # 내부에서 다른 타깃 재진입
+
+    class Client:
+        def balance(self, asset):
+            feed.calls.append(("balance", asset))
+            return {"asset": asset, "qty": len(feed.calls)}
+
+    def notify(text):
+        feed.calls.append(("notify", text))
+        return "sent"
+
+    feed.quote, feed.download, feed.Client, feed.notify = quote, download, Client, notify
+    consumer = types.ModuleType("fake_consumer")
+    consumer.quote = quote                                          # from fake_feed import quote
+    sys.modules["fake_feed"], sys.modules["fake_consumer"] = feed, consumer
+    return feed, consumer
+
+
+TARGETS = (
+    Target("fake_feed", "quote"),
+    Target("fake_feed", "download", fanout=True),
+    Target("fake_feed", "Client.balance"),
+    Target("fake_feed", "notify", "write"),
+)
+
+
+class ReplaySessionTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "cycle.replay.gz"
+        self.feed, self.consumer = _install_fake_modules()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        sys.modules.pop("fake_feed", None)
+        sys.modules.pop("fake_consumer", None)
+
+    def _record(self):
+        with ReplaySession("record", self.path, targets=TARGETS, patch_postgrest=False) as session:
+            first = self.consumer.quote("BTC", when="t1")
+            second = self.feed.quote("BTC", when="t1")
+            self.feed.Client().balance("KRW")
+            self.feed.download(["A", "B"])
+            with self.assertRaises(ValueError):
+                self.feed.quote("BAD")
+            self.assertEqual(self.feed.notify("hi"), "sent")
+        self.assertIs(self.consumer.quote, self.feed.quote)          # 패치 원복
+        return session, [first, second]
+
+    def test_record_then_replay_offline(self):
+        session, recorded = self._record()
+        self.assertEqual(session.stats["recorded"], 4)               # download 내부 balance는 별도 기록 안 함
+        self.assertTrue(self.path.exists())
+        self.assertEqual(len(ReplayArchive.load(self.path).entries), 5)
+
+        live_calls = len(self.feed.calls)
+        sleeps = []
+        with ReplaySession("replay", self.path, latency_scale=2.0, targets=TARGETS,
+                           patch_postgrest=False, sleep=sleeps.append) as replay:
+            self.assertEqual(self.consumer.quote("BTC", when="t1"), recorded[0])
+            self.assertEqual(self.feed.quote("BTC", when="t1"), recorded[1])
+            self.assertEqual(self.feed.quote("BTC", when="t1"), recorded[1])    # 소진 후 마지막 응답 반복
+            self.assertEqual(self.feed.Client().balance("KRW")["asset"], "KRW")
+            self.assertEqual([r["asset"] for r in self.feed.download(["A", "B"])], ["A", "B"])
+            with self.assertRaises(ValueError):
+                self.feed.quote("BAD")
+            self.assertIsNot(self.feed.notify("hi"), "sent")           # 쓰기는 스텁
+            with self.assertRaises(ReplayMiss):
+                self.feed.Client().balance("USDT")                     # 남은 응답 없음 → miss
+        self.assertEqual(len(self.feed.calls), live_calls)              # 원본 호출 없음
+        self.assertEqual(replay.stats["misses"], 1)
+        self.assertEqual(replay.stats["stubbed"], 1)
+        self.assertTrue(sleeps and all(s >= 0 for s in sleeps))
+        self.assertAlmostEqual(replay.stats["simulated_latency"], sum(sleeps))
+
+    def test_changed_arguments_fall_back_to_recorded_order(self):
+        self._record()
+        with ReplaySession("replay", self.path, targets=TARGETS, patch_postgrest=False):
+            a = self.feed.quote("BTC", when="t2")                      # 시각 인자가 달라도 순서대로
+            b = self.feed.quote("BTC", when="t3")
+        self.assertEqual((a["when"], b["when"]), ("t1", "t1"))
+        self.assertNotEqual(a["px"], b["px"])
+
+    def test_responses_are_snapshots(self):
+        self._record()
+        with ReplaySession("replay", self.path, targets=TARGETS, patch_postgrest=False):
+            self.feed.quote("BTC", when="t1")
+            last = self.feed.quote("BTC", when="t1")
+            last["px"] = -1                                            # 호출자가 결과를 수정해도
+            repeat = self.feed.quote("BTC", when="t1")                 # 반복 응답은 원본 그대로
+        self.assertNotEqual(repeat["px"], -1)
+
+
+class PostgrestReplayTests(unittest.TestCase):
+    def test_reads_replayed_and_writes_stubbed(self):
+        from postgrest import APIResponse, SyncPostgrestClient
+
+        client = SyncPostgrestClient("http://127.0.0.1:9/rest/v1")
+        read = client.from_("daily_ohlcv").select("close_price").eq("stock_code", "005930")
+        _, key = _postgrest_key(read)
+        with TemporaryDirectory() as tmp:
+            path = Path(tmp) / "sb.replay.gz"
+            archive = ReplayArchive()
+            archive.add("supabase.read", key, 0.01,
+                        pickle.dumps(APIResponse(data=[{"close_price": 70000}], count=None)), ok=True)
+            archive.save(path)
+            with ReplaySession("replay", path, targets=()):
+                self.assertEqual(read.execute().data, [{"close_price": 70000}])
+                write = client.from_("trade_executions").insert({"stock_code": "005930"})
+                self.assertEqual(write.execute().data, [])
+
+
+class FailClosedReplayTests(unittest.TestCase):
+    """Replayed orders never reach a broker; untapped HTTP is refused or stubbed."""
+
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "us.replay.gz"
+        self.sent = []
+        transport = patch("requests.adapters.HTTPAdapter.send",
+                          lambda adapter, request, **kwargs: self._fake_send(request))
+        transport.start()
+        self.addCleanup(transport.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _fake_send(self, request):
+        self.sent.append((request.method, request.url))
+        resp = requests.Response()
+        resp.status_code = 200
+        resp._content = b'{"id": "ord-1", "status": "accepted"}'
+        resp.url, resp.request = request.url, request
+        return resp
+
+    def _broker(self):
+        from stocks.us_broker import AlpacaBroker
+
+        broker = AlpacaBroker(live=False)
+        broker.api_key, broker.secret_key = "key", "secret"
+        return broker
+
+    def test_replayed_us_buy_makes_no_http_call(self):
+        broker = self._broker()
+        with ReplaySession("record", self.path, patch_postgrest=False):
+            recorded = broker.route_and_execute("AAPL", "buy", 3, price_hint=100.0, simulate=False)
+        self.assertEqual(self.sent, [("POST", "https://paper-api.alpaca.markets/v2/orders")])
+
+        self.sent.clear()
+        with ReplaySession("replay", self.path, patch_postgrest=False) as replay:
+            replayed = broker.route_and_execute("AAPL", "buy", 3, price_hint=100.0, simulate=False)
+            with self.assertRaises(ReplayMiss):                         # 기록 없는 주문 → miss, 전송 없음
+                broker.submit_order("AAPL", "buy", 1)
+        self.assertEqual(replayed, recorded)
+        self.assertEqual(self.sent, [])
+        self.assertGreaterEqual(replay.stats["misses"], 1)
+
+    def test_untapped_requests_fail_closed(self):
+        ReplayArchive().save(self.path)
+        with ReplaySession("replay", self.path, targets=(), patch_postgrest=False) as replay:
+            resp = requests.request("POST", "https://paper-api.alpaca.markets/v2/orders", json={"qty": 1})
+            self.assertEqual((resp.status_code, resp.json()), (200, {}))
+            with self.assertRaises(ReplayMiss):
+                requests.Session().get("https://example.com/quote")
+        self.assertEqual(self.sent, [])
+        self.assertEqual((replay.stats["stubbed"], replay.stats["misses"]), (1, 1))
+
+    def test_httpx_writes_stubbed(self):
+        import httpx
+
+        ReplayArchive().save(self.path)
+        with ReplaySession("replay", self.path, targets=(), patch_postgrest=False):
+            with httpx.Client() as client:
+                self.assertEqual(client.post("http://127.0.0.1:9/orders", json={}).json(), {})
+                with self.assertRaises(ReplayMiss):
+                    client.get("http://127.0.0.1:9/quote")
+
+    def test_alpaca_order_paths_are_targets(self):
+        ns = {t.namespace: t.kind for t in DEFAULT_TARGETS}
+        self.assertEqual(ns["stocks.us_broker.AlpacaBroker.submit_order"], "order")
+        self.assertEqual(ns["stocks.us_broker.AlpacaBroker.route_and_execute"], "order")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+"""Sector metadata table + batched exposure resolution tests."""
+from __future__ import annotations
+
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from quant.risk.exposure import ExposureManager
+from quant.risk.sector_metadata import SectorMetadataStore
+
+
+class _Fetcher:
+    def __init__(self, table, delay=0.05):
+        self.table = table
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, symbol):
+        with self._lock:
+            self.calls.append(symbol)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        return self.table.get(symbol)
+
+
+class SectorMetadataStoreTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / "sector.sqlite3"
+        self.seed = [{"stock_code": "005930", "industry": "반도체"}]
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _store(self, fetcher, **kw):
+        return SectorMetadataStore(path=self.path, fetcher=fetcher, seed_loader=lambda: self.seed, **kw)
+
+    def test_batch_fetch_then_warm_and_persisted(self) -> None:
+        fetcher = _Fetcher({"ABC": ("Industrials", "Machinery"), "DEF": ("Energy", "Oil")})
+        store = self._store(fetcher)
+        out = store.resolve_many(["AAPL", "005930", "abc", "DEF", "ZZZ", "ABC"])
+        self.assertEqual(out["AAPL"], "Technology")          # static map
+        self.assertEqual(out["005930"], "반도체")              # top50 seed
+        self.assertEqual(out["ABC"], "Industrials")
+        self.assertEqual(out["ZZZ"], "UNKNOWN")
+        self.assertEqual(sorted(fetcher.calls), ["ABC", "DEF", "ZZZ"])
+        self.assertGreater(fetcher.peak, 1)                  # one concurrent batch
+
+        store.resolve_many(["ABC", "DEF", "ZZZ"])            # misses are cached too
+        self.assertEqual(len(fetcher.calls), 3)
+        store.close()
+
+        reopened = self._store(_Fetcher({}))
+        reopened.seed_loader = lambda: (_ for _ in ()).throw(AssertionError("reseeded"))
+        self.assertEqual(reopened.get("abc"), {"sector": "Industrials", "industry": "Machinery"})
+        self.assertEqual(reopened.fetcher.calls, [])
+        reopened.close()
+
+    def test_expired_rows_are_refetched(self) -> None:
+        now = [1000.0]
+        fetcher = _Fetcher({"ABC": ("Technology", "")}, delay=0)
+        store = self._store(fetcher, ttl_seconds=100, miss_ttl_seconds=10, clock=lambda: now[0])
+        store.resolve_many(["ABC", "NOPE"])
+        now[0] += 20
+        self.assertEqual(store.resolve_many(["ABC", "NOPE"], fetch=False), {"ABC": "Technology", "NOPE": "UNKNOWN"})
+        store.resolve_many(["ABC", "NOPE"])
+        self.assertEqual(fetcher.calls, ["ABC", "NOPE", "NOPE"])
+        store.close()
+
+    def test_failed_refetch_keeps_known_sector(self) -> None:
+        now = [1000.0]
+        fetcher = _Fetcher({"ABC": ("Technology", "Software")}, delay=0)
+        store = self._store(fetcher, ttl_seconds=100, miss_ttl_seconds=10, clock=lambda: now[0])
+        store.resolve_many(["ABC"])
+        now[0] += 150
+        fetcher.table = {}                                   # provider down / rate limited
+        self.assertEqual(store.resolve_many(["ABC"]), {"ABC": "Technology"})
+        self.assertEqual(store.get("ABC"), {"sector": "Technology", "industry": "Software"})
+        now[0] += 5
+        store.resolve_many(["ABC"])
+        self.assertEqual(fetcher.calls, ["ABC", "ABC"])      # extended by miss_ttl only
+        now[0] += 10
+        store.resolve_many(["ABC"])
+        self.assertEqual(len(fetcher.calls), 3)
+        store.close()
+
+        reopened = self._store(_Fetcher({}), clock=lambda: now[0])
+        self.assertEqual(reopened.get("ABC"), {"sector": "Technology", "industry": "Software"})
+        reopened.close()
+
+
+class ExposureSectorTests(unittest.TestCase):
+    def test_exposure_uses_store_without_network_when_warm(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            fetcher = _Fetcher({"XYZ": ("Utilities", "")}, delay=0)
+            store = SectorMetadataStore(path=Path(tmp) / "s.sqlite3", fetcher=fetcher, seed_loader=list)
+            mgr = ExposureManager(sector_limit=0.5, sector_store=store)
+            positions = [
+                {"symbol": "AAPL", "market_value": 100},
+                {"symbol": "XYZ", "market_value": 100},
+                {"symbol": "XYZ", "market_value": 100},
+                {"symbol": "MSFT", "market_value": 100, "sector": "Software"},
+            ]
+            cold = mgr.sector_exposure(positions, yfinance_fallback=True)
+            self.assertEqual(cold["sector_exposure"]["Utilities"], 0.5)
+            self.assertEqual(fetcher.calls, ["XYZ"])
+            warm = mgr.summarize(positions, yfinance_fallback=True)
+            self.assertEqual(warm["sector"], cold)
+            self.assertEqual(fetcher.calls, ["XYZ"])
+            store.close()
+
+    def test_offline_lookup_does_not_seed_or_create_table(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "risk" / "s.sqlite3"
+            fetcher = _Fetcher({}, delay=0)
+            store = SectorMetadataStore(
+                path=path, fetcher=fetcher,
+                seed_loader=lambda: (_ for _ in ()).throw(AssertionError("seeded offline")),
+            )
+            mgr = ExposureManager(sector_limit=0.5, sector_store=store)
+            positions = [{"symbol": "AAPL", "market_value": 100}, {"symbol": "005930", "market_value": 100}]
+            out = mgr.sector_exposure(positions, yfinance_fallback=False)
+            self.assertEqual(out["sector_exposure"], {"Technology": 0.5, "UNKNOWN": 0.5})
+            self.assertIsNone(store.get("005930"))
+            self.assertEqual(fetcher.calls, [])
+            self.assertFalse(path.exists())
+
+            seeds = []
+            store.seed_loader = lambda: seeds.append(1) or [{"stock_code": "005930", "industry": "반도체"}]
+            self.assertEqual(store.resolve_many(["005930"]), {"005930": "반도체"})
+            store.resolve_many(["005930", "AAPL"])
+            self.assertEqual(seeds, [1])
+            self.assertTrue(path.exists())
+            store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
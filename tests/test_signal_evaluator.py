@@ -0,0 +1,90 @@
+"""Signal IC engine tests."""
+from __future__ import annotations
+
+import unittest
+
+import numpy as np
+
+from quant.signal_evaluator import (SignalEvaluator, compute_ic,
+                                    permutation_pvalue, rolling_rank_ic)
+
+
+def _reference_ic(signals, returns):
+    """Pure-Python compute_ic() prior to the NumPy engine."""
+    pairs = [(s, r) for s, r in zip(signals, returns) if s is not None and r is not None and s != 0 and r != 0]
+    if len(pairs) < 10:
+        return None
+
+    def _rank(values):
+        ranks = [0.0] * len(values)
+        for rank, (idx, _) in enumerate(sorted(enumerate(values), key=lambda x: x[1]), 1):
+            ranks[idx] = float(rank)
+        return ranks
+
+    rx, ry = _rank([p[0] for p in pairs]), _rank([p[1] for p in pairs])
+    n = len(rx)
+    mx, my = sum(rx) / n, sum(ry) / n
+    cov = sum((a - mx) * (b - my) for a, b in zip(rx, ry)) / n
+    sx = (sum((a - mx) ** 2 for a in rx) / n) ** 0.5
+    sy = (sum((b - my) ** 2 for b in ry) / n) ** 0.5
+    return round(cov / (sx * sy), 6)
+
+
+def _sample(n=300, seed=0, zeros=True, beta=0.2):
+    rng = np.random.default_rng(seed)
+    sig = rng.normal(size=n).round(1)          # rounding creates ties
+    ret = (beta * sig + rng.normal(size=n)).round(2)
+    sig, ret = sig.tolist(), ret.tolist()
+    if zeros:
+        for i in range(0, n, 17):
+            ret[i] = 0.0
+        sig[5] = None
+    return sig, ret
+
+
+class SignalEvaluatorEngineTests(unittest.TestCase):
+    def test_compute_ic_matches_reference(self) -> None:
+        sig, ret = _sample()
+        self.assertEqual(compute_ic(sig, ret), _reference_ic(sig, ret))
+        self.assertIsNone(compute_ic(sig[:8], ret[:8]))
+
+    def test_rolling_ic_matches_window_loop(self) -> None:
+        sig, ret = _sample(n=200)
+        for w, step in ((14, 7), (20, 10), (30, 1)):
+            expected = []
+            for start in range(0, len(sig) - w + 1, step):
+                ic = _reference_ic(sig[start:start + w], ret[start:start + w])
+                if ic is not None:
+                    expected.append(ic)
+            got = rolling_rank_ic(sig, ret, window=w, step=step)
+            self.assertEqual(len(got), len(expected))
+            self.assertTrue(np.allclose(got, expected, atol=1e-6))
+
+    def test_permutation_seeded_and_early_stop(self) -> None:
+        sig, ret = _sample(n=200, zeros=False, beta=0.5)
+        p1, used1 = permutation_pvalue(sig, ret, n_perms=5000, seed=3, early_stop=False)
+        p2, used2 = permutation_pvalue(sig, ret, n_perms=5000, seed=3, early_stop=False)
+        self.assertEqual((p1, used1), (p2, used2))
+        self.assertEqual(used1, 5000)
+        self.assertLess(p1, 0.05)
+
+        # clearly decided → stops at the first check
+        _, used = permutation_pvalue(sig, ret, n_perms=20_000, seed=3)
+        self.assertEqual(used, 1000)
+
+        rng = np.random.default_rng(9)
+        noise_sig = rng.normal(size=200).tolist()
+        noise_ret = rng.normal(size=200).tolist()
+        p_null, used_null = permutation_pvalue(noise_sig, noise_ret, n_perms=20_000, seed=3)
+        self.assertGreater(p_null, 0.05)
+        self.assertLess(used_null, 20_000)
+
+    def test_evaluator_uses_configured_permutations(self) -> None:
+        sig, ret = _sample(n=200, zeros=False)
+        ev = SignalEvaluator(supabase_client=object(), n_perms=2000, perm_seed=1)
+        self.assertEqual(ev._permutation_test(sig, ret), ev._permutation_test(sig, ret))
+        self.assertEqual(ev._permutation_test(sig[:5], ret[:5]), 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
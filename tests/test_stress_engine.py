@@ -0,0 +1,98 @@
+"""Historical replay / covariance stress engine tests."""
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from quant.risk.covariance import ledoit_wolf, nearest_psd
+from quant.stress_engine import (HistoricalWindow, ReturnPanelData,
+                                 StressEngine, StressLimits, summarize)
+
+
+def _panel(n_days=400, seed=5):
+    rng = np.random.default_rng(seed)
+    common = rng.normal(0, 0.01, (n_days, 1))
+    returns = common * np.array([2.0, 1.0, 1.0]) + rng.normal(0, 0.005, (n_days, 3))
+    dates = np.datetime64("2020-01-01") + np.arange(n_days).astype("timedelta64[D]")
+    return ReturnPanelData(dates, ["btc", "kr_equity", "us_equity"], returns)
+
+
+class CovarianceTests(unittest.TestCase):
+    def test_ledoit_wolf_against_closed_form(self) -> None:
+        rng = np.random.default_rng(0)
+        X = rng.normal(size=(60, 20))
+        cov, shrink = ledoit_wolf(X)
+        self.assertTrue(0.0 <= shrink <= 1.0)
+        self.assertTrue(np.allclose(cov, cov.T))
+        self.assertGreater(np.linalg.eigvalsh(cov).min(), 0.0)
+
+        Xc = X - X.mean(axis=0)
+        S = Xc.T @ Xc / len(X)
+        mu = np.trace(S) / S.shape[0]
+        d2 = ((S - mu * np.eye(20)) ** 2).sum()
+        b2 = sum(((np.outer(x, x) - S) ** 2).sum() for x in Xc) / len(X) ** 2
+        expected = min(b2, d2) / d2
+        self.assertAlmostEqual(shrink, expected, places=10)
+
+    def test_nearest_psd_clips_negative_eigenvalues(self) -> None:
+        bad = np.array([[1.0, 2.0], [2.0, 1.0]])
+        fixed = nearest_psd(bad)
+        self.assertGreaterEqual(np.linalg.eigvalsh(fixed).min(), 0.0)
+
+
+class StressEngineTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.panel = _panel()
+        self.weights = {"btc": 0.3, "kr_equity": 0.3, "us_equity": 0.4}
+
+    def test_replay_matches_compounded_window(self) -> None:
+        engine = StressEngine(self.panel, self.weights, 1_000_000)
+        windows = [
+            HistoricalWindow("A", "2020-02-01", "2020-02-10"),
+            HistoricalWindow("B", "2020-03-01", "2020-03-31"),
+        ]
+        out = engine.replay(windows)
+        self.assertEqual([r["days"] for r in out], [10, 31])
+        lo = int((np.datetime64("2020-03-01") - self.panel.dates[0]).astype(int))
+        port = self.panel.returns[lo:lo + 31] @ np.array([0.3, 0.3, 0.4])
+        equity = np.cumprod(1 + port)
+        self.assertAlmostEqual(out[1]["pnl_pct"], round((equity[-1] - 1) * 100, 4), places=4)
+        dd = (equity / np.maximum.accumulate(np.maximum(equity, 1.0)) - 1).min() * 100
+        self.assertAlmostEqual(out[1]["max_drawdown_pct"], round(dd, 4), places=4)
+
+    def test_conditional_shock_propagates_through_covariance(self) -> None:
+        engine = StressEngine(self.panel, self.weights, 1_000_000, limits=StressLimits(max_loss_pct=5.0))
+        full = engine.propagate(["btc"], np.array([[-0.20]]))
+        self.assertAlmostEqual(full[0, 0], -0.20)
+        # positively correlated equities fall too, by less than the shocked asset
+        self.assertTrue(np.all(full[0, 1:] < 0))
+        self.assertTrue(np.all(full[0, 1:] > -0.20))
+        res = engine.conditional_scenarios(["btc"], np.array([[-0.01], [-0.40]]))
+        self.assertEqual(res[0]["breached"], [])
+        self.assertIn("max_loss", res[1]["breached"])
+
+    def test_random_scenarios_vectorized_and_seeded(self) -> None:
+        engine = StressEngine(self.panel, self.weights, 1_000_000)
+        a = engine.random_scenarios(n=2000, seed=1)
+        b = engine.random_scenarios(n=2000, seed=1)
+        self.assertEqual(len(a), 2000)
+        self.assertEqual([r["pnl_pct"] for r in a[:50]], [r["pnl_pct"] for r in b[:50]])
+        summary = summarize(a, top=3)
+        self.assertEqual(len(summary["worst"]), 3)
+        self.assertLessEqual(summary["worst"][0]["pnl_pct"], summary["worst"][1]["pnl_pct"])
+
+    def test_panel_cache_roundtrip(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = self.panel.save(Path(tmp) / "panel.npz")
+            loaded = ReturnPanelData.load(path)
+        self.assertEqual(loaded.assets, self.panel.assets)
+        self.assertTrue(np.array_equal(loaded.dates, self.panel.dates))
+        self.assertTrue(np.allclose(loaded.returns, self.panel.returns))
+        self.assertIsNone(ReturnPanelData.load(Path("/nonexistent/panel.npz")))
+
+
+if __name__ == "__main__":
+    unittest.main()
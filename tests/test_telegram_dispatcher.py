@@ -0,0 +1,200 @@
+"""Telegram background dispatcher and append-only INFO buffer tests."""
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from common import telegram as tg
+from common.telegram import Priority, TelegramDispatcher, TokenBucket
+
+
+class _Recorder:
+    def __init__(self, block: threading.Event | None = None, results=None):
+        self.sent: list[str] = []
+        self.block = block
+        self.results = list(results or [])
+
+    def __call__(self, text: str, parse_mode: str):
+        if self.block is not None:
+            self.block.wait(5)
+        self.sent.append(text)
+        return self.results.pop(0) if self.results else (True, 200, 0.0)
+
+
+class TelegramDispatcherTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmp.name)
+        self.outbox = self.tmp / "outbox.jsonl"
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _dispatcher(self, post, **kw) -> TelegramDispatcher:
+        d = TelegramDispatcher(outbox_path=self.outbox, post=post, rate=kw.pop("rate", 1000.0), **kw)
+        self.addCleanup(d.close, 2.0)
+        return d
+
+    def test_priority_order_and_digest_coalescing(self) -> None:
+        gate = threading.Event()
+        rec = _Recorder(block=gate)
+        d = self._dispatcher(rec, burst=1, max_chars=40)
+        d.submit("first", "HTML", Priority.IMPORTANT, 2)       # occupies the worker
+        deadline = time.time() + 5
+        while d._inflight != 1 and time.time() < deadline:
+            time.sleep(0.001)
+        for i in range(6):
+            d.submit(f"trade-{i}", "HTML", Priority.IMPORTANT, 2)
+        d.submit("STOP LOSS", "HTML", Priority.URGENT, 2)
+        gate.set()
+        self.assertTrue(d.flush(5))
+        self.assertEqual(rec.sent[0], "first")
+        self.assertEqual(rec.sent[1], "STOP LOSS")
+        digests = rec.sent[2:]
+        self.assertEqual("\n\n".join(digests).split("\n\n"), [f"trade-{i}" for i in range(6)])
+        self.assertLess(len(digests), 6)
+        self.assertTrue(all(len(m) <= 40 for m in digests))
+        self.assertEqual(d.stats["messages"], 8)
+
+    def test_submit_does_not_block_caller(self) -> None:
+        gate = threading.Event()
+        d = self._dispatcher(_Recorder(block=gate), rate=1.0, burst=1)
+        t0 = time.perf_counter()
+        for i in range(20):
+            d.submit(f"m{i}", "HTML", Priority.URGENT, 2)
+        self.assertLess(time.perf_counter() - t0, 0.5)
+        gate.set()
+
+    def test_retry_then_ack_in_outbox(self) -> None:
+        rec = _Recorder(results=[(False, 500, 0.0)])
+        d = self._dispatcher(rec)
+        d.bucket.pause = lambda seconds: None          # skip backoff wait
+        mid = d.submit("hello", "HTML", Priority.URGENT, 2)
+        self.assertTrue(d.flush(5))
+        self.assertEqual(rec.sent, ["hello", "hello"])
+        rows = [json.loads(line) for line in self.outbox.read_text().splitlines()]
+        self.assertIn({"ack": mid}, rows)
+
+    def test_recover_adopts_dead_process_messages(self) -> None:
+        dead_pid = 2 ** 22 + 12345
+        with patch.object(tg, "_pid_alive", side_effect=lambda pid: pid != dead_pid):
+            tg._append_jsonl(self.outbox, {"id": "a", "pid": dead_pid, "ts": 1, "priority": "urgent",
+                                           "text": "lost", "parse_mode": "HTML", "retries": 2})
+            tg._append_jsonl(self.outbox, {"id": "b", "pid": dead_pid, "ts": 2, "priority": "urgent",
+                                           "text": "done", "parse_mode": "HTML", "retries": 2})
+            tg._append_jsonl(self.outbox, {"ack": "b"})
+            tg._append_jsonl(self.outbox, {"id": "c", "pid": 1, "ts": 3, "priority": "urgent",
+                                           "text": "other live process", "parse_mode": "HTML", "retries": 2})
+            rec = _Recorder()
+            d = self._dispatcher(rec)
+            self.assertEqual(d.recover(), 1)
+            self.assertTrue(d.flush(5))
+            self.assertEqual(rec.sent, ["lost"])
+            # second process sees the claim and does not resend
+            other = self._dispatcher(_Recorder())
+            self.assertEqual(other.recover(), 0)
+
+    def test_compaction_keeps_own_pending_messages(self) -> None:
+        gate = threading.Event()
+        rec = _Recorder(block=gate)
+        d = self._dispatcher(rec)
+        with patch.object(tg, "_OUTBOX_COMPACT_BYTES", 0):       # every ack compacts
+            ids = [d.submit(f"m{i}", "HTML", Priority.URGENT, 2) for i in range(5)]
+            gate.set()
+            self.assertTrue(d.flush(5))
+        self.assertEqual(rec.sent, [f"m{i}" for i in range(5)])
+        self.assertEqual(d.stats["recovered"], 0)
+        rows = [json.loads(line) for line in self.outbox.read_text().splitlines()]
+        self.assertFalse([r for r in rows if r.get("id") in ids])   # compacted away once acked
+
+    def test_wait_delivered_reports_outcome(self) -> None:
+        rec = _Recorder(results=[(True, 200, 0.0), (False, 400, 0.0)])
+        d = self._dispatcher(rec)
+        ok_id = d.submit("ok", "HTML", Priority.URGENT, 0, track=True)
+        self.assertTrue(d.wait_delivered(ok_id, 5))
+        bad_id = d.submit("bad", "HTML", Priority.URGENT, 0, track=True)
+        self.assertFalse(d.wait_delivered(bad_id, 5))
+        self.assertEqual(d.stats["failed"], 1)
+        self.assertEqual(d._waiters, {})
+
+    def test_wait_delivered_times_out_while_queued(self) -> None:
+        gate = threading.Event()
+        d = self._dispatcher(_Recorder(block=gate))
+        mid = d.submit("slow", "HTML", Priority.URGENT, 0, track=True)
+        self.assertFalse(d.wait_delivered(mid, 0.05))
+        gate.set()
+        self.assertTrue(d.flush(5))
+
+    def test_token_bucket(self) -> None:
+        now = [0.0]
+        bucket = TokenBucket(rate=1.0, capacity=2, clock=lambda: now[0])
+        self.assertEqual(bucket.wait_time(), 0.0)
+        self.assertEqual(bucket.wait_time(), 0.0)
+        self.assertAlmostEqual(bucket.wait_time(), 1.0)
+        now[0] = 1.0
+        self.assertEqual(bucket.wait_time(), 0.0)
+        bucket.pause(5)
+        self.assertAlmostEqual(bucket.wait_time(), 5.0)
+
+
+class InfoBufferTests(unittest.TestCase):
+    def test_append_only_buffer_views(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp, \
+                patch.object(tg, "_INFO_BUFFER_FILE", Path(tmp) / "info.jsonl"):
+            tg._append_jsonl(tg._INFO_BUFFER_FILE, {"date": "2000-01-01", "hour": "09", "msg": "old"})
+            with patch.object(tg.time, "strftime", side_effect=lambda fmt: "2000-01-02" if "Y" in fmt else "10"):
+                tg.append_info_buffer("a")
+                tg.append_info_buffer("b")
+            data = tg.load_info_buffer()
+            self.assertEqual(data, {"date": "2000-01-02", "msgs": ["a", "b"], "hours": {"10": ["a", "b"]}})
+            tg.mark_info_hour_briefed("2000-01-02", "10")
+            self.assertEqual(tg.load_info_buffer()["hours"], {})
+            self.assertEqual(tg.flush_info_buffer(), ["a", "b"])
+            self.assertEqual(tg.flush_info_buffer(), [])
+
+    def test_legacy_json_buffer_is_migrated_once(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            legacy = Path(tmp) / "info.json"
+            legacy.write_text(json.dumps({
+                "date": "2000-01-02",
+                "msgs": ["a", "b", "c"],
+                "hours": {"09": [], "10": ["b", "c"]},   # 09시는 이미 브리핑됨
+            }), encoding="utf-8")
+            with patch.object(tg, "_INFO_BUFFER_FILE", Path(tmp) / "info.jsonl"), \
+                    patch.object(tg, "_LEGACY_INFO_BUFFER_FILE", legacy):
+                data = tg.load_info_buffer()
+                self.assertEqual(data, {"date": "2000-01-02", "msgs": ["a", "b", "c"], "hours": {"10": ["b", "c"]}})
+                self.assertFalse(legacy.exists())
+                self.assertEqual(tg.load_info_buffer(), data)
+                self.assertEqual(tg.flush_info_buffer(), ["a", "b", "c"])
+            self.assertEqual(sorted(p.name for p in Path(tmp).iterdir()), ["info.jsonl"])
+
+    def test_send_telegram_routes(self) -> None:
+        with patch.object(tg, "append_info_buffer") as info, \
+                patch.object(tg, "get_dispatcher") as get_d, \
+                patch.dict(os.environ, {"TELEGRAM_BOT_TOKEN": "t", "TELEGRAM_CHAT_ID": "c"}):
+            self.assertTrue(tg.send_telegram("x", priority=Priority.INFO))
+            info.assert_called_once_with("x")
+            self.assertTrue(tg.send_telegram("y", priority=Priority.IMPORTANT))
+            get_d.return_value.submit.assert_called_once_with("y", "HTML", Priority.IMPORTANT, 2)
+        with patch.dict(os.environ, {"TELEGRAM_BOT_TOKEN": "", "TELEGRAM_CHAT_ID": ""}):
+            self.assertFalse(tg.send_telegram("z"))
+
+    def test_deliver_telegram_waits_for_outcome(self) -> None:
+        with patch.object(tg, "get_dispatcher") as get_d, \
+                patch.dict(os.environ, {"TELEGRAM_BOT_TOKEN": "t", "TELEGRAM_CHAT_ID": "c"}):
+            get_d.return_value.submit.return_value = "m1"
+            get_d.return_value.wait_delivered.return_value = False
+            self.assertFalse(tg.deliver_telegram("y", priority=Priority.IMPORTANT, timeout=3))
+            get_d.return_value.submit.assert_called_once_with("y", "HTML", Priority.IMPORTANT, 2, track=True)
+            get_d.return_value.wait_delivered.assert_called_once_with("m1", 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
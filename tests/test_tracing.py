@@ -0,0 +1,133 @@
+"""Cycle tracing: nested spans, no-op outside cycles, JSONL + Prometheus export."""
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from common import tracing
+from common.metrics import summarize_stage_latency
+from common.tracing import (_NULL, propagate, read_traces, span, trace_cycle,
+                            traced, traced_cycle)
+
+
+@traced("data_fetch.ohlcv")
+def _fetch(delay=0.01):
+    time.sleep(delay)
+    return "rows"
+
+
+@traced("indicators")
+def _indicators():
+    with span("indicators.volume"):
+        time.sleep(0.005)
+    return 42
+
+
+class TracingTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "trace.jsonl"
+        self.observed = []
+        patcher = patch("common.prometheus_metrics.observe_stage_latency",
+                        side_effect=lambda m, s, v: self.observed.append((m, s, v)))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_disabled_outside_cycle(self):
+        self.assertIs(span("x"), _NULL)
+        self.assertEqual(_fetch(0), "rows")
+        self.assertFalse(self.path.exists())
+        with patch.dict("os.environ", {"OPENCLAW_TRACE": "0"}):
+            self.assertIs(trace_cycle("BTC", self.path), _NULL)
+
+    def test_nested_stages_recorded(self):
+        with trace_cycle("BTC", self.path) as cycle:
+            _fetch()
+            _fetch()
+            self.assertEqual(_indicators(), 42)
+            with span("order"):
+                with span("order"):                                 # 같은 스테이지 중첩은 한 번만 집계
+                    time.sleep(0.002)
+            cycle.set_result("HOLD")
+
+        rec = cycle.record
+        self.assertEqual((rec["market"], rec["result"]), ("BTC", "HOLD"))
+        stacks = {s["stack"]: s for s in rec["stacks"]}
+        self.assertEqual(stacks["cycle;data_fetch.ohlcv"]["n"], 2)
+        self.assertIn("cycle;indicators;indicators.volume", stacks)
+        ind = stacks["cycle;indicators"]
+        self.assertLessEqual(ind["self_ms"], ind["ms"])
+        self.assertGreaterEqual(rec["stages"]["data_fetch.ohlcv"], 20)
+        self.assertAlmostEqual(rec["stages"]["order"], stacks["cycle;order"]["ms"])
+        self.assertGreaterEqual(rec["duration_ms"], sum(
+            s["ms"] for p, s in stacks.items() if p.count(";") == 1))
+
+        on_disk = list(read_traces(self.path))
+        self.assertEqual(on_disk, [json.loads(json.dumps(rec))])
+        stages = {s for m, s, _ in self.observed if m == "BTC"}
+        self.assertEqual(stages, {"cycle", "data_fetch.ohlcv", "indicators", "indicators.volume", "order"})
+
+    def test_decorated_cycle_records_result_and_errors(self):
+        @traced_cycle("KR")
+        def cycle(fail=False):
+            _fetch(0)
+            if fail:
+                raise RuntimeError("boom")
+            return {"result": "BUY"}
+
+        with patch.object(tracing, "TRACE_FILE", self.path):
+            self.assertEqual(cycle(), {"result": "BUY"})
+            with self.assertRaises(RuntimeError):
+                cycle(fail=True)
+        first, second = read_traces(self.path, market="KR")
+        self.assertEqual(first["result"], "BUY")
+        self.assertEqual((second["result"], second["error"]), ("error", "RuntimeError"))
+        self.assertIs(span("x"), _NULL)                             # 예외 후에도 컨텍스트 정리
+
+    def test_spans_are_per_thread(self):
+        seen = []
+        with trace_cycle("US", self.path) as cycle:
+            t = threading.Thread(target=lambda: seen.append(span("worker")))
+            t.start()
+            t.join()
+        self.assertIs(seen[0], _NULL)
+        self.assertEqual([s["stack"] for s in cycle.record["stacks"]], ["cycle"])
+
+    def test_pool_work_attributed_to_submitting_span(self):
+        with trace_cycle("KR", self.path) as cycle:
+            with span("data_fetch"), ThreadPoolExecutor(max_workers=4) as pool:
+                futures = [pool.submit(propagate(_fetch), 0.005) for _ in range(4)]
+                self.assertEqual([f.result() for f in futures], ["rows"] * 4)
+                pool.submit(lambda: span("unbound")).result()       # 바인딩 없이 제출한 작업은 추적 안 됨
+            with span("llm"):
+                asyncio.run(asyncio.to_thread(_indicators))
+        stacks = {s["stack"]: s for s in cycle.record["stacks"]}
+        self.assertEqual(stacks["cycle;data_fetch;data_fetch.ohlcv"]["n"], 4)
+        self.assertIn("cycle;llm;indicators;indicators.volume", stacks)
+        self.assertNotIn("unbound", json.dumps(cycle.record))
+        self.assertIs(span("x"), _NULL)
+
+    def test_summary_quantiles(self):
+        for delay in (0.0, 0.01):
+            with trace_cycle("BTC", self.path):
+                _fetch(delay)
+        summary = summarize_stage_latency(read_traces(self.path))
+        row = summary[("BTC", "data_fetch.ohlcv")]
+        self.assertEqual(row["n"], 2)
+        self.assertLessEqual(row["p50_ms"], row["p95_ms"])
+        self.assertLessEqual(row["p95_ms"], row["max_ms"])
+        self.assertIn(("BTC", "cycle"), summary)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+"""US momentum rotation panel engine tests (synthetic prices, no network)."""
+from __future__ import annotations
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from stocks.us_momentum_backtest import (_build_rebalance_dates,
+                                         _top_n_columns,
+                                         calc_momentum_score_for_series,
+                                         momentum_score_panel,
+                                         sweep_momentum_rotation)
+
+
+def _panel(n_rows=200, n_cols=12, seed=0):
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range("2020-01-01", periods=n_rows)
+    cols = [f"S{i:02d}" for i in range(n_cols)]
+    c = 100 * np.exp(np.cumsum(rng.normal(0.0005, 0.02, (n_rows, n_cols)), axis=0))
+    h = c * (1 + np.abs(rng.normal(0, 0.01, (n_rows, n_cols))))
+    v = rng.uniform(1e5, 1e6, (n_rows, n_cols))
+    c[:90, 0] = np.nan                      # late listing
+    c[[70, 71, 150], 1] = np.nan            # trading halts
+    h[[80, 120], 2] = np.nan
+    v[[100, 101], 3] = np.nan
+    return (pd.DataFrame(c, idx, cols), pd.DataFrame(h, idx, cols), pd.DataFrame(v, idx, cols))
+
+
+class MomentumScorePanelTests(unittest.TestCase):
+    def test_matches_series_function_including_gaps(self) -> None:
+        closes, highs, volumes = _panel()
+        scores = momentum_score_panel(closes, highs, volumes, lookback=60)
+        for t in range(25, len(closes)):
+            lo = max(0, t - 60)
+            for sym in closes.columns:
+                ref = calc_momentum_score_for_series(
+                    sym,
+                    closes[sym].iloc[lo:t + 1].dropna(),
+                    highs[sym].iloc[lo:t + 1].dropna(),
+                    volumes[sym].iloc[lo:t + 1].dropna(),
+                )
+                got = scores.at[closes.index[t], sym]
+                if ref is None:
+                    self.assertTrue(np.isnan(got), (t, sym))
+                else:
+                    self.assertEqual(got, ref.score, (t, sym))
+
+    def test_gap_fallback_uses_same_high_window_as_fast_path(self) -> None:
+        rng = np.random.default_rng(5)
+        idx = pd.bdate_range("2020-01-01", periods=200)
+        c = np.repeat(100 * np.exp(np.cumsum(rng.normal(0.0005, 0.02, (200, 1)), axis=0)), 2, axis=1)
+        h = c * 1.01
+        h[99] = h.max() * 1.5                                 # 60일 밖, 120일 안의 신고가
+        v = np.repeat(rng.uniform(1e5, 1e6, (200, 1)), 2, axis=1)
+        closes, highs, volumes = (pd.DataFrame(a, idx, ["S00", "S01"]) for a in (c, h, v))
+        closes.iloc[89, 1] = np.nan                           # S01만 결측 → 시리즈 경로
+        scores = momentum_score_panel(closes, highs, volumes, lookback=120)
+        for t in range(190, 200):
+            fast, gappy = scores.iloc[t, 0], scores.iloc[t, 1]
+            self.assertFalse(np.isnan(fast))
+            self.assertEqual(fast, gappy, t)
+
+    def test_top_n_breaks_ties_by_column_order(self) -> None:
+        row = np.array([50.0, np.nan, 70.0, 50.0, 70.0, 50.0])
+        self.assertEqual(sorted(_top_n_columns(row, 3)), [0, 2, 4])
+        self.assertEqual(sorted(_top_n_columns(row, 1)), [2])
+
+
+class SweepTests(unittest.TestCase):
+    def test_sweep_runs_all_combinations_on_shared_period(self) -> None:
+        closes, highs, volumes = _panel(n_rows=320, n_cols=20, seed=3)
+        results = sweep_momentum_rotation(
+            closes, highs, volumes, lookbacks=(60, 120), top_percents=(5.0, 50.0),
+        )
+        self.assertEqual([(r["lookback"], r["top_percent"]) for r in results],
+                         [(60, 5.0), (60, 50.0), (120, 5.0), (120, 50.0)])
+        expected_points = len(_build_rebalance_dates(closes.index, 21, start=120)) - 1
+        for r in results:
+            self.assertEqual(r["points"], expected_points)
+            self.assertEqual(r["start_date"], results[0]["start_date"])
+            self.assertLessEqual(r["max_drawdown_pct"], 0.0)
+        # top 5% of 20 → 1 name per rebalance, 50% → 10
+        self.assertEqual(results[0]["avg_holdings"], 1.0)
+        self.assertEqual(results[1]["holdings"].shape[1], 20)
+        self.assertTrue((np.count_nonzero(results[1]["holdings"].to_numpy(), axis=1) <= 10).all())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+"""Vectorized VaR engine tests."""
+from __future__ import annotations
+
+import math
+import unittest
+
+import numpy as np
+
+from quant.risk.var_engine import ReturnPanel, VaREngine, var_cvar_from_samples
+from quant.risk.var_model import VaRModel, compute_var_metrics
+
+
+def _reference_historical(port, confidence):
+    """Pure-Python percentile/tail mean (the pre-NumPy var_model implementation)."""
+    arr = sorted(port)
+    pos = (1.0 - confidence) * (len(arr) - 1)
+    lo, hi = int(math.floor(pos)), int(math.ceil(pos))
+    q = arr[lo] if lo == hi else arr[lo] * (1 - (pos - lo)) + arr[hi] * (pos - lo)
+    tail = [r for r in port if r <= q]
+    return max(0.0, -q), max(0.0, -sum(tail) / len(tail))
+
+
+def _sample_book(n_assets=8, n_days=252, seed=3):
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0, 0.01, (n_days, 1))
+    returns = market + rng.standard_t(4, (n_days, n_assets)) * 0.008
+    symbols = [f"S{i}" for i in range(n_assets)]
+    positions = [{"symbol": s, "market_value": 1000 * (i + 1)} for i, s in enumerate(symbols)]
+    return symbols, returns, positions
+
+
+class VaREngineTests(unittest.TestCase):
+    def test_historical_matches_reference_implementation(self) -> None:
+        symbols, returns, positions = _sample_book()
+        matrix = {s: returns[:, i].tolist() for i, s in enumerate(symbols)}
+        out = compute_var_metrics(positions, matrix)
+
+        total = sum(p["market_value"] for p in positions)
+        w = [p["market_value"] / total for p in positions]
+        port = [sum(w[j] * returns[t, j] for j in range(len(w))) for t in range(len(returns))]
+        var_95, cvar_95 = _reference_historical(port, 0.95)
+        var_99, _ = _reference_historical(port, 0.99)
+        self.assertAlmostEqual(out["var_95"], round(var_95, 6), places=6)
+        self.assertAlmostEqual(out["cvar_95"], round(cvar_95, 6), places=6)
+        self.assertAlmostEqual(out["var_99"], round(var_99, 6), places=6)
+
+        full = VaRModel().compute_full(positions, matrix)
+        self.assertAlmostEqual(full["methods"]["historical"]["var_95"], out["var_95"], places=6)
+
+    def test_component_var_sums_to_parametric(self) -> None:
+        symbols, returns, _ = _sample_book()
+        weights = {s: 1.0 / len(symbols) for s in symbols}
+        out = VaREngine(n_paths=5000).compute(ReturnPanel(symbols, returns), weights)
+        total = sum(p["component_var"] for p in out["positions"].values())
+        self.assertAlmostEqual(total, out["parametric_var"], places=5)
+        for name in ("filtered", "block_bootstrap", "monte_carlo"):
+            row = out["methods"][name]
+            self.assertEqual(row["paths"], 5000)
+            self.assertGreaterEqual(row["cvar_95"], row["var_95"])
+
+    def test_seeded_and_horizon_scaling(self) -> None:
+        symbols, returns, _ = _sample_book()
+        weights = {s: 1.0 / len(symbols) for s in symbols}
+        panel = ReturnPanel(symbols, returns)
+        a = VaREngine(seed=7).compute(panel, weights, methods=("monte_carlo",))
+        b = VaREngine(seed=7).compute(panel, weights, methods=("monte_carlo",))
+        self.assertEqual(a["methods"], b["methods"])
+        ten = VaREngine(seed=7, horizon_days=10).compute(panel, weights, methods=("block_bootstrap",))
+        one = VaREngine(seed=7, horizon_days=1).compute(panel, weights, methods=("block_bootstrap",))
+        self.assertGreater(ten["methods"]["block_bootstrap"]["var_99"], one["methods"]["block_bootstrap"]["var_99"])
+
+    def test_var_cvar_from_empty_samples(self) -> None:
+        self.assertEqual(var_cvar_from_samples(np.array([]), 0.95), (0.0, 0.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
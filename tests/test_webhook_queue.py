@@ -0,0 +1,157 @@
+"""Webhook spool / dispatcher tests against a local mock receiver."""
+from __future__ import annotations
+
+import asyncio
+import json
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from api import webhook_manager as wm
+from api.webhook_queue import (CircuitBreaker, DeliveryLogWriter,
+                               DispatcherConfig, MockReceiver,
+                               WebhookDispatcher, WebhookSpool)
+
+
+def _hooks(receiver, paths):
+    return [{"id": f"h{i}", "url": receiver.url(p), "events": ["alert"], "active": True} for i, p in enumerate(paths)]
+
+
+class WebhookQueueTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.receiver = MockReceiver().start()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.receiver.stop()
+
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmp.name)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _dispatcher(self, **cfg) -> WebhookDispatcher:
+        spool = WebhookSpool(self.tmp / "spool.sqlite3")
+        config = DispatcherConfig(**{"timeout": 2.0, "backoff_base": 0.05, "idle_poll": 0.05, **cfg})
+        dispatcher = WebhookDispatcher(spool, DeliveryLogWriter(self.tmp / "log.jsonl", batch_size=1000), config)
+        self.addCleanup(spool.close)
+        self.addCleanup(dispatcher.stop)
+        return dispatcher
+
+    def test_enqueue_is_persistent_without_worker(self) -> None:
+        spool = WebhookSpool(self.tmp / "spool.sqlite3")
+        dispatcher = WebhookDispatcher(spool, DeliveryLogWriter(self.tmp / "log.jsonl"))
+        out = wm.enqueue_event("alert", {"x": 1}, registry=_hooks(self.receiver, ["/ok/a", "/ok/b"]),
+                               dispatcher=dispatcher)
+        self.assertEqual(out["queued"], 2)
+        spool.close()
+        reopened = WebhookSpool(self.tmp / "spool.sqlite3")
+        self.assertEqual(len(reopened), 2)
+        body = json.loads(reopened.claim(10, lease_seconds=5)[0].body)
+        self.assertEqual(body["data"], {"x": 1})
+        self.assertEqual(reopened.claim(10, lease_seconds=5), [])       # leased
+        reopened.close()
+
+    def test_slow_endpoint_does_not_delay_others(self) -> None:
+        dispatcher = self._dispatcher(per_endpoint_concurrency=1)
+        dispatcher.start()
+        hooks = _hooks(self.receiver, ["/slow/1.5"] + [f"/ok/fast{i}" for i in range(20)])
+        t0 = time.time()
+        wm.enqueue_event("alert", {}, registry=hooks, dispatcher=dispatcher)
+        while sum(self.receiver.hits[f"/ok/fast{i}"] for i in range(20)) < 20:
+            self.assertLess(time.time() - t0, 1.0)
+            time.sleep(0.005)
+        self.assertTrue(dispatcher.wait_idle(timeout=5))
+        self.assertEqual(dispatcher.stats["sent"], 21)
+        dispatcher.stop()
+        rows = [json.loads(line) for line in (self.tmp / "log.jsonl").read_text().splitlines()]
+        self.assertEqual(len(rows), 21)
+        self.assertTrue(all(r["status"] == "ok" for r in rows))
+
+    def test_lease_expiry_while_queued_does_not_duplicate(self) -> None:
+        # 10 x 0.3 s through one slot outlasts the 4 x timeout = 2 s lease
+        dispatcher = self._dispatcher(timeout=0.5, per_endpoint_concurrency=1)
+        dispatcher.start()
+        hooks = [{"id": f"h{i}", "url": self.receiver.url("/slow/0.3"), "events": ["alert"], "active": True}
+                 for i in range(10)]
+        wm.enqueue_event("alert", {}, registry=hooks, dispatcher=dispatcher)
+        self.assertTrue(dispatcher.wait_idle(timeout=10))
+        self.assertEqual(self.receiver.hits["/slow/0.3"], 10)
+        self.assertEqual(dispatcher.stats["sent"], 10)
+        self.assertEqual(len(dispatcher.spool), 0)
+
+    def test_claim_skips_excluded_ids(self) -> None:
+        spool = WebhookSpool(self.tmp / "spool.sqlite3")
+        self.addCleanup(spool.close)
+        spool.enqueue_many([(None, "http://x/a", "alert", b"{}", "s"), (None, "http://x/b", "alert", b"{}", "s")])
+        first = spool.claim(10, lease_seconds=0)
+        again = spool.claim(10, lease_seconds=0, exclude={first[0].id})
+        self.assertEqual([d.id for d in again], [first[1].id])
+
+    def test_retries_then_dead_letter_and_circuit_breaker(self) -> None:
+        dispatcher = self._dispatcher(max_attempts=3, failure_threshold=3, cooldown=30.0)
+        dispatcher.start()
+        wm.enqueue_event("alert", {}, registry=_hooks(self.receiver, ["/fail/x"]), dispatcher=dispatcher)
+        deadline = time.time() + 5
+        while dispatcher.stats["dead"] < 1 and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.receiver.hits["/fail/x"], 3)
+        self.assertEqual(dispatcher.stats["retried"], 2)
+        self.assertEqual(len(dispatcher.spool), 0)
+
+        # breaker is open now: a new event is deferred, not sent
+        wm.enqueue_event("alert", {}, registry=_hooks(self.receiver, ["/fail/x"]), dispatcher=dispatcher)
+        time.sleep(0.3)
+        self.assertEqual(self.receiver.hits["/fail/x"], 3)
+        self.assertGreaterEqual(dispatcher.stats["deferred"], 1)
+        self.assertEqual(len(dispatcher.spool), 1)
+
+    def test_breaker_half_open_probe(self) -> None:
+        br = CircuitBreaker(failure_threshold=2, cooldown=10)
+        br.record(False, 0)
+        br.record(False, 1)
+        self.assertFalse(br.allow(5))
+        self.assertTrue(br.allow(11))     # probe
+        self.assertFalse(br.allow(11))    # only one probe in flight
+        br.record(True, 12)
+        self.assertTrue(br.allow(12))
+
+    def test_registry_cached_by_mtime(self) -> None:
+        path = self.tmp / "registry.json"
+        with patch.object(wm, "WEBHOOKS_PATH", path), \
+                patch.dict(wm._registry_cache, {"key": None, "rows": [], "by_event": {}}):
+            wm._save_registry(_hooks(self.receiver, ["/ok/r"]))
+            with patch.object(Path, "read_text", side_effect=AssertionError("re-read")):
+                self.assertEqual(len(wm._subscribers("alert")), 1)
+                self.assertEqual(wm._subscribers("btc_signal"), [])
+
+    def test_test_route_enqueues_off_the_event_loop(self) -> None:
+        spool = WebhookSpool(self.tmp / "spool.sqlite3")
+        self.addCleanup(spool.close)
+        dispatcher = WebhookDispatcher(spool, DeliveryLogWriter(self.tmp / "log.jsonl"))
+        threads = []
+        enqueue = spool.enqueue_many
+        spool.enqueue_many = lambda rows: threads.append(threading.current_thread()) or enqueue(rows)
+
+        async def call(event):
+            return await wm.api_test_webhook({}, {"event": event})
+
+        hooks = _hooks(self.receiver, ["/ok/t"])
+        with patch.object(wm, "get_dispatcher", return_value=dispatcher), \
+                patch.object(wm, "_subscribers", side_effect=lambda e: hooks if e == "alert" else []):
+            out = asyncio.run(call("alert"))
+            self.assertEqual(out["message"], "webhook test queued")
+            self.assertEqual(out["data"]["queued"], 1)
+            self.assertNotIn("sent", out["data"])
+            self.assertIsNot(threads[0], threading.main_thread())
+            self.assertEqual(asyncio.run(call("kr_trade"))["message"], "no active subscribers for event")
+
+
+if __name__ == "__main__":
+    unittest.main()